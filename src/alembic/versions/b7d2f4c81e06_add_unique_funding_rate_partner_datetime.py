@@ -0,0 +1,53 @@
+"""add_unique_funding_rate_partner_datetime
+
+Revision ID: b7d2f4c81e06
+Revises: 6084c6cf6d73
+Create Date: 2025-01-27 10:12:41.518203
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = "b7d2f4c81e06"
+down_revision: Union[str, None] = "6084c6cf6d73"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Earlier backfills re-inserted the same funding rates on every run, keep one
+    # row per (partner_name, datetime) before adding the unique key.
+    op.execute(
+        """
+        DELETE FROM reports.funding_rate_history f
+        USING (
+            SELECT id,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY partner_name, datetime ORDER BY id
+                   ) AS rn
+            FROM reports.funding_rate_history
+        ) d
+        WHERE f.id = d.id AND d.rn > 1
+        """
+    )
+    op.create_unique_constraint(
+        "uq_funding_rate_history_partner_name_datetime",
+        "funding_rate_history",
+        ["partner_name", "datetime"],
+        schema="reports",
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(
+        "uq_funding_rate_history_partner_name_datetime",
+        "funding_rate_history",
+        schema="reports",
+        type_="unique",
+    )
@@ -0,0 +1,82 @@
+"""add_hot_query_composite_indexes
+
+Revision ID: d5a8e2f17c93
+Revises: c3e91a7d5b42
+Create Date: 2024-12-03 10:12:41.318904
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "d5a8e2f17c93"
+down_revision: Union[str, None] = "c3e91a7d5b42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    (
+        "ix_pps_history_vault_id_datetime",
+        "pps_history",
+        ["vault_id", sa.text("datetime DESC")],
+    ),
+    (
+        "ix_vault_performance_vault_id_datetime",
+        "vault_performance",
+        ["vault_id", sa.text("datetime DESC")],
+    ),
+    (
+        "ix_user_portfolio_user_address_vault_id_status",
+        "user_portfolio",
+        ["user_address", "vault_id", "status"],
+    ),
+    (
+        "ix_user_points_wallet_partner_vault_session",
+        "user_points",
+        ["wallet_address", "partner_name", "vault_id", "session_id"],
+    ),
+    (
+        "ix_point_distribution_history_vault_partner_created_at",
+        "point_distribution_history",
+        ["vault_id", "partner_name", sa.text("created_at DESC")],
+    ),
+    (
+        "ix_onchain_transaction_history_to_address_method_id_timestamp",
+        "onchain_transaction_history",
+        ["to_address", "method_id", "timestamp"],
+    ),
+    (
+        "ix_onchain_transaction_history_lower_from_address",
+        "onchain_transaction_history",
+        [sa.text("lower(from_address)")],
+    ),
+]
+
+
+def upgrade() -> None:
+    # Build concurrently so the history tables stay writable while indexing
+    with op.get_context().autocommit_block():
+        for name, table_name, columns in INDEXES:
+            op.create_index(
+                name,
+                table_name,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table_name, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table_name,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -1,15 +1,16 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
 from typing import Annotated
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from pydantic import ValidationError
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from core import security
 from core.config import settings
-from core.db import engine
+from core.db import async_engine, engine, session_router
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token"
@@ -21,5 +22,22 @@ def get_db() -> Generator:
         yield session
 
 
+async def get_async_db() -> AsyncGenerator:
+    async with AsyncSession(async_engine) as session:
+        yield session
+
+
+async def get_async_read_db(request: Request) -> AsyncGenerator:
+    """Session on the read replica when the route can read stale data."""
+    # Route template, not the path with its ids, like the request metrics
+    route = request.scope.get("route")
+    route = route.path if route else request.url.path
+    target, _ = await session_router.route(request.method, route)
+    async with AsyncSession(session_router.engine(target)) as session:
+        yield session
+
+
 SessionDep = Annotated[Session, Depends(get_db)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
+ReadSessionDep = Annotated[AsyncSession, Depends(get_async_read_db)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
\ No newline at end of file
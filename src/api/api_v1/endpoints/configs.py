@@ -1,6 +1,6 @@
 from typing import List, Optional
 from fastapi import APIRouter
-from api.api_v1.deps import SessionDep
+from api.api_v1.deps import AsyncSessionDep
 from core import constants
 from models.app_config import AppConfig
 from sqlmodel import select
@@ -9,13 +9,13 @@ router = APIRouter()
 
 
 @router.get("/")
-def get_apy_config(
-    session: SessionDep,
+async def get_apy_config(
+    session: AsyncSessionDep,
 ):
     statement = select(AppConfig).where(
         AppConfig.name == constants.AppConfigKey.APY_PERIOD.value
     )
-    app_config = session.exec(statement).first()
+    app_config = (await session.exec(statement)).first()
     return {
         constants.AppConfigKey.APY_PERIOD.value: app_config.key if app_config else 45
     }
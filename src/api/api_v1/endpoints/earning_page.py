@@ -3,10 +3,9 @@ import json
 from typing import List, Optional
 import uuid
 
-import numpy as np
-import pandas as pd
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import asc, bindparam, desc, func, text
+from sqlalchemy.orm import selectinload
 from sqlmodel import Session, and_, select, or_
 
 from api.api_v1.endpoints.vaults import (
@@ -16,7 +15,7 @@ from api.api_v1.endpoints.vaults import (
     get_earned_rewards,
 )
 import schemas
-from api.api_v1.deps import SessionDep
+from api.api_v1.deps import AsyncSessionDep
 from models import Vault
 from models.vaults import NetworkChain, VaultCategory, VaultGroup, VaultMetadata
 from schemas.vault import GroupSchema, SupportedNetwork, VaultExtended, VaultSortField
@@ -27,7 +26,7 @@ router = APIRouter()
 
 @router.get("/vaults/", response_model=List[schemas.VaultExtended])
 async def get_all_vaults(
-    session: SessionDep,
+    session: AsyncSessionDep,
     category: Optional[str] = Query(None),
     network_chain: NetworkChain = Query(None),
     tags: Optional[str] = Query(None),
@@ -38,7 +37,11 @@ async def get_all_vaults(
         description="Optional sort fields. Example: sort_by=category&sort_by=apy_desc",
     ),
 ):
-    statement = select(Vault).where(Vault.is_active == True)
+    statement = (
+        select(Vault)
+        .where(Vault.is_active == True)
+        .options(selectinload(Vault.vault_metadata))
+    )
     conditions = []
     if category:
         conditions.append(Vault.ui_category == category)
@@ -67,15 +70,15 @@ async def get_all_vaults(
     if conditions:
         statement = statement.where(and_(*conditions))
 
-    vaults = session.exec(statement).all()
+    vaults = (await session.exec(statement)).all()
     results = []
 
     for vault in vaults:
-        schema_vault = _update_vault_apy(vault, session=session)
-        schema_vault.points = get_earned_points(session, vault)
-        schema_vault.rewards = get_earned_rewards(session, vault)
+        schema_vault = _update_vault_apy(vault)
+        schema_vault.points = await get_earned_points(session, vault)
+        schema_vault.rewards = await get_earned_rewards(session, vault)
 
-        schema_vault.price_per_share = _get_last_price_per_share(
+        schema_vault.price_per_share = await _get_last_price_per_share(
             session=session, vault_id=vault.id
         )
         current_price = get_vault_currency_price(schema_vault.vault_currency)
@@ -1,18 +1,106 @@
-from typing import List, Optional
-from fastapi import APIRouter, Query
+import csv
+import io
+from enum import Enum
+from typing import AsyncIterator, List, Optional
+from fastapi import APIRouter, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import true
+from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from api.api_v1.deps import SessionDep
-from models.user_assets_history import UserHoldingAssetHistory
+from api.api_v1.deps import ReadSessionDep
+from core.db import async_engine
+from models.user_assets_history import UserHoldingAssetHistory, UserHoldingAssetLatest
 from models.vaults import NetworkChain
 from schemas.user_assets import UserAssetAmount
 
 router = APIRouter()
 
+MAX_PAGE_SIZE = 10000
+STREAM_BATCH_SIZE = 5000
+
+
+class HoldingsFormat(str, Enum):
+    json = "json"
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+def _to_asset_amount(user: str, amount: float) -> UserAssetAmount:
+    return UserAssetAmount(
+        user_address=user,
+        asset_amount=amount,
+        asset_amount_in_uint256=int(amount * 1e18),
+    )
+
+
+def _holdings_query(
+    chain: NetworkChain,
+    block_number: Optional[int],
+    user_address: Optional[str],
+    after: Optional[str],
+    limit: Optional[int],
+):
+    latest = UserHoldingAssetLatest
+    if block_number:
+        # Holding of every user as of the block, one index lookup per user on
+        # (chain, user_address, block_number DESC)
+        history = UserHoldingAssetHistory
+        as_of = (
+            select(history.asset_amount)
+            .where(history.chain == latest.chain)
+            .where(history.user_address == latest.user_address)
+            .where(history.block_number <= block_number)
+            .order_by(history.block_number.desc())
+            .limit(1)
+            .lateral()
+        )
+        query = select(latest.user_address, as_of.c.asset_amount).join(as_of, true())
+    else:
+        query = select(latest.user_address, latest.asset_amount)
+
+    query = query.where(latest.chain == chain)
+    if user_address:
+        query = query.where(latest.user_address == user_address)
+    if after:
+        query = query.where(latest.user_address > after)
+
+    query = query.order_by(latest.user_address)
+    if limit:
+        query = query.limit(limit)
+    return query
+
+
+async def _stream_holdings(
+    query, format: HoldingsFormat, bind: Optional[AsyncEngine] = None
+) -> AsyncIterator[str]:
+    # The request session is closed once the handler returns, stream from a
+    # session owned by the response, on the same database
+    async with AsyncSession(bind or async_engine) as session:
+        result = await session.stream(
+            query.execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+        if format == HoldingsFormat.csv:
+            yield "user_address,asset_amount,asset_amount_in_uint256\r\n"
+
+        async for rows in result.partitions():
+            output = io.StringIO()
+            if format == HoldingsFormat.csv:
+                writer = csv.writer(output)
+                for user, amount in rows:
+                    writer.writerow([user, amount, int(amount * 1e18)])
+            else:
+                for user, amount in rows:
+                    output.write(_to_asset_amount(user, amount).model_dump_json())
+                    output.write("\n")
+            yield output.getvalue()
+
 
 @router.get("/kelpdao/all-users", response_model=List[UserAssetAmount])
-def get_user_asset_amounts(
-    session: SessionDep,
+async def get_user_asset_amounts(
+    session: ReadSessionDep,
+    response: Response,
     chain: NetworkChain,
     block_number: Optional[int] = Query(
         None, description="The block number to fetch the asset amounts for"
@@ -20,39 +108,27 @@ def get_user_asset_amounts(
     user_address: Optional[str] = Query(
         None, description="The user address to filter the asset amounts for"
     ),
+    after: Optional[str] = Query(
+        None,
+        description="Return the users after this address, the X-Next-Cursor header of the previous page",
+    ),
+    limit: Optional[int] = Query(
+        None, ge=1, le=MAX_PAGE_SIZE, description="Page size, all users when not set"
+    ),
+    format: HoldingsFormat = Query(
+        HoldingsFormat.json, description="ndjson and csv stream the rows"
+    ),
 ):
+    query = _holdings_query(chain, block_number, user_address, after, limit)
 
-    # Build the base query
-    query = select(
-        UserHoldingAssetHistory.user_address, UserHoldingAssetHistory.asset_amount
-    )
-
-    # Apply the user_address filter if provided
-    if user_address:
-        query = query.where(UserHoldingAssetHistory.user_address == user_address)
-
-    if block_number:
-        query = query.where(UserHoldingAssetHistory.block_number <= block_number)
-
-    query = query.where(UserHoldingAssetHistory.chain == chain)
-
-    # Subquery to get the latest block_number less than or equal to the specified block_number for each user
-    subquery = query.order_by(
-        UserHoldingAssetHistory.user_address,
-        UserHoldingAssetHistory.block_number.desc(),
-    ).distinct(UserHoldingAssetHistory.user_address)
-
-    # Main query to get the latest asset_amount for each user
-    latest_assets = session.exec(subquery).all()
-
-    data = []
-    for user, amount in latest_assets:
-        data.append(
-            UserAssetAmount(
-                user_address=user,
-                asset_amount=amount,
-                asset_amount_in_uint256=int(amount * 1e18),
-            )
+    if format != HoldingsFormat.json:
+        media_type = "text/csv" if format == HoldingsFormat.csv else "application/x-ndjson"
+        return StreamingResponse(
+            _stream_holdings(query, format, session.bind), media_type=media_type
         )
 
-    return data
+    latest_assets = (await session.exec(query)).all()
+    if limit and len(latest_assets) == limit:
+        response.headers["X-Next-Cursor"] = latest_assets[-1][0]
+
+    return [_to_asset_amount(user, amount) for user, amount in latest_assets]
@@ -27,7 +27,7 @@ router = APIRouter()
 
 
 @router.get("/users/{wallet_address}", response_model=dict)
-async def get_user(session: SessionDep, wallet_address: str):
+def get_user(session: SessionDep, wallet_address: str):
     wallet_address = wallet_address.lower()
     if not is_valid_wallet_address(wallet_address):
         raise HTTPException(status_code=400, detail="Invalid wallet address")
@@ -36,7 +36,7 @@ async def get_user(session: SessionDep, wallet_address: str):
 
 
 @router.post("/users/join", response_model=dict)
-async def join_user(session: SessionDep, user: schemas.UserJoin):
+def join_user(session: SessionDep, user: schemas.UserJoin):
     user.user_address = user.user_address.lower()
     if not is_valid_wallet_address(user.user_address):
         raise HTTPException(status_code=400, detail="Invalid wallet address")
@@ -45,7 +45,7 @@ async def join_user(session: SessionDep, user: schemas.UserJoin):
 
 
 @router.get("/users/{wallet_address}/referral", response_model=List[str])
-async def get_referral_codes(session: SessionDep, wallet_address: str):
+def get_referral_codes(session: SessionDep, wallet_address: str):
     wallet_address = wallet_address.lower()
     if not is_valid_wallet_address(wallet_address):
         raise HTTPException(status_code=400, detail="Invalid wallet address")
@@ -58,7 +58,7 @@ async def get_referral_codes(session: SessionDep, wallet_address: str):
 
 
 @router.get("/users/{wallet_address}/rewards", response_model=schemas.Rewards)
-async def get_rewards(session: SessionDep, wallet_address: str):
+def get_rewards(session: SessionDep, wallet_address: str):
     wallet_address = wallet_address.lower()
     if not is_valid_wallet_address(wallet_address):
         raise HTTPException(status_code=400, detail="Invalid wallet address")
@@ -107,7 +107,7 @@ async def get_rewards(session: SessionDep, wallet_address: str):
 
 
 @router.get("/users/{wallet_address}/points", response_model=List[schemas.Points])
-async def get_points(session: SessionDep, wallet_address: str):
+def get_points(session: SessionDep, wallet_address: str):
     wallet_address = wallet_address.lower()
     if not is_valid_wallet_address(wallet_address):
         raise HTTPException(status_code=400, detail="Invalid wallet address")
@@ -157,7 +157,7 @@ async def get_points(session: SessionDep, wallet_address: str):
 
 
 @router.post("/users/sign/term-of-services")
-async def sign_terms_of_service(session: SessionDep, input: schemas.BaseUserAgreement):
+def sign_terms_of_service(session: SessionDep, input: schemas.BaseUserAgreement):
     wallet_address = input.wallet_address.lower()
     if not is_valid_wallet_address(wallet_address):
         raise HTTPException(status_code=400, detail="Invalid wallet address")
@@ -189,7 +189,7 @@ async def sign_terms_of_service(session: SessionDep, input: schemas.BaseUserAgre
 
 
 @router.post("/users/sign/risk-agreement")
-async def sign_terms_of_service(session: SessionDep, input: schemas.UserAgreement):
+def sign_terms_of_service(session: SessionDep, input: schemas.UserAgreement):
     wallet_address = input.wallet_address.lower()
     if not is_valid_wallet_address(wallet_address):
         raise HTTPException(status_code=400, detail="Invalid wallet address")
@@ -219,7 +219,7 @@ async def sign_terms_of_service(session: SessionDep, input: schemas.UserAgreemen
 
 
 @router.get("/users/{wallet_address}/sign/term-of-services/status")
-async def get_user_term_of_service_status(session: SessionDep, wallet_address: str):
+def get_user_term_of_service_status(session: SessionDep, wallet_address: str):
     wallet_address = wallet_address.lower()
     if not is_valid_wallet_address(wallet_address):
         raise HTTPException(status_code=400, detail="Invalid wallet address")
@@ -234,7 +234,7 @@ async def get_user_term_of_service_status(session: SessionDep, wallet_address: s
 
 
 @router.get("/users/{wallet_address}/sign/risk-agreement/status")
-async def get_user_term_of_service_status(
+def get_user_term_of_service_status(
     session: SessionDep,
     wallet_address: str,
     vault_id: uuid.UUID,
@@ -6,149 +6,74 @@ import secrets
 from typing import List, Optional
 import uuid
 
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
-import numpy as np
-import pandas as pd
 from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
-from sqlalchemy import func
 from sqlmodel import Session, select
 from api.api_v1.auth_utils import authenticate
-from models.onchain_transaction_history import OnchainTransactionHistory
+from models.transaction_ledger import LedgerAction, TransactionLedger
 import schemas
 from api.api_v1.deps import SessionDep
-from core import constants
-from models import Vault
-from services.vault_contract_service import VaultContractService
-from api.api_v1.deps import SessionDep
-from utils.extension_utils import (
-    to_amount_pendle,
-    to_tx_aumount,
-    to_tx_aumount_goldlink,
-)
-from utils.vault_utils import get_deposit_method_ids
+from utils.lazy_import import lazy_import
+
+pd = lazy_import("pandas")
 
 router = APIRouter()
 
 
 def _get_deposits(
     session: Session,
-    wallet_address: str,
+    wallet_addresses: list[str],
     start_date: datetime,
     end_date: Optional[datetime] = None,
 ):
-    start_timestamp = int(start_date.timestamp())
-    end_timestamp = int(end_date.timestamp()) if end_date else None
-
-    deposit_method_ids = get_deposit_method_ids()
-
     query = (
-        select(OnchainTransactionHistory)
-        .where(OnchainTransactionHistory.method_id.in_(deposit_method_ids))
+        select(TransactionLedger)
+        .where(TransactionLedger.action == LedgerAction.DEPOSIT)
         .where(
-            func.lower(OnchainTransactionHistory.from_address) == wallet_address.lower()
+            TransactionLedger.user_address.in_(
+                [address.lower() for address in wallet_addresses]
+            )
         )
-        .where(OnchainTransactionHistory.timestamp >= start_timestamp)
+        .where(TransactionLedger.timestamp >= int(start_date.timestamp()))
+        .order_by(TransactionLedger.timestamp)
     )
 
-    if end_timestamp:
-        query = query.where(OnchainTransactionHistory.timestamp <= end_timestamp)
+    if end_date:
+        query = query.where(TransactionLedger.timestamp <= int(end_date.timestamp()))
 
     return session.exec(query).all()
 
 
-def _get_vault(session: Session, to_address: str):
-    vault_address = VaultContractService().get_vault_address_by_contract(
-        to_address.lower()
-    )
-    return session.exec(
-        select(Vault).where(
-            func.lower(Vault.contract_address).in_(
-                [addr.lower() for addr in vault_address]
-            )
-        )
-    ).first()
-
-
-def _calculate_total_deposit(session: Session, deposits):
-    total_deposit = 0
-    data = []
-    for deposit in deposits:
-        vault = _get_vault(session, deposit.to_address)
-        if not vault:
-            continue
-        if vault.strategy_name == constants.PENDLE_HEDGING_STRATEGY:
-            value_deposit = to_amount_pendle(
-                deposit.input, deposit.block_number, vault.network_chain
-            )
-            total_deposit += value_deposit
-            data.append(
-                {
-                    "amount": value_deposit,
-                    "datetime": datetime.fromtimestamp(
-                        deposit.timestamp, tz=timezone.utc
-                    ),
-                }
-            )
-        elif vault.slug == constants.GOLD_LINK_SLUG:
-            value_deposit = to_tx_aumount_goldlink(deposit.input)
-            total_deposit += value_deposit
-            data.append(
-                {
-                    "amount": value_deposit,
-                    "datetime": datetime.fromtimestamp(
-                        deposit.timestamp, tz=timezone.utc
-                    ),
-                }
-            )
-        else:
-            value_deposit = to_tx_aumount(deposit.input)
-            total_deposit += value_deposit
-            data.append(
-                {
-                    "amount": value_deposit,
-                    "datetime": datetime.fromtimestamp(
-                        deposit.timestamp, tz=timezone.utc
-                    ),
-                }
-            )
-    return total_deposit, data
-
-
 def _process_deposit_with_addresses(
     session: Session,
     addresses: list[str],
     start_date: datetime,
     end_date: Optional[datetime],
 ) -> list[dict]:
-    results = []
+    deposits_by_address = {}
+    for deposit in _get_deposits(session, addresses, start_date, end_date):
+        deposits_by_address.setdefault(deposit.user_address, []).append(deposit)
 
+    results = []
     for wallet_address in addresses:
-        deposits = _get_deposits(session, wallet_address, start_date, end_date)
-        if deposits:
-            total_deposit, data = _calculate_total_deposit(session, deposits)
-            results.append(
-                {
-                    "wallet_address": wallet_address,
-                    "deposited": True,
-                    "total amount": total_deposit,
-                    "datetime": [
-                        {
-                            "amount": entry["amount"],
-                            "datetime": entry["datetime"].isoformat(),
-                        }
-                        for entry in data
-                    ],
-                }
-            )
-        else:
-            results.append(
-                {
-                    "wallet_address": wallet_address,
-                    "deposited": False,
-                    "total amount": 0,
-                    "datetime": [],
-                }
-            )
+        deposits = deposits_by_address.get(wallet_address.lower(), [])
+        results.append(
+            {
+                "wallet_address": wallet_address,
+                "deposited": bool(deposits),
+                "total amount": sum(deposit.amount for deposit in deposits),
+                "datetime": [
+                    {
+                        "amount": deposit.amount,
+                        "datetime": datetime.fromtimestamp(
+                            deposit.timestamp, tz=timezone.utc
+                        ).isoformat(),
+                    }
+                    for deposit in deposits
+                ],
+            }
+        )
     return results
 
 
@@ -218,8 +143,8 @@ async def analyze_user_deposit_from_csv(
         addresses = df["address"].tolist()
 
         # Process addresses and calculate deposits
-        results = _process_deposit_with_addresses(
-            session, addresses, start_date, end_date
+        results = await run_in_threadpool(
+            _process_deposit_with_addresses, session, addresses, start_date, end_date
         )
 
         # Generate CSV output
@@ -9,7 +9,9 @@ import uuid
 from fastapi import APIRouter, HTTPException
 import pytz
 from sqlalchemy import distinct, func, text
+from sqlalchemy.orm import selectinload
 from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from models.deposit_summary_snapshot import DepositSummarySnapshot
 from models.pps_history import PricePerShareHistory
 from models.user import User
@@ -17,11 +19,11 @@ from models.user_portfolio import UserPortfolio
 from models.vault_performance import VaultPerformance
 from models.vault_performance_history import VaultPerformanceHistory
 import schemas
-import pandas as pd
-from api.api_v1.deps import SessionDep
+from api.api_v1.deps import ReadSessionDep
 from models import Vault
 from core.config import settings
 from core import constants
+from core.db import run_concurrently
 from services.deposit_service import DepositService
 from services.market_data import get_klines, get_price
 from services.vault_contract_service import VaultContractService
@@ -35,11 +37,14 @@ from utils.extension_utils import (
 from pytz import timezone
 
 from utils.vault_utils import get_deposit_method_ids, get_vault_currency_price
+from utils.lazy_import import lazy_import
+
+pd = lazy_import("pandas")
 
 router = APIRouter()
 
 
-def __get_total_depositors(session: SessionDep) -> int:
+async def __get_total_depositors(session: AsyncSession) -> int:
     method_ids = get_deposit_method_ids()
     formatted_method_ids = ", ".join(f"'{method_id}'" for method_id in method_ids)
 
@@ -60,42 +65,57 @@ def __get_total_depositors(session: SessionDep) -> int:
         """
     )
 
-    result = session.exec(raw_query).scalar()
+    result = (await session.execute(raw_query)).scalar()
 
     return int(result) if result is not None else 0
 
 
-@router.get("/{vault_id}", response_model=schemas.Statistics)
-async def get_all_statistics(session: SessionDep, vault_id: str):
+async def _get_vault(session: AsyncSession, vault_id) -> Vault:
+    return (await session.exec(select(Vault).where(Vault.id == vault_id))).first()
 
-    statement = select(Vault).where(Vault.id == vault_id)
-    vault = session.exec(statement).first()
 
-    statement = (
+async def _get_latest_performances(
+    session: AsyncSession, vault_ids: list
+) -> dict[uuid.UUID, VaultPerformance]:
+    performances = await session.exec(
         select(VaultPerformance)
-        .where(VaultPerformance.vault_id == vault_id)
-        .order_by(VaultPerformance.datetime.desc())
+        .where(VaultPerformance.vault_id.in_(vault_ids))
+        .distinct(VaultPerformance.vault_id)
+        .order_by(VaultPerformance.vault_id, VaultPerformance.datetime.desc())
     )
-    performances = session.exec(statement).first()
+    return {performance.vault_id: performance for performance in performances}
+
+
+async def _get_last_prices_per_share(
+    session: AsyncSession, vault_ids: list
+) -> dict[uuid.UUID, float]:
+    pps_histories = await session.exec(
+        select(PricePerShareHistory)
+        .where(PricePerShareHistory.vault_id.in_(vault_ids))
+        .distinct(PricePerShareHistory.vault_id)
+        .order_by(PricePerShareHistory.vault_id, PricePerShareHistory.datetime.desc())
+    )
+    return {pps.vault_id: pps.price_per_share for pps in pps_histories}
+
+
+@router.get("/{vault_id}", response_model=schemas.Statistics)
+async def get_all_statistics(session: ReadSessionDep, vault_id: str):
+    vault, performances, prices_per_share = await run_concurrently(
+        lambda session: _get_vault(session, vault_id),
+        lambda session: _get_latest_performances(session, [vault_id]),
+        lambda session: _get_last_prices_per_share(session, [vault_id]),
+        bind=session.bind,
+    )
+    performances = performances.get(uuid.UUID(vault_id)) if performances else None
     if performances is None:
         raise HTTPException(
             status_code=400,
             detail="The performances data not found in the database.",
         )
 
-    pps_history = session.exec(
-        select(PricePerShareHistory)
-        .where(PricePerShareHistory.vault_id == vault_id)
-        .order_by(PricePerShareHistory.datetime.desc())
-    ).first()
-    if pps_history:
-        last_price_per_share = pps_history.price_per_share
-    else:
-        last_price_per_share = 0
-
     statistic = schemas.Statistics(
         name=vault.name,
-        price_per_share=last_price_per_share,
+        price_per_share=prices_per_share.get(vault.id, 0),
         apy_1y=(
             performances.apy_ytd
             if vault.strategy_name == constants.OPTIONS_WHEEL_STRATEGY
@@ -129,16 +149,17 @@ async def get_all_statistics(session: SessionDep, vault_id: str):
 
 
 @router.get("/", response_model=schemas.DashboardStats)
-async def get_dashboard_statistics(session: SessionDep):
+async def get_dashboard_statistics(session: ReadSessionDep):
     statement = (
         select(Vault)
+        .options(selectinload(Vault.vault_group))
         .where(Vault.strategy_name != None)
         .where(Vault.is_active == True)
         .where(
             (Vault.tags == None) | (~Vault.tags.like("%ended%"))
         )  # Exclude vaults with 'ended' tag
     )
-    vaults = session.exec(statement).all()
+    vaults = (await session.exec(statement)).all()
 
     grouped_vaults = {}
     tvl_in_all_vaults = 0
@@ -161,6 +182,21 @@ async def get_dashboard_statistics(session: SessionDep):
         ):
             grouped_vaults[group_id]["default_vault"] = vault
 
+    default_vault_ids = [
+        group["default_vault"].id
+        for group in grouped_vaults.values()
+        if group["default_vault"]
+    ]
+    # Hand the connection back before the concurrent queries check out theirs,
+    # holding it while waiting for more can drain the pool under load
+    await session.close()
+    performances, prices_per_share, count = await run_concurrently(
+        lambda session: _get_latest_performances(session, default_vault_ids),
+        lambda session: _get_last_prices_per_share(session, default_vault_ids),
+        __get_total_depositors,
+        bind=session.bind,
+    )
+
     data = []
     for group in grouped_vaults.values():
         try:
@@ -170,20 +206,8 @@ async def get_dashboard_statistics(session: SessionDep):
             if not default_vault:
                 continue  # skip if there's no default vault (shouldn't happen)
 
-            statement = (
-                select(VaultPerformance)
-                .where(VaultPerformance.vault_id == default_vault.id)
-                .order_by(VaultPerformance.datetime.desc())
-            )
-            performance = session.exec(statement).first()
-
-            pps_history = session.exec(
-                select(PricePerShareHistory)
-                .where(PricePerShareHistory.vault_id == default_vault.id)
-                .order_by(PricePerShareHistory.datetime.desc())
-            ).first()
-
-            last_price_per_share = pps_history.price_per_share if pps_history else 0
+            performance = performances.get(default_vault.id)
+            last_price_per_share = prices_per_share.get(default_vault.id, 0)
 
             statistic = schemas.VaultStats(
                 name=default_vault.name,
@@ -208,8 +232,6 @@ async def get_dashboard_statistics(session: SessionDep):
             print(f"Failed to calculate stats for {vault.id}, {vault.name}")
             print(traceback.format_exc())
 
-    # count all portfolio of vault
-    count = __get_total_depositors(session=session)
     dashboard_stats = schemas.DashboardStats(
         tvl_in_all_vaults=tvl_in_all_vaults,
         total_depositors=count,
@@ -221,21 +243,23 @@ async def get_dashboard_statistics(session: SessionDep):
 
 @router.get("/{vault_id}/tvl-history")
 async def get_vault_performance(
-    session: SessionDep, vault_id: str, is_weekly: bool = False
+    session: ReadSessionDep, vault_id: str, is_weekly: bool = False
 ):
     # Get the VaultPerformance records for the given vault_id
     statement = select(Vault).where(Vault.id == vault_id)
-    vault = session.exec(statement).first()
+    vault = (await session.exec(statement)).first()
     if vault is None:
         raise HTTPException(
             status_code=400,
             detail="The data not found in the database.",
         )
 
-    perf_hist = session.exec(
-        select(VaultPerformance)
-        .where(VaultPerformance.vault_id == vault.id)
-        .order_by(VaultPerformance.datetime.asc())
+    perf_hist = (
+        await session.exec(
+            select(VaultPerformance)
+            .where(VaultPerformance.vault_id == vault.id)
+            .order_by(VaultPerformance.datetime.asc())
+        )
     ).all()
 
     if len(perf_hist) == 0:
@@ -268,7 +292,7 @@ async def get_vault_performance(
 
 
 @router.get("/users/recent")
-async def get_total_user(session: SessionDep):
+async def get_total_user(session: ReadSessionDep):
     # Define the SQL query to get the total user count for 7 days, and 30 days
     raw_query = text(
         """
@@ -280,7 +304,7 @@ async def get_total_user(session: SessionDep):
         """
     )
 
-    result = session.exec(raw_query).one()
+    result = (await session.execute(raw_query)).one()
 
     # Return the results for 7 days, and 30 days
     return {
@@ -294,7 +318,7 @@ async def get_total_user(session: SessionDep):
 
 
 @router.get("/depositors/recent")
-async def get_total_depositors(session: SessionDep):
+async def get_total_depositors(session: ReadSessionDep):
     # Prepare the method IDs for the SQL query
     method_ids = get_deposit_method_ids()
     formatted_method_ids = ", ".join(f"'{method_id}'" for method_id in method_ids)
@@ -321,7 +345,7 @@ async def get_total_depositors(session: SessionDep):
         """
     )
 
-    result = session.exec(raw_query).one()
+    result = (await session.execute(raw_query)).one()
 
     # Return the results for 7 days and 30 days
     return {
@@ -335,7 +359,7 @@ async def get_total_depositors(session: SessionDep):
 
 
 @router.get("/yield/summary")
-async def get_yield(session: SessionDep):
+async def get_yield(session: ReadSessionDep):
     raw_query = text(
         """
          WITH vault_performance AS (
@@ -365,7 +389,7 @@ async def get_yield(session: SessionDep):
     )
 
     # Execute the query and retrieve the result
-    result = session.exec(raw_query).one()
+    result = (await session.execute(raw_query)).one()
 
     # Return the results for 1 day, 7 days, and 30 days
     return {
@@ -376,7 +400,7 @@ async def get_yield(session: SessionDep):
 
 
 @router.get("/users/weekly-summary")
-async def get_weekly_user(session: SessionDep):
+async def get_weekly_user(session: ReadSessionDep):
     # Define the SQL query to calculate cumulative users by creation date
     raw_query = text(
         """
@@ -396,7 +420,7 @@ async def get_weekly_user(session: SessionDep):
     )
 
     # Execute the raw SQL query
-    result = session.exec(raw_query)
+    result = await session.execute(raw_query)
 
     # Fetch all results as a list of dictionaries
     users = [
@@ -407,7 +431,7 @@ async def get_weekly_user(session: SessionDep):
 
 
 @router.get("/users/cumulative-summary")
-async def get_cumulative_user(session: SessionDep):
+async def get_cumulative_user(session: ReadSessionDep):
     # Define the SQL query to calculate cumulative users by creation date
     raw_query = text(
         """
@@ -431,7 +455,7 @@ async def get_cumulative_user(session: SessionDep):
     )
 
     # Execute the raw SQL query
-    result = session.exec(raw_query)
+    result = await session.execute(raw_query)
 
     # Fetch all results as a list of dictionaries
     cumulative_users = [
@@ -442,19 +466,21 @@ async def get_cumulative_user(session: SessionDep):
 
 
 @router.get("/{vault_id}/yield/daily-chart")
-async def get_yield_daily_chart(session: SessionDep, vault_id: str):
+async def get_yield_daily_chart(session: ReadSessionDep, vault_id: str):
     statement = select(Vault).where(Vault.id == vault_id)
-    vault = session.exec(statement).first()
+    vault = (await session.exec(statement)).first()
     if vault is None:
         raise HTTPException(
             status_code=400,
             detail="The data not found in the database.",
         )
 
-    records = session.exec(
-        select(VaultPerformanceHistory)
-        .where(VaultPerformanceHistory.vault_id == vault.id)
-        .order_by(VaultPerformanceHistory.datetime.desc())
+    records = (
+        await session.exec(
+            select(VaultPerformanceHistory)
+            .where(VaultPerformanceHistory.vault_id == vault.id)
+            .order_by(VaultPerformanceHistory.datetime.desc())
+        )
     ).all()
 
     if len(records) == 0:
@@ -469,20 +495,22 @@ async def get_yield_daily_chart(session: SessionDep, vault_id: str):
 
 
 @router.get("/{vault_id}/cumulative/daily-chart")
-async def get_yield_cumulative_chart(session: SessionDep, vault_id: str):
+async def get_yield_cumulative_chart(session: ReadSessionDep, vault_id: str):
 
     statement = select(Vault).where(Vault.id == vault_id)
-    vault = session.exec(statement).first()
+    vault = (await session.exec(statement)).first()
     if vault is None:
         raise HTTPException(
             status_code=400,
             detail="The data not found in the database.",
         )
 
-    records = session.exec(
-        select(VaultPerformanceHistory)
-        .where(VaultPerformanceHistory.vault_id == vault.id)
-        .order_by(VaultPerformanceHistory.datetime.desc())
+    records = (
+        await session.exec(
+            select(VaultPerformanceHistory)
+            .where(VaultPerformanceHistory.vault_id == vault.id)
+            .order_by(VaultPerformanceHistory.datetime.desc())
+        )
     ).all()
 
     if len(records) == 0:
@@ -502,7 +530,7 @@ async def get_yield_cumulative_chart(session: SessionDep, vault_id: str):
 
 
 @router.get("/tvl/weekly-chart")
-async def get_vault_performance(session: SessionDep):
+async def get_vault_performance(session: ReadSessionDep):
     raw_query = text(
         """
         SELECT 
@@ -522,7 +550,7 @@ async def get_vault_performance(session: SessionDep):
     )
 
     # Execute the query
-    result = session.exec(raw_query).all()
+    result = (await session.execute(raw_query)).all()
 
     if len(result) == 0:
         return {"date": [], "tvl": []}
@@ -538,7 +566,7 @@ async def get_vault_performance(session: SessionDep):
 
 
 @router.get("/tvl/cumulative-chart")
-async def get_cumulative_vault_performance(session: SessionDep):
+async def get_cumulative_vault_performance(session: ReadSessionDep):
     # Define the SQL query to sum tvl values by day
     raw_query = text(
         """
@@ -559,7 +587,7 @@ async def get_cumulative_vault_performance(session: SessionDep):
     )
 
     # Execute the query
-    result = session.exec(raw_query).all()
+    result = (await session.execute(raw_query)).all()
 
     if len(result) == 0:
         return {"date": [], "cumulative_tvl": []}
@@ -584,12 +612,14 @@ async def get_cumulative_vault_performance(session: SessionDep):
 
 
 @router.get("/deposits/summary")
-async def get_desposit_summary(session: SessionDep):
+async def get_desposit_summary(session: ReadSessionDep):
     # Define the SQL query to sum tvl values by day
-    result = session.exec(
-        select(DepositSummarySnapshot)
-        .order_by(DepositSummarySnapshot.datetime.desc())
-        .limit(1)
+    result = (
+        await session.exec(
+            select(DepositSummarySnapshot)
+            .order_by(DepositSummarySnapshot.datetime.desc())
+            .limit(1)
+        )
     ).first()
 
     return {
@@ -599,7 +629,7 @@ async def get_desposit_summary(session: SessionDep):
 
 
 @router.get("/api/yield-data-chart")
-async def get_yield_chart_data(session: SessionDep):
+async def get_yield_chart_data(session: ReadSessionDep):
     raw_query = text(
         """
           SELECT 
@@ -619,7 +649,7 @@ async def get_yield_chart_data(session: SessionDep):
         """
     )
 
-    result = session.exec(raw_query)
+    result = await session.execute(raw_query)
 
     yield_data = [
         {"date": row[0], "weekly_yield": row[1], "cumulative_yield": row[2]}
@@ -630,7 +660,7 @@ async def get_yield_chart_data(session: SessionDep):
 
 
 @router.get("/api/user-data-chart")
-async def get_user_chart_data(session: SessionDep):
+async def get_user_chart_data(session: ReadSessionDep):
     raw_query = text(
         """
         WITH user_stats AS (
@@ -653,7 +683,7 @@ async def get_user_chart_data(session: SessionDep):
         """
     )
 
-    result = session.exec(raw_query)
+    result = await session.execute(raw_query)
 
     yield_data = [
         {"date": row[0], "new_users": row[1], "cumulative_users": row[2]}
@@ -664,7 +694,7 @@ async def get_user_chart_data(session: SessionDep):
 
 
 @router.get("/api/depositors-data-chart")
-async def get_deposit_chart_data(session: SessionDep):
+async def get_deposit_chart_data(session: ReadSessionDep):
     # Prepare the method IDs for the SQL query
     method_ids = get_deposit_method_ids()
     formatted_method_ids = ", ".join(f"'{method_id}'" for method_id in method_ids)
@@ -685,7 +715,7 @@ async def get_deposit_chart_data(session: SessionDep):
         """
     )
 
-    result = session.exec(raw_query).all()
+    result = (await session.execute(raw_query)).all()
 
     # Return the results as a list of dictionaries
     return [
@@ -703,9 +733,9 @@ async def get_deposit_chart_data(session: SessionDep):
 
 
 @router.get("/api/tvl-data-chart")
-async def get_tvl_chart_data(session: SessionDep):
+async def get_tvl_chart_data(session: ReadSessionDep):
     statement = select(Vault).where(Vault.is_active)
-    vaults = session.exec(statement).all()
+    vaults = (await session.exec(statement)).all()
 
     # Create a mapping of vault_id to vault_currency
     vault_currencies = {vault.id: vault.vault_currency for vault in vaults}
@@ -728,7 +758,7 @@ async def get_tvl_chart_data(session: SessionDep):
         """
     )
 
-    result = session.exec(last_friday_for_daily_vault_raw_query)
+    result = await session.execute(last_friday_for_daily_vault_raw_query)
     last_friday_for_daily_vaults = [
         {
             "vault_id": row[0],
@@ -758,7 +788,7 @@ async def get_tvl_chart_data(session: SessionDep):
         AND EXTRACT(DOW FROM vp.datetime) = 5 
         """
     )
-    result = session.exec(friday_vault_raw_query)
+    result = await session.execute(friday_vault_raw_query)
     friday_vaults = [
         {
             "vault_id": row[0],
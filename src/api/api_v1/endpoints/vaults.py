@@ -3,11 +3,11 @@ import json
 from typing import List, Optional
 import uuid
 
-import numpy as np
-import pandas as pd
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import bindparam, func, text
+from sqlalchemy.orm import selectinload
 from sqlmodel import Session, and_, select, or_
+from sqlmodel.ext.asyncio.session import AsyncSession
 from web3 import Web3
 
 from models.pps_history import PricePerShareHistory
@@ -17,7 +17,7 @@ from models.user_rewards import UserRewards
 from models.vault_apy_breakdown import VaultAPYBreakdown
 from models.whitelist_wallets import WhitelistWallet
 import schemas
-from api.api_v1.deps import SessionDep
+from api.api_v1.deps import ReadSessionDep
 from core import constants
 from models import PointDistributionHistory, Vault
 from models.vault_performance import VaultPerformance
@@ -28,11 +28,14 @@ from schemas.vault_metadata_response import VaultMetadataResponse
 from services import kelpgain_service
 from core.config import settings
 from services.vault_rewards_service import VaultRewardsService
+from utils.lazy_import import lazy_import
+
+pd = lazy_import("pandas")
 
 router = APIRouter()
 
 
-def _update_vault_apy(vault: Vault, session: Session) -> schemas.Vault:
+def _update_vault_apy(vault: Vault) -> schemas.Vault:
     schema_vault = schemas.Vault.model_validate(vault)
     if vault.strategy_name == constants.OPTIONS_WHEEL_STRATEGY:
         schema_vault.apy = vault.ytd_apy
@@ -41,18 +44,22 @@ def _update_vault_apy(vault: Vault, session: Session) -> schemas.Vault:
     return schema_vault
 
 
-def _get_last_price_per_share(session: Session, vault_id: uuid.UUID) -> float:
-    latest_pps = session.exec(
-        select(PricePerShareHistory)
-        .where(PricePerShareHistory.vault_id == vault_id)
-        .order_by(PricePerShareHistory.datetime.desc())
+async def _get_last_price_per_share(
+    session: AsyncSession, vault_id: uuid.UUID
+) -> float:
+    latest_pps = (
+        await session.exec(
+            select(PricePerShareHistory)
+            .where(PricePerShareHistory.vault_id == vault_id)
+            .order_by(PricePerShareHistory.datetime.desc())
+        )
     ).first()
 
     return latest_pps.price_per_share if latest_pps else 0.0
 
 
-def get_vault_earned_point_by_partner(
-    session: Session, vault: Vault, partner_name: str
+async def get_vault_earned_point_by_partner(
+    session: AsyncSession, vault: Vault, partner_name: str
 ) -> PointDistributionHistory:
     """
     Get the latest PointDistributionHistory record for the given vault_id and partner name.
@@ -60,7 +67,7 @@ def get_vault_earned_point_by_partner(
     If the partner name is 'HARMONIX', it also includes points from 'HARMONIX_MKT'.
 
     Args:
-        session (Session): The database session used to execute queries.
+        session (AsyncSession): The database session used to execute queries.
         vault (Vault): The vault instance for which the points are being retrieved.
         partner_name (str): The name of the partner for which to retrieve the points.
 
@@ -77,7 +84,7 @@ def get_vault_earned_point_by_partner(
         )
         .order_by(PointDistributionHistory.created_at.desc())
     )
-    point_dist_hist = session.exec(statement).first()
+    point_dist_hist = (await session.exec(statement)).first()
 
     mkt_point: float = 0
     if partner_name == constants.HARMONIX:
@@ -89,7 +96,7 @@ def get_vault_earned_point_by_partner(
             )
             .order_by(PointDistributionHistory.created_at.desc())
         )
-        point_dist_hist_mkt = session.exec(statement_mtk).first()
+        point_dist_hist_mkt = (await session.exec(statement_mtk)).first()
         mkt_point = point_dist_hist_mkt if point_dist_hist_mkt else 0
 
     if point_dist_hist is None:
@@ -107,14 +114,14 @@ def get_vault_earned_point_by_partner(
     return point_dist_hist
 
 
-def _get_vault_earned_reward_by_partner(
-    session: Session, vault: Vault, partner_name: str
+async def _get_vault_earned_reward_by_partner(
+    session: AsyncSession, vault: Vault, partner_name: str
 ) -> RewardDistributionHistory:
     """
     Retrieve the latest RewardDistributionHistory record for a given vault and partner.
 
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
         vault (Vault): The vault instance.
         partner_name (str): The partner name.
 
@@ -129,16 +136,16 @@ def _get_vault_earned_reward_by_partner(
         )
         .order_by(RewardDistributionHistory.created_at.desc())
     )
-    reward_dist_hist = session.exec(statement).first()
+    reward_dist_hist = (await session.exec(statement)).first()
     return reward_dist_hist
 
 
-def _get_name_token_reward(session: Session, vault: Vault) -> str:
+async def _get_name_token_reward(session: AsyncSession, vault: Vault) -> str:
     """
     Retrieve the reward token name for a given vault.
 
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
         vault (Vault): The vault instance.
 
     Returns:
@@ -147,12 +154,14 @@ def _get_name_token_reward(session: Session, vault: Vault) -> str:
     statement = select(RewardDistributionConfig.reward_token).where(
         RewardDistributionConfig.vault_id == vault.id
     )
-    reward_token = session.exec(statement).first()
+    reward_token = (await session.exec(statement)).first()
 
     return reward_token
 
 
-def get_earned_points(session: Session, vault: Vault) -> List[schemas.EarnedPoints]:
+async def get_earned_points(
+    session: AsyncSession, vault: Vault
+) -> List[schemas.EarnedPoints]:
     routes = json.loads(vault.routes) if vault.routes is not None else []
     partners = routes + [constants.HARMONIX]
 
@@ -174,7 +183,9 @@ def get_earned_points(session: Session, vault: Vault) -> List[schemas.EarnedPoin
 
     earned_points = []
     for partner in partners:
-        point_dist_hist = get_vault_earned_point_by_partner(session, vault, partner)
+        point_dist_hist = await get_vault_earned_point_by_partner(
+            session, vault, partner
+        )
 
         if partner != constants.PARTNER_KELPDAOGAIN:
             earned_points.append(
@@ -188,15 +199,19 @@ def get_earned_points(session: Session, vault: Vault) -> List[schemas.EarnedPoin
     return earned_points
 
 
-def get_earned_rewards(session: Session, vault: Vault) -> List[schemas.EarnedRewards]:
+async def get_earned_rewards(
+    session: AsyncSession, vault: Vault
+) -> List[schemas.EarnedRewards]:
 
     earned_rewards = []
     if vault.slug in [
         constants.PENDLE_RSETH_26JUN25_SLUG,
         # constants.HYPE_DELTA_NEUTRAL_SLUG,
     ]:
-        reward = _get_vault_earned_reward_by_partner(session, vault, constants.HARMONIX)
-        token_reward = _get_name_token_reward(session=session, vault=vault)
+        reward = await _get_vault_earned_reward_by_partner(
+            session, vault, constants.HARMONIX
+        )
+        token_reward = await _get_name_token_reward(session=session, vault=vault)
         if reward:
             earned_rewards.append(
                 schemas.EarnedRewards(
@@ -219,12 +234,17 @@ def get_earned_rewards(session: Session, vault: Vault) -> List[schemas.EarnedRew
 
 @router.get("/", response_model=List[schemas.GroupSchema])
 async def get_all_vaults(
-    session: SessionDep,
+    session: ReadSessionDep,
     category: VaultCategory = Query(None),
     network_chain: NetworkChain = Query(None),
     tags: Optional[List[str]] = Query(None),
 ):
-    statement = select(Vault).where(Vault.is_active == True).order_by(Vault.order)
+    statement = (
+        select(Vault)
+        .where(Vault.is_active == True)
+        .options(selectinload(Vault.vault_group))
+        .order_by(Vault.order)
+    )
 
     conditions = []
     if category:
@@ -243,15 +263,15 @@ async def get_all_vaults(
     if conditions:
         statement = statement.where(and_(*conditions))
 
-    vaults = session.exec(statement).all()
+    vaults = (await session.exec(statement)).all()
     grouped_vaults = {}
     for vault in vaults:
         group_id = vault.group_id or vault.id
-        schema_vault = _update_vault_apy(vault, session=session)
-        schema_vault.points = get_earned_points(session, vault)
-        schema_vault.rewards = get_earned_rewards(session, vault)
+        schema_vault = _update_vault_apy(vault)
+        schema_vault.points = await get_earned_points(session, vault)
+        schema_vault.rewards = await get_earned_rewards(session, vault)
 
-        schema_vault.price_per_share = _get_last_price_per_share(
+        schema_vault.price_per_share = await _get_last_price_per_share(
             session=session, vault_id=vault.id
         )
 
@@ -321,18 +341,22 @@ async def get_all_vaults(
 
 
 @router.get("/{vault_slug}", response_model=schemas.Vault)
-async def get_vault_info(session: SessionDep, vault_slug: str):
-    statement = select(Vault).where(Vault.slug == vault_slug)
-    vault = session.exec(statement).first()
+async def get_vault_info(session: ReadSessionDep, vault_slug: str):
+    statement = (
+        select(Vault)
+        .where(Vault.slug == vault_slug)
+        .options(selectinload(Vault.vault_group))
+    )
+    vault = (await session.exec(statement)).first()
     if vault is None:
         raise HTTPException(
             status_code=400,
             detail="The data not found in the database.",
         )
 
-    schema_vault = _update_vault_apy(vault, session=session)
-    schema_vault.points = get_earned_points(session, vault)
-    schema_vault.rewards = get_earned_rewards(session, vault)
+    schema_vault = _update_vault_apy(vault)
+    schema_vault.points = await get_earned_points(session, vault)
+    schema_vault.rewards = await get_earned_rewards(session, vault)
 
     # Check if the vault is part of a group
     if vault.vault_group:
@@ -340,7 +364,7 @@ async def get_vault_info(session: SessionDep, vault_slug: str):
         group_vaults_statement = (
             select(Vault).where(Vault.group_id == vault.group_id).where(Vault.is_active)
         )
-        group_vaults = session.exec(group_vaults_statement).all()
+        group_vaults = (await session.exec(group_vaults_statement)).all()
 
         # Get the selected network chain of all vaults in the group
         selected_networks = {
@@ -362,21 +386,23 @@ async def get_vault_info(session: SessionDep, vault_slug: str):
 
 @router.get("/{vault_slug}/performance")
 async def get_vault_performance(
-    session: SessionDep, vault_slug: str, apy_option: Optional[str] = None
+    session: ReadSessionDep, vault_slug: str, apy_option: Optional[str] = None
 ):
     # Get the VaultPerformance records for the given vault_id
     statement = select(Vault).where(Vault.slug == vault_slug)
-    vault = session.exec(statement).first()
+    vault = (await session.exec(statement)).first()
     if vault is None:
         raise HTTPException(
             status_code=400,
             detail="The data not found in the database.",
         )
 
-    perf_hist = session.exec(
-        select(VaultPerformance)
-        .where(VaultPerformance.vault_id == vault.id)
-        .order_by(VaultPerformance.datetime.asc())
+    perf_hist = (
+        await session.exec(
+            select(VaultPerformance)
+            .where(VaultPerformance.vault_id == vault.id)
+            .order_by(VaultPerformance.datetime.asc())
+        )
     ).all()
     if len(perf_hist) == 0:
         return {"date": [], "apy": []}
@@ -421,14 +447,16 @@ async def get_vault_performance(
 
 
 @router.get("/apy/performance/chart")
-async def get_vault_performance_chart(session: SessionDep):
+async def get_vault_performance_chart(session: ReadSessionDep):
     # Get the VaultPerformance records for the given vault_id
-    vaults = session.exec(select(Vault).where(Vault.is_active)).all()
+    vaults = (await session.exec(select(Vault).where(Vault.is_active))).all()
 
-    perf_hist = session.exec(
-        select(VaultPerformance)
-        .where(VaultPerformance.vault_id.in_([vault.id for vault in vaults]))
-        .order_by(VaultPerformance.datetime.asc())
+    perf_hist = (
+        await session.exec(
+            select(VaultPerformance)
+            .where(VaultPerformance.vault_id.in_([vault.id for vault in vaults]))
+            .order_by(VaultPerformance.datetime.asc())
+        )
     ).all()
     if len(perf_hist) == 0:
         return []
@@ -496,11 +524,11 @@ async def get_vault_performance_chart(session: SessionDep):
 
 
 @router.get("/apy-breakdown/{vault_id}")
-def get_apy_breakdown(
-    session: SessionDep, vault_id: str, apy_option: Optional[str] = None
+async def get_apy_breakdown(
+    session: ReadSessionDep, vault_id: str, apy_option: Optional[str] = None
 ):
     statement = select(Vault).where(Vault.id == vault_id)
-    vault = session.exec(statement).first()
+    vault = (await session.exec(statement)).first()
     if vault is None:
         raise HTTPException(
             status_code=400,
@@ -516,8 +544,9 @@ def get_apy_breakdown(
         select(VaultAPYBreakdown)
         .where(VaultAPYBreakdown.vault_id == vault_id)
         .where(VaultAPYBreakdown.period == period)
+        .options(selectinload(VaultAPYBreakdown.apy_components))
     )
-    vault_apy = session.exec(statement).first()
+    vault_apy = (await session.exec(statement)).first()
     if vault_apy is None:
         return {}
 
@@ -531,9 +560,9 @@ def get_apy_breakdown(
 
 
 @router.get("/metrics/{vault_id}", response_model=VaultMetadataResponse)
-def get_vault_metadata(session: SessionDep, vault_id: str):
+async def get_vault_metadata(session: ReadSessionDep, vault_id: str):
     # Retrieve the vault
-    vault = session.exec(select(Vault).where(Vault.id == vault_id)).first()
+    vault = (await session.exec(select(Vault).where(Vault.id == vault_id))).first()
     if not vault:
         raise HTTPException(
             status_code=404,  # Use 404 to indicate "not found"
@@ -541,8 +570,10 @@ def get_vault_metadata(session: SessionDep, vault_id: str):
         )
 
     # Retrieve the vault metadata
-    vault_metadata = session.exec(
-        select(VaultMetadata).where(VaultMetadata.vault_id == vault_id)
+    vault_metadata = (
+        await session.exec(
+            select(VaultMetadata).where(VaultMetadata.vault_id == vault_id)
+        )
     ).first()
 
     if not vault_metadata:
@@ -560,8 +591,8 @@ def get_vault_metadata(session: SessionDep, vault_id: str):
 
 
 @router.get("/{vault_id}/pps-histories")
-def get_pps_histories(
-    session: SessionDep,
+async def get_pps_histories(
+    session: ReadSessionDep,
     vault_id: uuid.UUID,
     start_date: Optional[str] = Query(
         None, description="Start date in YYYY-MM-DD format"
@@ -591,17 +622,15 @@ def get_pps_histories(
     )
 
     # Execute the query with parameters
-    result = session.exec(
-        raw_query.bindparams(
-            bindparam("vault_id", value=vault_id),
-            bindparam(
-                "start_date",
-                value=datetime.strptime(start_date, "%Y-%m-%d") if start_date else None,
-            ),
-            bindparam(
-                "end_date",
-                value=datetime.strptime(end_date, "%Y-%m-%d") if end_date else None,
-            ),
+    start = datetime.strptime(start_date, "%Y-%m-%d") if start_date else None
+    end = datetime.strptime(end_date, "%Y-%m-%d") if end_date else None
+    result = (
+        await session.execute(
+            raw_query.bindparams(
+                bindparam("vault_id", value=vault_id),
+                bindparam("start_date", value=start),
+                bindparam("end_date", value=end),
+            )
         )
     ).all()
 
@@ -620,12 +649,12 @@ def get_pps_histories(
 
 
 @router.get("/{slug}/whitelist-wallets", response_model=List[str])
-async def get_whitelist_wallets(slug: str, session: SessionDep):
+async def get_whitelist_wallets(slug: str, session: ReadSessionDep):
     """
     Returns a list of whitelisted wallet addresses for a specific vault
     """
     statement = select(WhitelistWallet).where(WhitelistWallet.vault_slug == slug)
-    whitelist_wallets = session.exec(statement).all()
+    whitelist_wallets = (await session.exec(statement)).all()
 
     # Convert addresses to checksum format
     return [
@@ -0,0 +1,106 @@
+"""Latency of the read endpoints under a fixed number of concurrent clients.
+
+Sends `--requests` GET requests per endpoint from `--concurrency` concurrent
+clients against a running API and prints p50/p99 latency and throughput. Start
+the API from the revision to compare (e.g. before and after the async database
+layer) with the same worker count and run the benchmark against each one:
+
+    uvicorn main:app --port 8000 --workers 1
+    python -m benchmarks.bench_api_load --base-url http://localhost:8000 --concurrency 50
+
+The vault used by the per vault endpoints is the first vault listed by the API.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+import httpx
+
+from core.config import settings
+
+
+def percentile(values: List[float], pct: float) -> float:
+    values = sorted(values)
+    index = min(len(values) - 1, round(pct / 100 * (len(values) - 1)))
+    return values[index]
+
+
+async def load(
+    client: httpx.AsyncClient, path: str, requests: int, concurrency: int
+) -> dict:
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(path)
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            url = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                response = await client.get(url)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += failed
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "p50": statistics.median(latencies),
+        "p99": percentile(latencies, 99),
+        "rps": requests / elapsed,
+        "errors": errors,
+    }
+
+
+async def run(args):
+    prefix = settings.API_V1_STR
+    async with httpx.AsyncClient(
+        base_url=args.base_url,
+        timeout=args.timeout,
+        limits=httpx.Limits(max_connections=args.concurrency),
+    ) as client:
+        groups = (await client.get(f"{prefix}/vaults/")).json()
+        vault = groups[0]["vaults"][0]
+        paths = [
+            f"{prefix}/vaults/",
+            f"{prefix}/vaults/{vault['slug']}",
+            f"{prefix}/vaults/{vault['slug']}/performance",
+            f"{prefix}/vaults/apy-breakdown/{vault['id']}",
+            f"{prefix}/vaults/{vault['id']}/pps-histories",
+            f"{prefix}/statistics/",
+            f"{prefix}/statistics/{vault['id']}",
+            f"{prefix}/earning/vaults/",
+            f"{prefix}/app-config/",
+        ]
+
+        print(f"concurrency={args.concurrency} requests={args.requests}")
+        for path in paths:
+            # Warm up the connection pools and caches of the server
+            await load(client, path, args.concurrency, args.concurrency)
+            result = await load(client, path, args.requests, args.concurrency)
+            print(
+                f"  {path}: p50={result['p50']:.1f} ms p99={result['p99']:.1f} ms"
+                f" throughput={result['rps']:.1f} req/s errors={result['errors']}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=60)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Write throughput of the COPY bulk writer against the ORM and INSERT paths.
+
+Writes `--rows` synthetic rows of the two tables the indexers fill the most,
+each with every strategy, and prints the median wall time and rows per second:
+
+- orm: `session.add_all` and a commit, one INSERT per row
+- orm_checked: a SELECT per row before adding it, the explorer indexer path
+  (onchain_transaction_history only)
+- insert_values: multi-row `INSERT ... ON CONFLICT` in batches of 1000
+- copy: `core.bulk_writer.bulk_write`
+
+The rows are tagged and deleted after every run.
+
+Usage: python -m benchmarks.bench_bulk_writer --rows 20000 --repeat 3
+"""
+
+import argparse
+import statistics
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+
+from core.bulk_writer import UPSERT_SPECS, bulk_write
+from core.db import engine
+from models.onchain_transaction_history import OnchainTransactionHistory
+from models.user_assets_history import UserHoldingAssetHistory
+
+TAG = "0xbenchbulk"
+INSERT_BATCH_SIZE = 1000
+
+
+def transaction_rows(count: int) -> List[dict]:
+    return [
+        {
+            "tx_hash": f"{TAG}{i:054x}",
+            "block_number": 250_000_000 + i,
+            "timestamp": 1_735_689_600 + i,
+            "from_address": f"{TAG}{i % 5000:029x}",
+            "to_address": "0xc0e2b9ecabca12d5024b2c11788b1cfaf972e5aa",
+            "method_id": "0x2e2d2984",
+            "input": "0x2e2d2984" + "00" * 68,
+            "value": 0.0,
+            "chain": "arbitrum_one",
+        }
+        for i in range(count)
+    ]
+
+
+def holding_rows(count: int) -> List[dict]:
+    timestamp = datetime.now(timezone.utc)
+    return [
+        {
+            "user_address": f"{TAG}{i % 5000:029x}",
+            "total_shares": 1.0 + i,
+            "vault_total_shares": 1e6,
+            "asset_amount": 0.01 * i,
+            "asset_address": "0x4186bfc76e2e237523cbc30fd220fe055156b41f",
+            "asset_symbol": "rsETH",
+            "asset_decimals": 18,
+            "holding_percentage": (1.0 + i) / 1e6,
+            "timestamp": timestamp,
+            "block_number": 250_000_000 + i // 5000,
+            "chain": "arbitrum_one",
+        }
+        for i in range(count)
+    ]
+
+
+CASES = {
+    OnchainTransactionHistory: (transaction_rows, OnchainTransactionHistory.tx_hash),
+    UserHoldingAssetHistory: (holding_rows, UserHoldingAssetHistory.user_address),
+}
+
+
+def write_orm(session: Session, model: type, rows: List[dict]):
+    session.add_all([model(**row) for row in rows])
+    session.commit()
+
+
+def write_orm_checked(session: Session, model: type, rows: List[dict]):
+    for row in rows:
+        existing = session.exec(
+            select(model).where(model.tx_hash == row["tx_hash"])
+        ).first()
+        if not existing:
+            session.add(model(**row))
+    session.commit()
+
+
+def write_insert_values(session: Session, model: type, rows: List[dict]):
+    spec = UPSERT_SPECS[model]
+    objects = [model(**row).model_dump(exclude_none=True) for row in rows]
+    for start in range(0, len(objects), INSERT_BATCH_SIZE):
+        statement = insert(model).values(objects[start : start + INSERT_BATCH_SIZE])
+        if spec.conflict_columns:
+            statement = statement.on_conflict_do_nothing(
+                index_elements=list(spec.conflict_columns)
+            )
+        session.execute(statement)
+    session.commit()
+
+
+def write_copy(session: Session, model: type, rows: List[dict]):
+    bulk_write(session, model, rows)
+    session.commit()
+
+
+STRATEGIES: Dict[str, Callable[[Session, type, List[dict]], None]] = {
+    "orm": write_orm,
+    "orm_checked": write_orm_checked,
+    "insert_values": write_insert_values,
+    "copy": write_copy,
+}
+
+
+def cleanup(session: Session, model: type):
+    _, tag_column = CASES[model]
+    session.exec(delete(model).where(tag_column.startswith(TAG)))
+    session.commit()
+
+
+def measure(model: type, strategy: str, rows: List[dict], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        with Session(engine) as session:
+            cleanup(session, model)
+            start = time.perf_counter()
+            STRATEGIES[strategy](session, model, rows)
+            timings.append(time.perf_counter() - start)
+            cleanup(session, model)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--strategies", nargs="+", choices=list(STRATEGIES), default=list(STRATEGIES)
+    )
+    args = parser.parse_args()
+
+    for model, (build_rows, _) in CASES.items():
+        rows = build_rows(args.rows)
+        print(f"{model.__tablename__}, {args.rows} rows")
+        for strategy in args.strategies:
+            if strategy == "orm_checked" and model is not OnchainTransactionHistory:
+                continue
+            seconds = measure(model, strategy, rows, args.repeat)
+            print(f"  {strategy:<14} {seconds:8.3f}s {args.rows / seconds:10.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Import time budget of the API entry point and the job modules.
+
+Imports `main` and every `bg_tasks` module in a fresh interpreter with
+`-X importtime`, keeps the fastest of `--repeat` runs and compares it with the
+budget. Exits with status 1 when a module is over budget or cannot be imported,
+so it can gate a CI step.
+
+Usage: python -m benchmarks.bench_importtime --main-budget-ms 4000 --job-budget-ms 3500
+"""
+
+import argparse
+import pathlib
+import subprocess
+import sys
+from typing import List, Optional
+
+SRC = pathlib.Path(__file__).resolve().parent.parent
+
+
+def job_modules() -> List[str]:
+    return sorted(
+        f"bg_tasks.{path.stem}"
+        for path in (SRC / "bg_tasks").glob("*.py")
+        if path.stem != "__init__"
+    )
+
+
+def import_time_ms(module: str) -> Optional[float]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        return None
+    for line in reversed(result.stderr.splitlines()):
+        # import time: self [us] | cumulative | imported package
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1]) / 1000
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--main-budget-ms", type=float, default=4000)
+    parser.add_argument("--job-budget-ms", type=float, default=3500)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("modules", nargs="*", help="Defaults to main and bg_tasks")
+    args = parser.parse_args()
+
+    failures = []
+    for module in args.modules or ["main"] + job_modules():
+        budget = args.main_budget_ms if module == "main" else args.job_budget_ms
+        timings = [import_time_ms(module) for _ in range(args.repeat)]
+        if None in timings:
+            failures.append(module)
+            print(f"  {module}: cannot be imported")
+            continue
+        elapsed = min(timings)
+        status = "ok"
+        if elapsed > budget:
+            failures.append(module)
+            status = "OVER BUDGET"
+        print(f"  {module}: {elapsed:.0f} ms (budget {budget:.0f} ms) {status}")
+
+    if failures:
+        print(f"{len(failures)} modules failed: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""Wall time, queries, peak memory and rows written of the bg_tasks jobs.
+
+Seeds the synthetic dataset of `benchmarks.dataset` before every run, so each
+job starts from the same state, then runs the job entry point in a child
+process with the HTTP and JSON-RPC calls answered by `benchmarks.stubs`. The
+child reports:
+
+- wall_seconds: the entry point only, the imports are done before
+- queries, rows_written: SQL statements and rows inserted/updated/deleted
+- peak_rss_mb, rss_growth_mb: peak RSS of the child and its growth in the run
+- rpc_calls, http_calls: calls answered by the stubs
+
+The median of `--repeat` runs is printed and written to `--output` as JSON.
+With `--baseline` the results are compared to a previous output and the
+command exits with 1 when a metric grew more than `--tolerance`. Use the
+same dataset options for both runs, see `benchmarks.dataset` for the
+database to run it against.
+
+Usage:
+    python -m benchmarks.bench_jobs --users 20000 --output bench_jobs.json
+    python -m benchmarks.bench_jobs --users 20000 --baseline bench_jobs.json
+"""
+
+import argparse
+import importlib
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import datetime, timezone
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from benchmarks import dataset
+from benchmarks.stubs import stubbed_network
+from core import constants
+from core.db import engine
+from core.instrumentation import statement_operation
+
+# Imported before the measured run, so no job pays for them
+PRELOAD = ["pandas", "web3", "core.db", "models", "services.vault_registry"]
+METRICS = [
+    "wall_seconds",
+    "queries",
+    "rows_written",
+    "peak_rss_mb",
+    "rss_growth_mb",
+    "rpc_calls",
+    "http_calls",
+]
+
+
+def run_harmonix_distribute_points():
+    from bg_tasks import points_distribution_job_harmonix as job
+
+    current_time = datetime.now(tz=timezone.utc)
+    job.harmonix_distribute_points(current_time)
+    job.update_vault_points(current_time)
+
+
+def run_update_referral_points():
+    from bg_tasks import points_distribution_job_harmonix as job
+    from models.reward_session_config import RewardSessionConfig
+    from models.reward_sessions import RewardSessions
+
+    reward_session = job.session.exec(
+        select(RewardSessions)
+        .where(RewardSessions.partner_name == constants.HARMONIX)
+        .where(RewardSessions.end_date == None)
+    ).first()
+    reward_session_config = job.session.exec(
+        select(RewardSessionConfig).where(
+            RewardSessionConfig.session_id == reward_session.session_id
+        )
+    ).first()
+    job.update_referral_points(
+        datetime.now(tz=timezone.utc),
+        reward_session,
+        reward_session_config,
+        reward_session.points_distributed,
+    )
+
+
+def run_calculate_tvl_last_30_days():
+    from bg_tasks import calculate_tvl_last_30_days as job
+
+    job.calculate_tvl_last_30_days()
+
+
+def run_rewards_distribution_job_harmonix():
+    from bg_tasks import rewards_distribution_job_harmonix as job
+
+    job.main()
+
+
+def run_daily_yield_calculation():
+    from bg_tasks import daily_yield_calculation as job
+
+    job.daily_yield_calculation()
+
+
+JOBS = {
+    "harmonix_distribute_points": run_harmonix_distribute_points,
+    "update_referral_points": run_update_referral_points,
+    "calculate_tvl_last_30_days": run_calculate_tvl_last_30_days,
+    "rewards_distribution_job_harmonix": run_rewards_distribution_job_harmonix,
+    "daily_yield_calculation": run_daily_yield_calculation,
+}
+
+
+class StatementCounter:
+    def __init__(self):
+        self.queries = 0
+        self.rows_written = 0
+
+    def before_cursor_execute(self, conn, cursor, statement, *args):
+        self.queries += 1
+
+    def after_cursor_execute(self, conn, cursor, statement, *args):
+        if statement_operation(statement) in ("INSERT", "UPDATE", "DELETE"):
+            self.rows_written += max(cursor.rowcount, 0)
+
+
+def peak_rss_mb() -> float:
+    # KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(job: str) -> dict:
+    """Run `job` in this process and return its metrics."""
+    for module in PRELOAD:
+        importlib.import_module(module)
+    counter = StatementCounter()
+    # Listening on the Engine class covers every engine the jobs create
+    event.listen(Engine, "before_cursor_execute", counter.before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", counter.after_cursor_execute)
+
+    rss_before = peak_rss_mb()
+    with stubbed_network() as calls:
+        start = time.perf_counter()
+        JOBS[job]()
+        wall_seconds = time.perf_counter() - start
+    return {
+        "wall_seconds": wall_seconds,
+        "queries": counter.queries,
+        "rows_written": counter.rows_written,
+        "peak_rss_mb": peak_rss_mb(),
+        "rss_growth_mb": peak_rss_mb() - rss_before,
+        "rpc_calls": sum(n for kind, n in calls.items() if kind.startswith("rpc")),
+        "http_calls": sum(n for kind, n in calls.items() if kind.startswith("http")),
+    }
+
+
+def run_child(job: str, log_path: str) -> dict:
+    with tempfile.NamedTemporaryFile(suffix=".json") as result, open(
+        log_path, "w"
+    ) as log:
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_jobs", "--child", job]
+            + ["--result", result.name],
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"{job} failed, see {log_path}")
+        return json.load(open(result.name))
+
+
+def seed(spec: dataset.DatasetSpec, now: datetime):
+    with Session(engine) as session:
+        dataset.reset(session)
+        dataset.generate(session, spec, now)
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> bool:
+    """Print the change of every metric, returns whether one regressed."""
+    if results["spec"] != baseline["spec"]:
+        print("warning: the baseline was measured on another dataset spec")
+    regressed = False
+    for job, metrics in results["jobs"].items():
+        base = baseline["jobs"].get(job)
+        if base is None:
+            continue
+        for metric, value in metrics.items():
+            before = base.get(metric)
+            if not before:
+                continue
+            change = value / before - 1
+            flag = ""
+            if change > tolerance:
+                flag = "  REGRESSED"
+                regressed = True
+            print(f"{job} {metric}: {before:.4g} -> {value:.4g} ({change:+.1%}){flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    dataset.spec_arguments(parser)
+    parser.add_argument("--jobs", nargs="+", choices=list(JOBS), default=list(JOBS))
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Results of a previous run to compare")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument(
+        "--keep", action="store_true", help="Keep the dataset after the last run"
+    )
+    parser.add_argument("--child", choices=list(JOBS), help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        with open(args.result, "w") as result:
+            json.dump(measure(args.child), result)
+        return
+
+    spec = dataset.spec_from_arguments(args)
+    now = dataset.default_now()
+    log_dir = tempfile.mkdtemp(prefix="bench_jobs_")
+    results = {"spec": asdict(spec), "jobs": {}}
+    try:
+        for job in args.jobs:
+            runs = []
+            for attempt in range(args.repeat):
+                seed(spec, now)
+                log_path = os.path.join(log_dir, f"{job}_{attempt}.log")
+                runs.append(run_child(job, log_path))
+            results["jobs"][job] = {
+                metric: statistics.median(run[metric] for run in runs)
+                for metric in METRICS
+            }
+            print(
+                f"{job}: "
+                + ", ".join(
+                    f"{metric}={value:.4g}"
+                    for metric, value in results["jobs"][job].items()
+                )
+            )
+    finally:
+        if not args.keep:
+            with Session(engine) as session:
+                dataset.reset(session)
+    print(f"Job logs in {log_dir}")
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            if compare(results, json.load(baseline), args.tolerance):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
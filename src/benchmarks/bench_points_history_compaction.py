@@ -0,0 +1,188 @@
+"""Table size and reader latency of the points history before and after compaction.
+
+Seeds hourly `user_points_history` rows for a dedicated benchmark vault, then
+measures the history size and the two reader shapes: latest point per user
+points record (referral aggregation) and total points per record. It runs the
+compaction and measures again. Needs a local/dev database since it runs
+VACUUM FULL on the history tables. Seeded rows are removed at the end.
+
+Usage: python -m benchmarks.bench_points_history_compaction --users 500 --days 90
+"""
+
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from core.db import engine
+from services.points_history_compaction import HISTORY_ROLLUPS, compact_history
+
+VAULT_NAME = "bench compaction vault"
+TABLES = ["user_points_history", "user_points_history_daily"]
+
+LATEST_FROM_HISTORY = """
+SELECT sum(point) FROM (
+    SELECT DISTINCT ON (h.user_points_id) h.point
+    FROM user_points_history h
+    JOIN user_points up ON up.id = h.user_points_id
+    WHERE up.vault_id = :vault_id
+    ORDER BY h.user_points_id, h.created_at DESC
+) latest
+"""
+LATEST_FROM_POINTER = """
+SELECT sum(last_history_point) FROM user_points WHERE vault_id = :vault_id
+"""
+TOTAL_FROM_HISTORY = """
+SELECT h.user_points_id, sum(h.point)
+FROM user_points_history h
+JOIN user_points up ON up.id = h.user_points_id
+WHERE up.vault_id = :vault_id
+GROUP BY h.user_points_id
+"""
+TOTAL_FROM_ROLLUP = """
+SELECT user_points_id, sum(point) FROM (
+    SELECT h.user_points_id, h.point
+    FROM user_points_history h
+    JOIN user_points up ON up.id = h.user_points_id
+    WHERE up.vault_id = :vault_id
+    UNION ALL
+    SELECT d.user_points_id, d.point
+    FROM user_points_history_daily d
+    JOIN user_points up ON up.id = d.user_points_id
+    WHERE up.vault_id = :vault_id
+) rows
+GROUP BY user_points_id
+"""
+
+
+def seed(session: Session, users: int, days: int, now: datetime):
+    vault_id = session.execute(
+        text(
+            "INSERT INTO vaults (id, name) VALUES (gen_random_uuid(), :name) RETURNING id"
+        ),
+        {"name": VAULT_NAME},
+    ).scalar_one()
+    session.execute(
+        text(
+            """
+            INSERT INTO user_points (
+                id, vault_id, wallet_address, points, partner_name,
+                created_at, updated_at, last_history_point, last_history_at
+            )
+            SELECT gen_random_uuid(), :vault_id, '0xbench' || md5(u::text), 0,
+                   'Harmonix', :now, :now, 1, :now
+            FROM generate_series(1, :users) u
+            """
+        ),
+        {"vault_id": vault_id, "users": users, "now": now},
+    )
+    session.execute(
+        text(
+            """
+            INSERT INTO user_points_history (id, user_points_id, point, created_at)
+            SELECT gen_random_uuid(), up.id, 1, :now - g * interval '1 hour'
+            FROM user_points up
+            CROSS JOIN generate_series(0, :hours - 1) g
+            WHERE up.vault_id = :vault_id
+            """
+        ),
+        {"vault_id": vault_id, "hours": days * 24, "now": now},
+    )
+    session.commit()
+    return vault_id
+
+
+def cleanup(session: Session, vault_id):
+    params = {"vault_id": vault_id}
+    owned = "SELECT id FROM user_points WHERE vault_id = :vault_id"
+    for table in TABLES:
+        session.execute(
+            text(f"DELETE FROM {table} WHERE user_points_id IN ({owned})"), params
+        )
+    session.execute(text("DELETE FROM user_points WHERE vault_id = :vault_id"), params)
+    session.execute(text("DELETE FROM vaults WHERE id = :vault_id"), params)
+    session.commit()
+
+
+def vacuum():
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table in TABLES:
+            conn.execute(text(f"VACUUM FULL ANALYZE {table}"))
+
+
+def table_sizes(session: Session) -> dict:
+    return {
+        table: session.execute(
+            text(f"SELECT pg_total_relation_size('{table}')")
+        ).scalar_one()
+        for table in TABLES
+    }
+
+
+def latency_ms(session: Session, sql: str, vault_id, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        session.execute(text(sql), {"vault_id": vault_id}).all()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def report(label: str, session: Session, vault_id, repeat: int):
+    sizes = table_sizes(session)
+    print(f"[{label}]")
+    for table, size in sizes.items():
+        print(f"  {table}: {size / 1024 / 1024:.1f} MiB")
+    print(
+        f"  latest per record, history scan: {latency_ms(session, LATEST_FROM_HISTORY, vault_id, repeat):.1f} ms"
+    )
+    print(
+        f"  latest per record, pointer: {latency_ms(session, LATEST_FROM_POINTER, vault_id, repeat):.1f} ms"
+    )
+    print(
+        f"  total per record, raw history: {latency_ms(session, TOTAL_FROM_HISTORY, vault_id, repeat):.1f} ms"
+    )
+    print(
+        f"  total per record, raw + daily: {latency_ms(session, TOTAL_FROM_ROLLUP, vault_id, repeat):.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--retention-days", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    session = Session(engine)
+    now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    vault_id = seed(session, args.users, args.days, now)
+    try:
+        vacuum()
+        print(f"users={args.users} days={args.days} rows={args.users * args.days * 24}")
+        report("before", session, vault_id, args.repeat)
+
+        start = time.perf_counter()
+        compacted = compact_history(
+            session,
+            next(r for r in HISTORY_ROLLUPS if r.table == "user_points_history"),
+            now - timedelta(days=args.retention_days),
+            args.batch_size,
+        )
+        elapsed = time.perf_counter() - start
+        print(f"compacted {compacted} rows in {elapsed:.1f} s")
+
+        vacuum()
+        report("after", session, vault_id, args.repeat)
+    finally:
+        cleanup(session, vault_id)
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
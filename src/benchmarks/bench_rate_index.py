@@ -0,0 +1,91 @@
+"""Per-vault runtime of the historical yield report's funding rate lookups.
+
+Compares the previous DataFrame path (resample per partner, then filter the
+daily frame for every vault date) with `RateSeriesIndex` on synthetic hourly
+funding rates. No database or network access is needed.
+
+Usage: python -m benchmarks.bench_rate_index --days 365 --vaults 6
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from reports.rate_index import RateSeriesIndex
+
+
+def build_rows(days: int):
+    start = datetime(2024, 4, 5, tzinfo=timezone.utc)
+    rng = np.random.default_rng(42)
+    rates = rng.normal(0.00001, 0.00002, size=days * 24)
+    return [(start + timedelta(hours=i), float(rate)) for i, rate in enumerate(rates)]
+
+
+def legacy_daily_df(rows) -> pd.DataFrame:
+    df = pd.DataFrame([{"datetime": dt, "funding_rate": rate} for dt, rate in rows])
+    df["datetime"] = pd.to_datetime(df["datetime"], errors="coerce")
+    daily_avg = (
+        df.set_index("datetime").resample("D")["funding_rate"].mean().reset_index()
+    )
+    daily_avg.rename(
+        columns={"datetime": "date", "funding_rate": "average_rate"}, inplace=True
+    )
+    return daily_avg
+
+
+def legacy_avg_by_date(avg_df: pd.DataFrame, target_date: datetime) -> float:
+    avg_df["date_filter"] = avg_df["date"].dt.date
+    filtered_row = avg_df.loc[avg_df["date_filter"] == target_date.date()]
+    if not filtered_row.empty:
+        return filtered_row["average_rate"].mean()
+    return 0.0
+
+
+def run_legacy(rows, dates, vaults: int) -> list:
+    results = []
+    for _ in range(vaults):
+        # Every vault rebuilt its own DataFrame from the query result
+        avg_df = legacy_daily_df(rows)
+        results = [legacy_avg_by_date(avg_df, date) for date in dates]
+    return results
+
+
+def run_index(rows, dates, vaults: int) -> list:
+    # The index is loaded once per process and shared by every vault
+    rate_index = RateSeriesIndex(rows)
+    results = []
+    for _ in range(vaults):
+        results = [rate_index.day_mean(date) for date in dates]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--vaults", type=int, default=6)
+    args = parser.parse_args()
+
+    rows = build_rows(args.days)
+    dates = [rows[0][0] + timedelta(days=i) for i in range(args.days)]
+
+    start = time.perf_counter()
+    legacy = run_legacy(rows, dates, args.vaults)
+    legacy_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = run_index(rows, dates, args.vaults)
+    index_elapsed = time.perf_counter() - start
+
+    assert np.allclose(legacy, indexed), "rate index diverges from DataFrame path"
+
+    print(f"rows={len(rows)} days={args.days} vaults={args.vaults}")
+    print(f"dataframe: {legacy_elapsed / args.vaults * 1000:.2f} ms/vault")
+    print(f"rate index: {index_elapsed / args.vaults * 1000:.2f} ms/vault")
+    print(f"speedup: {legacy_elapsed / index_elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
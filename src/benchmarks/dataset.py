@@ -0,0 +1,586 @@
+"""Deterministic synthetic dataset, at production scale, for the job benchmarks.
+
+Seeds vaults, users, referrals, portfolios, on-chain transactions with their
+ledger rows, PPS and performance history, an active Harmonix reward session
+with the points already distributed and the reward weeks of the HYPE vault.
+The same spec, seed and `--now` always produce the same rows, ids included.
+
+Every seeded row is tagged (`bench ` names, `0xbe4c` wallets) and `--reset`
+deletes them with the rows the jobs wrote for them. The jobs read every row of
+their tables though, so run it against a scratch database upgraded with
+alembic to get numbers that only depend on the spec.
+
+Usage:
+    python -m benchmarks.dataset --users 20000 --days 90
+    python -m benchmarks.dataset --reset
+"""
+
+import argparse
+import random
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from sqlalchemy import insert, text
+from sqlmodel import Session
+
+from core import constants
+from core.db import engine
+from models.onchain_transaction_history import OnchainTransactionHistory
+from models.points_multiplier_config import PointsMultiplierConfig
+from models.pps_history import PricePerShareHistory
+from models.referralcodes import ReferralCode
+from models.referrals import Referral
+from models.reward_distribution_config import RewardDistributionConfig
+from models.reward_session_config import RewardSessionConfig
+from models.reward_sessions import RewardSessions
+from models.transaction_ledger import LedgerAction, TransactionLedger
+from models.user import User
+from models.user_points import UserPoints
+from models.user_points_history import UserPointsHistory
+from models.user_portfolio import PositionStatus, UserPortfolio
+from models.vault_performance import VaultPerformance
+from models.vaults import Vault
+
+NAME_PREFIX = "bench "
+WALLET_PREFIX = "0xbe4c"
+CONFIG_TAG = "BENCH"
+INSERT_BATCH_SIZE = 5000
+
+# Vault and sender of the transactions read by the HYPE rewards job
+HYPE_VAULT_ID = uuid.UUID("c3010b21-25e0-4786-870c-774d2b91f4c5")
+HYPE_VAULT_ADDRESS = "0xc0e2b9ecabca12d5024b2c11788b1cfaf972e5aa"
+HYPE_DEPOSIT_METHOD_ID = "0x71b8dc69"
+HYPE_WITHDRAW_METHOD_ID = "0x087fad4c"
+
+USDC_ADDRESS = "0xaf88d065e77c8cc2239327c5edb3a432268e5831"
+# Strategy and currency of the vaults, in turn
+VAULT_KINDS = [
+    (constants.DELTA_NEUTRAL_STRATEGY, "USDC"),
+    (constants.OPTIONS_WHEEL_STRATEGY, "USDC"),
+    (constants.DELTA_NEUTRAL_STRATEGY, "WETH"),
+    (constants.STAKING_STRATEGY, "WBTC"),
+]
+PRICES = {"USDC": 1.0, "WETH": 3000.0, "WBTC": 60000.0}
+# Arbitrum One blocks, counted from a fixed date to stay in the integer columns
+SECONDS_PER_BLOCK = 0.25
+FIRST_BLOCK_AT = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    users: int = 5000
+    vaults: int = 6
+    # Days of transactions, PPS and performance history
+    days: int = 90
+    # Share of the users who joined with a referral code
+    referred_share: float = 0.3
+    kol_share: float = 0.01
+    # Vaults a user has a position in, from 1 to this
+    max_positions: int = 3
+    deposits_per_position: int = 3
+    closed_share: float = 0.1
+    # Share of the users depositing in the HYPE vault
+    hype_share: float = 0.05
+    # Hourly points history rows kept for each position
+    points_history_hours: int = 24
+    seed: int = 42
+
+
+class Generator:
+    def __init__(self, spec: DatasetSpec, now: datetime):
+        self.spec = spec
+        self.now = now
+        self.rng = random.Random(spec.seed)
+        self.rows: Dict[type, List[dict]] = {}
+
+    def new_id(self) -> uuid.UUID:
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def random_hex(self, length: int) -> str:
+        return f"{self.rng.getrandbits(length * 4):0{length}x}"
+
+    def past(self, days: float) -> datetime:
+        return self.now - timedelta(seconds=self.rng.uniform(0, days * 86400))
+
+    def block_number(self, at: datetime) -> int:
+        return int((at - FIRST_BLOCK_AT).total_seconds() / SECONDS_PER_BLOCK)
+
+    def add(self, model: type, row: dict):
+        self.rows.setdefault(model, []).append(row)
+
+    def vaults(self, hype_vault_exists: bool):
+        self.vault_rows = []
+        for index in range(self.spec.vaults):
+            strategy, currency = VAULT_KINDS[index % len(VAULT_KINDS)]
+            row = dict(
+                id=self.new_id(),
+                name=f"{NAME_PREFIX}vault {index}",
+                slug=f"bench-vault-{index}",
+                contract_address="0x" + self.random_hex(40),
+                category="real_yield",
+                network_chain="arbitrum_one",
+                strategy_name=strategy,
+                vault_currency=currency,
+                is_active=True,
+                update_frequency="daily",
+                owner_wallet_address="0x" + self.random_hex(40),
+                tvl=0,
+            )
+            self.vault_rows.append(row)
+            self.add(Vault, row)
+            self.add(
+                PointsMultiplierConfig,
+                dict(
+                    id=self.new_id(),
+                    vault_id=row["id"],
+                    multiplier=self.rng.choice([1, 1, 1.5, 2]),
+                    created_at=self.now - timedelta(days=self.spec.days),
+                ),
+            )
+        if not hype_vault_exists:
+            self.add(
+                Vault,
+                dict(
+                    id=HYPE_VAULT_ID,
+                    name=f"{NAME_PREFIX}hype vault",
+                    contract_address=HYPE_VAULT_ADDRESS,
+                    category="real_yield",
+                    network_chain="arbitrum_one",
+                    is_active=False,
+                ),
+            )
+
+    def users(self):
+        self.user_rows = []
+        for index in range(self.spec.users):
+            tier = (
+                constants.UserTier.KOL.value
+                if self.rng.random() < self.spec.kol_share
+                else constants.UserTier.DEFAULT.value
+            )
+            row = dict(
+                user_id=self.new_id(),
+                wallet_address=WALLET_PREFIX + self.random_hex(36),
+                tier=tier,
+                created_at=self.past(self.spec.days),
+            )
+            self.user_rows.append(row)
+            self.add(User, row)
+
+        # Early users refer most of the others
+        codes = {}
+        for index, referee in enumerate(self.user_rows[1:], start=1):
+            if self.rng.random() >= self.spec.referred_share:
+                continue
+            referrer = self.user_rows[int(index * self.rng.random() ** 3)]
+            code = codes.get(referrer["user_id"])
+            if code is None:
+                code = codes[referrer["user_id"]] = dict(
+                    referral_code_id=self.new_id(),
+                    user_id=referrer["user_id"],
+                    code=f"bench-{self.random_hex(12)}",
+                    created_at=referrer["created_at"],
+                )
+                self.add(ReferralCode, code)
+            self.add(
+                Referral,
+                dict(
+                    referral_id=self.new_id(),
+                    referrer_id=referrer["user_id"],
+                    referee_id=referee["user_id"],
+                    referral_code_id=code["referral_code_id"],
+                    created_at=referee["created_at"],
+                ),
+            )
+
+    def transaction(self, user: dict, to_address: str, method_id: str, at, input):
+        row = dict(
+            id=self.new_id(),
+            tx_hash="0x" + self.random_hex(64),
+            block_number=self.block_number(at),
+            timestamp=int(at.timestamp()),
+            from_address=user["wallet_address"],
+            to_address=to_address,
+            method_id=method_id,
+            input=input,
+            value=0,
+            chain="arbitrum_one",
+        )
+        self.add(OnchainTransactionHistory, row)
+        return row
+
+    def ledger(self, transaction: dict, vault: dict, action, amount, pps):
+        price = PRICES[vault["vault_currency"]]
+        self.add(
+            TransactionLedger,
+            dict(
+                id=self.new_id(),
+                tx_hash=transaction["tx_hash"],
+                vault_id=vault["id"],
+                user_address=transaction["from_address"].lower(),
+                action=action,
+                method_id=transaction["method_id"],
+                token=vault["vault_currency"],
+                amount=amount,
+                shares=amount * price / pps,
+                pps_at_block=pps,
+                usd_value=amount * price,
+                block_number=transaction["block_number"],
+                timestamp=transaction["timestamp"],
+                chain="arbitrum_one",
+            ),
+        )
+
+    def positions(self, session_id: uuid.UUID) -> float:
+        spec = self.spec
+        points_distributed = 0
+        for user in self.user_rows:
+            vaults = self.rng.sample(
+                self.vault_rows, self.rng.randint(1, min(spec.max_positions, spec.vaults))
+            )
+            for vault in vaults:
+                closed = self.rng.random() < spec.closed_share
+                start = max(user["created_at"], self.past(spec.days))
+                balance = 0
+                for _ in range(spec.deposits_per_position):
+                    amount = round(self.rng.lognormvariate(6, 1.5), 2)
+                    balance += amount
+                    at = start + (self.now - start) * self.rng.random()
+                    transaction = self.transaction(
+                        user,
+                        vault["contract_address"],
+                        constants.MethodID.DEPOSIT2.value,
+                        at,
+                        constants.MethodID.DEPOSIT2.value
+                        + f"{int(amount * 1e6):064x}"
+                        + USDC_ADDRESS[2:].rjust(64, "0"),
+                    )
+                    self.ledger(
+                        transaction, vault, LedgerAction.DEPOSIT, amount, 1.0
+                    )
+                if closed:
+                    at = start + (self.now - start) * self.rng.random()
+                    transaction = self.transaction(
+                        user,
+                        vault["contract_address"],
+                        constants.MethodID.COMPPLETE_WITHDRAWAL.value,
+                        at,
+                        constants.MethodID.COMPPLETE_WITHDRAWAL.value
+                        + f"{int(balance * 1e6):064x}",
+                    )
+                    self.ledger(
+                        transaction,
+                        vault,
+                        LedgerAction.INITIATE_WITHDRAWAL,
+                        balance,
+                        1.0,
+                    )
+                self.add(
+                    UserPortfolio,
+                    dict(
+                        vault_id=vault["id"],
+                        user_address=user["wallet_address"],
+                        total_balance=0 if closed else balance,
+                        init_deposit=balance,
+                        total_shares=0 if closed else balance,
+                        entry_price=1.0,
+                        status=(
+                            PositionStatus.CLOSED if closed else PositionStatus.ACTIVE
+                        ),
+                        trade_start_date=start,
+                    ),
+                )
+                # Positions opened in the last hour get their points on the next run
+                if closed or start > self.now - timedelta(hours=1):
+                    continue
+                points_distributed += self.points(session_id, user, vault, balance)
+        return points_distributed
+
+    def points(self, session_id, user: dict, vault: dict, balance: float) -> float:
+        hours = self.spec.points_history_hours
+        hourly = balance * PRICES[vault["vault_currency"]] / 2000
+        user_points_id = self.new_id()
+        last_at = self.now - timedelta(hours=1)
+        self.add(
+            UserPoints,
+            dict(
+                id=user_points_id,
+                vault_id=vault["id"],
+                wallet_address=user["wallet_address"],
+                points=hourly * hours,
+                partner_name=constants.HARMONIX,
+                session_id=session_id,
+                created_at=last_at - timedelta(hours=hours - 1),
+                updated_at=last_at,
+                last_history_point=hourly,
+                last_history_at=last_at,
+            ),
+        )
+        for hour in range(hours):
+            at = last_at - timedelta(hours=hour)
+            self.add(
+                UserPointsHistory,
+                dict(
+                    id=self.new_id(),
+                    user_points_id=user_points_id,
+                    point=hourly,
+                    created_at=at,
+                    updated_at=at,
+                ),
+            )
+        return hourly * hours
+
+    def reward_session(self) -> dict:
+        reward_session = dict(
+            session_id=self.new_id(),
+            session_name=f"{NAME_PREFIX}harmonix session",
+            partner_name=constants.HARMONIX,
+            start_date=self.now - timedelta(days=self.spec.days),
+            points_distributed=0,
+        )
+        self.add(RewardSessions, reward_session)
+        self.add(
+            RewardSessionConfig,
+            dict(
+                id=self.new_id(),
+                session_id=reward_session["session_id"],
+                max_points=1e15,
+                duration_in_minutes=(self.spec.days + 365) * 24 * 60,
+                created_at=reward_session["start_date"],
+            ),
+        )
+        return reward_session
+
+    def history(self):
+        for vault in self.vault_rows:
+            pps = 1.0
+            tvl = self.rng.uniform(1e5, 1e7)
+            for day in range(self.spec.days, -1, -1):
+                at = self.now - timedelta(days=day)
+                pps *= 1 + self.rng.gauss(0.0003, 0.002)
+                tvl *= 1 + self.rng.gauss(0.001, 0.01)
+                self.add(
+                    PricePerShareHistory,
+                    dict(
+                        id=self.new_id(),
+                        vault_id=vault["id"],
+                        datetime=at,
+                        price_per_share=pps,
+                    ),
+                )
+                self.add(
+                    VaultPerformance,
+                    dict(
+                        id=self.new_id(),
+                        vault_id=vault["id"],
+                        datetime=at,
+                        total_locked_value=tvl,
+                        apy_1m=self.rng.uniform(5, 25),
+                        apy_1w=self.rng.uniform(5, 25),
+                        benchmark=pps,
+                        pct_benchmark=0,
+                        risk_factor=0.01,
+                        all_time_high_per_share=pps,
+                        total_shares=tvl / pps,
+                        sortino_ratio=1,
+                        downside_risk=0.01,
+                        unique_depositors=len(self.user_rows),
+                    ),
+                )
+            vault["tvl"] = tvl
+
+    def hype(self):
+        for user in self.user_rows:
+            if self.rng.random() >= self.spec.hype_share:
+                continue
+            for _ in range(self.spec.deposits_per_position):
+                self.transaction(
+                    user,
+                    HYPE_VAULT_ADDRESS,
+                    HYPE_DEPOSIT_METHOD_ID,
+                    self.past(self.spec.days),
+                    HYPE_DEPOSIT_METHOD_ID,
+                )
+            if self.rng.random() < self.spec.closed_share:
+                self.transaction(
+                    user,
+                    HYPE_VAULT_ADDRESS,
+                    HYPE_WITHDRAW_METHOD_ID,
+                    self.past(7),
+                    HYPE_WITHDRAW_METHOD_ID,
+                )
+        # The job starts from the week in progress, which began 6 days ago
+        for week in range(1, 5):
+            start = self.now - timedelta(days=6 + 7 * (4 - week))
+            self.add(
+                RewardDistributionConfig,
+                dict(
+                    id=self.new_id(),
+                    vault_id=HYPE_VAULT_ID,
+                    reward_token=CONFIG_TAG,
+                    total_reward=1000,
+                    week=week,
+                    distribution_percentage=0.25,
+                    start_date=start.replace(hour=0),
+                    created_at=start,
+                ),
+            )
+
+
+# Parents first, inserted in this order and deleted in the reverse one
+MODELS = [
+    Vault,
+    PointsMultiplierConfig,
+    PricePerShareHistory,
+    VaultPerformance,
+    User,
+    ReferralCode,
+    Referral,
+    RewardSessions,
+    RewardSessionConfig,
+    UserPortfolio,
+    OnchainTransactionHistory,
+    TransactionLedger,
+    UserPoints,
+    UserPointsHistory,
+    RewardDistributionConfig,
+]
+
+BENCH_USERS = "SELECT user_id FROM users WHERE wallet_address LIKE :wallets"
+BENCH_VAULTS = "SELECT id FROM vaults WHERE name LIKE :names"
+BENCH_USER_POINTS = "SELECT id FROM user_points WHERE wallet_address LIKE :wallets"
+BENCH_REFERRAL_POINTS = f"SELECT id FROM referral_points WHERE user_id IN ({BENCH_USERS})"
+BENCH_USER_REWARDS = "SELECT id FROM user_rewards WHERE wallet_address LIKE :wallets"
+BENCH_SESSIONS = "SELECT session_id FROM reward_sessions WHERE session_name LIKE :names"
+# Seeded rows and the rows the jobs write for them, children first
+RESET_STATEMENTS = [
+    f"DELETE FROM user_reward_audit WHERE user_points_id IN ({BENCH_USER_REWARDS})",
+    "DELETE FROM user_rewards WHERE wallet_address LIKE :wallets",
+    f"DELETE FROM user_point_audit WHERE user_points_id IN ({BENCH_USER_POINTS})",
+    f"DELETE FROM user_points_history WHERE user_points_id IN ({BENCH_USER_POINTS})",
+    f"DELETE FROM user_points_history_daily WHERE user_points_id IN ({BENCH_USER_POINTS})",
+    "DELETE FROM user_points WHERE wallet_address LIKE :wallets",
+    f"DELETE FROM referral_points_history WHERE referral_points_id IN ({BENCH_REFERRAL_POINTS})",
+    f"DELETE FROM referral_points_history_daily WHERE referral_points_id IN ({BENCH_REFERRAL_POINTS})",
+    f"DELETE FROM referral_points WHERE user_id IN ({BENCH_USERS})",
+    f"DELETE FROM user_last_30_days_tvl WHERE user_id IN ({BENCH_USERS})",
+    f"DELETE FROM rewards WHERE user_id IN ({BENCH_USERS})",
+    f"DELETE FROM referrals WHERE referee_id IN ({BENCH_USERS})",
+    f"DELETE FROM referral_codes WHERE user_id IN ({BENCH_USERS})",
+    "DELETE FROM users WHERE wallet_address LIKE :wallets",
+    "DELETE FROM user_position_view WHERE wallet_address LIKE :wallets",
+    "DELETE FROM user_portfolio WHERE user_address LIKE :wallets",
+    "DELETE FROM onchain_transaction_history WHERE from_address LIKE :wallets",
+    "DELETE FROM transaction_ledger WHERE user_address LIKE :wallets",
+    "DELETE FROM config.reward_distribution_config WHERE reward_token = :tag",
+    f"DELETE FROM reward_session_config WHERE session_id IN ({BENCH_SESSIONS})",
+    "DELETE FROM reward_sessions WHERE session_name LIKE :names",
+    *(
+        f"DELETE FROM {table} WHERE vault_id IN ({BENCH_VAULTS})"
+        for table in [
+            "point_distribution_history",
+            "point_distribution_history_daily",
+            "points_multiplier_config",
+            "pps_history",
+            "vault_performance",
+            "vault_performance_history",
+            "vault_state_snapshot",
+            "reward_distribution_history",
+        ]
+    ),
+    "DELETE FROM vaults WHERE name LIKE :names",
+]
+
+
+def reset(session: Session):
+    params = {
+        "wallets": f"{WALLET_PREFIX}%",
+        "names": f"{NAME_PREFIX}%",
+        "tag": CONFIG_TAG,
+    }
+    for statement in RESET_STATEMENTS:
+        session.execute(text(statement), params)
+    session.commit()
+
+
+def build(
+    spec: DatasetSpec, now: datetime, hype_vault_exists: bool = False
+) -> Dict[type, List[dict]]:
+    """Rows of the dataset of `spec`, by model."""
+    generator = Generator(spec, now)
+    generator.vaults(hype_vault_exists)
+    generator.users()
+    reward_session = generator.reward_session()
+    reward_session["points_distributed"] = generator.positions(
+        reward_session["session_id"]
+    )
+    generator.history()
+    generator.hype()
+    return generator.rows
+
+
+def generate(session: Session, spec: DatasetSpec, now: datetime) -> Dict[str, int]:
+    """Insert the dataset of `spec`, returns the rows inserted per table."""
+    rows_by_model = build(spec, now, session.get(Vault, HYPE_VAULT_ID) is not None)
+    counts = {}
+    for model in MODELS:
+        rows = rows_by_model.get(model, [])
+        for start in range(0, len(rows), INSERT_BATCH_SIZE):
+            session.execute(insert(model), rows[start : start + INSERT_BATCH_SIZE])
+        counts[model.__tablename__] = len(rows)
+    session.commit()
+    return counts
+
+
+def default_now() -> datetime:
+    return datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def spec_arguments(parser: argparse.ArgumentParser):
+    """Command line options of every DatasetSpec field."""
+    for name, default in asdict(DatasetSpec()).items():
+        parser.add_argument(
+            f"--{name.replace('_', '-')}", type=type(default), default=default
+        )
+
+
+def spec_from_arguments(args: argparse.Namespace) -> DatasetSpec:
+    return DatasetSpec(**{name: getattr(args, name) for name in asdict(DatasetSpec())})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    spec_arguments(parser)
+    parser.add_argument(
+        "--now",
+        type=datetime.fromisoformat,
+        default=None,
+        help="Anchor of the history, the current hour by default",
+    )
+    parser.add_argument(
+        "--reset", action="store_true", help="Only delete the benchmark rows"
+    )
+    args = parser.parse_args()
+
+    session = Session(engine)
+    start = time.perf_counter()
+    reset(session)
+    if args.reset:
+        print(f"Deleted the benchmark rows in {time.perf_counter() - start:.1f} s")
+        return
+
+    now = args.now or default_now()
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=timezone.utc)
+    counts = generate(session, spec_from_arguments(args), now)
+    session.close()
+    for table, count in counts.items():
+        print(f"  {table}: {count}")
+    print(f"Seeded {sum(counts.values())} rows in {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
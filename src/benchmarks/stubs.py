@@ -0,0 +1,130 @@
+"""Answers the outbound HTTP and JSON-RPC calls of the jobs during a benchmark.
+
+Every request goes through `requests`, web3's HTTPProvider included, so the
+transport adapter is replaced: JSON-RPC bodies get a synthetic result, the
+Binance average price a fixed price and anything else an empty JSON object.
+Nothing leaves the machine and the calls take no time, so the numbers measure
+the job itself. The calls are counted by kind.
+"""
+
+import json
+from collections import Counter
+from contextlib import contextmanager
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core.config import settings
+
+PRICES = {"BTCUSDT": 60000.0, "ETHUSDT": 3000.0, "LINKUSDT": 15.0}
+BLOCK_NUMBER = 250_000_000
+CHAIN_ID = 42161
+# pricePerShare, totalValueLocked, ... of every contract, 1.0 at 6 decimals
+CALL_RESULT = 1_000_000
+
+calls = Counter()
+
+
+def word(value: int) -> str:
+    return value.to_bytes(32, "big").hex()
+
+
+def transaction_receipt(tx_hash: str) -> dict:
+    """Receipt with one pendle Deposit log, its amount derived from the hash."""
+    amount = (int(tx_hash[-6:], 16) % 10_000 + 1) * 10**6
+    sender = "0x" + tx_hash[-40:]
+    log = {
+        "address": "0x" + "00" * 20,
+        "blockHash": "0x" + "00" * 32,
+        "blockNumber": hex(BLOCK_NUMBER),
+        "data": "0x" + word(0) + word(0) + word(amount) + word(amount) + word(amount),
+        "logIndex": "0x0",
+        "removed": False,
+        "topics": [
+            settings.PENDLE_DEPOSIT_EVENT_TOPIC,
+            "0x" + "00" * 12 + sender[2:],
+        ],
+        "transactionHash": tx_hash,
+        "transactionIndex": "0x0",
+    }
+    return {
+        "blockHash": log["blockHash"],
+        "blockNumber": log["blockNumber"],
+        "contractAddress": None,
+        "cumulativeGasUsed": "0x0",
+        "effectiveGasPrice": "0x0",
+        "from": sender,
+        "gasUsed": "0x0",
+        "logs": [log],
+        "logsBloom": "0x" + "00" * 256,
+        "status": "0x1",
+        "to": log["address"],
+        "transactionHash": tx_hash,
+        "transactionIndex": "0x0",
+        "type": "0x2",
+    }
+
+
+def rpc_result(method: str, params: list):
+    if method == "web3_clientVersion":
+        return "benchmark"
+    if method == "eth_chainId":
+        return hex(CHAIN_ID)
+    if method == "eth_blockNumber":
+        return hex(BLOCK_NUMBER)
+    if method == "eth_call":
+        return "0x" + word(CALL_RESULT)
+    if method == "eth_getTransactionReceipt":
+        return transaction_receipt(params[0])
+    raise ValueError(f"The benchmark RPC stub does not answer {method}")
+
+
+def rpc_response(payload: dict) -> dict:
+    calls[f"rpc {payload['method']}"] += 1
+    try:
+        result = rpc_result(payload["method"], payload.get("params") or [])
+    except ValueError as e:
+        return {
+            "jsonrpc": "2.0",
+            "id": payload.get("id"),
+            "error": {"code": -32601, "message": str(e)},
+        }
+    return {"jsonrpc": "2.0", "id": payload.get("id"), "result": result}
+
+
+def http_response(request: requests.PreparedRequest):
+    url = urlparse(request.url)
+    body = request.body
+    if body:
+        payload = json.loads(body)
+        if isinstance(payload, list):
+            return [rpc_response(item) for item in payload]
+        if isinstance(payload, dict) and "jsonrpc" in payload:
+            return rpc_response(payload)
+    calls[f"http {url.hostname}"] += 1
+    if url.path.endswith("/avgPrice"):
+        symbol = parse_qs(url.query)["symbol"][0]
+        return {"mins": 5, "price": str(PRICES.get(symbol, 1.0))}
+    return {}
+
+
+def send(adapter, request, **kwargs) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.url = request.url
+    response.request = request
+    response.headers["Content-Type"] = "application/json"
+    response._content = json.dumps(http_response(request)).encode()
+    return response
+
+
+@contextmanager
+def stubbed_network():
+    calls.clear()
+    original = HTTPAdapter.send
+    HTTPAdapter.send = send
+    try:
+        yield calls
+    finally:
+        HTTPAdapter.send = original
@@ -0,0 +1,26 @@
+import logging
+
+from sqlmodel import Session
+
+from core.db import engine
+from log import setup_logging_to_console, setup_logging_to_file
+from services.transaction_ledger_service import TransactionLedgerService
+
+session = Session(engine)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("backfill_transaction_ledger")
+
+
+def main():
+    # Also the migration path of the ledger: the first run decodes every indexed
+    # transaction, later runs retry the ones the indexer could not decode
+    logger.info("Backfilling transaction_ledger...")
+    enriched = TransactionLedgerService(session).backfill()
+    logger.info(f"Transaction ledger backfill completed, {enriched} rows written")
+
+
+if __name__ == "__main__":
+    setup_logging_to_console()
+    setup_logging_to_file("backfill_transaction_ledger", logger=logger)
+    main()
@@ -1,6 +1,8 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 import logging
-from typing import Optional, Tuple, Dict, Any
+from typing import Callable, List, Optional, Set, Tuple, Dict, Any
 import uuid
 
 from sqlalchemy import func
@@ -29,6 +31,8 @@ from services import (
     kelpgain_service,
 )
 from services.apy_component_service import (
+    VaultAPYResult,
+    bulk_upsert_vault_apy,
     BSXApyComponentService,
     DeltaNeutralApyComponentService,
     GoldLinkApyComponentService,
@@ -64,15 +68,94 @@ PERIOD_15_DAYS: int = 15
 PERIOD_45_DAYS: int = 45
 
 
+PREFETCH_WORKERS: int = 8
+
+# External inputs, keyed by name; parameterized inputs add their arguments to the key
+KELPDAO_APY = "kelpdao_apy"
+KELPGAIN_APY = "kelpgain_apy"
+RENZO_APY = "renzo_apy"
+LIDO_APY = "lido_apy"
+PENDLE_MARKET = "pendle_market"
+
+EXTERNAL_FETCHERS: Dict[str, Callable[..., Any]] = {
+    KELPDAO_APY: kelpdao_service.get_apy,
+    KELPGAIN_APY: kelpgain_service.get_apy,
+    RENZO_APY: renzo_service.get_apy,
+    LIDO_APY: lido_service.get_apy,
+    PENDLE_MARKET: lambda pt_address: pendle_service.get_market(
+        constants.CHAIN_IDS["CHAIN_ARBITRUM"], pt_address
+    ),
+}
+
+SLUG_INPUTS: Dict[str, List[str]] = {
+    constants.KELPDAO_VAULT_ARBITRUM_SLUG: [KELPDAO_APY],
+    constants.KELPDAO_VAULT_SLUG: [KELPDAO_APY],
+    constants.RENZO_VAULT_SLUG: [RENZO_APY],
+    constants.DELTA_NEUTRAL_VAULT_VAULT_SLUG: [LIDO_APY],
+    constants.KELPDAO_GAIN_VAULT_SLUG: [KELPGAIN_APY],
+    constants.ETH_WITH_LENDING_BOOST_YIELD: [LIDO_APY],
+}
+
+
+@dataclass
+class APYInputSnapshot:
+    external: Dict[tuple, Any] = field(default_factory=dict)
+    errors: Dict[tuple, Exception] = field(default_factory=dict)
+    latest_performances: Dict[uuid.UUID, VaultPerformance] = field(default_factory=dict)
+    latest_hyperliquid_distributions: Dict[uuid.UUID, PointDistributionHistory] = (
+        field(default_factory=dict)
+    )
+
+    def get(self, *key) -> Any:
+        if key in self.errors:
+            raise Exception(f"Input {key} could not be fetched: {self.errors[key]}")
+        return self.external[key]
+
+
+def get_required_inputs(vault: Vault) -> Set[tuple]:
+    if vault.strategy_name == constants.PENDLE_HEDGING_STRATEGY:
+        return {(PENDLE_MARKET, vault.pt_address)}
+    return {(name,) for name in SLUG_INPUTS.get(vault.slug, [])}
+
+
+def _fetch_input(key: tuple):
+    return EXTERNAL_FETCHERS[key[0]](*key[1:])
+
+
+def prefetch_inputs(
+    vaults: List[Vault], max_workers: int = PREFETCH_WORKERS
+) -> APYInputSnapshot:
+    snapshot = APYInputSnapshot()
+    keys = set().union(*(get_required_inputs(vault) for vault in vaults))
+
+    logger.info(f"Prefetching {len(keys)} external inputs for {len(vaults)} vaults")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {key: executor.submit(_fetch_input, key) for key in keys}
+        for key, future in futures.items():
+            try:
+                snapshot.external[key] = future.result()
+            except Exception as e:
+                logger.error(f"Failed to fetch input {key}: {e}", exc_info=True)
+                snapshot.errors[key] = e
+
+    vault_ids = [vault.id for vault in vaults]
+    snapshot.latest_performances = get_latest_vault_performances(vault_ids)
+    snapshot.latest_hyperliquid_distributions = get_latest_hyperliquid_distributions(
+        vault_ids
+    )
+    return snapshot
+
+
 class VaultAPYCalculator:
-    def __init__(self, vault: Vault):
+    def __init__(self, vault: Vault, snapshot: APYInputSnapshot):
         self.vault = vault
         self.vault_id = vault.id
+        self.snapshot = snapshot
         self.current_apy = 0
         self.apy_15d = 0
         self.apy_45d = 0
 
-    def calculate_apy_components(self):
+    def calculate_apy_components(self) -> List[VaultAPYResult]:
         logger.info(
             f"Starting APY calculation for vault: {self.vault.name} (ID: {self.vault_id})"
         )
@@ -91,16 +174,17 @@ class VaultAPYCalculator:
             constants.HYPE_DELTA_NEUTRAL_SLUG: self._handle_hype,
         }
 
+        results: List[VaultAPYResult] = []
         if self.vault.strategy_name == constants.PENDLE_HEDGING_STRATEGY:
             logger.info(
                 f"Processing Pendle hedging strategy for vault: {self.vault.name} (slug: {self.vault.slug})"
             )
-            self._handle_pendle_hedging_strategy()
+            results = self._handle_pendle_hedging_strategy()
         elif self.vault.slug in handlers:
             logger.info(
                 f"Processing {self.vault.slug} strategy for vault: {self.vault.name} (slug: {self.vault.slug})"
             )
-            handlers[self.vault.slug]()
+            results = handlers[self.vault.slug]()
         else:
             logger.warning(
                 f"Vault {self.vault.name} not supported (slug: {self.vault.slug})"
@@ -109,6 +193,7 @@ class VaultAPYCalculator:
         logger.info(
             f"Completed APY calculation for vault: {self.vault.name} (slug: {self.vault.slug})"
         )
+        return results
 
     def _get_vault_apy(self) -> Tuple[float, float, float]:
         if self.vault.strategy_name == constants.OPTIONS_WHEEL_STRATEGY:
@@ -116,108 +201,152 @@ class VaultAPYCalculator:
         return self.vault.monthly_apy, self.vault.apy_15d, self.vault.apy_45d
 
     def _handle_kelpdao_arb(self):
-        yearly_apy = kelpdao_service.get_apy()
+        yearly_apy = self.snapshot.get(KELPDAO_APY)
         allocated_apy = yearly_apy * ALLOCATION_RATIO
 
-        handle_kelpdao_arb(
-            self.vault_id, self.current_apy, allocated_apy, PERIOD_30_DAYS
-        )
-        handle_kelpdao_arb(self.vault_id, self.apy_15d, allocated_apy, PERIOD_15_DAYS)
-        handle_kelpdao_arb(self.vault_id, self.apy_45d, allocated_apy, PERIOD_45_DAYS)
+        return [
+            handle_kelpdao_arb(
+                self.vault_id, self.current_apy, allocated_apy, PERIOD_30_DAYS
+            ),
+            handle_kelpdao_arb(
+                self.vault_id, self.apy_15d, allocated_apy, PERIOD_15_DAYS
+            ),
+            handle_kelpdao_arb(
+                self.vault_id, self.apy_45d, allocated_apy, PERIOD_45_DAYS
+            ),
+        ]
 
     def _handle_kelpdao(self):
-        rs_eth_value = kelpdao_service.get_apy() * ALLOCATION_RATIO
+        rs_eth_value = self.snapshot.get(KELPDAO_APY) * ALLOCATION_RATIO
         ae_usd_value = AEUSD_VAULT_APY * ALLOCATION_RATIO
 
-        handle_kelpdao(
-            self.vault_id, self.current_apy, rs_eth_value, ae_usd_value, PERIOD_30_DAYS
-        )
-        handle_kelpdao(
-            self.vault_id, self.apy_15d, rs_eth_value, ae_usd_value, PERIOD_15_DAYS
-        )
-        handle_kelpdao(
-            self.vault_id, self.apy_45d, rs_eth_value, ae_usd_value, PERIOD_45_DAYS
-        )
+        return [
+            handle_kelpdao(
+                self.vault_id,
+                self.current_apy,
+                rs_eth_value,
+                ae_usd_value,
+                PERIOD_30_DAYS,
+            ),
+            handle_kelpdao(
+                self.vault_id, self.apy_15d, rs_eth_value, ae_usd_value, PERIOD_15_DAYS
+            ),
+            handle_kelpdao(
+                self.vault_id, self.apy_45d, rs_eth_value, ae_usd_value, PERIOD_45_DAYS
+            ),
+        ]
 
     def _handle_renzo(self):
-        ez_eth_value = renzo_service.get_apy() * ALLOCATION_RATIO
+        ez_eth_value = self.snapshot.get(RENZO_APY) * ALLOCATION_RATIO
         ae_usd_value = RENZO_AEVO_VAULE * ALLOCATION_RATIO
 
-        handle_renzo(
-            self.vault_id, self.current_apy, ez_eth_value, ae_usd_value, PERIOD_30_DAYS
-        )
-        handle_renzo(
-            self.vault_id, self.apy_15d, ez_eth_value, ae_usd_value, PERIOD_15_DAYS
-        )
-        handle_renzo(
-            self.vault_id, self.apy_45d, ez_eth_value, ae_usd_value, PERIOD_45_DAYS
-        )
+        return [
+            handle_renzo(
+                self.vault_id,
+                self.current_apy,
+                ez_eth_value,
+                ae_usd_value,
+                PERIOD_30_DAYS,
+            ),
+            handle_renzo(
+                self.vault_id, self.apy_15d, ez_eth_value, ae_usd_value, PERIOD_15_DAYS
+            ),
+            handle_renzo(
+                self.vault_id, self.apy_45d, ez_eth_value, ae_usd_value, PERIOD_45_DAYS
+            ),
+        ]
 
     def _handle_delta_neutral(self):
-        wst_eth_value = lido_service.get_apy() * ALLOCATION_RATIO * 100
+        wst_eth_value = self.snapshot.get(LIDO_APY) * ALLOCATION_RATIO * 100
         ae_usd_value = AEUSD_VAULT_APY * ALLOCATION_RATIO
 
-        handle_delta_neutral(
-            self.vault_id, self.current_apy, wst_eth_value, ae_usd_value, PERIOD_30_DAYS
-        )
-        handle_delta_neutral(
-            self.vault_id, self.apy_15d, wst_eth_value, ae_usd_value, PERIOD_15_DAYS
-        )
-        handle_delta_neutral(
-            self.vault_id, self.apy_45d, wst_eth_value, ae_usd_value, PERIOD_45_DAYS
-        )
+        return [
+            handle_delta_neutral(
+                self.vault_id,
+                self.current_apy,
+                wst_eth_value,
+                ae_usd_value,
+                PERIOD_30_DAYS,
+            ),
+            handle_delta_neutral(
+                self.vault_id, self.apy_15d, wst_eth_value, ae_usd_value, PERIOD_15_DAYS
+            ),
+            handle_delta_neutral(
+                self.vault_id, self.apy_45d, wst_eth_value, ae_usd_value, PERIOD_45_DAYS
+            ),
+        ]
 
     def _handle_solv(self):
-        upsert_vault_apy(self.vault_id, self.current_apy, PERIOD_30_DAYS)
-        upsert_vault_apy(self.vault_id, self.apy_15d, PERIOD_15_DAYS)
-        upsert_vault_apy(self.vault_id, self.apy_45d, PERIOD_45_DAYS)
+        return [
+            VaultAPYResult(self.vault_id, self.current_apy, PERIOD_30_DAYS),
+            VaultAPYResult(self.vault_id, self.apy_15d, PERIOD_15_DAYS),
+            VaultAPYResult(self.vault_id, self.apy_45d, PERIOD_45_DAYS),
+        ]
 
     def _handle_pendle_hedging_strategy(self):
-        pendle_data = pendle_service.get_market(
-            constants.CHAIN_IDS["CHAIN_ARBITRUM"], self.vault.pt_address
-        )
+        pendle_data = self.snapshot.get(PENDLE_MARKET, self.vault.pt_address)
         pendle_fixed_apy = calculate_fixed_value(pendle_data)
 
-        handle_pendle_hedging_strategy(
-            self.vault, self.current_apy, pendle_fixed_apy, PERIOD_30_DAYS
-        )
-        handle_pendle_hedging_strategy(
-            self.vault, self.apy_15d, pendle_fixed_apy, PERIOD_15_DAYS
-        )
-        handle_pendle_hedging_strategy(
-            self.vault, self.apy_45d, pendle_fixed_apy, PERIOD_45_DAYS
-        )
+        return [
+            handle_pendle_hedging_strategy(
+                self.vault,
+                self.current_apy,
+                pendle_fixed_apy,
+                PERIOD_30_DAYS,
+                self.snapshot,
+            ),
+            handle_pendle_hedging_strategy(
+                self.vault, self.apy_15d, pendle_fixed_apy, PERIOD_15_DAYS, self.snapshot
+            ),
+            handle_pendle_hedging_strategy(
+                self.vault, self.apy_45d, pendle_fixed_apy, PERIOD_45_DAYS, self.snapshot
+            ),
+        ]
 
     def _handle_kelp_gain(self):
-        rs_eth_value = kelpgain_service.get_apy() * ALLOCATION_RATIO
+        rs_eth_value = self.snapshot.get(KELPGAIN_APY) * ALLOCATION_RATIO
         ae_usd_value = AEUSD_VAULT_APY * ALLOCATION_RATIO
 
-        handle_kelp_gain(
-            self.vault_id, self.current_apy, rs_eth_value, ae_usd_value, PERIOD_30_DAYS
-        )
-        handle_kelp_gain(
-            self.vault_id, self.apy_15d, rs_eth_value, ae_usd_value, PERIOD_15_DAYS
-        )
-        handle_kelp_gain(
-            self.vault_id, self.apy_45d, rs_eth_value, ae_usd_value, PERIOD_45_DAYS
-        )
+        return [
+            handle_kelp_gain(
+                self.vault_id,
+                self.current_apy,
+                rs_eth_value,
+                ae_usd_value,
+                PERIOD_30_DAYS,
+            ),
+            handle_kelp_gain(
+                self.vault_id, self.apy_15d, rs_eth_value, ae_usd_value, PERIOD_15_DAYS
+            ),
+            handle_kelp_gain(
+                self.vault_id, self.apy_45d, rs_eth_value, ae_usd_value, PERIOD_45_DAYS
+            ),
+        ]
 
     def _handle_rethink(self):
-        wst_eth_value = lido_service.get_apy() * 100
-        handle_rethink(self.vault_id, self.current_apy, wst_eth_value, PERIOD_30_DAYS)
-        handle_rethink(self.vault_id, self.apy_15d, wst_eth_value, PERIOD_15_DAYS)
-        handle_rethink(self.vault_id, self.apy_45d, wst_eth_value, PERIOD_45_DAYS)
+        wst_eth_value = self.snapshot.get(LIDO_APY) * 100
+        return [
+            handle_rethink(
+                self.vault_id, self.current_apy, wst_eth_value, PERIOD_30_DAYS
+            ),
+            handle_rethink(self.vault_id, self.apy_15d, wst_eth_value, PERIOD_15_DAYS),
+            handle_rethink(self.vault_id, self.apy_45d, wst_eth_value, PERIOD_45_DAYS),
+        ]
 
     def _handle_hype(self):
-        vault_performance = get_latest_vault_performance(self.vault_id)
+        vault_performance = self.snapshot.latest_performances.get(self.vault_id)
         reward_monthly_apy = (
             vault_performance.reward_monthly_apy
             if vault_performance and vault_performance.reward_monthly_apy is not None
             else 0
         )
-        handle_hype(self.vault_id, self.current_apy, reward_monthly_apy, PERIOD_30_DAYS)
-        handle_hype(self.vault_id, self.apy_15d, 0, PERIOD_15_DAYS)
-        handle_hype(self.vault_id, self.apy_45d, 0, PERIOD_45_DAYS)
+        return [
+            handle_hype(
+                self.vault_id, self.current_apy, reward_monthly_apy, PERIOD_30_DAYS
+            ),
+            handle_hype(self.vault_id, self.apy_15d, 0, PERIOD_15_DAYS),
+            handle_hype(self.vault_id, self.apy_45d, 0, PERIOD_45_DAYS),
+        ]
 
 
 # Keep existing utility functions
@@ -244,59 +373,57 @@ def calculate_hyperliquid_value(point_dist, tvl: float, hype_point_usd=5):
     return calculate_annualized_pnl(weekly_pnl_percentage, 12) * 100
 
 
-# Keep existing database operation functions
-def upsert_vault_apy(
-    vault_id: uuid.UUID, total_apy: float, period: int
-) -> VaultAPYBreakdown:
-    vault_apy = session.exec(
-        select(VaultAPYBreakdown)
-        .where(VaultAPYBreakdown.vault_id == vault_id)
-        .where(VaultAPYBreakdown.period == period)
-    ).first()
-
-    if not vault_apy:
-        vault_apy = VaultAPYBreakdown(vault_id=vault_id)
-
-    vault_apy.total_apy = total_apy
-    vault_apy.period = period
-    session.add(vault_apy)
-    session.commit()
-
-    return vault_apy
-
-
-def get_latest_hyperliquid_distribution(vault_id):
-    return session.exec(
+# Database operation functions
+def get_latest_hyperliquid_distributions(
+    vault_ids: List[uuid.UUID],
+) -> Dict[uuid.UUID, PointDistributionHistory]:
+    rows = session.exec(
         select(PointDistributionHistory)
-        .where(PointDistributionHistory.vault_id == vault_id)
+        .distinct(PointDistributionHistory.vault_id)
+        .where(PointDistributionHistory.vault_id.in_(vault_ids))
         .where(PointDistributionHistory.partner_name == constants.HYPERLIQUID)
-        .order_by(PointDistributionHistory.created_at.desc())
-    ).first()
+        .order_by(
+            PointDistributionHistory.vault_id,
+            PointDistributionHistory.created_at.desc(),
+        )
+    ).all()
+    return {row.vault_id: row for row in rows}
 
 
-def get_latest_vault_performance(vault_id):
-    return session.exec(
+def get_latest_vault_performances(
+    vault_ids: List[uuid.UUID],
+) -> Dict[uuid.UUID, VaultPerformance]:
+    rows = session.exec(
         select(VaultPerformance)
-        .where(VaultPerformance.vault_id == vault_id)
-        .order_by(VaultPerformance.datetime.desc())
-    ).first()
+        .distinct(VaultPerformance.vault_id)
+        .where(VaultPerformance.vault_id.in_(vault_ids))
+        .order_by(VaultPerformance.vault_id, VaultPerformance.datetime.desc())
+    ).all()
+    return {row.vault_id: row for row in rows}
 
 
-# Keep existing handler functions
+# Handler functions
 def handle_pendle_hedging_strategy(
-    vault: Vault, apy: float, pendle_fixed_apy: float, period: int
-):
+    vault: Vault,
+    apy: float,
+    pendle_fixed_apy: float,
+    period: int,
+    snapshot: APYInputSnapshot,
+) -> VaultAPYResult:
     if vault.slug == constants.PENDLE_RSETH_26DEC24_SLUG:
-        handle_rseth_dec24_vault(vault, apy, pendle_fixed_apy, period)
-    else:
-        handle_other_pendle_vaults(vault, apy, pendle_fixed_apy, period)
+        return handle_rseth_dec24_vault(
+            vault, apy, pendle_fixed_apy, period, snapshot
+        )
+    return handle_other_pendle_vaults(vault, apy, pendle_fixed_apy, period, snapshot)
 
 
-def handle_rseth_dec24_vault(vault, apy, fixed_value, period: int):
-    point_dist = get_latest_hyperliquid_distribution(vault.id)
+def handle_rseth_dec24_vault(
+    vault, apy, fixed_value, period: int, snapshot: APYInputSnapshot
+):
+    point_dist = snapshot.latest_hyperliquid_distributions.get(vault.id)
     hyperliquid_point_value = calculate_hyperliquid_value(point_dist, vault.tvl)
     funding_fee_value = apy - fixed_value - hyperliquid_point_value
-    save_pendle_components(
+    return build_pendle_components(
         vault.id,
         apy,
         fixed_value,
@@ -306,8 +433,10 @@ def handle_rseth_dec24_vault(vault, apy, fixed_value, period: int):
     )
 
 
-def handle_other_pendle_vaults(vault, apy, period_pendle_fixed_apy, period: int):
-    vault_performance = get_latest_vault_performance(vault.id)
+def handle_other_pendle_vaults(
+    vault, apy, period_pendle_fixed_apy, period: int, snapshot: APYInputSnapshot
+):
+    vault_performance = snapshot.latest_performances.get(vault.id)
 
     period_reward_apy = 0
 
@@ -331,7 +460,7 @@ def handle_other_pendle_vaults(vault, apy, period_pendle_fixed_apy, period: int)
         )
 
     funding_fee_value = apy - period_pendle_fixed_apy - period_reward_apy
-    save_pendle_jun2025_components(
+    return build_pendle_jun2025_components(
         vault.id,
         apy,
         period_pendle_fixed_apy,
@@ -341,7 +470,6 @@ def handle_other_pendle_vaults(vault, apy, period_pendle_fixed_apy, period: int)
     )
 
 
-# Keep existing handler functions
 def handle_kelpdao_arb(vault_id, apy, allocated_apy: float, period: int):
     period_apy = allocated_apy
 
@@ -354,7 +482,7 @@ def handle_kelpdao_arb(vault_id, apy, allocated_apy: float, period: int):
         period,
         session,
     )
-    service.save()
+    return service.to_result()
 
 
 def handle_kelpdao(
@@ -370,7 +498,7 @@ def handle_kelpdao(
         period,
         session,
     )
-    kelpdao_component_service.save()
+    return kelpdao_component_service.to_result()
 
 
 def handle_renzo(vault_id, apy, ez_eth_value: float, ae_usd_value: float, period: int):
@@ -384,7 +512,7 @@ def handle_renzo(vault_id, apy, ez_eth_value: float, ae_usd_value: float, period
         period,
         session,
     )
-    renzo_component_service.save()
+    return renzo_component_service.to_result()
 
 
 def handle_delta_neutral(
@@ -402,7 +530,7 @@ def handle_delta_neutral(
         period,
         session,
     )
-    delta_neutral_component_service.save()
+    return delta_neutral_component_service.to_result()
 
 
 def handle_kelp_gain(
@@ -420,7 +548,7 @@ def handle_kelp_gain(
         period,
         session,
     )
-    kelpdao_component_service.save()
+    return kelpdao_component_service.to_result()
 
 
 def handle_rethink(vault_id, apy, wst_eth_value: float, period: int):
@@ -434,7 +562,7 @@ def handle_rethink(vault_id, apy, wst_eth_value: float, period: int):
         period,
         session,
     )
-    rethink_component_service.save()
+    return rethink_component_service.to_result()
 
 
 def handle_hype(vault_id, apy, period_reward_apy: float, period: int):
@@ -447,11 +575,11 @@ def handle_hype(vault_id, apy, period_reward_apy: float, period: int):
         period,
         session,
     )
-    hype_component_service.save()
+    return hype_component_service.to_result()
 
 
-# Keep existing component saving functions
-def save_pendle_components(
+# Component building functions
+def build_pendle_components(
     vault_id,
     current_apy,
     fixed_value,
@@ -468,10 +596,10 @@ def save_pendle_components(
         period,
         session,
     )
-    pendle_component_service.save()
+    return pendle_component_service.to_result()
 
 
-def save_pendle_jun2025_components(
+def build_pendle_jun2025_components(
     vault_id,
     current_apy,
     fixed_value,
@@ -488,24 +616,35 @@ def save_pendle_jun2025_components(
         period,
         session,
     )
-    service.save()
+    return service.to_result()
 
 
 def main():
     try:
         logger.info("Starting APY breakdown calculation for all vaults...")
         vaults = session.exec(select(Vault).where(Vault.is_active == True)).all()
+
+        # Phase 1: fetch every distinct external input once for all vaults
+        snapshot = prefetch_inputs(vaults)
+
+        # Phase 2: pure per-vault computation on the snapshot
+        results: List[VaultAPYResult] = []
         for vault in vaults:
             try:
-                calculator = VaultAPYCalculator(vault)
-                calculator.calculate_apy_components()
+                calculator = VaultAPYCalculator(vault, snapshot)
+                results.extend(calculator.calculate_apy_components())
             except Exception as vault_error:
                 logger.error(
                     f"An error occurred while processing vault {vault.name}: {vault_error}",
                     exc_info=True,
                 )
 
-        logger.info("Completed APY breakdown calculation for all vaults")
+        # Phase 3: one bulk upsert of every breakdown and component
+        bulk_upsert_vault_apy(session, results)
+
+        logger.info(
+            f"Completed APY breakdown calculation for all vaults ({len(results)} breakdowns)"
+        )
 
     except Exception as e:
         logger.error(
@@ -4,23 +4,17 @@ from typing import List, Tuple
 from more_itertools import tabulate
 from sqlalchemy import func
 from sqlmodel import Session, select
-from web3 import Web3
-from core import constants
 from log import setup_logging_to_console, setup_logging_to_file
 from models.campaigns import Campaign
-from models.onchain_transaction_history import OnchainTransactionHistory
 from models.referralcodes import ReferralCode
 from models.referrals import Referral
 from models.reward_thresholds import RewardThresholds
 from models.rewards import Reward
 from models.user import User
 from models.user_last_30_days_tvl import UserLast30DaysTVL
+from models.transaction_ledger import LedgerAction, TransactionLedger
 from models.user_portfolio import UserPortfolio
 from core.db import engine
-from models.vaults import Vault
-from services.vault_contract_service import VaultContractService
-from utils.extension_utils import to_amount_pendle, to_tx_aumount
-from utils.web3_utils import get_current_pps_by_block
 
 
 logging.basicConfig(level=logging.INFO)
@@ -29,124 +23,32 @@ logger = logging.getLogger(__name__)
 session = Session(engine)
 
 
-def calculate_withdrawals(
-    withdrawals: List[OnchainTransactionHistory],
+def sum_ledger(
+    address: str, action: LedgerAction, since: int = 0
 ) -> Tuple[float, float]:
-    service = VaultContractService()
-    total_withdrawal_value = 0
-    total_shares = 0
-
-    for withdrawal in withdrawals:
-        vault_addresses = service.get_vault_address_by_contract(
-            withdrawal.to_address.lower()
+    shares, amount = session.exec(
+        select(
+            func.coalesce(func.sum(TransactionLedger.shares), 0),
+            func.coalesce(func.sum(TransactionLedger.amount), 0),
         )
-        vault = session.exec(
-            select(Vault).where(
-                func.lower(withdrawal.to_address).in_(
-                    func.lower(addr) for addr in vault_addresses
-                )
-            )
-        ).first()
-
-        if not vault:
-            continue  # Skip if vault is not found
-
-        if vault.strategy_name == constants.PENDLE_HEDGING_STRATEGY:
-            withdrawal_amount = to_amount_pendle(
-                withdrawal.input, withdrawal.block_number, vault.network_chain
-            )
-            shares = withdrawal_amount
-        else:
-            abi, _ = service.get_vault_abi(vault=vault)
-            shares = to_tx_aumount(withdrawal.input)
-            vault_contract, _ = service.get_vault_contract(
-                vault.network_chain,
-                Web3.to_checksum_address(withdrawal.to_address),
-                abi,
-            )
-            pps = get_current_pps_by_block(vault_contract, withdrawal.block_number)
-            withdrawal_amount = shares * pps
-
-        total_withdrawal_value += withdrawal_amount
-        total_shares += shares
-
-    return total_shares, total_withdrawal_value
+        .where(TransactionLedger.user_address == address.lower())
+        .where(TransactionLedger.action == action)
+        .where(TransactionLedger.timestamp >= since)
+    ).one()
+    return float(shares), float(amount)
 
 
 def handler(address: str) -> Tuple[str, float, float, float]:
-    service = VaultContractService()
     today_timestamp = int(
         datetime(2024, 11, 2, 0, 0, 0, tzinfo=timezone.utc).timestamp()
     )
 
-    deposits_query = (
-        select(OnchainTransactionHistory)
-        .where(
-            OnchainTransactionHistory.method_id.in_(
-                [
-                    constants.MethodID.DEPOSIT2.value,
-                    constants.MethodID.DEPOSIT.value,
-                    constants.MethodID.DEPOSIT3.value,
-                ]
-            )
-        )
-        .where(func.lower(OnchainTransactionHistory.from_address) == address.lower())
+    _, total_deposit_value = sum_ledger(address, LedgerAction.DEPOSIT)
+    _, total_withdrawal_value = sum_ledger(address, LedgerAction.COMPLETE_WITHDRAWAL)
+    total_share, init_withdraw_vaule = sum_ledger(
+        address, LedgerAction.INITIATE_WITHDRAWAL, today_timestamp
     )
 
-    deposits = session.exec(deposits_query).all()
-
-    total_deposit_value = 0
-    for deposit in deposits:
-        vault_address = service.get_vault_address_by_contract(
-            deposit.to_address.lower()
-        )
-        vault = session.exec(
-            select(Vault).where(
-                func.lower(deposit.to_address).in_(
-                    func.lower(addr) for addr in vault_address
-                )
-            )
-        ).first()
-        total_deposit = 0
-        if vault.strategy_name == constants.PENDLE_HEDGING_STRATEGY:
-            total_deposit = to_amount_pendle(
-                deposit.input, deposit.block_number, vault.network_chain
-            )
-
-            total_deposit_value = total_deposit_value + total_deposit
-        else:
-            total_deposit = to_tx_aumount(deposit.input)
-            total_deposit_value = total_deposit_value + total_deposit
-
-    withdraw_query = (
-        select(OnchainTransactionHistory)
-        .where(
-            OnchainTransactionHistory.method_id.in_(
-                [
-                    constants.MethodID.COMPPLETE_WITHDRAWAL.value,
-                    constants.MethodID.COMPPLETE_WITHDRAWAL2.value,
-                ]
-            )
-        )
-        .where(func.lower(OnchainTransactionHistory.from_address) == address.lower())
-    )
-
-    withdraw = session.exec(withdraw_query).all()
-    _, total_withdrawal_value = calculate_withdrawals(withdraw)
-
-    init_withdraw_query = (
-        select(OnchainTransactionHistory)
-        .where(
-            OnchainTransactionHistory.method_id.in_([constants.MethodID.WITHDRAW.value])
-        )
-        .where(func.lower(OnchainTransactionHistory.from_address) == address.lower())
-        .where(OnchainTransactionHistory.timestamp >= today_timestamp)
-    )
-
-    init_withdraw = session.exec(init_withdraw_query).all()
-
-    total_share, init_withdraw_vaule = calculate_withdrawals(init_withdraw)
-
     return (
         address,
         total_deposit_value,
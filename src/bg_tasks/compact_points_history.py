@@ -0,0 +1,34 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlmodel import Session
+
+from core.config import settings
+from core.db import engine
+from log import setup_logging_to_console, setup_logging_to_file
+from services.points_history_compaction import compact_points_history
+
+session = Session(engine)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("compact_points_history")
+
+
+def main():
+    # Also the migration path for existing history: the first runs work through the
+    # backlog in short batches while the hourly points jobs keep writing
+    cutoff = datetime.now(timezone.utc) - timedelta(
+        days=settings.POINTS_HISTORY_RETENTION_DAYS
+    )
+    logger.info(f"Compacting points history older than {cutoff}...")
+    compacted = compact_points_history(
+        session, cutoff, settings.POINTS_HISTORY_COMPACTION_BATCH_SIZE
+    )
+    for table, count in compacted.items():
+        logger.info(f"{table}: {count} rows rolled up into daily rows")
+
+
+if __name__ == "__main__":
+    setup_logging_to_console()
+    setup_logging_to_file("compact_points_history", logger=logger)
+    main()
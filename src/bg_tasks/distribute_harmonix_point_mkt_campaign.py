@@ -1,6 +1,7 @@
 from datetime import datetime, timezone
 import logging
 import traceback
+from typing import Set
 from uuid import UUID
 import pandas as pd
 from sqlalchemy import func
@@ -15,6 +16,7 @@ from models.user import User
 from models.user_points import UserPointAudit, UserPoints
 from models.user_portfolio import PositionStatus, UserPortfolio
 from models.vaults import Vault
+from services.user_position_view_service import UserPositionViewService
 
 session = Session(engine)
 
@@ -25,12 +27,15 @@ logger = logging.getLogger("distribute_harmonix_point_mkt_campaign")
 logger.setLevel(logging.INFO)
 
 
-def process_excel_points(df: pd.DataFrame):
+def process_excel_points(df: pd.DataFrame) -> Set[UUID]:
     """
     Process points from Excel file and distribute to users
 
     Args:
         df: DataFrame containing Wallet and Points columns
+
+    Returns:
+        The ids of the vaults whose user points were updated
     """
     logger.info(f"Processing points for {len(df)} users")
 
@@ -56,6 +61,7 @@ def process_excel_points(df: pd.DataFrame):
         )
         raise ValueError("No active reward session found.")
 
+    vault_ids = set()
     # Process each wallet-points pair
     for _, row in df.iterrows():
         wallet = row["Wallet"]
@@ -96,6 +102,7 @@ def process_excel_points(df: pd.DataFrame):
 
             session.add(user_points)
             session.flush()
+            vault_ids.add(user_points.vault_id)
             # Add audit record
             audit = UserPointAudit(
                 user_points_id=user_points.id,
@@ -121,6 +128,7 @@ def process_excel_points(df: pd.DataFrame):
             continue
 
     session.commit()
+    return vault_ids
 
 
 def update_distribution_history_for_vaults(current_time):
@@ -167,7 +175,8 @@ def main():
         extracted_data = df[["Wallet", "Points"]]
 
         # Process the points
-        process_excel_points(extracted_data)
+        vault_ids = process_excel_points(extracted_data)
+        UserPositionViewService(session).refresh(vault_ids=vault_ids)
         current_time = datetime.now(tz=timezone.utc)
         update_distribution_history_for_vaults(current_time)
 
@@ -1,22 +1,29 @@
 """
-Query all UserPorfolio join with Vaults:
-- get vault_contract using get_vault_contract function
-- define get_user_state function to get user state from onchain using getUserVaultState function, getUserVaultState will return 4 values in tupple: deposit_amount, shares, profit, loss
-- define get_pps function to get price per share from onchain using pricePerShare function
+Reconcile UserPortfolio with the on-chain vault state:
+- group portfolios (or recent depositors) per vault
+- read every user's state in batched eth_call requests: getUserVaultState returns
+  4 values in tupple: deposit_amount, shares, profit, loss, getUserWithdrawlShares
+  the pending withdrawal shares. Both depend on msg.sender so they can't go through
+  Multicall3; pricePerShare is read once per vault
 - calculate following information:
 totalBalance = shares * pps
 
-- update user position with following information:
+- diff against the stored positions in memory and bulk update only the changed:
 - deposit_amount
 - shares
 - totalBalance
+- pending_withdrawal
 
-
+and log drift statistics per vault.
 """
 
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 import logging
-from sqlalchemy import func
+import math
+from typing import Dict, List, Optional, Tuple
+import uuid
+from sqlalchemy import func, update
 from sqlmodel import Session, select
 from web3 import Web3
 from web3.contract import Contract
@@ -29,8 +36,10 @@ from log import setup_logging_to_console
 from models.onchain_transaction_history import OnchainTransactionHistory
 from models.user_portfolio import PositionStatus, UserPortfolio
 from models.vaults import Vault
+from services.user_position_view_service import UserPositionViewService
 from services.vault_contract_service import VaultContractService
-import time
+from services.vault_registry import vault_registry
+from utils.web3_utils import batch_eth_call
 
 session = Session(engine)
 
@@ -38,6 +47,47 @@ session = Session(engine)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("fix_user_position_from_onchain")
 
+BSX_VAULT_ID = uuid.UUID("1679bfd4-48eb-4b77-bf27-c2dae0712f91")
+RECONCILED_FIELDS = [
+    "init_deposit",
+    "total_shares",
+    "total_balance",
+    "pending_withdrawal",
+]
+
+
+@dataclass
+class OnchainUserState:
+    init_deposit: float
+    total_shares: float
+    total_balance: float
+    pending_withdrawal: float
+
+
+@dataclass
+class DriftReport:
+    vault_name: str
+    checked: int = 0
+    changed: int = 0
+    failed: int = 0
+    created: int = 0
+    total_balance_drift: float = 0.0
+    max_total_balance_drift: float = 0.0
+    changed_fields: Dict[str, int] = field(default_factory=dict)
+
+    def log(self):
+        logger.info(
+            "Drift %s | checked=%s changed=%s created=%s failed=%s | total_balance drift sum=%.6f max=%.6f | fields=%s",
+            self.vault_name,
+            self.checked,
+            self.changed,
+            self.created,
+            self.failed,
+            self.total_balance_drift,
+            self.max_total_balance_drift,
+            self.changed_fields,
+        )
+
 
 def get_vault_contract(vault: Vault, contract_abi_name) -> tuple[Contract, Web3]:
     w3 = Web3(Web3.HTTPProvider(constants.NETWORK_RPC_URLS[vault.network_chain]))
@@ -75,6 +125,103 @@ def get_pps(vault_contract: Contract) -> int:
     return pps
 
 
+def read_user_states(
+    vault_contract: Contract, w3: Web3, user_addresses: List[str]
+) -> Dict[str, Optional[OnchainUserState]]:
+    """Read the on-chain state of every user of one vault in batched requests."""
+    pps = get_pps(vault_contract)
+
+    vault_states = batch_eth_call(
+        w3,
+        [
+            (vault_contract.functions.getUserVaultState(), address)
+            for address in user_addresses
+        ],
+    )
+    withdrawal_shares = batch_eth_call(
+        w3,
+        [
+            (vault_contract.functions.getUserWithdrawlShares(), address)
+            for address in user_addresses
+        ],
+    )
+
+    states: Dict[str, Optional[OnchainUserState]] = {}
+    for address, user_state, pending_withdrawal in zip(
+        user_addresses, vault_states, withdrawal_shares
+    ):
+        if user_state is None or pending_withdrawal is None:
+            states[address] = None
+            continue
+        states[address] = OnchainUserState(
+            init_deposit=user_state[0] / 1e6,
+            total_shares=user_state[1] / 1e6,
+            total_balance=(user_state[1] * pps) / 1e12,
+            pending_withdrawal=pending_withdrawal / 1e6,
+        )
+    return states
+
+
+def diff_portfolio(
+    portfolio: UserPortfolio, state: OnchainUserState, report: DriftReport
+) -> Optional[dict]:
+    """Return the changed values of a portfolio, None when it matches the chain."""
+    changes = {}
+    for field_name in RECONCILED_FIELDS:
+        stored = getattr(portfolio, field_name) or 0
+        onchain = getattr(state, field_name)
+        if not math.isclose(stored, onchain, rel_tol=1e-9, abs_tol=1e-6):
+            changes[field_name] = onchain
+            report.changed_fields[field_name] = (
+                report.changed_fields.get(field_name, 0) + 1
+            )
+
+    drift = abs((portfolio.total_balance or 0) - state.total_balance)
+    report.total_balance_drift += drift
+    report.max_total_balance_drift = max(report.max_total_balance_drift, drift)
+    if not changes:
+        return None
+    report.changed += 1
+    return {"id": portfolio.id, **changes}
+
+
+def reconcile_vault_portfolios(
+    vault: Vault,
+    portfolios: List[UserPortfolio],
+    states: Dict[str, Optional[OnchainUserState]],
+) -> Tuple[List[dict], DriftReport]:
+    report = DriftReport(vault_name=vault.name)
+    updates = []
+    for portfolio in portfolios:
+        report.checked += 1
+        state = states.get(portfolio.user_address.lower())
+        if state is None:
+            report.failed += 1
+            logger.error(
+                "Could not read on-chain state for user %s, vault %s",
+                portfolio.user_address,
+                vault.name,
+            )
+            continue
+        change = diff_portfolio(portfolio, state, report)
+        if change:
+            updates.append(change)
+    return updates, report
+
+
+def bulk_update_portfolios(updates: List[dict]):
+    if not updates:
+        return
+    # Rows only differ in the changed columns, group them so every executemany
+    # updates the same set of columns
+    by_columns: Dict[tuple, List[dict]] = {}
+    for row in updates:
+        by_columns.setdefault(tuple(sorted(row)), []).append(row)
+    for rows in by_columns.values():
+        session.execute(update(UserPortfolio), rows)
+    session.commit()
+
+
 def get_recent_deposits_query(timestamp_threshold: int):
     return (
         select(OnchainTransactionHistory)
@@ -89,160 +236,63 @@ def get_recent_deposits_query(timestamp_threshold: int):
             )
         )
         .where(OnchainTransactionHistory.timestamp >= timestamp_threshold)
-    )
-
-
-def fetch_vault(deposit, vault_contract_service):
-    vault_address = vault_contract_service.get_vault_address_by_contract(
-        deposit.to_address.lower()
-    )
-    return session.exec(
-        select(Vault).where(
-            func.lower(Vault.contract_address).in_(
-                func.lower(addr) for addr in vault_address
-            )
-        )
-    ).first()
-
-
-def get_user_portfolio_data(vault_contract, user_address):
-    user_state = get_user_state(vault_contract, user_address)
-    pps = get_pps(vault_contract)
-    pending_withdrawal = get_pending_withdrawal_shares(vault_contract, user_address)
-    total_balance = (user_state[1] * pps) / 1e12
-
-    init_deposit = user_state[0] / 1e6
-    total_shares = user_state[1] / 1e6
-    pending_withdrawal = pending_withdrawal / 1e6
-
-    return init_deposit, total_shares, total_balance, pending_withdrawal
-
-
-def update_or_create_user_portfolio(
-    vault: Vault, deposit: OnchainTransactionHistory, vault_contract
-):
-    logger.info(
-        "Starting update_or_create_user_portfolio for user %s, vault %s",
-        deposit.from_address,
-        vault.id,
-    )
-
-    user_portfolio = session.exec(
-        select(UserPortfolio).where(
-            (func.lower(UserPortfolio.user_address) == func.lower(deposit.from_address))
-            & (UserPortfolio.vault_id == vault.id)
-            & (UserPortfolio.status == PositionStatus.ACTIVE)
-        )
-    ).first()
-
-    init_deposit, total_shares, total_balance, pending_withdrawal = (
-        get_user_portfolio_data(vault_contract, deposit.from_address)
-    )
-
-    if user_portfolio is None:
-        logger.info(
-            "Creating new user portfolio for user %s, vault %s with init_deposit=%s, total_shares=%s, total_balance=%s, pending_withdrawal=%s",
-            deposit.from_address,
-            vault.id,
-            init_deposit,
-            total_shares,
-            total_balance,
-            pending_withdrawal,
-        )
-
-        entry_price = get_pps_by_blocknumber(
-            vault_contract, block_number=deposit.block_number
-        )
-        user_portfolio = UserPortfolio(
-            vault_id=vault.id,
-            user_address=deposit.from_address,
-            init_deposit=init_deposit,
-            total_shares=total_shares,
-            total_balance=total_balance,
-            pending_withdrawal=pending_withdrawal,
-            trade_start_date=datetime.fromtimestamp(deposit.timestamp),
-            status=PositionStatus.ACTIVE,
-            entry_price=entry_price,
-        )
-    else:
-        logger.info(
-            "Updating existing user portfolio for user %s, vault %s from init_deposit=%s to %s, total_shares=%s to %s, total_balance=%s to %s, pending_withdrawal=%s to %s",
-            deposit.from_address,
-            vault.id,
-            user_portfolio.init_deposit,
-            init_deposit,
-            user_portfolio.total_shares,
-            total_shares,
-            user_portfolio.total_balance,
-            total_balance,
-            user_portfolio.pending_withdrawal,
-            pending_withdrawal,
-        )
-        user_portfolio.init_deposit = init_deposit
-        user_portfolio.total_shares = total_shares
-        user_portfolio.total_balance = total_balance
-        user_portfolio.pending_withdrawal = pending_withdrawal
-
-    session.add(user_portfolio)
-    session.commit()
-
-    logger.info(
-        "Completed update_or_create_user_portfolio for user %s, vault %s",
-        deposit.from_address,
-        vault.id,
+        .order_by(OnchainTransactionHistory.timestamp)
     )
 
 
 def fix_incorrect_user_portfolio():
     vault_contract_service = VaultContractService()
-    subquery = select(UserPortfolio).where(
-        UserPortfolio.status == PositionStatus.ACTIVE,
-        UserPortfolio.vault_id != "1679bfd4-48eb-4b77-bf27-c2dae0712f91",
-    )
+    user_portfolios = session.exec(
+        select(UserPortfolio).where(
+            UserPortfolio.status == PositionStatus.ACTIVE,
+            UserPortfolio.vault_id != BSX_VAULT_ID,
+        )
+    ).all()
+    vaults = {
+        vault.id: vault
+        for vault in session.exec(select(Vault).where(Vault.is_active)).all()
+    }
 
-    user_portfolio = session.exec(subquery).all()
+    portfolios_by_vault: Dict[uuid.UUID, List[UserPortfolio]] = {}
+    for portfolio in user_portfolios:
+        portfolios_by_vault.setdefault(portfolio.vault_id, []).append(portfolio)
 
     logger.info("Starting to process fix_incorrect_user_portfolio...")
-    for user in user_portfolio:
-        try:
-            vault = session.exec(
-                select(Vault).where(Vault.is_active).where(Vault.id == user.vault_id)
-            ).first()
-
-            # Check if vault is None and log an error if it is
-            if vault is None:
-                logger.error(
-                    "Vault not found for user %s with vault_id %s",
-                    user.user_address,
-                    user.vault_id,
-                )
-                continue  # Skip to the next user if vault is not found
+    for vault_id, portfolios in portfolios_by_vault.items():
+        vault = vaults.get(vault_id)
+        # Check if vault is None and log an error if it is
+        if vault is None:
+            logger.error(
+                "Vault not found for %s users with vault_id %s",
+                len(portfolios),
+                vault_id,
+            )
+            continue
 
+        try:
             abi_name, _ = vault_contract_service.get_vault_abi(vault=vault)
             if abi_name != "RockOnyxDeltaNeutralVault":
                 continue
 
-            vault_contract, _ = get_vault_contract(vault, abi_name)
-            init_deposit, total_shares, total_balance, pending_withdrawal = (
-                get_user_portfolio_data(vault_contract, user.user_address)
+            vault_contract, w3 = get_vault_contract(vault, abi_name)
+            states = read_user_states(
+                vault_contract,
+                w3,
+                list({p.user_address.lower() for p in portfolios}),
             )
-
-            user.init_deposit = init_deposit
-            user.total_shares = total_shares
-            user.total_balance = total_balance
-            user.pending_withdrawal = pending_withdrawal
-
-            session.add(user)
+            updates, report = reconcile_vault_portfolios(vault, portfolios, states)
+            bulk_update_portfolios(updates)
+            UserPositionViewService(session).refresh(vault_ids=[vault.id])
+            report.log()
         except Exception as e:
+            session.rollback()
             logger.error(
-                "Error processing fix_incorrect_user_portfolio_function for address %s: %s",
-                user.user_address,
+                "Error processing fix_incorrect_user_portfolio_function for vault %s: %s",
+                vault.name,
                 str(e),
                 exc_info=True,
             )
 
-    session.commit()
-
 
 def fix_user_position_from_onchain():
     vault_contract_service = VaultContractService()
@@ -254,30 +304,76 @@ def fix_user_position_from_onchain():
 
     logger.info("Starting to process fix_user_position_from_onchain...")
 
+    # Keep the first deposit per user and vault
+    first_deposits: Dict[uuid.UUID, Dict[str, OnchainTransactionHistory]] = {}
+    vaults: Dict[uuid.UUID, Vault] = {}
     for deposit in deposits:
-        try:
-            vault = fetch_vault(deposit, vault_contract_service)
+        vault = vault_registry.get_by_address(deposit.to_address)
+        if vault is None or vault.id == BSX_VAULT_ID:
+            continue
+        vaults[vault.id] = vault
+        first_deposits.setdefault(vault.id, {}).setdefault(
+            deposit.from_address.lower(), deposit
+        )
 
+    for vault_id, user_deposits in first_deposits.items():
+        vault = vaults[vault_id]
+        try:
             abi_name, _ = vault_contract_service.get_vault_abi(vault=vault)
-            if vault.id == "1679bfd4-48eb-4b77-bf27-c2dae0712f91":  # bsx
-                continue
-
-            vault_contract, _ = get_vault_contract(vault, abi_name)
-
-            update_or_create_user_portfolio(
-                vault,
-                deposit,
-                vault_contract,
-            )
-            logger.info(
-                "Successfully processed fix_user_position_from_onchain for address: %s",
-                deposit.from_address,
-            )
+            vault_contract, w3 = get_vault_contract(vault, abi_name)
+
+            portfolios = session.exec(
+                select(UserPortfolio)
+                .where(UserPortfolio.vault_id == vault.id)
+                .where(UserPortfolio.status == PositionStatus.ACTIVE)
+                .where(
+                    func.lower(UserPortfolio.user_address).in_(list(user_deposits))
+                )
+            ).all()
+            existing = {p.user_address.lower(): p for p in portfolios}
+
+            states = read_user_states(vault_contract, w3, list(user_deposits))
+            updates, report = reconcile_vault_portfolios(vault, portfolios, states)
+
+            for user_address, deposit in user_deposits.items():
+                state = states.get(user_address)
+                if user_address in existing or state is None:
+                    continue
+                logger.info(
+                    "Creating new user portfolio for user %s, vault %s with init_deposit=%s, total_shares=%s, total_balance=%s, pending_withdrawal=%s",
+                    deposit.from_address,
+                    vault.id,
+                    state.init_deposit,
+                    state.total_shares,
+                    state.total_balance,
+                    state.pending_withdrawal,
+                )
+                entry_price = get_pps_by_blocknumber(
+                    vault_contract, block_number=deposit.block_number
+                )
+                session.add(
+                    UserPortfolio(
+                        vault_id=vault.id,
+                        user_address=deposit.from_address,
+                        init_deposit=state.init_deposit,
+                        total_shares=state.total_shares,
+                        total_balance=state.total_balance,
+                        pending_withdrawal=state.pending_withdrawal,
+                        trade_start_date=datetime.fromtimestamp(deposit.timestamp),
+                        status=PositionStatus.ACTIVE,
+                        entry_price=entry_price,
+                    )
+                )
+                report.created += 1
 
+            bulk_update_portfolios(updates)
+            session.commit()
+            UserPositionViewService(session).refresh(list(user_deposits), [vault.id])
+            report.log()
         except Exception as e:
+            session.rollback()
             logger.error(
-                "Error processing fix_user_position_from_onchain for address %s, vault: %s; Error: %s",
-                deposit.from_address,
+                "Error processing fix_user_position_from_onchain for vault: %s; Error: %s",
                 vault.name,
                 str(e),
                 exc_info=True,
@@ -15,6 +15,7 @@ from models.vault_rewards import VaultRewards
 from models.vaults import Vault, VaultCategory
 from schemas.earned_restaking_rewards import EarnedRestakingRewards
 from services.market_data import get_price
+from services.user_position_view_service import UserPositionViewService
 
 session = Session(engine)
 
@@ -185,6 +186,7 @@ def main():
             )
 
     session.commit()
+    UserPositionViewService(session).refresh(vault_ids=[vault.id for vault in vaults])
 
 
 if __name__ == "__main__":
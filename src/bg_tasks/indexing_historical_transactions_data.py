@@ -5,12 +5,13 @@ import traceback
 import click
 from web3 import Web3
 from sqlmodel import Session, select
+from core.bulk_writer import bulk_write
 from core.db import engine
 from log import setup_logging_to_console, setup_logging_to_file
 from models.onchain_transaction_history import OnchainTransactionHistory
 from models.vaults import NetworkChain, Vault
 from services import arbiscan_service, basescan_service, etherscan_service
-from sqlalchemy.exc import IntegrityError
+from services.transaction_ledger_service import TransactionLedgerService
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -62,6 +63,7 @@ def index_transactions(contract_addresses, chain: NetworkChain):
             raise ValueError("Chain not supported")
 
         with Session(engine) as session:
+            ledger_service = TransactionLedgerService(session)
             for address in contract_addresses:
                 latest_block = get_latest_block(session, address, chain)
                 page = 1
@@ -75,30 +77,25 @@ def index_transactions(contract_addresses, chain: NetworkChain):
                         time.sleep(0.5)
                         break
 
-                    for tx in transactions:
-                        if tx["isError"] == "1":
-                            continue
-
-                        tx_data = process_transaction(tx, chain)
-                        # Check if transaction already exists
-                        existing_tx = session.exec(
-                            select(OnchainTransactionHistory).where(
-                                OnchainTransactionHistory.tx_hash == tx_data["tx_hash"]
-                            )
-                        ).first()
-
-                        if not existing_tx:
-                            new_transaction = OnchainTransactionHistory(**tx_data)
-                            session.add(new_transaction)
-
-                    try:
-                        session.commit()
-                    except IntegrityError:
-                        session.rollback()
-                        logger.warning(
-                            f"Transaction {tx_data['tx_hash']} already exists. Skipping."
-                        )
-                    
+                    rows = [
+                        process_transaction(tx, chain)
+                        for tx in transactions
+                        if tx["isError"] != "1"
+                    ]
+                    # One COPY per page, the transactions already indexed are
+                    # skipped on tx_hash
+                    columns = list(OnchainTransactionHistory.model_fields)
+                    inserted = bulk_write(
+                        session, OnchainTransactionHistory, rows, returning=columns
+                    )
+                    session.commit()
+                    new_transactions = [
+                        OnchainTransactionHistory(**dict(zip(columns, row)))
+                        for row in inserted
+                    ]
+                    # Decode once here so readers only sum the ledger
+                    ledger_service.enrich(new_transactions)
+
                     page += 1
                     time.sleep(0.5)
 
@@ -185,5 +182,14 @@ def live():
     sys.exit(0)
 
 
+@cli.command()
+@click.option("--batch-size", default=500, help="Transactions decoded per batch")
+def backfill_ledger(batch_size: int):
+    setup_logging_to_console()
+    with Session(engine) as session:
+        enriched = TransactionLedgerService(session).backfill(batch_size)
+    logger.info(f"Transaction ledger backfill completed, {enriched} rows written")
+
+
 if __name__ == "__main__":
     cli()
@@ -9,11 +9,12 @@ from sqlmodel import Session, select
 from web3 import Web3
 from core import constants
 from core.abi_reader import read_abi
+from core.bulk_writer import bulk_write
 from core.config import settings
 from core.db import engine
 from log import setup_logging_to_console, setup_logging_to_file
 from models.onchain_transaction_history import OnchainTransactionHistory
-from models.user_assets_history import UserHoldingAssetHistory
+from models.user_assets_history import UserHoldingAssetHistory, UserHoldingAssetLatest
 from models.user_holding_job_state import UserHoldingJobState
 from models.vaults import Vault
 from schemas.vault_state import OldVaultState, VaultState
@@ -140,6 +141,38 @@ def get_rseth_balance(chain, vault_address, block_number):
     return rseth_balance
 
 
+def update_latest_holdings(session: Session, histories: List[UserHoldingAssetHistory]):
+    if not histories:
+        return
+
+    # Later rows of the same user win, as in the history; older blocks don't
+    # roll the snapshot back, see UPSERT_SPECS
+    bulk_write(
+        session,
+        UserHoldingAssetLatest,
+        [
+            {
+                "chain": history.chain,
+                "user_address": history.user_address,
+                "asset_amount": history.asset_amount,
+                "block_number": history.block_number,
+                "timestamp": history.timestamp,
+            }
+            for history in histories
+        ],
+    )
+
+
+def write_holdings(session: Session, histories: List[UserHoldingAssetHistory]):
+    """Append `histories` and move the latest holdings, with one COPY each."""
+    bulk_write(
+        session,
+        UserHoldingAssetHistory,
+        [history.model_dump(exclude={"id"}) for history in histories],
+    )
+    update_latest_holdings(session, histories)
+
+
 def calculate_rseth_holding(
     session: Session,
     tx_history: Tuple[Any, str, List[OnchainTransactionHistory]],
@@ -227,6 +260,7 @@ def calculate_rseth_holding(
                 logger.info(f"Total shares: {vault_total_shares}")
 
                 # when fund is fully deployed, we need to calculate the user holding
+                histories = []
                 for user, data in user_positions.items():
                     user_shares = data["shares"]
                     user_pool_share_pct = user_shares / vault_total_shares
@@ -249,10 +283,11 @@ def calculate_rseth_holding(
                         block_number=tx.block_number,
                         chain=chain,
                     )
-                    session.add(user_history)
+                    histories.append(user_history)
 
                     user_positions[user]["deposit_amount"] = 0
 
+                write_holdings(session, histories)
                 cumulative_deployment_fund = 0  # reset the deployment fund
                 session.commit()
 
@@ -276,6 +311,7 @@ def calculate_rseth_holding(
                 logger.info(f"Total shares: {vault_total_shares}")
 
                 # when fund is fully deployed, we need to calculate the user holding
+                histories = []
                 for user, data in user_positions.items():
                     user_shares = data["shares"]
                     user_pool_share_pct = user_shares / vault_total_shares
@@ -298,8 +334,9 @@ def calculate_rseth_holding(
                         block_number=tx.block_number,
                         chain=chain,
                     )
-                    session.add(user_history)
+                    histories.append(user_history)
 
+                write_holdings(session, histories)
                 logger.info("------- // END close position //----")
 
         if len(transactions) > 0:
@@ -1,7 +1,7 @@
 import logging
 from datetime import datetime, timedelta, timezone
 import traceback
-from typing import List
+from typing import Dict
 import uuid
 from sqlalchemy import func
 from sqlmodel import Session, select
@@ -21,6 +21,8 @@ from models.vaults import Vault
 from core.db import engine
 from core import constants
 from sqlmodel import Session, select
+from services.user_position_view_service import UserPositionViewService
+from services.vault_registry import vault_registry
 from utils.vault_utils import get_vault_currency_price
 
 logging.basicConfig(level=logging.INFO)
@@ -151,9 +153,7 @@ def harmonix_distribute_points(current_time):
             .where(UserPoints.session_id == reward_session.session_id)
             .where(UserPoints.vault_id == portfolio.vault_id)
         )
-        vault = session.exec(
-            select(Vault).where(Vault.id == portfolio.vault_id)
-        ).first()
+        vault = vault_registry.get_by_id(portfolio.vault_id)
 
         user_points = session.exec(user_points_query).first()
         # if  user points is none then insert user points
@@ -190,6 +190,8 @@ def harmonix_distribute_points(current_time):
                 partner_name=constants.HARMONIX,
                 session_id=reward_session.session_id,
                 created_at=current_time,
+                last_history_point=points,
+                last_history_at=current_time,
             )
             session.add(user_points)
             user_points_history = UserPointsHistory(
@@ -209,17 +211,19 @@ def harmonix_distribute_points(current_time):
                 break
         else:
             logger.info(f"Updating existing user points for {portfolio.user_address}")
-            # get last user points history
-            user_points_history_query = (
-                select(UserPointsHistory)
-                .where(UserPointsHistory.user_points_id == user_points.id)
-                .order_by(UserPointsHistory.created_at.desc())
-            )
-            user_points_history = session.exec(user_points_history_query).first()
+            last_history_at = user_points.last_history_at
+            if last_history_at is None:
+                # get last user points history
+                user_points_history_query = (
+                    select(UserPointsHistory)
+                    .where(UserPointsHistory.user_points_id == user_points.id)
+                    .order_by(UserPointsHistory.created_at.desc())
+                )
+                user_points_history = session.exec(user_points_history_query).first()
+                last_history_at = user_points_history.created_at
             # Calculate points to be distributed
             duration_hours = (
-                current_time
-                - user_points_history.created_at.replace(tzinfo=timezone.utc)
+                current_time - last_history_at.replace(tzinfo=timezone.utc)
             ).total_seconds() / 3600
 
             currency_price = get_vault_currency_price(vault.vault_currency)
@@ -239,6 +243,8 @@ def harmonix_distribute_points(current_time):
             previous_points = user_points.points
             user_points.points += points
             user_points.updated_at = current_time
+            user_points.last_history_point = points
+            user_points.last_history_at = current_time
             logger.info(
                 f"Updated total points from {previous_points} to {user_points.points} with user: {portfolio.user_address}"
             )
@@ -260,172 +266,66 @@ def harmonix_distribute_points(current_time):
     reward_session.points_distributed = total_points_distributed
     reward_session.update_date = current_time
     session.commit()
+    UserPositionViewService(session).refresh(
+        vault_ids={portfolio.vault_id for portfolio in active_portfolios}
+    )
     logger.info("Points distribution job completed.")
     update_referral_points(
         current_time, reward_session, reward_session_config, total_points_distributed
     )
 
 
+def get_referee_points_by_referrer(reward_session) -> Dict[uuid.UUID, float]:
+    """Sum the latest history points of every referee, grouped by referrer.
+
+    One aggregate query replaces the per-referee lookups. The latest history
+    point is read from the `UserPoints` pointer, so the history table isn't scanned.
+    """
+    query = (
+        select(Referral.referrer_id, func.sum(UserPoints.last_history_point))
+        .join(User, User.user_id == Referral.referee_id)
+        .join(UserPoints, UserPoints.wallet_address == User.wallet_address)
+        .where(UserPoints.partner_name == constants.HARMONIX)
+        .where(UserPoints.session_id == reward_session.session_id)
+        .group_by(Referral.referrer_id)
+    )
+    return {referrer_id: points or 0 for referrer_id, points in session.exec(query)}
+
+
 def update_referral_points(
     current_time, reward_session, reward_session_config, total_points_distributed
 ):
     logger.info("Starting referral points distribution process...")
-    referrals_query = select(Referral).order_by(Referral.referrer_id)
-    referrals = session.exec(referrals_query).all()
-    logger.info(f"Retrieved {len(referrals)} total referral records")
-
-    referrals_copy = referrals.copy()
-    unique_referrers = []
-    for referral in referrals_copy:
-        if referral.referrer_id not in unique_referrers:
-            unique_referrers.append(referral.referrer_id)
-    logger.info(f"Identified {len(unique_referrers)} unique referrers for processing")
-
-    # Create a dictionary mapping referrer_ids to their referrals
-    referrals_by_referrer = {}
-    for referral in referrals:
-        if referral.referrer_id not in referrals_by_referrer:
-            referrals_by_referrer[referral.referrer_id] = []
-        referrals_by_referrer[referral.referrer_id].append(referral)
-
-    for referrer_id in unique_referrers:
-        # Get referrer user info for better logging
-        referrer_user = session.exec(
-            select(User).where(User.user_id == referrer_id)
-        ).first()
-        logger.info(
-            f"Processing referrer | ID: {referrer_id} | Wallet: {referrer_user.wallet_address}"
+    referrer_ids = session.exec(
+        select(Referral.referrer_id).distinct().order_by(Referral.referrer_id)
+    ).all()
+    logger.info(f"Identified {len(referrer_ids)} unique referrers for processing")
+
+    referee_points_by_referrer = get_referee_points_by_referrer(reward_session)
+    existing_referral_points = {
+        referral_points.user_id: referral_points
+        for referral_points in session.exec(
+            select(ReferralPoints).where(
+                ReferralPoints.session_id == reward_session.session_id
+            )
+        ).all()
+    }
+
+    # Bounds depend on what was distributed before, so referrers are applied in order
+    for referrer_id in referrer_ids:
+        total_referee_points = referee_points_by_referrer.get(referrer_id, 0)
+        referral_points = adjust_referral_points_within_bounds(
+            reward_session_config, total_points_distributed, total_referee_points
         )
-
-        # O(1) lookup instead of O(n) filtering
-        referrer_referrals = referrals_by_referrer.get(referrer_id, [])
-        logger.info(f"Found {len(referrer_referrals)} referees for current referrer")
-
-        referral_points_query = (
-            select(ReferralPoints)
-            .where(ReferralPoints.user_id == referrer_id)
-            .where(ReferralPoints.session_id == reward_session.session_id)
+        logger.info(
+            f"Referrer {referrer_id} | referees points: {total_referee_points:,.2f} | referral points: {referral_points:,.2f}"
         )
-        user_referral_points = session.exec(referral_points_query).first()
 
-        total_referee_points = 0  # Track total points earned by referees
+        user_referral_points = existing_referral_points.get(referrer_id)
         if user_referral_points:
-            logger.info(
-                f"Found existing referral points record for referrer {referrer_id}"
-            )
-            referral_points = 0
-            for referral in referrer_referrals:
-                user_points = get_user_points_by_referee_id(
-                    referral, reward_session, session
-                )
-                if not user_points:
-                    logger.info(f"No points found for referee {referral.referee_id}")
-                    continue
-                user_points_list = [point.id for point in user_points]
-                # get points from points_history
-                points_sum_query = select(
-                    func.sum(UserPointsHistory.point).label("total_points")
-                ).where(
-                    UserPointsHistory.id.in_(
-                        select(UserPointsHistory.id)
-                        .where(UserPointsHistory.user_points_id.in_(user_points_list))
-                        .distinct(UserPointsHistory.user_points_id)
-                        .order_by(
-                            UserPointsHistory.user_points_id,
-                            UserPointsHistory.created_at.desc(),
-                        )
-                    )
-                )
-
-                user_points_history_point = session.exec(points_sum_query).first()
-                user_points_history_point = user_points_history_point or 0
-                referee_points = user_points_history_point
-                total_referee_points += referee_points
-                logger.info(
-                    f"Referee {referral.referee_id} earned {referee_points:,.2f} points"
-                )
-                referral_points += referee_points
-
-            logger.info(
-                f"Total points earned by all referees: {total_referee_points:,.2f}"
-            )
-            logger.info(
-                f"Raw referral points before adjustment: {referral_points:,.2f}"
-            )
-            referral_points = adjust_referral_points_within_bounds(
-                reward_session_config, total_points_distributed, referral_points
-            )
-            logger.info(f"Adjusted referral points: {referral_points:,.2f}")
-            logger.info(
-                f"Current total referral points: {user_referral_points.points:,.2f}"
-            )
-            logger.info(
-                f"New total after adding: {(user_referral_points.points + referral_points):,.2f}"
-            )
-
             user_referral_points.points += referral_points
             user_referral_points.updated_at = current_time
-            referral_points_history = ReferralPointsHistory(
-                referral_points_id=user_referral_points.id,
-                point=referral_points,
-                created_at=current_time,
-            )
-            session.add(referral_points_history)
-            session.commit()
-            total_points_distributed += referral_points
-            if total_points_distributed >= reward_session_config.max_points:
-                logger.info("Maximum points limit reached - ending reward session")
-                reward_session.end_date = current_time
-                session.commit()
-                break
         else:
-            logger.info(
-                f"Creating new referral points record for referrer {referrer_id}"
-            )
-            referral_points = 0
-            for referral in referrer_referrals:
-                user_points = get_user_points_by_referee_id(
-                    referral, reward_session, session
-                )
-                if not user_points:
-                    logger.info(f"No points found for referee {referral.referee_id}")
-                    continue
-                user_points_list = [point.id for point in user_points]
-                # get points from points_history
-                points_sum_query = select(
-                    func.sum(UserPointsHistory.point).label("total_points")
-                ).where(
-                    UserPointsHistory.id.in_(
-                        select(UserPointsHistory.id)
-                        .where(UserPointsHistory.user_points_id.in_(user_points_list))
-                        .distinct(UserPointsHistory.user_points_id)
-                        .order_by(
-                            UserPointsHistory.user_points_id,
-                            UserPointsHistory.created_at.desc(),
-                        )
-                    )
-                )
-
-                user_points_history_point = session.exec(points_sum_query).first()
-                user_points_history_point = user_points_history_point or 0
-                referee_points = user_points_history_point
-                total_referee_points += referee_points
-                logger.info(
-                    f"Referee {referral.referee_id} earned {referee_points:,.2f} points"
-                )
-                referral_points += referee_points
-
-            logger.info(
-                f"Total points earned by all referees: {total_referee_points:,.2f}"
-            )
-            logger.info(
-                f"Raw referral points before adjustment: {referral_points:,.2f}"
-            )
-            referral_points = adjust_referral_points_within_bounds(
-                reward_session_config, total_points_distributed, referral_points
-            )
-            logger.info(f"Adjusted referral points: {referral_points:,.2f}")
-
             user_referral_points = ReferralPoints(
                 id=uuid.uuid4(),
                 user_id=referrer_id,
@@ -434,24 +334,20 @@ def update_referral_points(
                 updated_at=current_time,
                 session_id=reward_session.session_id,
             )
-            session.add(user_referral_points)
-            referral_points_history = ReferralPointsHistory(
+        session.add(user_referral_points)
+        session.add(
+            ReferralPointsHistory(
                 referral_points_id=user_referral_points.id,
                 point=referral_points,
                 created_at=current_time,
             )
-            session.add(referral_points_history)
-            session.commit()
-            total_points_distributed += referral_points
-            if total_points_distributed >= reward_session_config.max_points:
-                logger.info("Maximum points limit reached - ending reward session")
-                reward_session.end_date = current_time
-                session.commit()
-                break
-        logger.info(
-            f"Completed processing referrer {referrer_id} with {len(referrer_referrals)} referees"
         )
-        logger.info("-------------------------------------------")
+
+        total_points_distributed += referral_points
+        if total_points_distributed >= reward_session_config.max_points:
+            logger.info("Maximum points limit reached - ending reward session")
+            reward_session.end_date = current_time
+            break
 
     session.commit()
     logger.info(
@@ -469,23 +365,6 @@ def adjust_referral_points_within_bounds(
     return referral_points
 
 
-def get_user_points_by_referee_id(
-    referral, reward_session, session: Session
-) -> List[UserPoints]:
-    user_query = select(User).where(User.user_id == referral.referee_id)
-    user = session.exec(user_query).first()
-    if not user:
-        return None
-    user_points_query = (
-        select(UserPoints)
-        .where(UserPoints.wallet_address == user.wallet_address)
-        .where(UserPoints.partner_name == constants.HARMONIX)
-        .where(UserPoints.session_id == reward_session.session_id)
-    )
-    user_points = session.exec(user_points_query).all()
-    return user_points
-
-
 def update_vault_points(current_time):
     active_vaults_query = select(Vault).where(Vault.is_active == True)
     active_vaults = session.exec(active_vaults_query).all()
@@ -0,0 +1,26 @@
+import logging
+
+from sqlmodel import Session
+
+from core.db import engine
+from log import setup_logging_to_console, setup_logging_to_file
+from services.user_position_view_service import UserPositionViewService
+
+session = Session(engine)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("refresh_user_position_view")
+
+
+def main():
+    # The listeners and the jobs refresh the rows they change, this rebuild
+    # fills the view the first time and catches the writes of other scripts
+    logger.info("Refreshing user_position_view...")
+    count = UserPositionViewService(session).refresh()
+    logger.info(f"Refreshed {count} user_position_view rows")
+
+
+if __name__ == "__main__":
+    setup_logging_to_console()
+    setup_logging_to_file("refresh_user_position_view", logger=logger)
+    main()
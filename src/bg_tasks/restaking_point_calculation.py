@@ -25,6 +25,7 @@ from models.user_portfolio import PositionStatus, UserPortfolio
 from models.vaults import Vault, VaultCategory
 from schemas import EarnedRestakingPoints
 from services import renzo_service, zircuit_service, kelpdao_service, kelpgain_service
+from services.user_position_view_service import UserPositionViewService
 
 session = Session(engine)
 
@@ -316,6 +317,7 @@ def main():
             )
 
     session.commit()
+    UserPositionViewService(session).refresh(vault_ids=[vault.id for vault in vaults])
 
 
 if __name__ == "__main__":
@@ -1,10 +1,12 @@
 import logging
 from datetime import datetime, timedelta, timezone
+from typing import List
+
+from sqlalchemy import func, update
 from sqlmodel import Session, select
 from core import constants
 from log import setup_logging_to_console, setup_logging_to_file
 from models.campaigns import Campaign
-from models.referralcodes import ReferralCode
 from models.referrals import Referral
 from models.reward_thresholds import RewardThresholds
 from models.rewards import Reward
@@ -20,6 +22,43 @@ logger = logging.getLogger(__name__)
 session = Session(engine)
 
 
+def get_latest_rewards(session: Session, user_ids, campaign_name: str = None):
+    """Latest reward (by start date) of each user of `user_ids`, in one query.
+
+    `in_campaign` tells whether any reward of the user belongs to
+    `campaign_name`.
+    """
+    partition = {"partition_by": Reward.user_id}
+    ranked = (
+        select(
+            Reward.reward_id,
+            Reward.user_id,
+            Reward.reward_percentage,
+            Reward.end_date,
+            Reward.campaign_name,
+            func.row_number()
+            .over(**partition, order_by=Reward.start_date.desc())
+            .label("rank"),
+            func.bool_or(Reward.campaign_name == campaign_name)
+            .over(**partition)
+            .label("in_campaign"),
+        )
+        .where(Reward.user_id.in_(user_ids))
+        .subquery()
+    )
+    rows = session.execute(select(ranked).where(ranked.c.rank == 1)).all()
+    return {row.user_id: row for row in rows}
+
+
+def apply_reward_transitions(
+    session: Session, closed_rewards: List[dict], new_rewards: List[Reward]
+):
+    if closed_rewards:
+        session.execute(update(Reward), closed_rewards)
+    session.add_all(new_rewards)
+    session.commit()
+
+
 def distribute_referral_101_rewards(current_time):
     with Session(engine) as session:
         campaign_101 = session.exec(
@@ -34,40 +73,46 @@ def distribute_referral_101_rewards(current_time):
             "Starting reward distribution job for campaign: %s", campaign_101.name
         )
 
-        unique_referrers = []
-        referrals_query = select(Referral).order_by(Referral.created_at)
-        referrals = session.exec(referrals_query).all()
+        referrals = session.exec(
+            select(Referral.referrer_id, Referral.referee_id).order_by(
+                Referral.created_at
+            )
+        ).all()
         logger.info("Retrieved %d referrals", len(referrals))
+        last_rewards = get_latest_rewards(
+            session, select(Referral.referrer_id), campaign_101.name
+        )
+        # Largest position of each referee, a referee without user or
+        # position has no entry
+        max_balances = dict(
+            session.exec(
+                select(Referral.referee_id, func.max(UserPortfolio.total_balance))
+                .join(User, User.user_id == Referral.referee_id)
+                .join(UserPortfolio, UserPortfolio.user_address == User.wallet_address)
+                .group_by(Referral.referee_id)
+            ).all()
+        )
 
+        # Referrers walked in referral order, the first REWARD_HIGH_LIMIT ones
+        # joining the campaign get the high reward
+        unique_referrers = set()
+        closed_rewards = []
+        new_rewards = []
         for referral in referrals:
-            logger.debug("Processing referral: %s", referral)
             if len(unique_referrers) >= constants.REWARD_HIGH_LIMIT:
                 logger.info("Reached reward high limit, stopping further processing.")
                 break
 
-            if referral.referrer_id in unique_referrers:
-                logger.debug(
-                    "Referrer %s already processed, skipping.", referral.referrer_id
-                )
+            referrer_id = referral.referrer_id
+            if referrer_id in unique_referrers:
                 continue
 
-            reward_query = (
-                select(Reward)
-                .where(Reward.user_id == referral.referrer_id)
-                .order_by(Reward.start_date)
-            )
-            rewards = session.exec(reward_query).all()
-            if rewards is None or len(rewards) == 0:
+            last_reward = last_rewards.get(referrer_id)
+            if last_reward is None:
                 continue
+            if last_reward.in_campaign:
+                unique_referrers.add(referrer_id)
 
-            is_already_in_101_campaign = False
-            for reward in rewards:
-                if reward.campaign_name == campaign_101.name:
-                    unique_referrers.append(referral.referrer_id)
-                    is_already_in_101_campaign = True
-                    break
-
-            last_reward = rewards[-1]
             if last_reward.campaign_name == campaign_101.name:
                 if (
                     last_reward.end_date is not None
@@ -75,58 +120,59 @@ def distribute_referral_101_rewards(current_time):
                 ):
                     logger.debug(
                         "Last reward for referrer %s is expired, updating status and adding new reward.",
-                        referral.referrer_id,
+                        referrer_id,
                     )
-                    last_reward.status = constants.Status.CLOSED
-                    new_reward = Reward(
-                        user_id=referral.referrer_id,
-                        reward_percentage=constants.REWARD_DEFAULT_PERCENTAGE,
-                        start_date=current_time,
-                        end_date=None,
-                        campaign_name=constants.Campaign.DEFAULT.value,
+                    closed_rewards.append(
+                        {
+                            "reward_id": last_reward.reward_id,
+                            "status": constants.Status.CLOSED.value,
+                        }
+                    )
+                    new_rewards.append(
+                        Reward(
+                            user_id=referrer_id,
+                            reward_percentage=constants.REWARD_DEFAULT_PERCENTAGE,
+                            start_date=current_time,
+                            end_date=None,
+                            campaign_name=constants.Campaign.DEFAULT.value,
+                        )
                     )
-                    session.add(new_reward)
-                    session.commit()
                 continue
 
-            if is_already_in_101_campaign:
+            if last_reward.in_campaign:
                 continue
 
-            user_query = select(User).where(User.user_id == referral.referee_id)
-            user = session.exec(user_query).first()
-            if not user:
-                logger.debug("No user found with ID %s, skipping.", referral.referee_id)
+            max_balance = max_balances.get(referral.referee_id)
+            if (
+                max_balance is None
+                or max_balance < constants.MIN_FUNDS_FOR_HIGH_REWARD
+            ):
                 continue
 
-            user_portfolio_query = select(UserPortfolio).where(
-                UserPortfolio.user_address == user.wallet_address
+            logger.debug("High reward added for referrer %s", referrer_id)
+            closed_rewards.append(
+                {
+                    "reward_id": last_reward.reward_id,
+                    "status": constants.Status.CLOSED.value,
+                    "end_date": current_time,
+                }
             )
-            user_portfolios = session.exec(user_portfolio_query).all()
-            for user_portfolio in user_portfolios:
-                if user_portfolio.total_balance >= constants.MIN_FUNDS_FOR_HIGH_REWARD:
-                    logger.debug(
-                        "User portfolio balance is sufficient for high reward, processing referrer %s",
-                        referral.referrer_id,
-                    )
-                    last_reward.status = constants.Status.CLOSED
-                    last_reward.end_date = current_time
-                    high_reward = Reward(
-                        user_id=referral.referrer_id,
-                        reward_percentage=constants.REWARD_HIGH_PERCENTAGE,
-                        start_date=current_time,
-                        end_date=current_time
-                        + timedelta(constants.HIGH_REWARD_DURATION_DAYS),
-                        campaign_name=campaign_101.name,
-                    )
-                    session.add(high_reward)
-                    session.commit()
-                    logger.debug(
-                        "High reward added for referrer %s", referral.referrer_id
-                    )
-                    unique_referrers.append(referral.referrer_id)
-                    break
+            new_rewards.append(
+                Reward(
+                    user_id=referrer_id,
+                    reward_percentage=constants.REWARD_HIGH_PERCENTAGE,
+                    start_date=current_time,
+                    end_date=current_time
+                    + timedelta(constants.HIGH_REWARD_DURATION_DAYS),
+                    campaign_name=campaign_101.name,
+                )
+            )
+            unique_referrers.add(referrer_id)
 
-        logger.info("Reward distribution job completed.")
+        apply_reward_transitions(session, closed_rewards, new_rewards)
+        logger.info(
+            "Reward distribution job completed, %d rewards added.", len(new_rewards)
+        )
 
 
 def distribute_kol_and_partner_rewards(current_time):
@@ -140,51 +186,56 @@ def distribute_kol_and_partner_rewards(current_time):
     rewards_thresholds = session.exec(
         select(RewardThresholds).order_by(RewardThresholds.tier)
     ).all()
-    user_query = select(User).where(
+    user_ids = select(User.user_id).where(
         User.tier.in_([constants.UserTier.KOL.value, constants.UserTier.PARTNER.value])
     )
-    users = session.exec(user_query).all()
-    for user in users:
-        reward_query = (
-            select(Reward)
-            .where(Reward.user_id == user.user_id)
-            .order_by(Reward.start_date)
-        )
-        rewards = session.exec(reward_query).all()
+    last_rewards = get_latest_rewards(session, user_ids)
+    # Latest 30 days TVL of each user
+    tvls = dict(
+        session.exec(
+            select(UserLast30DaysTVL.user_id, UserLast30DaysTVL.total_value_locked)
+            .where(UserLast30DaysTVL.user_id.in_(user_ids))
+            .distinct(UserLast30DaysTVL.user_id)
+            .order_by(UserLast30DaysTVL.user_id, UserLast30DaysTVL.created_at.desc())
+        ).all()
+    )
 
-        last_reward = rewards[-1]
+    closed_rewards = []
+    new_rewards = []
+    for user_id in session.exec(user_ids).all():
+        last_reward = last_rewards.get(user_id)
+        if last_reward is None:
+            logger.warning("User %s has no reward, skipping.", user_id)
+            continue
         if (
             last_reward.campaign_name == constants.Campaign.KOL_AND_PARTNER.value
             or last_reward.campaign_name == constants.Campaign.DEFAULT.value
         ):
-            reward_percentage = get_reward_percentage_by_user_tvl(
-                rewards_thresholds, user
+            reward_percentage = get_reward_percentage_by_tvl(
+                rewards_thresholds, tvls.get(user_id, 0)
             )
             if reward_percentage != last_reward.reward_percentage:
-                last_reward.status = constants.Status.CLOSED
-                last_reward.end_date = current_time
-                new_reward = Reward(
-                    user_id=user.user_id,
-                    reward_percentage=reward_percentage,
-                    start_date=current_time,
-                    end_date=None,
-                    campaign_name=constants.Campaign.KOL_AND_PARTNER.value,
+                closed_rewards.append(
+                    {
+                        "reward_id": last_reward.reward_id,
+                        "status": constants.Status.CLOSED.value,
+                        "end_date": current_time,
+                    }
+                )
+                new_rewards.append(
+                    Reward(
+                        user_id=user_id,
+                        reward_percentage=reward_percentage,
+                        start_date=current_time,
+                        end_date=None,
+                        campaign_name=constants.Campaign.KOL_AND_PARTNER.value,
+                    )
                 )
-                session.add(new_reward)
-        session.commit()
+    apply_reward_transitions(session, closed_rewards, new_rewards)
 
 
-def get_reward_percentage_by_user_tvl(rewards_thresholds, user):
-    tvl = 0
+def get_reward_percentage_by_tvl(rewards_thresholds, tvl: float):
     reward_percentage = 0
-    user_last_30_days_tvl_query = (
-        select(UserLast30DaysTVL)
-        .where(UserLast30DaysTVL.user_id == user.user_id)
-        .order_by(UserLast30DaysTVL.created_at.desc())
-    )
-    user_last_30_days_tvl = session.exec(user_last_30_days_tvl_query).first()
-    if user_last_30_days_tvl is not None:
-        tvl = user_last_30_days_tvl.total_value_locked
     for rewards_threshold in rewards_thresholds:
         if tvl >= rewards_threshold.threshold:
             reward_percentage = rewards_threshold.commission_rate
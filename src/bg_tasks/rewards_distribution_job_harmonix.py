@@ -1,6 +1,7 @@
 from datetime import datetime, timezone, timedelta
 from collections import defaultdict
 import traceback
+import uuid
 import pandas as pd
 from typing import Dict, List, Tuple
 
@@ -10,10 +11,13 @@ from sqlalchemy import create_engine, select, text
 from sqlmodel import Session
 from web3 import Web3
 from core import constants
+from core.bulk_writer import bulk_write
 from core.db import engine
 from datetime import datetime, timedelta
 
 from models.user_rewards import UserRewardAudit, UserRewards
+from services.log_decoder import VaultEventFamily, decode_event
+from services.user_position_view_service import UserPositionViewService
 
 DEPOSIT_METHOD_ID = "0x71b8dc69"
 WITHDRAW_METHOD_ID = "0x087fad4c"
@@ -137,35 +141,6 @@ def get_logs_from_tx_hash(tx_hash: str, topic: str = None) -> list:
     return logs
 
 
-def _extract_pendle_event(entry):
-    # Parse the account parameter from the topics field
-    from_address = None
-    if len(entry["topics"]) >= 2:
-        from_address = f'0x{entry["topics"][1].hex()[26:]}'  # For deposit event
-
-    # token_in = None
-    # if len(entry["topics"]) >= 3:
-    #     token_in = f'0x{entry["topics"][2].hex()[26:]}'
-
-    # Parse the amount and shares parameters from the data field
-    data = entry["data"].hex()
-
-    if entry["topics"][0].hex() == settings.PENDLE_COMPLETE_WITHDRAW_EVENT_TOPIC:
-        pt_amount = int(data[2:66], 16) / 1e18
-        sc_amount = int(data[66 : 66 + 64], 16) / 1e6
-        shares = int(data[66 + 64 : 66 + 2 * 64], 16) / 1e6
-        total_amount = int(data[66 + 2 * 64 : 66 + 3 * 64], 16) / 1e6
-        eth_amount = 0
-    else:
-        pt_amount = int(data[2:66], 16) / 1e18
-        eth_amount = int(data[66 : 66 + 64], 16) / 1e18
-        sc_amount = int(data[66 + 64 : 66 + 2 * 64], 16) / 1e6
-        total_amount = int(data[66 + 64 * 2 : 66 + 3 * 64], 16) / 1e6
-        shares = int(data[66 + 3 * 64 : 66 + 4 * 64], 16) / 1e6
-
-    return pt_amount, eth_amount, sc_amount, total_amount, shares, from_address
-
-
 def get_amount_from_tx(row) -> float:
     """
     Dựa vào 1 row trong df,
@@ -185,12 +160,10 @@ def get_amount_from_tx(row) -> float:
 
         # Mỗi tx deposit có thể có 1 log?
         # Ta parse log đầu tiên (hoặc lặp qua logs)
-        event_data = _extract_pendle_event(logs[0])
-        # event_data = (pt_amount, eth_amount, sc_amount, total_amount, shares, from_address)
+        event_data = decode_event(VaultEventFamily.pendle, logs[0])
         # Tuỳ theo “bạn muốn xài sc_amount hay total_amount là deposit”
         # Giả sử "total_amount" = deposit stable
-        total_amount = event_data[3]
-        return total_amount
+        return event_data.value
 
     elif row["method_id"] == WITHDRAW_METHOD_ID:
         # Tương tự, filter log withdraw
@@ -198,92 +171,78 @@ def get_amount_from_tx(row) -> float:
         if not logs:
             return 0.0
 
-        event_data = _extract_pendle_event(logs[0])
+        event_data = decode_event(VaultEventFamily.pendle, logs[0])
         # Giả sử “total_amount” = số stable rút ra
-        total_amount = event_data[3]
-        return total_amount
+        return event_data.value
 
     return 0.0  # default
 
 
-def process_reward_record(session: Session, row, current_date: datetime):
-    """Process and insert/update rewards for a single record."""
-    try:
-        # Get existing reward record for the user if any
-        user_reward = session.exec(
-            select(UserRewards)
-            .where(UserRewards.vault_id == HYPE_VAULT_ID)
-            .where(UserRewards.wallet_address == row["user_address"])
-        ).first()
-        if user_reward:
-            user_reward = user_reward[0]
-
-        # Store old reward value for audit
-        old_value = user_reward.total_reward if user_reward else 0
-        print(f"Processing reward for {row['user_address']}...")
-        print(f"Current reward value: {old_value}")
-
-        try:
-            # Update existing reward record
-            if user_reward:
-                user_reward.total_reward += row["reward"]
-                user_reward.updated_at = current_date
-                print(f"Updated reward: {old_value} -> {user_reward.total_reward}")
-            # Create new reward record
-            else:
-                user_reward = UserRewards(
-                    vault_id=HYPE_VAULT_ID,
-                    wallet_address=row["user_address"],
-                    total_reward=row["reward"],
-                    created_at=current_date,
-                    updated_at=current_date,
-                    partner_name=constants.HARMONIX,
-                )
-                session.add(user_reward)
-                print(f"Created new reward record: {row['reward']}")
-
-            session.commit()
-
-            # Create audit record
-            user_reward_audit = UserRewardAudit(
-                user_points_id=user_reward.id,
-                old_value=old_value,
-                new_value=user_reward.total_reward,
-                created_at=current_date,
-            )
-            session.add(user_reward_audit)
-
-            # Commit changes
-            session.commit()
-            print(f"Successfully processed reward for {row['user_address'][:8]}")
-
-        except Exception as db_error:
-            print(f"Database operation failed: {str(db_error)}")
-            session.rollback()
-            raise
-
-    except Exception as e:
-        print(f"Failed to process rewards for user {row['user_address']}: {str(e)}")
-        if session:
-            session.rollback()
-        raise
-
-
 def insert_rewards_to_db(reward_df):
-    """Insert all rewards from DataFrame into database."""
+    """Add the rewards of `reward_df` to the user totals, with an audit row per user.
+
+    The totals are incremented in the database by one COPY bulk write, so a
+    concurrent writer's update isn't lost, and the audit rows are built from
+    the totals it returns.
+    """
     current_date = datetime.now(tz=timezone.utc)
     session = Session(engine)
 
     print(f"Starting to process {len(reward_df)} reward records...")
+    if reward_df.empty:
+        # No reward config covers the current date
+        print("No rewards to process")
+        return
+
+    rewards = reward_df.groupby("user_address")["reward"].sum()
+    reward_ids = {
+        wallet_address: reward_id
+        for reward_id, wallet_address in session.execute(
+            select(UserRewards.id, UserRewards.wallet_address)
+            .where(UserRewards.vault_id == HYPE_VAULT_ID)
+            .where(UserRewards.wallet_address.in_(list(rewards.index)))
+        ).all()
+    }
 
-    for index, row in reward_df.iterrows():
-        try:
-            process_reward_record(session, row, current_date)
-        except Exception as e:
-            print(f"Error processing row {index}: {str(e)}")
-            traceback.print_exc()
-            continue
+    reward_rows = [
+        {
+            "id": reward_ids.get(user_address) or uuid.uuid4(),
+            "vault_id": HYPE_VAULT_ID,
+            "wallet_address": user_address,
+            "total_reward": reward,
+            "partner_name": constants.HARMONIX,
+            "created_at": current_date,
+            "updated_at": current_date,
+        }
+        for user_address, reward in rewards.items()
+    ]
+
+    try:
+        # Upserted on the id, the reward is added to the stored total
+        totals = dict(
+            bulk_write(
+                session, UserRewards, reward_rows, returning=["id", "total_reward"]
+            )
+        )
+        audit_rows = [
+            {
+                "user_points_id": row["id"],
+                "old_value": totals[row["id"]] - row["total_reward"],
+                "new_value": totals[row["id"]],
+                "created_at": current_date,
+            }
+            for row in reward_rows
+        ]
+        bulk_write(session, UserRewardAudit, audit_rows)
+        session.commit()
+    except Exception:
+        session.rollback()
+        traceback.print_exc()
+        raise
+    created = len(reward_rows) - len(reward_ids)
+    print(f"Updated {len(reward_ids)} and created {created} reward records")
 
+    UserPositionViewService(session).refresh(vault_ids=[HYPE_VAULT_ID])
     print("Completed processing all rewards")
 
 
@@ -488,30 +447,35 @@ class RewardsDistributionJob:
                 )
 
 
-# Your SQL query
-query = """
-    SELECT * FROM public.onchain_transaction_history
-    WHERE method_id in ('0x71b8dc69', '0x087fad4c', '0xb51d1d4f') 
-    AND to_address = lower('0xc0e2b9ECABcA12D5024B2C11788B1cFaf972E5aa')
-    ORDER BY timestamp ASC
-"""
+def main():
+    # Your SQL query
+    query = """
+        SELECT * FROM public.onchain_transaction_history
+        WHERE method_id in ('0x71b8dc69', '0x087fad4c', '0xb51d1d4f') 
+        AND to_address = lower('0xc0e2b9ECABcA12D5024B2C11788B1cFaf972E5aa')
+        ORDER BY timestamp ASC
+    """
+
+    # Execute the query and fetch results
+    with session.begin():
+        # Execute query and load into DataFrame
+        df = pd.read_sql_query(query, engine)
+
+    # Convert timestamp to datetime
+    df["datetime"] = pd.to_datetime(df["timestamp"], unit="s")
 
-# Execute the query and fetch results
-with session.begin():
-    # Execute query and load into DataFrame
-    df = pd.read_sql_query(query, engine)
+    df_sorted = df.sort_values(
+        by="datetime"
+    )  # sắp xếp chronologically (cột 'datetime' là kiểu datetime)
+    df_sorted = df_sorted.reset_index(drop=True)
 
-# Convert timestamp to datetime
-df["datetime"] = pd.to_datetime(df["timestamp"], unit="s")
+    # Initialize and run the job
+    job = RewardsDistributionJob()
+    reward_df = job.distribute_rewards(df_sorted)
 
-df_sorted = df.sort_values(
-    by="datetime"
-)  # sắp xếp chronologically (cột 'datetime' là kiểu datetime)
-df_sorted = df_sorted.reset_index(drop=True)
+    # Process rewards (using your existing DB logic)
+    insert_rewards_to_db(reward_df)
 
-# Initialize and run the job
-job = RewardsDistributionJob()
-reward_df = job.distribute_rewards(df_sorted)
 
-# Process rewards (using your existing DB logic)
-insert_rewards_to_db(reward_df)
+if __name__ == "__main__":
+    main()
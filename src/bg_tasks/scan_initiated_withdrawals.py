@@ -1,7 +1,9 @@
 import asyncio
+from collections import defaultdict
 from datetime import datetime, timedelta, timezone
 import logging
-from typing import List, Optional, Tuple
+import threading
+from typing import Dict, List, Optional, Tuple
 import pandas as pd
 from sqlalchemy import text
 from sqlmodel import Session, col, select
@@ -11,17 +13,22 @@ from bg_tasks.utils import (
     get_user_withdrawals,
 )
 from core import constants
+from core.abi_reader import read_abi
 from core.db import engine
 from log import setup_logging_to_console, setup_logging_to_file
+from models.initiated_withdrawal_amount import InitiatedWithdrawalAmount
 from models.vaults import Vault
 from notifications import telegram_bot
 from notifications.message_builder import build_transaction_message
 import schemas
 from services.market_data import get_price
 from services.vault_contract_service import VaultContractService
+from services.vault_registry import vault_registry
 from web3 import Web3
+from web3.contract import Contract
 
-from utils.extension_utils import convert_timedelta_to_time
+from utils.extension_utils import convert_timedelta_to_time, to_tx_aumount
+from utils.web3_utils import multicall
 
 session = Session(engine)
 
@@ -32,9 +39,112 @@ logger = logging.getLogger("scan_initiated_withdrawals")
 logger.setLevel(logging.INFO)
 
 
+class WithdrawalAmountResolver:
+    """Resolves initiated withdrawal amounts in batches.
+
+    Shares are decoded from the stored transaction input, so the only RPC
+    needed is the price per share at the transaction block. Pending rows are
+    grouped by block and every vault address seen at that block is read in one
+    multicall. Web3 providers and contracts are built once and shared between
+    the worker threads.
+    """
+
+    def __init__(self, service: VaultContractService):
+        self.service = service
+        self._lock = threading.Lock()
+        self._web3: Dict[str, Web3] = {}
+        self._contracts: Dict[Tuple[str, str], Contract] = {}
+
+    def get_web3(self, network_chain: str) -> Web3:
+        with self._lock:
+            if network_chain not in self._web3:
+                self._web3[network_chain] = Web3(
+                    Web3.HTTPProvider(constants.NETWORK_RPC_URLS[network_chain])
+                )
+            return self._web3[network_chain]
+
+    def get_contract(self, vault: Vault, address: str) -> Contract:
+        key = (vault.network_chain, address.lower())
+        w3 = self.get_web3(vault.network_chain)
+        with self._lock:
+            if key not in self._contracts:
+                abi_name, _ = self.service.get_vault_abi(vault=vault)
+                self._contracts[key] = w3.eth.contract(
+                    address=Web3.to_checksum_address(address), abi=read_abi(abi_name)
+                )
+            return self._contracts[key]
+
+    def _get_pps_at_block(
+        self, vault: Vault, addresses: List[str], block_number: int
+    ) -> Dict[str, Optional[float]]:
+        contracts = [self.get_contract(vault, address) for address in addresses]
+        try:
+            results = multicall(
+                self.get_web3(vault.network_chain),
+                [contract.functions.pricePerShare() for contract in contracts],
+                block_identifier=block_number,
+            )
+        except Exception as e:
+            logger.warning(
+                f"Multicall failed for {vault.name} at block {block_number}, falling back to single calls: {e}"
+            )
+            results = []
+            for contract in contracts:
+                try:
+                    results.append(
+                        contract.functions.pricePerShare().call(
+                            block_identifier=block_number
+                        )
+                    )
+                except Exception as inner_e:
+                    logger.error(
+                        f"Error reading pricePerShare of {contract.address} at block {block_number}: {inner_e}"
+                    )
+                    results.append(None)
+
+        # Same decimals as get_current_pps_by_block
+        return {
+            address.lower(): (pps / 1e6 if pps is not None else None)
+            for address, pps in zip(addresses, results)
+        }
+
+    def resolve(self, vault: Vault, rows: list) -> Dict[str, float]:
+        """Return the withdrawal amount of each row, keyed by tx hash."""
+        if vault.strategy_name == constants.PENDLE_HEDGING_STRATEGY:
+            return {
+                row.tx_hash: self.service.get_withdraw_amount(
+                    vault,
+                    Web3.to_checksum_address(row.to_address),
+                    row.input,
+                    row.block_number,
+                )
+                for row in rows
+            }
+
+        rows_by_block = defaultdict(list)
+        for row in rows:
+            rows_by_block[row.block_number].append(row)
+
+        amounts: Dict[str, float] = {}
+        for block_number, block_rows in rows_by_block.items():
+            addresses = list({row.to_address.lower() for row in block_rows})
+            pps_by_address = self._get_pps_at_block(vault, addresses, block_number)
+            for row in block_rows:
+                pps = pps_by_address.get(row.to_address.lower())
+                if pps is None:
+                    logger.error(
+                        f"Error processing withdrawal item {row.id}: missing price per share at block {block_number}"
+                    )
+                    continue
+                amounts[row.tx_hash] = to_tx_aumount(row.input) * pps
+        return amounts
+
+
 class InitiatedWithdrawalWatcherJob:
     def __init__(self, session: Session):
         self.session = session
+        self.service = VaultContractService()
+        self.resolver = WithdrawalAmountResolver(self.service)
 
         utc_now = datetime.now(timezone.utc)
         self.start_date = utc_now - timedelta(days=3 * 30)
@@ -58,13 +168,45 @@ class InitiatedWithdrawalWatcherJob:
         ).all()
         return result
 
-    def get_withdrawals_for_current_day(
+    def _get_cached_amounts(self, tx_hashes: List[str]) -> Dict[str, float]:
+        if not tx_hashes:
+            return {}
+        rows = self.session.exec(
+            select(InitiatedWithdrawalAmount).where(
+                col(InitiatedWithdrawalAmount.tx_hash).in_(tx_hashes)
+            )
+        ).all()
+        return {row.tx_hash: row.amount for row in rows}
+
+    def _cache_amounts(self, vault: Vault, rows: list, amounts: Dict[str, float]):
+        for row in rows:
+            if row.tx_hash in amounts:
+                self.session.add(
+                    InitiatedWithdrawalAmount(
+                        tx_hash=row.tx_hash,
+                        vault_id=vault.id,
+                        block_number=row.block_number,
+                        amount=amounts[row.tx_hash],
+                    )
+                )
+        self.session.commit()
+
+    async def _resolve_vault_amounts(
+        self, vault: Vault, rows: list
+    ) -> Dict[str, float]:
+        try:
+            return await asyncio.to_thread(self.resolver.resolve, vault, rows)
+        except Exception as e:
+            logger.error(
+                f"Error resolving withdrawal amounts for vault {vault.name}: {e}",
+                exc_info=True,
+            )
+            return {}
+
+    async def get_withdrawals_for_current_day(
         self, vaults: List[Vault]
     ) -> Tuple[List[schemas.OnchainTransactionHistory], dict[str, float]]:
         try:
-            service = VaultContractService()
-            pool_amounts: dict[str, float] = {}
-
             # Filter eligible vaults
             eligible_slugs = {
                 constants.HYPE_DELTA_NEUTRAL_SLUG,
@@ -75,18 +217,24 @@ class InitiatedWithdrawalWatcherJob:
             }
             eligible_vaults = [v for v in vaults if v.slug in eligible_slugs]
 
-            # Batch get withdrawal pool amounts
-            for vault in eligible_vaults:
-                pool_amounts[vault.contract_address.lower()] = (
-                    service.get_withdrawal_pool_amount(vault)
+            # Read withdrawal pool amounts of all vaults concurrently
+            pool_amount_list = await asyncio.gather(
+                *(
+                    asyncio.to_thread(self.service.get_withdrawal_pool_amount, vault)
+                    for vault in eligible_vaults
                 )
+            )
+            pool_amounts: dict[str, float] = {
+                vault.contract_address.lower(): amount
+                for vault, amount in zip(eligible_vaults, pool_amount_list)
+            }
 
             # Complex query to get latest initiated withdrawals without completions
             query = get_pending_initiated_withdrawals_query()
 
-            result = []
+            pending: List[Tuple[Vault, list]] = []
             for vault in eligible_vaults:
-                vault_addresses = service.get_vault_address_historical(vault)
+                vault_addresses = vault_registry.get_addresses(vault)
                 params = {
                     "withdraw_method_id_1": constants.MethodID.WITHDRAW.value,
                     "complete_method_id": constants.MethodID.COMPPLETE_WITHDRAWAL.value,
@@ -94,34 +242,46 @@ class InitiatedWithdrawalWatcherJob:
                     "start_ts": self.start_date_timestamp,
                     "end_ts": self.end_date_timestamp,
                 }
+                pending.append((vault, self.session.execute(query, params).all()))
 
-                init_withdraws = self.session.execute(query, params).all()
+            # Amounts are immutable per transaction, only resolve the ones not seen before
+            amounts = self._get_cached_amounts(
+                [item.tx_hash for _, rows in pending for item in rows]
+            )
+            unresolved = [
+                (vault, [item for item in rows if item.tx_hash not in amounts])
+                for vault, rows in pending
+            ]
+            unresolved = [(vault, rows) for vault, rows in unresolved if rows]
+            logger.info(
+                f"Resolving {sum(len(rows) for _, rows in unresolved)} of "
+                f"{sum(len(rows) for _, rows in pending)} pending withdrawals"
+            )
 
-                for item in init_withdraws:
-                    try:
-                        amount = service.get_withdraw_amount(
-                            vault,
-                            Web3.to_checksum_address(item.to_address),
-                            item.input,
-                            item.block_number,
-                        )
+            resolved = await asyncio.gather(
+                *(self._resolve_vault_amounts(vault, rows) for vault, rows in unresolved)
+            )
+            for (vault, rows), vault_amounts in zip(unresolved, resolved):
+                self._cache_amounts(vault, rows, vault_amounts)
+                amounts.update(vault_amounts)
 
-                        date = datetime.fromtimestamp(item.timestamp, tz=timezone.utc)
-                        result.append(
-                            {
-                                "tx_hash": item.tx_hash,
-                                "age": convert_timedelta_to_time(self.end_date - date),
-                                "date": date.strftime("%Y-%m-%d %H:%M:%S"),
-                                "vault_address": item.to_address,
-                                "amount": amount,
-                                "vault_name": vault.name,
-                            }
-                        )
-                    except Exception as inner_e:
-                        logger.error(
-                            f"Error processing withdrawal item {item.id}: {inner_e}",
-                            exc_info=True,
-                        )
+            result = []
+            for vault, rows in pending:
+                for item in rows:
+                    if item.tx_hash not in amounts:
+                        continue
+
+                    date = datetime.fromtimestamp(item.timestamp, tz=timezone.utc)
+                    result.append(
+                        {
+                            "tx_hash": item.tx_hash,
+                            "age": convert_timedelta_to_time(self.end_date - date),
+                            "date": date.strftime("%Y-%m-%d %H:%M:%S"),
+                            "vault_address": item.to_address,
+                            "amount": amounts[item.tx_hash],
+                            "vault_name": vault.name,
+                        }
+                    )
 
             return result, pool_amounts
         except Exception as e:
@@ -130,95 +290,97 @@ class InitiatedWithdrawalWatcherJob:
             )
             return [], {}
 
-    def get_pendle_vault_withdrawals_for_current_day(
+    def _build_pendle_vault_report(self, vault: Vault, init_withdraws: list) -> dict:
+        pendle_vault_contract = self.resolver.get_contract(
+            vault, vault.contract_address
+        )
+        sc_withdraw_pool_amount, pt_withdraw_pool_amount = (
+            self.service.get_withdraw_pool_amount_pendle_vault(vault)
+        )
+
+        result = []
+        for item in init_withdraws:
+            try:
+                # getUserWithdraw depends on msg.sender, so it can't go through multicall
+                pt_amount, sc_amount, shares = get_user_withdrawals(
+                    item.from_address, pendle_vault_contract
+                )
+
+                result.append(
+                    {
+                        "pt_amount": pt_amount,
+                        "sc_amount": sc_amount,
+                        "shares": shares,
+                    }
+                )
+
+            except Exception as inner_e:
+                logger.error(
+                    f"Error processing withdrawal item {item.id}: {inner_e}",
+                    exc_info=True,
+                )
+                continue
+        # Create a DataFrame for the withdrawal details
+        df_withdrawal_details = pd.DataFrame(result)
+
+        # Calculate total Pendle withdrawal from df_withdrawal_details
+        total_sc_withdrawn = (
+            df_withdrawal_details["sc_amount"].sum()
+            if "sc_amount" in df_withdrawal_details
+            else 0
+        )
+        total_pt_withdrawn = (
+            df_withdrawal_details["pt_amount"].sum()
+            if "pt_amount" in df_withdrawal_details
+            else 0
+        )
+        total_shares_withdrawn = (
+            df_withdrawal_details["shares"].sum()
+            if "shares" in df_withdrawal_details
+            else 0
+        )
+        # Create a report
+        return {
+            "total_sc_withdrawn": total_sc_withdrawn,
+            "total_pt_withdrawn": total_pt_withdrawn,
+            "total_shares_withdrawn": total_shares_withdrawn,
+            "sc_withdraw_pool_amount": sc_withdraw_pool_amount,
+            "pt_withdraw_pool_amount": pt_withdraw_pool_amount,
+            "total_sc_amount_needed": round(
+                total_sc_withdrawn - sc_withdraw_pool_amount, 2
+            ),
+            "total_pt_amount_needed": round(
+                total_pt_withdrawn - pt_withdraw_pool_amount, 2
+            ),
+            "vault": vault.name,
+            "vault_address": vault.contract_address,
+        }
+
+    async def get_pendle_vault_withdrawals_for_current_day(
         self, vaults: List[Vault]
     ) -> List[dict]:
         try:
-            reports = []
+            query = get_pending_initiated_withdrawals_query_pendle_vault()
+            pending = []
             for vault in vaults:
-                service = VaultContractService()
-                abi_name, _ = service.get_vault_abi(vault=vault)
-                pendle_vault_contract, w3 = service.get_vault_contract(
-                    vault.network_chain, vault.contract_address, abi_name
-                )
-                query = get_pending_initiated_withdrawals_query_pendle_vault()
-                vault_addresses = service.get_vault_address_historical(vault)
-                sc_withdraw_pool_amount, pt_withdraw_pool_amount = (
-                    service.get_withdraw_pool_amount_pendle_vault(vault)
-                )
-
                 params = {
                     "withdraw_method_id_1": constants.MethodID.WITHDRAW_PENDLE2.value,
                     "withdraw_method_id_2": constants.MethodID.WITHDRAW_PENDLE1.value,
                     "complete_method_id": constants.MethodID.COMPPLETE_WITHDRAWAL2.value,
-                    "vault_addresses": vault_addresses,
+                    "vault_addresses": vault_registry.get_addresses(vault),
                     "start_ts": self.start_date_timestamp,
                     "end_ts": self.end_date_timestamp,
                 }
-
                 # Execute raw SQL query with parameters
-                init_withdraws = self.session.execute(query, params).all()
-                result = []
+                pending.append((vault, self.session.execute(query, params).all()))
 
-                for item in init_withdraws:
-                    try:
-                        pt_amount, sc_amount, shares = get_user_withdrawals(
-                            item.from_address, pendle_vault_contract
-                        )
-
-                        result.append(
-                            {
-                                "pt_amount": pt_amount,
-                                "sc_amount": sc_amount,
-                                "shares": shares,
-                            }
-                        )
-
-                    except Exception as inner_e:
-                        logger.error(
-                            f"Error processing withdrawal item {item.id}: {inner_e}",
-                            exc_info=True,
-                        )
-                        continue
-                # Create a DataFrame for the withdrawal details
-                df_withdrawal_details = pd.DataFrame(result)
-
-                # Calculate total Pendle withdrawal from df_withdrawal_details
-                total_sc_withdrawn = (
-                    df_withdrawal_details["sc_amount"].sum()
-                    if "sc_amount" in df_withdrawal_details
-                    else 0
-                )
-                total_pt_withdrawn = (
-                    df_withdrawal_details["pt_amount"].sum()
-                    if "pt_amount" in df_withdrawal_details
-                    else 0
-                )
-                total_shares_withdrawn = (
-                    df_withdrawal_details["shares"].sum()
-                    if "shares" in df_withdrawal_details
-                    else 0
+            reports = await asyncio.gather(
+                *(
+                    asyncio.to_thread(self._build_pendle_vault_report, vault, rows)
+                    for vault, rows in pending
                 )
-                # Create a report
-                reports.append(
-                    {
-                        "total_sc_withdrawn": total_sc_withdrawn,
-                        "total_pt_withdrawn": total_pt_withdrawn,
-                        "total_shares_withdrawn": total_shares_withdrawn,
-                        "sc_withdraw_pool_amount": sc_withdraw_pool_amount,
-                        "pt_withdraw_pool_amount": pt_withdraw_pool_amount,
-                        "total_sc_amount_needed": round(
-                            total_sc_withdrawn - sc_withdraw_pool_amount, 2
-                        ),
-                        "total_pt_amount_needed": round(
-                            total_pt_withdrawn - pt_withdraw_pool_amount, 2
-                        ),
-                        "vault": vault.name,
-                        "vault_address": vault.contract_address,
-                    }
-                )
-
-            return reports
+            )
+            return list(reports)
 
         except Exception as e:
             logger.error(
@@ -230,7 +392,9 @@ class InitiatedWithdrawalWatcherJob:
     async def run(self):
 
         vaults = self._get_non_pendle_active_vaults()
-        init_withdraws, pool_amounts = self.get_withdrawals_for_current_day(vaults)
+        init_withdraws, pool_amounts = await self.get_withdrawals_for_current_day(
+            vaults
+        )
         fields = [
             (
                 withdrawal["vault_address"],
@@ -239,7 +403,7 @@ class InitiatedWithdrawalWatcherJob:
             )
             for withdrawal in init_withdraws
         ]
-        reports = self.get_pendle_vault_withdrawals_for_current_day(
+        reports = await self.get_pendle_vault_withdrawals_for_current_day(
             self._get_pendle_active_vaults()
         )
 
@@ -0,0 +1,392 @@
+import asyncio
+import importlib
+import logging
+import signal
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from types import ModuleType
+from typing import Callable, Dict, List, Optional, Set
+
+import click
+from prometheus_client import REGISTRY, write_to_textfile
+from sqlmodel import Session
+
+from core import instrumentation
+from core.config import settings
+from core.db import engine, try_advisory_lock
+from log import setup_logging_to_console, setup_logging_to_file
+from models.job_run_history import JobRunHistory, JobRunStatus
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("scheduler")
+
+
+class CronSchedule:
+    """Crontab schedule: minute, hour, day of month, month and day of week.
+
+    Fields accept `*`, numbers, ranges, lists and steps. Both day fields have to
+    match, cron's "either day field" rule is not supported.
+    """
+
+    RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != len(self.RANGES):
+            raise ValueError(f"Invalid cron expression: {expression}")
+        self.expression = expression
+        self.fields = [
+            self._parse(field, low, high)
+            for field, (low, high) in zip(fields, self.RANGES)
+        ]
+
+    @staticmethod
+    def _parse(field: str, low: int, high: int) -> Set[int]:
+        values = set()
+        for part in field.split(","):
+            step = 1
+            if "/" in part:
+                part, step = part.split("/")
+                step = int(step)
+            if part == "*":
+                start, end = low, high
+            elif "-" in part:
+                start, end = map(int, part.split("-"))
+            else:
+                start = int(part)
+                end = high if step > 1 else start
+            values.update(range(start, end + 1, step))
+        return values
+
+    def is_due(self, at: datetime) -> bool:
+        minute, hour, day, month, weekday = self.fields
+        return (
+            at.minute in minute
+            and at.hour in hour
+            and at.day in day
+            and at.month in month
+            and at.isoweekday() % 7 in weekday
+        )
+
+
+@dataclass
+class ScheduledJob:
+    name: str
+    schedule: CronSchedule
+    # Job module, imported once when the scheduler starts
+    module: str
+    run: Callable[[ModuleType], None]
+
+
+def _run_points_distribution(module: ModuleType):
+    current_time = datetime.now(tz=timezone.utc)
+    module.harmonix_distribute_points(current_time)
+    module.update_vault_points(current_time)
+
+
+def _run_reward_distribution(module: ModuleType):
+    current_time = datetime.now(timezone.utc)
+    module.distribute_referral_101_rewards(current_time)
+    module.distribute_kol_and_partner_rewards(current_time)
+
+
+def _kelpdao_live(chain: str, vault_id: str) -> Callable[[ModuleType], None]:
+    return lambda module: module.import_live_data(chain, vault_id)
+
+
+def _vaults_performance(chain: str) -> Callable[[ModuleType], None]:
+    return lambda module: module.update_vaults_performance(chain)
+
+
+# Times are UTC
+JOBS: List[ScheduledJob] = [
+    ScheduledJob(
+        "update_performance_weekly",
+        CronSchedule("15 8 * * 5"),
+        "bg_tasks.update_performance_weekly",
+        lambda module: module.main(),
+    ),
+    ScheduledJob(
+        "update_delta_neutral_vault_performance_daily_arbitrum_one",
+        CronSchedule("5 */8 * * *"),
+        "bg_tasks.update_delta_neutral_vault_performance_daily",
+        _vaults_performance("arbitrum_one"),
+    ),
+    ScheduledJob(
+        "update_delta_neutral_vault_performance_daily_base",
+        CronSchedule("5 */8 * * *"),
+        "bg_tasks.update_delta_neutral_vault_performance_daily",
+        _vaults_performance("base"),
+    ),
+    ScheduledJob(
+        "update_delta_neutral_vault_performance_daily_ethereum",
+        CronSchedule("15 8 * * 5"),
+        "bg_tasks.update_delta_neutral_vault_performance_daily",
+        _vaults_performance("ethereum"),
+    ),
+    ScheduledJob(
+        "update_solv_vault_performance",
+        CronSchedule("5 */8 * * *"),
+        "bg_tasks.update_solv_vault_performance",
+        lambda module: module.main(),
+    ),
+    ScheduledJob(
+        "update_usdce_usdc_price_feed_oracle",
+        CronSchedule("0 0 * * *"),
+        "bg_tasks.update_usdce_usdc_price_feed_oracle",
+        lambda module: asyncio.run(module.main()),
+    ),
+    ScheduledJob(
+        "restaking_point_calculation",
+        CronSchedule("0 */12 * * *"),
+        "bg_tasks.restaking_point_calculation",
+        lambda module: module.main(),
+    ),
+    ScheduledJob(
+        "points_distribution_job_harmonix",
+        CronSchedule("0 * * * *"),
+        "bg_tasks.points_distribution_job_harmonix",
+        _run_points_distribution,
+    ),
+    ScheduledJob(
+        "reward_distribution_job",
+        CronSchedule("0 * * * *"),
+        "bg_tasks.reward_distribution_job",
+        _run_reward_distribution,
+    ),
+    ScheduledJob(
+        "update_tvl_for_vaults",
+        CronSchedule("0 * * * *"),
+        "bg_tasks.update_tvl_for_vaults",
+        lambda module: module.main(),
+    ),
+    ScheduledJob(
+        "calculate_tvl_last_30_days",
+        CronSchedule("0 0 * * *"),
+        "bg_tasks.calculate_tvl_last_30_days",
+        lambda module: module.calculate_tvl_last_30_days(),
+    ),
+    ScheduledJob(
+        "compact_points_history",
+        CronSchedule("30 1 * * *"),
+        "bg_tasks.compact_points_history",
+        lambda module: module.main(),
+    ),
+    ScheduledJob(
+        "refresh_user_position_view",
+        CronSchedule("45 1 * * *"),
+        "bg_tasks.refresh_user_position_view",
+        lambda module: module.main(),
+    ),
+    # Fills transaction_ledger after its migration, the deposit report, the
+    # balance check and calculate_tvl_last_30_days read only the ledger
+    ScheduledJob(
+        "backfill_transaction_ledger",
+        CronSchedule("30 * * * *"),
+        "bg_tasks.backfill_transaction_ledger",
+        lambda module: module.main(),
+    ),
+    # Indexes the active vaults of every chain in a single run
+    ScheduledJob(
+        "indexing_historical_transactions_data",
+        CronSchedule("*/15 * * * *"),
+        "bg_tasks.indexing_historical_transactions_data",
+        lambda module: module.live_index_data(),
+    ),
+    ScheduledJob(
+        "indexing_user_holding_kelpdao_arbitrum_one",
+        CronSchedule("*/20 * * * *"),
+        "bg_tasks.indexing_user_holding_kelpdao",
+        _kelpdao_live("arbitrum_one", "65f75bd7-a2d2-4764-ae31-78e4bb132c62"),
+    ),
+    ScheduledJob(
+        "indexing_user_holding_kelpdao_ethereum",
+        CronSchedule("*/20 * * * *"),
+        "bg_tasks.indexing_user_holding_kelpdao",
+        _kelpdao_live("ethereum", "2e63ed8f-c42a-4ac8-bf31-092270fc9ed1"),
+    ),
+]
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _reset_session(module: ModuleType):
+    # Job modules share one module level session across runs, the next run
+    # starts without the previous identity map or a failed transaction
+    session = getattr(module, "session", None)
+    if isinstance(session, Session):
+        session.close()
+
+
+def record_run(
+    job_name: str,
+    status: JobRunStatus,
+    started_at: datetime,
+    duration: float,
+    error: Optional[str] = None,
+):
+    logger.info(f"Job {job_name} {status.value} in {duration:.1f} s")
+    instrumentation.record_job_run(job_name, status.value, duration)
+    if settings.METRICS_TEXTFILE_PATH:
+        try:
+            write_to_textfile(settings.METRICS_TEXTFILE_PATH, REGISTRY)
+        except OSError as e:
+            logger.error(f"Cannot write the metrics file: {e}")
+    try:
+        with Session(engine) as session:
+            session.add(
+                JobRunHistory(
+                    job_name=job_name,
+                    status=status,
+                    started_at=started_at,
+                    duration_seconds=duration,
+                    error=error,
+                )
+            )
+            session.commit()
+    except Exception as e:
+        logger.error(f"Cannot record the run of {job_name}: {e}")
+
+
+class Scheduler:
+    """Runs the jobs in one resident process.
+
+    Job modules are imported once, so runs reuse their imports, connection pools
+    and caches. A job runs at most once at a time across every process sharing
+    the database, a run that finds the job's advisory lock taken is skipped.
+
+    Jobs of the same module share its module level state (the session, the
+    contracts of `import_live_data`, ...), so they run one after the other.
+    """
+
+    def __init__(self, jobs: List[ScheduledJob], max_workers: int):
+        self.jobs = jobs
+        self.modules: Dict[str, ModuleType] = {}
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="job"
+        )
+        self._running: Set[str] = set()
+        self._lock = threading.Lock()
+        self._module_locks: Dict[str, threading.Lock] = {
+            job.module: threading.Lock() for job in jobs
+        }
+
+    def load(self):
+        for job in self.jobs:
+            if job.module in self.modules:
+                continue
+            try:
+                self.modules[job.module] = importlib.import_module(job.module)
+            except Exception as e:
+                logger.error(f"Cannot load job module {job.module}: {e}")
+
+    def run_job(self, job: ScheduledJob):
+        started_at = _now()
+        start = time.monotonic()
+        module = self.modules.get(job.module)
+        if module is None:
+            record_run(
+                job.name, JobRunStatus.FAILED, started_at, 0, "Job module not loaded"
+            )
+            return
+
+        with self._module_locks[job.module], try_advisory_lock(
+            f"job:{job.name}"
+        ) as acquired:
+            if not acquired:
+                logger.warning(f"Job {job.name} is running in another process")
+                record_run(job.name, JobRunStatus.SKIPPED, started_at, 0)
+                return
+
+            logger.info(f"Job {job.name} started")
+            status, error = JobRunStatus.SUCCESS, None
+            try:
+                with instrumentation.job_run(job.name):
+                    job.run(module)
+            except (Exception, SystemExit) as e:
+                # The entry points of some jobs exit with a status code
+                if not isinstance(e, SystemExit) or e.code:
+                    status, error = JobRunStatus.FAILED, str(e)
+                    logger.error(f"Job {job.name} failed: {e}")
+                    logger.error(traceback.format_exc())
+            finally:
+                _reset_session(module)
+        record_run(job.name, status, started_at, time.monotonic() - start, error)
+
+    def submit(self, job: ScheduledJob):
+        with self._lock:
+            if job.name in self._running:
+                logger.warning(f"Job {job.name} is still running, skipping this run")
+                record_run(job.name, JobRunStatus.SKIPPED, _now(), 0)
+                return
+            self._running.add(job.name)
+
+        def run():
+            try:
+                self.run_job(job)
+            finally:
+                with self._lock:
+                    self._running.discard(job.name)
+
+        self.executor.submit(run)
+
+    def run_forever(self):
+        next_minute = _now().replace(second=0, microsecond=0) + timedelta(minutes=1)
+        logger.info(f"Scheduler started with {len(self.jobs)} jobs")
+        try:
+            while True:
+                time.sleep(max(0, (next_minute - _now()).total_seconds()))
+                for job in self.jobs:
+                    if job.schedule.is_due(next_minute):
+                        self.submit(job)
+                next_minute += timedelta(minutes=1)
+        finally:
+            logger.info("Scheduler stopping, waiting for running jobs")
+            self.executor.shutdown(wait=True)
+
+
+def _stop(signum, frame):
+    raise KeyboardInterrupt
+
+
+@click.command()
+@click.option("--job", "job_names", multiple=True, help="Run these jobs once and exit")
+def main(job_names):
+    setup_logging_to_console()
+    setup_logging_to_file("scheduler", logger=logger)
+    instrumentation.install()
+
+    jobs = JOBS
+    if job_names:
+        jobs = [job for job in JOBS if job.name in job_names]
+        unknown = set(job_names) - {job.name for job in jobs}
+        if unknown:
+            raise click.BadParameter(f"Unknown jobs: {', '.join(sorted(unknown))}")
+
+    scheduler = Scheduler(jobs, settings.SCHEDULER_MAX_WORKERS)
+    scheduler.load()
+    for module in scheduler.modules.values():
+        module_logger = getattr(module, "logger", None)
+        if isinstance(module_logger, logging.Logger):
+            setup_logging_to_file(module.__name__.split(".")[-1], logger=module_logger)
+
+    if job_names:
+        for job in jobs:
+            scheduler.run_job(job)
+        return
+
+    signal.signal(signal.SIGTERM, _stop)
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,24 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import logging
-import traceback
 import uuid
+import click
+import numpy as np
 import pandas as pd
 import pendulum
-from sqlalchemy import and_, func
+from sqlalchemy import update
 from sqlmodel import Session, select
-from bg_tasks.update_delta_neutral_vault_performance_daily import calculate_reward_apy
+from bg_tasks.update_delta_neutral_vault_performance_daily import (
+    calculate_reward_apy_from_configs,
+)
 from core import constants
 from core.db import engine
 from log import setup_logging_to_console, setup_logging_to_file
 from models import Vault
 from models.pps_history import PricePerShareHistory
+from models.reward_distribution_config import RewardDistributionConfig
 from models.vault_performance import VaultPerformance
 from services import pendle_service
+from services.market_data import get_hl_price
 
 # Initialize logger
 logging.basicConfig(level=logging.INFO)
@@ -22,6 +27,23 @@ logger = logging.getLogger("sync_apy_vault_performance_history")
 session = Session(engine)
 
 
+APY_WINDOWS = [15, 45]
+REWARD_COLUMNS = {
+    7: "reward_weekly_apy",
+    15: "reward_15d_apy",
+    30: "reward_monthly_apy",
+    45: "reward_45d_apy",
+}
+UPDATED_COLUMNS = [
+    "apy_15d",
+    "apy_45d",
+    "base_15d_apy",
+    "base_45d_apy",
+    "reward_15d_apy",
+    "reward_45d_apy",
+]
+
+
 def calculate_roi(current_value: float, previous_value: float, days: float) -> float:
     """Calculate annualized ROI"""
     if previous_value == 0:
@@ -31,133 +53,67 @@ def calculate_roi(current_value: float, previous_value: float, days: float) -> f
     return annualized_roi
 
 
-def get_date_init_vault(vault: Vault) -> datetime:
-    statement = (
-        select(VaultPerformance.datetime)
-        .where(VaultPerformance.vault_id == vault.id)
-        .order_by(VaultPerformance.datetime)
+def calculate_rolling_apy(price_per_share: np.ndarray, window_days: int) -> np.ndarray:
+    """Annualized ROI in percent of every day of a daily series over the last
+    `window_days`, over the days since the first one while the series is shorter.
+    """
+    days_since_start = np.arange(len(price_per_share))
+    past = np.maximum(days_since_start - window_days, 0)
+    days = days_since_start - past
+    past_price_per_share = price_per_share[past]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi = (price_per_share / past_price_per_share) ** (
+            365 / np.maximum(days, 1)
+        ) - 1
+    return np.where((days > 0) & (past_price_per_share != 0), roi * 100, 0)
+
+
+def _to_utc_day(values) -> pd.Series:
+    return pd.to_datetime(values, utc=True).dt.tz_localize(None).dt.normalize()
+
+
+def get_daily_history(vault: Vault, since: datetime | None = None) -> pd.DataFrame:
+    """Daily price per share and TVL of the days with both a price per share and
+    a performance row, forward-filled over the missing days."""
+    pps_query = select(
+        PricePerShareHistory.datetime, PricePerShareHistory.price_per_share
+    ).where(PricePerShareHistory.vault_id == vault.id)
+    tvl_query = select(
+        VaultPerformance.datetime, VaultPerformance.total_locked_value
+    ).where(VaultPerformance.vault_id == vault.id)
+    if since is not None:
+        pps_query = pps_query.where(PricePerShareHistory.datetime >= since)
+        tvl_query = tvl_query.where(VaultPerformance.datetime >= since)
+
+    pps = pd.DataFrame(
+        session.exec(pps_query.order_by(PricePerShareHistory.datetime.asc())).all(),
+        columns=["datetime", "price_per_share"],
     )
-    result = session.exec(statement).first()
-    return result.date()
-
-
-def update_apy(
-    vault: Vault,
-    datetime: datetime,
-    apy_15d: float,
-    apy_45d: float,
-    reward_15d_apy: float,
-    reward_45d_apy: float,
-):
-    statement = (
-        select(VaultPerformance)
-        .where(func.date(VaultPerformance.datetime) == datetime)
-        .where(VaultPerformance.vault_id == vault.id)
+    tvl = pd.DataFrame(
+        session.exec(tvl_query.order_by(VaultPerformance.datetime.asc())).all(),
+        columns=["datetime", "total_locked_value"],
     )
-    results = session.exec(statement).all()
-    if results:
-        for result in results:
-            result.apy_15d = apy_15d
-            result.apy_45d = apy_45d
-            result.base_15d_apy = apy_15d - reward_15d_apy
-            result.base_45d_apy = apy_45d - reward_45d_apy
-            result.reward_15d_apy = reward_15d_apy
-            result.reward_45d_apy = reward_45d_apy
-            session.add(result)
-        session.commit()
-
-
-def get_apy_history(vault: Vault) -> pd.DataFrame:
-    # Get the price per share and total locked value history by joining tables
-    combined_history = session.exec(
-        select(
-            PricePerShareHistory.datetime,
-            PricePerShareHistory.price_per_share,
-            VaultPerformance.total_locked_value,
-        )
-        .join(
-            VaultPerformance,
-            (PricePerShareHistory.vault_id == VaultPerformance.vault_id)
-            & (
-                func.date(PricePerShareHistory.datetime)
-                == func.date(VaultPerformance.datetime)
-            ),
-        )
-        .where(PricePerShareHistory.vault_id == vault.id)
-        .order_by(PricePerShareHistory.datetime.asc())
-    ).all()
+    if pps.empty or tvl.empty:
+        return pd.DataFrame(columns=["price_per_share", "total_locked_value"])
 
-    # Convert query results into a DataFrame
-    df = pd.DataFrame(
-        [
-            {
-                "datetime": item.datetime,
-                "price_per_share": item.price_per_share,
-                "total_locked_value": item.total_locked_value,
-            }
-            for item in combined_history
-        ]
+    pps["datetime"] = _to_utc_day(pps["datetime"])
+    tvl["datetime"] = _to_utc_day(tvl["datetime"])
+    df = pps.join(
+        tvl.groupby("datetime")["total_locked_value"].last(), on="datetime", how="inner"
     )
-
-    # Convert 'datetime' column to UTC and normalize to the start of the day
-    df["datetime"] = pd.to_datetime(df["datetime"], errors="coerce").dt.normalize()
-
     df.set_index("datetime", inplace=True)
-    # Resample to daily frequency, calculate mean funding rate, and forward-fill missing values
-    df_daily = df.resample("D").last()
-    df_daily = df_daily.ffill()
-    df_daily.index = pd.to_datetime(df_daily.index)
+    return df.resample("D").last().ffill()
 
-    # Calculate APY for different windows
-    for window_days in [15, 45]:
-        col_name = f"apy_{window_days}d"
 
-        # Create empty series for results
-        apys = pd.Series(index=df_daily.index)
+def get_apy_history(vault: Vault, since: datetime | None = None) -> pd.DataFrame:
+    df_daily = get_daily_history(vault, since)
+    if df_daily.empty:
+        return df_daily
 
-        # Calculate APY for each date
-        for current_date in df_daily.index:
-            try:
-                # Get the date N days ago
-                past_date = max(
-                    df_daily.index[0],  # first available date
-                    current_date - pd.Timedelta(days=window_days),  # N days ago
-                )
-
-                # Calculate actual number of days between points
-                days_diff = min(window_days, (current_date - df_daily.index[0]).days)
-
-                # If days_diff is 0, set APY to 0
-                if days_diff == 0:
-                    apys[current_date] = 0
-                else:
-                    # Calculate APY
-                    calculated_apy = (
-                        calculate_roi(
-                            df_daily.loc[
-                                current_date, "price_per_share"
-                            ],  # current PPS
-                            df_daily.loc[past_date, "price_per_share"],  # past PPS
-                            days=days_diff,
-                        )
-                        * 100
-                    )  # Convert to percentage
-
-                    logger.info(
-                        "Calculating %d-day APY - Date: %s, Past date: %s, APY: %.2f%%",
-                        window_days,
-                        current_date.strftime("%Y-%m-%d"),
-                        past_date.strftime("%Y-%m-%d"),
-                        calculated_apy,
-                    )
-
-                    apys[current_date] = calculated_apy
-            except Exception as e:
-                print(current_date)
-                traceback.print_exc()
-
-        # Add the results to df_daily
-        df_daily[col_name] = apys
+    price_per_share = df_daily["price_per_share"].to_numpy(dtype=float)
+    for window_days in APY_WINDOWS:
+        apys = calculate_rolling_apy(price_per_share, window_days)
+        df_daily[f"apy_{window_days}d"] = apys
         df_daily[f"base_{window_days}d_apy"] = apys
 
     if vault.strategy_name == constants.PENDLE_HEDGING_STRATEGY:
@@ -165,48 +121,15 @@ def get_apy_history(vault: Vault) -> pd.DataFrame:
             constants.CHAIN_IDS["CHAIN_ARBITRUM"], vault.pt_address
         )
         if pendle_data:
-            pendle_market_data = pendle_data[0]
-        if pendle_market_data:
-            pendle_fixed_yield = (pendle_market_data.implied_apy / 2) * 100
-            df_daily.loc[current_date, "apy_15d"] += pendle_fixed_yield
-            df_daily.loc[current_date, "apy_45d"] += pendle_fixed_yield
+            # The fixed yield is the current one, it only applies to the last day
+            pendle_fixed_yield = (pendle_data[0].implied_apy / 2) * 100
+            last_date = df_daily.index[-1]
+            df_daily.loc[last_date, "apy_15d"] += pendle_fixed_yield
+            df_daily.loc[last_date, "apy_45d"] += pendle_fixed_yield
 
     # Add reward APY if this is the Pendle RSeth vault
     if vault.slug == constants.PENDLE_RSETH_26JUN25_SLUG:
-        # Create columns for reward APYs
-        reward_columns = {
-            7: "reward_weekly_apy",
-            15: "reward_15d_apy",
-            30: "reward_monthly_apy",
-            45: "reward_45d_apy",
-        }
-
-        for current_date in df_daily.index:
-            # Get TVL for the date
-            tvl = (
-                df_daily.loc[current_date, "total_locked_value"]
-                if "total_locked_value" in df_daily.columns
-                else 0
-            )
-
-            # Calculate reward APYs for this date
-            reward_weekly_apy, reward_monthly_apy, reward_apy_15d, reward_apy_45d = (
-                calculate_reward_apy(
-                    vault_id=vault.id,
-                    total_tvl=tvl,
-                    current_date=pendulum.instance(current_date),
-                )
-            )
-
-            # Add reward APYs to DataFrame
-            df_daily.loc[current_date, reward_columns[7]] = reward_weekly_apy
-            df_daily.loc[current_date, reward_columns[15]] = reward_apy_15d
-            df_daily.loc[current_date, reward_columns[30]] = reward_monthly_apy
-            df_daily.loc[current_date, reward_columns[45]] = reward_apy_45d
-
-            # Add reward APYs to base APYs
-            df_daily.loc[current_date, "apy_15d"] += reward_apy_15d
-            df_daily.loc[current_date, "apy_45d"] += reward_apy_45d
+        add_reward_apy(vault, df_daily)
 
     apy_columns = ["apy_15d", "apy_45d", "base_15d_apy", "base_45d_apy"]
     df_daily[apy_columns] = df_daily[apy_columns].ffill()
@@ -214,6 +137,90 @@ def get_apy_history(vault: Vault) -> pd.DataFrame:
     return df_daily
 
 
+def add_reward_apy(vault: Vault, df_daily: pd.DataFrame):
+    # Distribution configs and the token price are loaded once for all the days
+    reward_configs = session.exec(
+        select(RewardDistributionConfig)
+        .where(RewardDistributionConfig.vault_id == vault.id)
+        .order_by(RewardDistributionConfig.start_date.asc())
+    ).all()
+    token_price = 0.0
+    if reward_configs:
+        token_price = get_hl_price(reward_configs[0].reward_token.replace("$", ""))
+
+    rewards = [
+        calculate_reward_apy_from_configs(
+            reward_configs,
+            token_price,
+            tvl,
+            list(REWARD_COLUMNS),
+            pendulum.instance(current_date),
+        )
+        for current_date, tvl in df_daily["total_locked_value"].items()
+    ]
+    # calculate_reward_apy returns the 7, 30, 15 and 45 day APYs in this order
+    for window_days, values in zip([7, 30, 15, 45], zip(*rewards)):
+        df_daily[REWARD_COLUMNS[window_days]] = values
+
+    df_daily["apy_15d"] += df_daily["reward_15d_apy"]
+    df_daily["apy_45d"] += df_daily["reward_45d_apy"]
+
+
+def update_apy_history(
+    vault: Vault, df_daily: pd.DataFrame, since: datetime | None = None
+) -> int:
+    """Write the APYs of the performance rows whose values changed, returns the
+    number of updated rows."""
+    query = select(
+        VaultPerformance.id, VaultPerformance.datetime, *[
+            getattr(VaultPerformance, column) for column in UPDATED_COLUMNS
+        ]
+    ).where(VaultPerformance.vault_id == vault.id)
+    if since is not None:
+        query = query.where(VaultPerformance.datetime >= since)
+    current = pd.DataFrame(
+        session.exec(query).all(), columns=["id", "datetime", *UPDATED_COLUMNS]
+    )
+    if current.empty or df_daily.empty:
+        return 0
+
+    computed = df_daily.reindex(columns=UPDATED_COLUMNS)
+    computed[["reward_15d_apy", "reward_45d_apy"]] = computed[
+        ["reward_15d_apy", "reward_45d_apy"]
+    ].fillna(0)
+    computed["base_15d_apy"] = computed["apy_15d"] - computed["reward_15d_apy"]
+    computed["base_45d_apy"] = computed["apy_45d"] - computed["reward_45d_apy"]
+
+    current["day"] = _to_utc_day(current["datetime"])
+    rows = current.join(computed, on="day", rsuffix="_new")
+    missing = rows["apy_15d_new"].isnull() | rows["apy_45d_new"].isnull()
+    if missing.any():
+        logger.warning(
+            f"Missing APY values for {missing.sum()} performance rows. Vault: {vault.name}"
+        )
+    rows = rows[~missing]
+
+    new_columns = [f"{column}_new" for column in UPDATED_COLUMNS]
+    unchanged = np.isclose(
+        rows[UPDATED_COLUMNS].to_numpy(dtype=float),
+        rows[new_columns].to_numpy(dtype=float),
+        rtol=1e-12,
+        atol=0,
+        equal_nan=True,
+    ).all(axis=1)
+    changed = rows[~unchanged]
+    if changed.empty:
+        return 0
+
+    updates = [
+        {"id": row["id"], **{column: row[f"{column}_new"] for column in UPDATED_COLUMNS}}
+        for row in changed[["id", *new_columns]].to_dict("records")
+    ]
+    session.execute(update(VaultPerformance), updates)
+    session.commit()
+    return len(updates)
+
+
 def update_tvl(vault_id: uuid.UUID, current_tvl: float):
     vault = session.exec(select(Vault).where(Vault.id == vault_id)).first()
     if vault:
@@ -261,82 +268,46 @@ def update_ended_vault_apy(vault: Vault):
 
 
 # Main Execution
-def main():
+def main(tail_days: int | None = None):
+    """Rebuild the APY history of the active vaults, only the last `tail_days`
+    days of it when set."""
     try:
         logger.info(
             "Starting the process to sync_apy_vault_performance_history for vaults..."
         )
         # Get the vaults from the Vault table
         vaults = session.exec(select(Vault).where(Vault.is_active == True)).all()
-        # vaults = session.exec(
-        #     select(Vault).where(
-        #         and_(
-        #             Vault.is_active == True,
-        #             Vault.tags.contains("ended")
-        #         )
-        #     )
-        # ).all()
-        date_now = datetime.now().date()
+
+        update_since = history_since = None
+        if tail_days is not None:
+            update_since = datetime.combine(
+                datetime.now(timezone.utc).date() - timedelta(days=tail_days),
+                datetime.min.time(),
+            )
+            # The APYs of the first updated days look back over the longest
+            # window, with the same margin to forward-fill the days before it
+            history_since = update_since - timedelta(days=2 * max(REWARD_COLUMNS))
 
         for vault in vaults:
-            if 'ended' in vault.get_tags():
+            if "ended" in vault.get_tags():
                 update_ended_vault_apy(vault)
                 continue
 
-            df_daily = get_apy_history(vault=vault)
-            start_date = get_date_init_vault(vault=vault)
-            current_date = start_date
-            while current_date <= date_now:
-                try:
-                    result = df_daily.loc[
-                        df_daily.index.strftime("%Y-%m-%d")
-                        == current_date.strftime("%Y-%m-%d")
-                    ]
-                    if not result.empty:
-                        if isinstance(result, pd.DataFrame):
-                            result = result.iloc[0]
-                    else:
-                        logger.warning(
-                            f"Missing APY values for date: {current_date}. Vault: {vault.name}"
-                        )
-
-                        # Skip the rest of the loop for this date
-                        current_date += pd.Timedelta(days=1)
-                        continue
-
-                    if pd.isnull(result["apy_15d"]) or pd.isnull(result["apy_45d"]):
-                        logger.warning(
-                            f"Missing APY values for date: {current_date}. APY 15d: {result['apy_15d']}, APY 45d: {result['apy_45d']}"
-                        )
-
-                    else:
-                        apy_15d = result["apy_15d"]
-                        apy_45d = result["apy_45d"]
-                        reward_15d_apy = result.get("reward_15d_apy", 0)
-                        reward_45d_apy = result.get("reward_45d_apy", 0)
-
-                        update_apy(
-                            vault=vault,
-                            datetime=current_date,
-                            apy_15d=apy_15d,
-                            apy_45d=apy_45d,
-                            reward_15d_apy=reward_15d_apy,
-                            reward_45d_apy=reward_45d_apy,
-                        )
-                        logger.info(
-                            f"Successfully updated APY data for {current_date}: APY 15 days = {apy_15d}, APY 45 days = {apy_45d}"
-                        )
-
-                except Exception as e:
-                    logger.error(
-                        f"Error occurred while processing date {current_date}: %s",
-                        e,
-                        exc_info=True,
-                    )
-                current_date += timedelta(days=1)
+            try:
+                df_daily = get_apy_history(vault, since=history_since)
+                updated = update_apy_history(vault, df_daily, since=update_since)
+                logger.info(
+                    f"Updated the APY of {updated} performance rows of vault {vault.name}"
+                )
+            except Exception as e:
+                session.rollback()
+                logger.error(
+                    f"Error occurred while updating the APY history of vault {vault.name}: %s",
+                    e,
+                    exc_info=True,
+                )
 
     except Exception as e:
-        print(traceback.print_exc())
         logger.error(
             "An error occurred while updating sync_apy_vault_performance_history: %s",
             e,
@@ -344,6 +315,18 @@ def main():
         )
 
 
-if __name__ == "__main__":
+@click.command()
+@click.option(
+    "--tail-days",
+    type=int,
+    default=None,
+    help="Only update the last days of the history, the whole history when not set",
+)
+def cli(tail_days):
+    setup_logging_to_console()
     setup_logging_to_file("sync_apy_vault_performance_history", logger=logger)
-    main()
+    main(tail_days)
+
+
+if __name__ == "__main__":
+    cli()
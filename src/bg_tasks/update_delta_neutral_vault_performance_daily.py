@@ -1,5 +1,5 @@
 import logging
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 import uuid
 from datetime import datetime, timedelta, timezone
 
@@ -29,6 +29,7 @@ from models.reward_distribution_config import RewardDistributionConfig
 from models.user_portfolio import UserPortfolio
 from models.vault_apy_breakdown import VaultAPYBreakdown
 from models.vault_performance import VaultPerformance
+from models.vault_state_snapshot import VaultStateSnapshot
 from models.vaults import NetworkChain, VaultCategory
 from schemas.fee_info import FeeInfo
 from schemas.vault_state import VaultState
@@ -38,6 +39,7 @@ from services.hyperliquid_service import (
 )
 from services.market_data import get_hl_price, get_price
 from services.vault_rewards_service import VaultRewardsService
+from services.vault_state_snapshot_service import VaultStateSnapshotService
 from utils.vault_utils import calculate_projected_apy
 from utils.web3_utils import get_vault_contract, get_current_pps, get_current_tvl
 
@@ -216,6 +218,22 @@ def calculate_reward_apy(
     token_name = reward_configs[0].reward_token.replace("$", "")
     hype_price = get_hl_price(token_name)  # Get current HYPE token price
 
+    return calculate_reward_apy_from_configs(
+        reward_configs, hype_price, total_tvl, day_ranges, current_date
+    )
+
+
+def calculate_reward_apy_from_configs(
+    reward_configs: List[RewardDistributionConfig],
+    hype_price: float,
+    total_tvl: float,
+    day_ranges: List[int],
+    current_date: pendulum.DateTime,
+) -> Tuple[float, float, float, float]:
+    """Reward APY of already loaded distribution configs, sorted by start date."""
+    if total_tvl <= 0 or not reward_configs:
+        return 0.0, 0.0, 0, 0
+
     # 1. Tìm ngày bắt đầu thật sự sớm nhất của campaign
     campaign_start_date = min(cfg.start_date for cfg in reward_configs)
 
@@ -288,6 +306,7 @@ def calculate_performance(
     vault_contract: Contract,
     owner_address: str,
     update_freq: str = "daily",
+    snapshot: Optional[VaultStateSnapshot] = None,
 ):
     current_price = get_price("ETHUSDT")
 
@@ -299,12 +318,20 @@ def calculate_performance(
 
     # price_per_share_df = get_price_per_share_history(vault_id)
 
-    current_price_per_share = get_current_pps(vault_contract)
-    total_balance = get_current_tvl(vault_contract)
+    if snapshot is not None and snapshot.total_shares is not None:
+        current_price_per_share = snapshot.price_per_share
+        total_balance = snapshot.tvl
+        total_shares = snapshot.total_shares
+        earned_fee = snapshot.fee_pool_amount
+    else:
+        current_price_per_share = get_current_pps(vault_contract)
+        total_balance = get_current_tvl(vault_contract)
+        vault_state = get_vault_state(
+            vault_contract, owner_address=owner_address, vault=vault
+        )
+        total_shares = vault_state.total_share
+        earned_fee = vault_state.total_fee_pool_amount
     fee_info = get_fee_info()
-    vault_state = get_vault_state(
-        vault_contract, owner_address=owner_address, vault=vault
-    )
 
     if vault.slug == constants.BSX_VAULT_SLUG:
         points_earned = get_points_earned()
@@ -320,7 +347,7 @@ def calculate_performance(
         adjusted_tvl = total_balance + points_value
 
         # Adjust the current PPS
-        current_price_per_share = adjusted_tvl / vault_state.total_share
+        current_price_per_share = adjusted_tvl / total_shares
 
     # Calculate reward APY if this is the Hype vault
     weekly_reward_apy = 0
@@ -435,11 +462,11 @@ def calculate_performance(
         vault_id=vault.id,
         risk_factor=risk_factor,
         all_time_high_per_share=all_time_high_per_share,
-        total_shares=vault_state.total_share,
+        total_shares=total_shares,
         sortino_ratio=sortino,
         downside_risk=downside,
         unique_depositors=count,
-        earned_fee=vault_state.total_fee_pool_amount,
+        earned_fee=earned_fee,
         fee_structure=fee_info,
         apy_15d=apy_15d,
         apy_45d=apy_45d,
@@ -454,15 +481,8 @@ def calculate_performance(
     return performance
 
 
-# Main Execution
-@click.command()
-@click.option("--chain", default="arbitrum_one", help="Blockchain network to use")
-def main(chain: str):
+def update_vaults_performance(chain: str):
     try:
-        setup_logging_to_console()
-        setup_logging_to_file(
-            f"update_delta_neutral_vault_performance_daily_{chain}", logger=logger
-        )
         # Parse chain to NetworkChain enum
         network_chain = NetworkChain[chain.lower()]
 
@@ -480,6 +500,9 @@ def main(chain: str):
             .where(Vault.category != VaultCategory.real_yield_v2)
             .where(not_(Vault.tags.contains("ended")))
         ).all()
+        # The state of every vault of the chain at one block, usually read by
+        # the TVL job a few minutes ago
+        snapshots = VaultStateSnapshotService(session).get_or_take(vaults)
 
         for vault in vaults:
             logger.info("Updating performance for %s...", vault.name)
@@ -497,6 +520,7 @@ def main(chain: str):
                     if network_chain in {NetworkChain.arbitrum_one, NetworkChain.base}
                     else "weekly"
                 ),
+                snapshot=snapshots.get(vault.id),
             )
             # Add the new performance record to the session and commit
             session.add(new_performance_rec)
@@ -529,5 +553,16 @@ def main(chain: str):
         raise e
 
 
+# Main Execution
+@click.command()
+@click.option("--chain", default="arbitrum_one", help="Blockchain network to use")
+def main(chain: str):
+    setup_logging_to_console()
+    setup_logging_to_file(
+        f"update_delta_neutral_vault_performance_daily_{chain}", logger=logger
+    )
+    update_vaults_performance(chain)
+
+
 if __name__ == "__main__":
     main()
@@ -1,5 +1,6 @@
 import logging
 import uuid
+from typing import Optional
 from datetime import datetime, timedelta, timezone
 
 import click
@@ -29,6 +30,7 @@ from models.pps_history import PricePerShareHistory
 from models.user_portfolio import UserPortfolio
 from models.vault_apy_breakdown import VaultAPYBreakdown
 from models.vault_performance import VaultPerformance
+from models.vault_state_snapshot import VaultStateSnapshot
 from models.vaults import NetworkChain
 from schemas.fee_info import FeeInfo
 from schemas.vault_state import VaultState, VaultStatePendle
@@ -37,6 +39,7 @@ from services.hyperliquid_service import (
     get_avg_8h_funding_rate,
 )
 from services.market_data import get_price
+from services.vault_state_snapshot_service import VaultStateSnapshotService
 from utils.vault_utils import calculate_projected_apy
 from utils.web3_utils import get_vault_contract, get_current_pps, get_current_tvl
 
@@ -176,6 +179,7 @@ def calculate_performance(
     vault_contract: Contract,
     owner_address: str,
     update_freq: str = "daily",
+    snapshot: Optional[VaultStateSnapshot] = None,
 ):
     logger.info("Starting performance calculation for vault: %s", vault.name)
     current_price = get_price("ETHUSDT")
@@ -183,18 +187,26 @@ def calculate_performance(
 
     today = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
 
-    current_price_per_share = get_current_pps(vault_contract)
-    total_balance = get_current_tvl(vault_contract)
+    if snapshot is not None and snapshot.total_shares is not None:
+        current_price_per_share = snapshot.price_per_share
+        total_balance = snapshot.tvl
+        total_shares = snapshot.total_shares
+        total_fee_pool_amount = snapshot.fee_pool_amount
+    else:
+        current_price_per_share = get_current_pps(vault_contract)
+        total_balance = get_current_tvl(vault_contract)
+        vault_state = get_vault_state(vault_contract, owner_address=owner_address)
+        total_shares = vault_state.total_shares
+        total_fee_pool_amount = vault_state.total_fee_pool_amount
     logger.info(
         "Current PPS: %.6f, Total TVL: %.2f", current_price_per_share, total_balance
     )
 
     fee_info = get_fee_info()
-    vault_state = get_vault_state(vault_contract, owner_address=owner_address)
     logger.info(
         "Vault state - Total shares: %.2f, Fee pool: %.2f",
-        vault_state.total_shares,
-        vault_state.total_fee_pool_amount,
+        total_shares,
+        total_fee_pool_amount,
     )
 
     weekly_reward_apy = 0
@@ -376,11 +388,11 @@ def calculate_performance(
         vault_id=vault.id,
         risk_factor=risk_factor,
         all_time_high_per_share=all_time_high_per_share,
-        total_shares=vault_state.total_shares,
+        total_shares=total_shares,
         sortino_ratio=sortino,
         downside_risk=downside,
         unique_depositors=count,
-        earned_fee=vault_state.total_fee_pool_amount,
+        earned_fee=total_fee_pool_amount,
         fee_structure=fee_info,
         base_monthly_apy=monthly_apy * 100,
         base_weekly_apy=weekly_apy * 100,
@@ -416,6 +428,7 @@ def main(chain: str):
             .where(Vault.network_chain == network_chain)
             .where(not_(Vault.tags.contains("ended")))
         ).all()
+        snapshots = VaultStateSnapshotService(session).get_or_take(vaults)
 
         for vault in vaults:
             logger.info("Updating performance for %s...", vault.name)
@@ -430,6 +443,7 @@ def main(chain: str):
                     if network_chain in {NetworkChain.arbitrum_one, NetworkChain.base}
                     else "weekly"
                 ),
+                snapshot=snapshots.get(vault.id),
             )
             # Add the new performance record to the session and commit
             session.add(new_performance_rec)
@@ -1,6 +1,7 @@
 import logging
 import uuid
 from datetime import datetime, timedelta, timezone
+from typing import Optional
 
 import pandas as pd
 import pendulum
@@ -24,9 +25,11 @@ from models import Vault
 from models.pps_history import PricePerShareHistory
 from models.user_portfolio import UserPortfolio
 from models.vault_performance import VaultPerformance
+from models.vault_state_snapshot import VaultStateSnapshot
 from schemas.fee_info import FeeInfo
 from schemas.vault_state import OldVaultState, VaultState
 from services.market_data import get_price
+from services.vault_state_snapshot_service import VaultStateSnapshotService
 
 # # Initialize logger
 logging.basicConfig(level=logging.INFO)
@@ -181,7 +184,10 @@ def calculate_apy_ytd(vault_id, current_price_per_share):
 
 # Step 4: Calculate Performance Metrics
 def calculate_performance(
-    vault_id: uuid.UUID, vault_contract: Contract, owner_address: str
+    vault_id: uuid.UUID,
+    vault_contract: Contract,
+    owner_address: str,
+    snapshot: Optional[VaultStateSnapshot] = None,
 ):
     current_price = get_price("ETHUSDT")
 
@@ -192,10 +198,19 @@ def calculate_performance(
 
     # price_per_share_df = get_price_per_share_history(vault_id)
 
-    current_price_per_share = get_current_pps(vault_contract)
-    total_balance = get_current_tvl(vault_contract)
+    if snapshot is not None and snapshot.total_shares is not None:
+        current_price_per_share = snapshot.price_per_share
+        total_balance = snapshot.tvl
+        total_shares = snapshot.total_shares
+        # Performance and management fees
+        earned_fee = snapshot.fee_pool_amount
+    else:
+        current_price_per_share = get_current_pps(vault_contract)
+        total_balance = get_current_tvl(vault_contract)
+        vault_state = get_vault_state(vault_contract, owner_address)
+        total_shares = vault_state.total_share
+        earned_fee = vault_state.performance_fee + vault_state.management_fee
     fee_info = get_fee_info()
-    vault_state = get_vault_state(vault_contract, owner_address)
     # Calculate Monthly APY
     month_ago_price_per_share = get_before_price_per_shares(session, vault_id, days=30)
     month_ago_datetime = pendulum.instance(month_ago_price_per_share.datetime).in_tz(
@@ -273,10 +288,10 @@ def calculate_performance(
         vault_id=vault_id,
         risk_factor=risk_factor,
         all_time_high_per_share=all_time_high_per_share,
-        total_shares=vault_state.total_share,
+        total_shares=total_shares,
         sortino_ratio=sortino,
         downside_risk=downside,
-        earned_fee=vault_state.performance_fee + vault_state.management_fee,
+        earned_fee=earned_fee,
         fee_structure=fee_info,
         unique_depositors=count,
         apy_15d=apy_15d,
@@ -298,9 +313,10 @@ def main():
         ).first()
 
         vault_contract, _ = get_vault_contract(vault)
+        snapshot = VaultStateSnapshotService(session).get_or_take([vault]).get(vault.id)
 
         new_performance_rec = calculate_performance(
-            vault.id, vault_contract, vault.owner_wallet_address
+            vault.id, vault_contract, vault.owner_wallet_address, snapshot=snapshot
         )
         # Add the new performance record to the session and commit
         session.add(new_performance_rec)
@@ -1,6 +1,7 @@
 import logging
 import uuid
 from datetime import datetime, timedelta, timezone
+from typing import Optional
 
 import click
 import numpy as np
@@ -18,8 +19,10 @@ from models import Vault
 from models.pps_history import PricePerShareHistory
 from models.user_portfolio import UserPortfolio
 from models.vault_performance import VaultPerformance
+from models.vault_state_snapshot import VaultStateSnapshot
 from models.vaults import NetworkChain, VaultCategory
 from schemas.fee_info import FeeInfo
+from services.vault_state_snapshot_service import VaultStateSnapshotService
 from utils.web3_utils import get_current_pps, get_vault_contract, get_current_tvl
 
 # Initialize logger
@@ -126,9 +129,17 @@ def calculate_tvl_statistics(vault_id: uuid.UUID):
     return all_time_high_tvl, sortino, downside, risk_factor
 
 
-def calculate_performance(vault: Vault, vault_contract: Contract):
-    current_price_per_share = get_current_pps(vault_contract, decimals=1e18)
-    current_tvl = get_current_tvl(vault_contract, decimals=1e18)
+def calculate_performance(
+    vault: Vault,
+    vault_contract: Contract,
+    snapshot: Optional[VaultStateSnapshot] = None,
+):
+    if snapshot is not None:
+        current_price_per_share = snapshot.price_per_share
+        current_tvl = snapshot.tvl
+    else:
+        current_price_per_share = get_current_pps(vault_contract, decimals=1e18)
+        current_tvl = get_current_tvl(vault_contract, decimals=1e18)
     fee_info = get_fee_info()
 
     # Calculate Monthly APY
@@ -260,12 +271,15 @@ def main(chain: str):
             .where(Vault.network_chain == network_chain)
             .where(not_(Vault.tags.contains("ended")))
         ).all()
+        snapshots = VaultStateSnapshotService(session).get_or_take(vaults)
 
         for vault in vaults:
             logger.info("Updating performance for %s...", vault.name)
             vault_contract, _ = get_vault_contract(vault, abi_name="rethink_yield_v2")
 
-            new_performance_rec = calculate_performance(vault, vault_contract)
+            new_performance_rec = calculate_performance(
+                vault, vault_contract, snapshot=snapshots.get(vault.id)
+            )
             session.add(new_performance_rec)
 
             # Update vault metrics
@@ -1,15 +1,14 @@
 import logging
 import uuid
 from datetime import datetime, timezone
+from typing import Optional
 
 import pandas as pd
-import numpy as np
 import pendulum
 from sqlalchemy import func
 from sqlmodel import Session, not_, select
 from web3.contract import Contract
 
-from bg_tasks.utils import sortino_ratio, downside_risk, calculate_risk_factor
 from core import constants
 from core.db import engine
 from log import setup_logging_to_console, setup_logging_to_file
@@ -17,11 +16,13 @@ from models import Vault
 from models.pps_history import PricePerShareHistory
 from models.user_portfolio import UserPortfolio
 from models.vault_performance import VaultPerformance
+from models.vault_state_snapshot import VaultStateSnapshot
 from models.vaults import NetworkChain
 from schemas.fee_info import FeeInfo
 from services.market_data import get_price
+from services.solv_nav_store import SolvNavStore, performance_statistics
+from services.vault_state_snapshot_service import VaultStateSnapshotService
 from utils.web3_utils import get_vault_contract, get_current_pps, get_current_tvl
-from services import solv_service
 
 # # Initialize logger
 logging.basicConfig(level=logging.INFO)
@@ -43,24 +44,6 @@ def get_fee_info():
     return json_fee_info
 
 
-def calculate_pps_statistics_from_solv(df: pd.DataFrame):
-    df.set_index("navDate", inplace=True)
-    df.sort_index(inplace=True)
-    df["pct_change"] = df["nav"].pct_change()
-
-    all_time_high_per_share = df["nav"].max()
-
-    sortino = float(sortino_ratio(df["pct_change"], period="weekly"))
-    if np.isnan(sortino) or np.isinf(sortino):
-        sortino = 0
-    downside = float(downside_risk(df["pct_change"], period="weekly"))
-    if np.isnan(downside) or np.isinf(downside):
-        downside = 0
-    returns = df["pct_change"].values.flatten()
-    risk_factor = calculate_risk_factor(returns)
-    return all_time_high_per_share, sortino, downside, risk_factor
-
-
 def update_price_per_share(vault_id: uuid.UUID, current_price_per_share: float):
     # update today to hour with minute = 0 and second = 0
     today = pendulum.now(tz=pendulum.UTC).replace(minute=0, second=0, microsecond=0)
@@ -96,24 +79,36 @@ def calculate_performance(
     vault_contract: Contract,
     owner_address: str,
     update_freq: str = "daily",
+    snapshot: Optional[VaultStateSnapshot] = None,
 ):
     current_price = get_price("BTCUSDT")
-    current_price_per_share = get_current_pps(vault_contract, decimals=1e8)
-    total_balance = get_current_tvl(vault_contract, decimals=1e8)
+    if snapshot is not None and snapshot.total_shares is not None:
+        current_price_per_share = snapshot.price_per_share
+        total_balance = snapshot.tvl
+        total_shares = snapshot.total_shares
+    else:
+        current_price_per_share = get_current_pps(vault_contract, decimals=1e8)
+        total_balance = get_current_tvl(vault_contract, decimals=1e8)
+        total_shares = get_total_shares(vault_contract)
     fee_info = get_fee_info()
-    total_shares = get_total_shares(vault_contract)
 
-    # get performance
-    df = solv_service.fetch_nav_data()
-    if df is None:
+    # get performance, only the NAV points published since the last run are
+    # downloaded
+    nav_store = SolvNavStore(session)
+    try:
+        nav_store.sync()
+    except Exception as e:
+        logger.warning(f"Cannot fetch the new NAV points, using the stored ones: {e}")
+    series = nav_store.series()
+    if not series:
         logger.info("Failed to fetch NAV data")
         return
 
     # Calculate the APYs
-    apy_1m = solv_service.get_monthly_apy(df, column="adjustedNav")
-    apy_1w = solv_service.get_weekly_apy(df)
-    apy_15d = solv_service.calculate_periodic_apy(df, days=15)
-    apy_45d = solv_service.calculate_periodic_apy(df, days=45)
+    apy_1m = series.periodic_apy(pd.DateOffset(months=1), column="adjusted_nav")
+    apy_1w = series.periodic_apy(pd.DateOffset(weeks=1))
+    apy_15d = series.periodic_apy(pd.DateOffset(days=15))
+    apy_45d = series.periodic_apy(pd.DateOffset(days=45))
     apy_ytd = 0
 
     performance_history = session.exec(
@@ -132,7 +127,7 @@ def calculate_performance(
     apy_ytd = apy_ytd * 100
 
     all_time_high_per_share, sortino, downside, risk_factor = (
-        calculate_pps_statistics_from_solv(df)
+        performance_statistics(nav_store.statistics())
     )
 
     # count all portfolio of vault
@@ -180,6 +175,7 @@ def main():
             # .where(Vault.is_active == True)
         ).all()
         logger.info("Start updating solv performance...")
+        snapshots = VaultStateSnapshotService(session).get_or_take(vaults)
 
         for vault in vaults:
             vault_contract, _ = get_vault_contract(vault, abi_name="solv")
@@ -189,6 +185,7 @@ def main():
                 vault_contract,
                 vault.owner_wallet_address,
                 update_freq="daily",
+                snapshot=snapshots.get(vault.id),
             )
             # Add the new performance record to the session and commit
             session.add(new_performance_rec)
@@ -1,48 +1,47 @@
 import logging
 import traceback
-import uuid
 
-from sqlmodel import Session, select
-from web3 import Web3
-from web3.contract import Contract
+from sqlalchemy import update
+from sqlmodel import Session
 
 from core.db import engine
 from log import setup_logging_to_console, setup_logging_to_file
 from models import Vault
-from core.abi_reader import read_abi
-from core import constants
-from services.vault_contract_service import VaultContractService
-from utils.web3_utils import get_current_tvl, get_vault_contract
+from services.user_position_view_service import UserPositionViewService
+from services.vault_registry import vault_registry
+from services.vault_state_snapshot_service import VaultStateSnapshotService
 
 # Initialize logger
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("update_vault_tvl")
 
 session = Session(engine)
-token_abi = read_abi("ERC20")
 
 
-def update_tvl(vault_id: uuid.UUID, current_tvl: float):
-    vault = session.exec(select(Vault).where(Vault.id == vault_id)).first()
-    if vault:
-        vault.tvl = current_tvl
-        session.commit()
+def update_tvl(snapshots):
+    # One bulk update by primary key instead of a commit per vault
+    session.execute(
+        update(Vault),
+        [{"id": snapshot.vault_id, "tvl": snapshot.tvl} for snapshot in snapshots],
+    )
+    session.commit()
+    # Bulk updates don't go through the flush the registry listens to
+    vault_registry.invalidate()
 
 
 # Main Execution
 def main():
     try:
         logger.info("Start updating TVL for vaults...")
-        # Get the vaults from the Vault table
-        vaults = session.exec(select(Vault).where(Vault.is_active == True)).all()
-
-        for vault in vaults:
-            abi, decimals = VaultContractService().get_vault_abi(vault=vault)
-
-            vault_contract, _ = get_vault_contract(vault, abi)
-            current_tvl = get_current_tvl(vault_contract, decimals)
-            update_tvl(vault.id, current_tvl)
-            logger.info(f"Updated TVL for Vault {vault.name} to {current_tvl}")
+        # Reads every active vault, one block and one batch per chain, and
+        # stores the snapshot the performance jobs and the API read
+        snapshots = VaultStateSnapshotService(session).take_active()
+        if snapshots:
+            update_tvl(snapshots.values())
+            # Prices the positions, and the vault fields, of the view
+            UserPositionViewService(session).refresh(vault_ids=snapshots.keys())
+        for snapshot in snapshots.values():
+            logger.info(f"Updated TVL for Vault {snapshot.vault_id} to {snapshot.tvl}")
 
     except Exception as e:
         print(traceback.print_exc())
@@ -1,17 +1,18 @@
 from asyncio.log import logger
 from datetime import timedelta
 import uuid
-import numpy as np
-import pandas as pd
 import pendulum
 from sqlalchemy import text
 from sqlmodel import Session, select
 from web3 import Web3
 from models.pps_history import PricePerShareHistory
-from empyrical import sortino_ratio, downside_risk
-from core.config import settings
 from models.vaults import Vault
+from services.log_decoder import VaultEventFamily, decode_event
 from services.vault_contract_service import VaultContractService
+from utils.lazy_import import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
 
 
 def get_before_price_per_shares(
@@ -63,6 +64,9 @@ def calculate_risk_factor(returns):
 
 
 def calculate_pps_statistics(session, vault_id):
+    # empyrical imports scipy, only the performance jobs need it
+    from empyrical import downside_risk, sortino_ratio
+
     statement = (
         select(PricePerShareHistory)
         .where(PricePerShareHistory.vault_id == vault_id)
@@ -250,25 +254,12 @@ def get_logs_from_tx_hash(vault: Vault, tx_hash: str, topic: str = None) -> list
 
 
 def extract_pendle_event(entry):
-    # Parse the account parameter from the topics field
-    from_address = None
-    if len(entry["topics"]) >= 2:
-        from_address = f'0x{entry["topics"][1].hex()[26:]}'  # For deposit event
-
-    # Parse the amount and shares parameters from the data field
-    data = entry["data"].hex()
-
-    if entry["topics"][0].hex() == settings.PENDLE_COMPLETE_WITHDRAW_EVENT_TOPIC:
-        pt_amount = int(data[2:66], 16) / 1e18
-        sc_amount = int(data[66 : 66 + 64], 16) / 1e6
-        shares = int(data[66 + 64 : 66 + 2 * 64], 16) / 1e6
-        total_amount = int(data[66 + 2 * 64 : 66 + 3 * 64], 16) / 1e6
-        eth_amount = 0
-    else:
-        pt_amount = int(data[2:66], 16) / 1e18
-        eth_amount = int(data[66 : 66 + 64], 16) / 1e18
-        sc_amount = int(data[66 + 64 : 66 + 2 * 64], 16) / 1e6
-        total_amount = int(data[66 + 64 * 2 : 66 + 3 * 64], 16) / 1e6
-        shares = int(data[66 + 3 * 64 : 66 + 4 * 64], 16) / 1e6
-
-    return pt_amount, eth_amount, sc_amount, total_amount, shares, from_address
+    decoded = decode_event(VaultEventFamily.pendle, entry)
+    return (
+        decoded.pt_amount,
+        decoded.eth_amount,
+        decoded.sc_amount,
+        decoded.value,
+        decoded.shares,
+        decoded.from_address,
+    )
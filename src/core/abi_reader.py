@@ -1,6 +1,9 @@
 import json
+from functools import lru_cache
 
 
+# ABIs are read once per process, callers must not modify the returned data
+@lru_cache(maxsize=None)
 def read_abi(token: str):
     with open(f"./config/{token.lower()}_abi.json") as f:
         data = json.load(f)
@@ -0,0 +1,192 @@
+"""Bulk writes through COPY, for the jobs inserting thousands of rows at once.
+
+The rows are streamed with `COPY ... FROM STDIN` into a temporary staging
+table holding only the written columns, then merged into the target with a
+single `INSERT ... SELECT ... ON CONFLICT`. Nothing goes through the ORM unit
+of work, so the cost per row is the COPY encoding instead of one INSERT
+statement and its bookkeeping.
+
+The conflict handling of a model is declared once in `UPSERT_SPECS`.
+"""
+
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from psycopg import sql
+from pydantic_core import PydanticUndefined
+from sqlmodel import Session
+
+from models.funding_rate_history import FundingRateHistory
+from models.onchain_transaction_history import OnchainTransactionHistory
+from models.user_assets_history import UserHoldingAssetHistory, UserHoldingAssetLatest
+from models.user_rewards import UserRewardAudit, UserRewards
+
+
+@dataclass(frozen=True)
+class UpsertSpec:
+    # Unique columns the rows conflict on, empty for plain inserts
+    conflict_columns: Tuple[str, ...] = ()
+    # Columns overwritten on conflict, empty to skip the conflicting rows
+    update_columns: Tuple[str, ...] = ()
+    # Columns added to the stored value on conflict, so concurrent writers of
+    # the same row don't overwrite each other
+    increment_columns: Tuple[str, ...] = ()
+    # Condition of the update, on the `target` and `excluded` rows
+    where: Optional[str] = None
+
+    @property
+    def updates(self) -> bool:
+        return bool(self.update_columns or self.increment_columns)
+
+
+UPSERT_SPECS: Dict[type, UpsertSpec] = {
+    FundingRateHistory: UpsertSpec(("partner_name", "datetime"), ("funding_rate",)),
+    OnchainTransactionHistory: UpsertSpec(("tx_hash",)),
+    UserHoldingAssetHistory: UpsertSpec(),
+    UserHoldingAssetLatest: UpsertSpec(
+        ("chain", "user_address"),
+        ("asset_amount", "block_number", "timestamp"),
+        # Re-indexing older transactions does not roll the snapshot back
+        where="target.block_number <= excluded.block_number",
+    ),
+    UserRewards: UpsertSpec(
+        ("id",), ("updated_at",), increment_columns=("total_reward",)
+    ),
+    UserRewardAudit: UpsertSpec(),
+}
+
+
+def _column_defaults(
+    model: type, columns: Sequence[str]
+) -> Dict[str, Callable[[], Any]]:
+    """Python side defaults of the model fields missing from `columns`.
+
+    Fields defaulting to None are left to the database, so serial keys and
+    nullable columns get their server value.
+    """
+    defaults = {}
+    for name, field in model.model_fields.items():
+        if name in columns or name not in model.__table__.columns.keys():
+            continue
+        if field.default_factory is not None:
+            defaults[name] = field.default_factory
+        elif field.default is not PydanticUndefined and field.default is not None:
+            defaults[name] = lambda value=field.default: value
+    return defaults
+
+
+def _table_name(model: type) -> sql.Composable:
+    table = model.__table__
+    if table.schema:
+        return sql.Identifier(table.schema, table.name)
+    return sql.Identifier(table.name)
+
+
+def _merge_statement(
+    model: type,
+    staging: sql.Identifier,
+    columns: List[str],
+    spec: UpsertSpec,
+    returning: Sequence[str],
+) -> sql.Composable:
+    column_list = sql.SQL(", ").join(map(sql.Identifier, columns))
+    statement = sql.SQL("INSERT INTO {} AS target ({}) SELECT {} FROM {}").format(
+        _table_name(model), column_list, column_list, staging
+    )
+    if spec.conflict_columns:
+        conflict = sql.SQL(" ON CONFLICT ({}) ").format(
+            sql.SQL(", ").join(map(sql.Identifier, spec.conflict_columns))
+        )
+        if spec.updates:
+            assignments = [
+                sql.SQL("{} = excluded.{}").format(
+                    sql.Identifier(name), sql.Identifier(name)
+                )
+                for name in spec.update_columns
+            ] + [
+                sql.SQL("{} = target.{} + excluded.{}").format(
+                    sql.Identifier(name), sql.Identifier(name), sql.Identifier(name)
+                )
+                for name in spec.increment_columns
+            ]
+            conflict += sql.SQL("DO UPDATE SET {}").format(
+                sql.SQL(", ").join(assignments)
+            )
+            if spec.where:
+                conflict += sql.SQL(" WHERE ") + sql.SQL(spec.where)
+        else:
+            conflict += sql.SQL("DO NOTHING")
+        statement += conflict
+    if returning:
+        statement += sql.SQL(" RETURNING {}").format(
+            sql.SQL(", ").join(map(sql.Identifier, returning))
+        )
+    return statement
+
+
+def bulk_write(
+    session: Session,
+    model: type,
+    rows: Iterable[dict],
+    spec: Optional[UpsertSpec] = None,
+    returning: Sequence[str] = (),
+) -> List[tuple] | int:
+    """Write `rows` of `model` with COPY and merge them per its `UpsertSpec`.
+
+    Every row must have the same keys; missing fields get their model
+    default. The write joins the transaction of `session` and is committed
+    with it. Returns the `returning` columns of the written rows, or their
+    count when `returning` is empty. Rows skipped on conflict are not counted.
+    """
+    if spec is None:
+        spec = UPSERT_SPECS[model]
+    rows = list(rows)
+    if not rows:
+        return [] if returning else 0
+
+    row_columns = list(rows[0])
+    defaults = _column_defaults(model, row_columns)
+    columns = row_columns + list(defaults)
+    if spec.updates:
+        # A statement can't update the same row twice, the last row wins and
+        # the increments of the same key are summed
+        by_key = {}
+        for row in rows:
+            key = tuple(row[name] for name in spec.conflict_columns)
+            previous = by_key.get(key)
+            if previous is not None and spec.increment_columns:
+                row = {
+                    **row,
+                    **{
+                        name: previous[name] + row[name]
+                        for name in spec.increment_columns
+                    },
+                }
+            by_key[key] = row
+        rows = list(by_key.values())
+
+    staging = sql.Identifier(f"bulk_{model.__tablename__}_{uuid.uuid4().hex[:8]}")
+    column_list = sql.SQL(", ").join(map(sql.Identifier, columns))
+    # Flush pending ORM changes first, the COPY bypasses the session
+    session.flush()
+    connection = session.connection().connection.driver_connection
+    with connection.cursor() as cursor:
+        cursor.execute(
+            sql.SQL(
+                "CREATE TEMPORARY TABLE {} ON COMMIT DROP"
+                " AS SELECT {} FROM {} WITH NO DATA"
+            ).format(staging, column_list, _table_name(model))
+        )
+        with cursor.copy(
+            sql.SQL("COPY {} ({}) FROM STDIN").format(staging, column_list)
+        ) as copy:
+            for row in rows:
+                copy.write_row(
+                    [row[name] for name in row_columns]
+                    + [default() for default in defaults.values()]
+                )
+        cursor.execute(_merge_statement(model, staging, columns, spec, returning))
+        result = cursor.fetchall() if returning else cursor.rowcount
+        cursor.execute(sql.SQL("DROP TABLE {}").format(staging))
+    return result
@@ -1,5 +1,5 @@
 import secrets
-from typing import Any, List, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 from pydantic import AnyHttpUrl, Extra, validator
 from pydantic_settings import BaseSettings
 
@@ -10,7 +10,6 @@ from pydantic import (
     ValidationInfo,
     field_validator,
 )
-from web3 import Web3
 
 
 class Settings(BaseSettings):
@@ -69,71 +68,79 @@ class Settings(BaseSettings):
     ROCKONYX_USDCE_USDC_PRICE_FEED_ADDRESS: str
     USDCE_USDC_CAMELOT_POOL_ADDRESS: str
 
-    STABLECOIN_DEPOSIT_VAULT_FILTER_TOPICS: str = Web3.solidity_keccak(
-        ["string"], ["Deposited(address,uint256,uint256)"]
-    ).hex()
-    STABLECOIN_INITIATE_WITHDRAW_VAULT_FILTER_TOPICS: str = Web3.solidity_keccak(
-        ["string"], ["InitiateWithdrawal(address,uint256,uint256)"]
-    ).hex()
-    STABLECOIN_COMPLETE_WITHDRAW_VAULT_FILTER_TOPICS: str = Web3.solidity_keccak(
-        ["string"], ["Withdrawn(address,uint256,uint256)"]
-    ).hex()
-
-    MULTIPLE_STABLECOINS_DEPOSIT_EVENT_TOPIC: str = Web3.solidity_keccak(
-        ["string"], ["Deposited(address,address,uint256,uint256)"]
-    ).hex()
-    DELTA_NEUTRAL_DEPOSIT_EVENT_TOPIC: str = Web3.solidity_keccak(
-        ["string"], ["Deposited(address,uint256,uint256)"]
-    ).hex()
-    DELTA_NEUTRAL_INITIATE_WITHDRAW_EVENT_TOPIC: str = Web3.solidity_keccak(
-        ["string"], ["RequestFunds(address,uint256,uint256)"]
-    ).hex()
-    DELTA_NEUTRAL_COMPLETE_WITHDRAW_EVENT_TOPIC: str = Web3.solidity_keccak(
-        ["string"], ["Withdrawn(address,uint256,uint256)"]
-    ).hex()
-
-    SOLV_DEPOSIT_EVENT_TOPIC: str = Web3.solidity_keccak(
-        ["string"], ["Deposit(address,address,uint256,uint256)"]
-    ).hex()
-    SOLV_INITIATE_WITHDRAW_EVENT_TOPIC: str = Web3.solidity_keccak(
-        ["string"], ["RequestFunds(address,address,uint256)"]
-    ).hex()
-    SOLV_COMPLETE_WITHDRAW_EVENT_TOPIC: str = Web3.solidity_keccak(
-        ["string"], ["Withdrawn(address,address,uint256,uint256)"]
-    ).hex()
-
+    # keccak("Deposited(address,uint256,uint256)")
+    STABLECOIN_DEPOSIT_VAULT_FILTER_TOPICS: str = (
+        "0x73a19dd210f1a7f902193214c0ee91dd35ee5b4d920cba8d519eca65a7b488ca"
+    )
+    # keccak("InitiateWithdrawal(address,uint256,uint256)")
+    STABLECOIN_INITIATE_WITHDRAW_VAULT_FILTER_TOPICS: str = (
+        "0x1161c944c3435352d302e3b1af910ea7a914b153da2056d90dd94f4e830a4d9e"
+    )
+    # keccak("Withdrawn(address,uint256,uint256)")
+    STABLECOIN_COMPLETE_WITHDRAW_VAULT_FILTER_TOPICS: str = (
+        "0x92ccf450a286a957af52509bc1c9939d1a6a481783e142e41e2499f0bb66ebc6"
+    )
+    # keccak("Deposited(address,address,uint256,uint256)")
+    MULTIPLE_STABLECOINS_DEPOSIT_EVENT_TOPIC: str = (
+        "0xf5681f9d0db1b911ac18ee83d515a1cf1051853a9eae418316a2fdf7dea427c5"
+    )
+    # keccak("Deposited(address,uint256,uint256)")
+    DELTA_NEUTRAL_DEPOSIT_EVENT_TOPIC: str = (
+        "0x73a19dd210f1a7f902193214c0ee91dd35ee5b4d920cba8d519eca65a7b488ca"
+    )
+    # keccak("RequestFunds(address,uint256,uint256)")
+    DELTA_NEUTRAL_INITIATE_WITHDRAW_EVENT_TOPIC: str = (
+        "0xe02be1878084d0d63ff254562290a8114f4ef7af224404e6ee73778bda0fc02f"
+    )
+    # keccak("Withdrawn(address,uint256,uint256)")
+    DELTA_NEUTRAL_COMPLETE_WITHDRAW_EVENT_TOPIC: str = (
+        "0x92ccf450a286a957af52509bc1c9939d1a6a481783e142e41e2499f0bb66ebc6"
+    )
+    # keccak("Deposit(address,address,uint256,uint256)")
+    SOLV_DEPOSIT_EVENT_TOPIC: str = (
+        "0xdcbc1c05240f31ff3ad067ef1ee35ce4997762752e3a095284754544f4c709d7"
+    )
+    # keccak("RequestFunds(address,address,uint256)")
+    SOLV_INITIATE_WITHDRAW_EVENT_TOPIC: str = (
+        "0x569ecbe8a13b4446e597e38bed740f0347bd3dc4ad569f2f3b65e2788f709822"
+    )
+    # keccak("Withdrawn(address,address,uint256,uint256)")
+    SOLV_COMPLETE_WITHDRAW_EVENT_TOPIC: str = (
+        "0x91fb9d98b786c57d74c099ccd2beca1739e9f6a81fb49001ca465c4b7591bbe2"
+    )
     # PENDLE TOPICS
-    PENDLE_DEPOSIT_EVENT_TOPIC: str = Web3.solidity_keccak(
-        ["string"], ["Deposit(address,uint256,uint256,uint256,uint256,uint256)"]
-    ).hex()
-
-    PENDLE_REQUEST_FUND_EVENT_TOPIC: str = Web3.solidity_keccak(
-        ["string"], ["RequestFunds(address,uint256,uint256,uint256,uint256,uint256)"]
-    ).hex()
-
-    PENDLE_FORCE_REQUEST_FUND_EVENT_TOPIC: str = Web3.solidity_keccak(
-        ["string"],
-        ["ForceRequestFunds(address,uint256,uint256,uint256,uint256,uint256)"],
-    ).hex()
-
-    PENDLE_COMPLETE_WITHDRAW_EVENT_TOPIC: str = Web3.solidity_keccak(
-        ["string"], ["Withdrawn(address,uint256,uint256,uint256,uint256)"]
-    ).hex()
-
-    RETHINK_DELTA_NEUTRAL_DEPOSIT_EVENT_TOPIC: str = Web3.solidity_keccak(
-        ["string"], ["UserDeposited(address,uint256)"]
-    ).hex()
-
+    # keccak("Deposit(address,uint256,uint256,uint256,uint256,uint256)")
+    PENDLE_DEPOSIT_EVENT_TOPIC: str = (
+        "0xf943cf10ef4d1e3239f4716ddecdf546e8ba8ab0e41deafd9a71a99936827e45"
+    )
+    # keccak("RequestFunds(address,uint256,uint256,uint256,uint256,uint256)")
+    PENDLE_REQUEST_FUND_EVENT_TOPIC: str = (
+        "0x29835b361052a697c9f643de976223a59a332b7b4acaefa06267016e3e5d8efa"
+    )
+    # keccak("ForceRequestFunds(address,uint256,uint256,uint256,uint256,uint256)")
+    PENDLE_FORCE_REQUEST_FUND_EVENT_TOPIC: str = (
+        "0x336e51768833a93e05296fc34a70754457d8a98ce79a27332468c18a04e7f836"
+    )
+    # keccak("Withdrawn(address,uint256,uint256,uint256,uint256)")
+    PENDLE_COMPLETE_WITHDRAW_EVENT_TOPIC: str = (
+        "0x94ffd6b85c71b847775c89ef6496b93cee961bdc6ff827fd117f174f06f745ae"
+    )
+    # keccak("UserDeposited(address,uint256)")
+    RETHINK_DELTA_NEUTRAL_DEPOSIT_EVENT_TOPIC: str = (
+        "0x951fdc61d6a98f96098a17ea6ac287a6fd38aea6bef73083c93b274cb830107d"
+    )
+    # keccak("DepositedToFundContract()")
     RETHINK_DELTA_NEUTRAL_DEPOSITED_TO_FUND_CONTRACT_EVENT_TOPIC: str = (
-        Web3.solidity_keccak(["string"], ["DepositedToFundContract()"]).hex()
+        "0xda43df27a339f80303355a0fac6c644bb25b52dc0317394b127e505099ff55ca"
+    )
+    # keccak("InitiateWithdrawal(address,uint256,uint256)")
+    RETHINK_DELTA_NEUTRAL_REQUEST_FUND_EVENT_TOPIC: str = (
+        "0x1161c944c3435352d302e3b1af910ea7a914b153da2056d90dd94f4e830a4d9e"
+    )
+    # keccak("Withdrawn(address,uint256,uint256)")
+    RETHINK_DELTA_NEUTRAL_COMPLETE_WITHDRAW_EVENT_TOPIC: str = (
+        "0x92ccf450a286a957af52509bc1c9939d1a6a481783e142e41e2499f0bb66ebc6"
     )
-    RETHINK_DELTA_NEUTRAL_REQUEST_FUND_EVENT_TOPIC: str = Web3.solidity_keccak(
-        ["string"], ["InitiateWithdrawal(address,uint256,uint256)"]
-    ).hex()
-    RETHINK_DELTA_NEUTRAL_COMPLETE_WITHDRAW_EVENT_TOPIC: str = Web3.solidity_keccak(
-        ["string"], ["Withdrawn(address,uint256,uint256)"]
-    ).hex()
-
     OPTIONS_WHEEL_OWNER_WALLET_ADDRESS: str
 
     OPERATION_ADMIN_WALLET_ADDRESS: str
@@ -221,6 +228,32 @@ class Settings(BaseSettings):
     HYPER_LIQUID_API_KEY: str | None = ""
     HYPER_LIQUID_ADDRESS: str | None = ""
 
+    # Raw points history older than this is rolled up into daily rows
+    POINTS_HISTORY_RETENTION_DAYS: int = 30
+    POINTS_HISTORY_COMPACTION_BATCH_SIZE: int = 10000
+
+    # Vaults changed by another process are picked up after this delay
+    VAULT_REGISTRY_TTL_SECONDS: int = 300
+
+    # Jobs of the resident scheduler running at the same time
+    SCHEDULER_MAX_WORKERS: int = 4
+
+    # Prometheus file written by the scheduler after every job run, for the
+    # node exporter's textfile collector
+    METRICS_TEXTFILE_PATH: str | None = None
+    # Port of the /metrics endpoint served by the web3 listener
+    LISTENER_METRICS_PORT: int | None = None
+
+    # Read only API routes query this database when set, a streaming replica
+    # of the primary with its own connection pool
+    SQLALCHEMY_REPLICA_DATABASE_URI: PostgresDsn | None = None
+    # Reads go back to the primary while the replica is further behind
+    REPLICA_MAX_LAG_SECONDS: float = 30
+    REPLICA_LAG_CHECK_INTERVAL_SECONDS: float = 5
+    # Route template to "primary" or "replica", e.g.
+    # {"/api/v1/statistics/": "primary"}, "replica" ignores the replica lag
+    DB_ROUTE_OVERRIDES: Dict[str, str] = {}
+
     @field_validator("SQLALCHEMY_DATABASE_URI", mode="before")
     def assemble_db_connection(cls, v: str | None, info: ValidationInfo) -> Any:
         if isinstance(v, str):
@@ -71,6 +71,11 @@ NETWORK_RPC_URLS = {
     CHAIN_BASE: settings.BASE_MAINNET_NETWORK_RPC,
 }
 
+# Multicall3 is deployed at the same address on every supported chain
+MULTICALL3_ADDRESS = Web3.to_checksum_address(
+    "0xcA11bde05977b3631167028862bE2a173976CA11"
+)
+
 NETWORK_SOCKET_URLS = {
     CHAIN_ARBITRUM: settings.ARBITRUM_MAINNET_INFURA_WEBSOCKER_URL,
     CHAIN_ETHER_MAINNET: settings.ETHER_MAINNET_INFURA_URL,
@@ -1,11 +1,17 @@
+import asyncio
+import hashlib
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
-from typing import List
+from typing import Any, Awaitable, Callable, Iterator, List
 
 from sqlalchemy import bindparam, func, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import Session, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from core import constants
 from core.config import settings
+from core.db_routing import SessionRouter
 from models.campaigns import Campaign
 from models.points_multiplier_config import PointsMultiplierConfig
 from models.pps_history import PricePerShareHistory
@@ -19,6 +25,65 @@ from models.vault_performance import VaultPerformance
 from models.vaults import NetworkChain, Vault, VaultGroup, VaultMetadata
 
 engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), pool_pre_ping=True)
+# Same database through psycopg's asyncio driver, used by the API handlers
+async_engine = create_async_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI), pool_pre_ping=True
+)
+# Read replica of the read only API routes, with a pool of its own
+replica_async_engine = (
+    create_async_engine(
+        str(settings.SQLALCHEMY_REPLICA_DATABASE_URI), pool_pre_ping=True
+    )
+    if settings.SQLALCHEMY_REPLICA_DATABASE_URI
+    else None
+)
+session_router = SessionRouter(
+    async_engine,
+    replica_async_engine,
+    settings.REPLICA_MAX_LAG_SECONDS,
+    settings.DB_ROUTE_OVERRIDES,
+    settings.REPLICA_LAG_CHECK_INTERVAL_SECONDS,
+)
+
+
+async def run_concurrently(
+    *queries: Callable[[AsyncSession], Awaitable[Any]], bind: AsyncEngine = None
+):
+    """Run independent queries at the same time, each on its own pooled connection.
+
+    An AsyncSession runs one statement at a time, so every query gets a session.
+    `bind` is the engine of the queries, the primary by default.
+    """
+
+    async def run(query):
+        async with AsyncSession(bind or async_engine) as session:
+            return await query(session)
+
+    return await asyncio.gather(*(run(query) for query in queries))
+
+
+@contextmanager
+def try_advisory_lock(name: str) -> Iterator[bool]:
+    """Hold a Postgres session advisory lock named `name` if it is free.
+
+    Yields whether the lock was acquired. The lock lives on a dedicated
+    connection, so it is shared by every process using the database and is
+    released if the process dies.
+    """
+    key = int.from_bytes(
+        hashlib.blake2b(name.encode(), digest_size=8).digest(), "big", signed=True
+    )
+    with engine.connect() as connection:
+        acquired = connection.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": key}
+        ).scalar()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                connection.execute(
+                    text("SELECT pg_advisory_unlock(:key)"), {"key": key}
+                )
 
 
 # make sure all SQLModel models are imported (models) before initializing DB
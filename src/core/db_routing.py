@@ -0,0 +1,105 @@
+"""Routing of the API sessions between the primary database and a read replica.
+
+Only the routes depending on `ReadSessionDep` are routed: their GET requests
+read from the replica while it is reachable and no further behind than the
+staleness tolerance, anything else stays on the primary. Handlers that write,
+or read what they just wrote, keep the primary sessions.
+"""
+
+import logging
+import math
+import time
+from enum import Enum
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from core.instrumentation import DB_REPLICA_LAG, DB_SESSION_ROUTES
+
+logger = logging.getLogger(__name__)
+
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Zero on a primary and on a replica that replayed all the WAL it received,
+# otherwise the age of the last replayed transaction
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery()"
+    " OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class DbTarget(str, Enum):
+    primary = "primary"
+    replica = "replica"
+
+
+class SessionRouter:
+    def __init__(
+        self,
+        primary: AsyncEngine,
+        replica: Optional[AsyncEngine],
+        max_lag_seconds: float,
+        overrides: Optional[Dict[str, str]] = None,
+        lag_check_interval: float = 5,
+    ):
+        self.primary = primary
+        self.replica = replica
+        self.max_lag_seconds = max_lag_seconds
+        self.overrides = {
+            route: DbTarget(target) for route, target in (overrides or {}).items()
+        }
+        self.lag_check_interval = lag_check_interval
+        self._lag: Optional[float] = None
+        self._lag_checked_at = -math.inf
+
+    async def replica_lag(self) -> Optional[float]:
+        """Seconds the replica is behind, None when it cannot be reached.
+
+        Checked at most once per `lag_check_interval`, the requests in between
+        reuse the last value.
+        """
+        now = time.monotonic()
+        if now - self._lag_checked_at < self.lag_check_interval:
+            return self._lag
+        # Concurrent requests keep the previous value while this one checks
+        self._lag_checked_at = now
+        try:
+            async with self.replica.connect() as connection:
+                lag = (await connection.execute(REPLICA_LAG_QUERY)).scalar()
+        except Exception as e:
+            logger.warning(f"Cannot check the replica lag: {e}")
+            self._lag = None
+            return None
+        # No transaction replayed since the replica started
+        self._lag = math.inf if lag is None else float(lag)
+        DB_REPLICA_LAG.set(self._lag)
+        return self._lag
+
+    async def route(self, method: str, route: str) -> Tuple[DbTarget, str]:
+        """Database of a request and the reason, recorded in the metrics."""
+        override = self.overrides.get(route)
+        if override == DbTarget.primary:
+            target, reason = DbTarget.primary, "override"
+        elif method not in READ_METHODS:
+            target, reason = DbTarget.primary, "write"
+        elif self.replica is None:
+            target, reason = DbTarget.primary, "no_replica"
+        else:
+            lag = await self.replica_lag()
+            if lag is None:
+                target, reason = DbTarget.primary, "replica_down"
+            elif override == DbTarget.replica:
+                target, reason = DbTarget.replica, "override"
+            elif lag > self.max_lag_seconds:
+                target, reason = DbTarget.primary, "replica_lagging"
+            else:
+                target, reason = DbTarget.replica, "read"
+        DB_SESSION_ROUTES.labels(route=route, target=target.value, reason=reason).inc()
+        return target, reason
+
+    def engine(self, target: DbTarget) -> AsyncEngine:
+        if target == DbTarget.replica and self.replica is not None:
+            return self.replica
+        return self.primary
@@ -0,0 +1,266 @@
+"""Metrics and tracing hooks for SQL statements, Web3 calls and outbound HTTP.
+
+`install()` registers the hooks once per process. Every hook records a
+metric in the default `prometheus_client` registry and, when the
+`opentelemetry` package is installed and configured, a span nested under the
+span of the current request or job.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from prometheus_client import Counter, Gauge, Histogram
+
+try:
+    from opentelemetry import trace
+
+    tracer = trace.get_tracer("harmonix")
+except ImportError:  # tracing is optional
+    tracer = None
+
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Latency of the API requests by route template",
+    ["method", "route", "status"],
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Latency of the SQL statements by statement type",
+    ["operation"],
+)
+DB_ROWS_WRITTEN = Counter(
+    "db_rows_written_total",
+    "Rows inserted, updated or deleted, by job when run from the scheduler",
+    ["operation", "job"],
+)
+RPC_REQUEST_DURATION = Histogram(
+    "rpc_request_duration_seconds",
+    "Latency of the JSON-RPC calls by chain and method",
+    ["chain", "method"],
+)
+RPC_REQUEST_ERRORS = Counter(
+    "rpc_request_errors_total",
+    "JSON-RPC calls that raised or returned an error",
+    ["chain", "method"],
+)
+OUTBOUND_HTTP_DURATION = Histogram(
+    "outbound_http_request_duration_seconds",
+    "Latency of the HTTP requests made to external APIs",
+    ["host", "status"],
+)
+JOB_DURATION = Histogram(
+    "job_duration_seconds",
+    "Duration of the scheduler job runs",
+    ["job", "status"],
+    # Jobs run from seconds to about an hour
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, float("inf")),
+)
+JOB_LAST_SUCCESS = Gauge(
+    "job_last_success_timestamp_seconds",
+    "Unix time of the last successful run of a job",
+    ["job"],
+)
+LISTENER_EVENT_LAG = Gauge(
+    "listener_event_lag_blocks",
+    "Blocks between the chain head and the last event handled by the listener",
+    ["chain"],
+)
+LISTENER_EVENTS = Counter(
+    "listener_events_total",
+    "Events handled by the web3 listener",
+    ["chain", "event"],
+)
+INGESTION_QUEUE_DEPTH = Gauge(
+    "ingestion_queue_depth",
+    "Events waiting in the queue of an ingestion consumer",
+    ["consumer"],
+)
+INGESTION_CONSUMER_LAG = Gauge(
+    "ingestion_consumer_lag_seconds",
+    "Seconds between receiving the last event and its consumer finishing it",
+    ["consumer"],
+)
+INGESTION_EVENTS = Counter(
+    "ingestion_events_total",
+    "Events of the ingestion consumers by outcome: handled, failed or dropped",
+    ["consumer", "status"],
+)
+DB_SESSION_ROUTES = Counter(
+    "db_session_routes_total",
+    "API sessions by route template, database and reason of the routing decision",
+    ["route", "target", "reason"],
+)
+DB_REPLICA_LAG = Gauge(
+    "db_replica_lag_seconds",
+    "Seconds the read replica is behind the primary, at the last check",
+)
+
+# Job of the scheduler running in the current thread, labels the rows it writes
+current_job: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "current_job", default=""
+)
+
+_installed = False
+_install_lock = threading.Lock()
+_rpc_chains: Dict[str, str] = {}
+
+
+@contextmanager
+def span(name: str, **attributes):
+    if tracer is None:
+        yield None
+        return
+    with tracer.start_as_current_span(name, attributes=attributes) as current:
+        yield current
+
+
+def statement_operation(statement: str) -> str:
+    words = statement.split(None, 1)
+    return words[0].upper() if words else ""
+
+
+def rpc_chain(endpoint_uri: Optional[str]) -> str:
+    # RPC urls embed API keys, label calls with the chain or the host only
+    endpoint_uri = str(endpoint_uri or "")
+    return _rpc_chains.get(endpoint_uri) or urlparse(endpoint_uri).hostname or ""
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+    if tracer is not None and context is not None:
+        context._query_span = tracer.start_span(
+            "db.query", attributes={"db.statement": statement[:500]}
+        )
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    operation = statement_operation(statement)
+    DB_QUERY_DURATION.labels(operation=operation).observe(elapsed)
+    if operation in ("INSERT", "UPDATE", "DELETE") and cursor.rowcount > 0:
+        DB_ROWS_WRITTEN.labels(operation=operation, job=current_job.get()).inc(
+            cursor.rowcount
+        )
+    query_span = getattr(context, "_query_span", None)
+    if query_span is not None:
+        query_span.end()
+
+
+def _handle_error(exception_context):
+    # The statement failed, after_cursor_execute is not called
+    if exception_context.connection is not None:
+        start_times = exception_context.connection.info.get("query_start_time")
+        if start_times:
+            start_times.pop()
+    query_span = getattr(exception_context.execution_context, "_query_span", None)
+    if query_span is not None:
+        query_span.end()
+
+
+def _instrument_sql():
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    # Listening on the Engine class covers the sync and the async engines
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+
+
+def _instrument_web3():
+    from web3.providers.async_rpc import AsyncHTTPProvider
+    from web3.providers.rpc import HTTPProvider
+
+    from core.constants import NETWORK_RPC_URLS
+
+    _rpc_chains.update({url: chain for chain, url in NETWORK_RPC_URLS.items() if url})
+
+    make_request = HTTPProvider.make_request
+    make_async_request = AsyncHTTPProvider.make_request
+
+    def record(chain, method, start, response):
+        RPC_REQUEST_DURATION.labels(chain=chain, method=method).observe(
+            time.perf_counter() - start
+        )
+        if response is None or "error" in response:
+            RPC_REQUEST_ERRORS.labels(chain=chain, method=method).inc()
+
+    def instrumented_make_request(self, method, params):
+        chain = rpc_chain(self.endpoint_uri)
+        start = time.perf_counter()
+        response = None
+        with span(f"rpc {method}", chain=chain):
+            try:
+                response = make_request(self, method, params)
+                return response
+            finally:
+                record(chain, method, start, response)
+
+    async def instrumented_make_async_request(self, method, params):
+        chain = rpc_chain(self.endpoint_uri)
+        start = time.perf_counter()
+        response = None
+        with span(f"rpc {method}", chain=chain):
+            try:
+                response = await make_async_request(self, method, params)
+                return response
+            finally:
+                record(chain, method, start, response)
+
+    HTTPProvider.make_request = instrumented_make_request
+    AsyncHTTPProvider.make_request = instrumented_make_async_request
+
+
+def _instrument_requests():
+    import requests
+
+    send = requests.Session.send
+
+    def instrumented_send(self, request, **kwargs):
+        host = urlparse(request.url).hostname or ""
+        start = time.perf_counter()
+        status = "error"
+        with span(f"HTTP {request.method}", host=host):
+            try:
+                response = send(self, request, **kwargs)
+                status = str(response.status_code)
+                return response
+            finally:
+                OUTBOUND_HTTP_DURATION.labels(host=host, status=status).observe(
+                    time.perf_counter() - start
+                )
+
+    requests.Session.send = instrumented_send
+
+
+def install():
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        _instrument_sql()
+        _instrument_web3()
+        _instrument_requests()
+        _installed = True
+
+
+@contextmanager
+def job_run(job_name: str):
+    """Labels the rows written while a scheduler job runs and traces the run."""
+    token = current_job.set(job_name)
+    try:
+        with span(f"job {job_name}"):
+            yield
+    finally:
+        current_job.reset(token)
+
+
+def record_job_run(job_name: str, status: str, duration: float):
+    JOB_DURATION.labels(job=job_name, status=status).observe(duration)
+    if status == "success":
+        JOB_LAST_SUCCESS.labels(job=job_name).set_to_current_time()
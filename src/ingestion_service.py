@@ -0,0 +1,157 @@
+"""One process ingesting the vault logs of every configured chain.
+
+Replaces running web3_listener, rethink_web3_listener and monitoring_listener
+per chain: every chain gets a single websocket subscription, every log is
+decoded once and handed to the portfolio, Rethink and alerting consumers.
+"""
+
+import asyncio
+import logging
+from typing import List, Optional
+
+import click
+from prometheus_client import start_http_server
+from sqlmodel import Session
+
+import monitoring_listener
+import rethink_web3_listener
+import web3_listener
+from core import instrumentation
+from core.config import settings
+from core.db import engine
+from log import setup_logging_to_console, setup_logging_to_file
+from models.vaults import NetworkChain
+from services.ingestion import ChainSource, Consumer, FanOut, LogEvent
+from services.log_decoder import VaultEventFamily
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("ingestion_service")
+
+ALERT_EVENTS = {"Deposit", "InitiateWithdraw", "Withdrawn"}
+
+
+class PortfolioConsumer(Consumer):
+    name = "portfolio"
+
+    def accepts(self, event: LogEvent) -> bool:
+        return event.decoded.family != VaultEventFamily.rethink
+
+    async def handle(self, event: LogEvent):
+        await asyncio.to_thread(self._handle, event)
+
+    @staticmethod
+    def _handle(event: LogEvent):
+        with Session(engine) as session:
+            web3_listener.handle_event(
+                session,
+                event.log["address"],
+                event.log,
+                event.decoded.event_name,
+                event.decoded,
+            )
+
+
+class RethinkConsumer(Consumer):
+    name = "rethink"
+
+    def accepts(self, event: LogEvent) -> bool:
+        return event.decoded.family == VaultEventFamily.rethink
+
+    async def handle(self, event: LogEvent):
+        await asyncio.to_thread(self._handle, event)
+
+    @staticmethod
+    def _handle(event: LogEvent):
+        with Session(engine) as session:
+            rethink_web3_listener.handle_rethink_event(
+                session, event.decoded.event_name, event.decoded
+            )
+
+
+class AlertConsumer(Consumer):
+    name = "alerts"
+    # Alerts are informative, never hold back the portfolio updates for them
+    drop_when_full = True
+
+    def accepts(self, event: LogEvent) -> bool:
+        return event.decoded.event_name in ALERT_EVENTS
+
+    async def handle(self, event: LogEvent):
+        # The alert reads the user position with blocking contract calls, run
+        # it on its own loop in a worker thread
+        await asyncio.to_thread(
+            asyncio.run,
+            monitoring_listener.handle_event(
+                event.log["address"],
+                event.log,
+                event.decoded.event_name,
+                event.decoded,
+            ),
+        )
+
+
+CONSUMERS = {
+    consumer.name: consumer
+    for consumer in (PortfolioConsumer, RethinkConsumer, AlertConsumer)
+}
+
+
+def websocket_url(network: NetworkChain) -> Optional[str]:
+    if network == NetworkChain.arbitrum_one:
+        return settings.ARBITRUM_MAINNET_INFURA_WEBSOCKER_URL
+    if network == NetworkChain.ethereum:
+        return settings.ETHER_MAINNET_INFURA_WEBSOCKER_URL
+    if network == NetworkChain.base:
+        return settings.BASE_MAINNET_WSS_NETWORK_RPC
+    return None
+
+
+async def run(networks: List[NetworkChain], consumer_names: List[str]):
+    fan_out = FanOut([CONSUMERS[name]() for name in consumer_names])
+    fan_out.start()
+    sources = [
+        ChainSource(network, websocket_url(network), fan_out) for network in networks
+    ]
+    logger.info(
+        f"Ingesting {[n.value for n in networks]} logs for {consumer_names} consumers"
+    )
+    try:
+        await asyncio.gather(*(source.run() for source in sources))
+    finally:
+        await fan_out.stop()
+
+
+@click.command()
+@click.option(
+    "--network",
+    "networks",
+    multiple=True,
+    type=click.Choice([n.value for n in NetworkChain]),
+    help="Chains to ingest, every chain with a websocket url when not set",
+)
+@click.option(
+    "--consumer",
+    "consumers",
+    multiple=True,
+    type=click.Choice(list(CONSUMERS)),
+    help="Consumers to run, all of them when not set",
+)
+def main(networks, consumers):
+    setup_logging_to_console()
+    setup_logging_to_file(app="ingestion_service", level=logging.INFO, logger=logger)
+    instrumentation.install()
+    if settings.LISTENER_METRICS_PORT:
+        start_http_server(settings.LISTENER_METRICS_PORT)
+
+    if networks:
+        chains = [NetworkChain(network) for network in networks]
+        missing = [chain.value for chain in chains if not websocket_url(chain)]
+        if missing:
+            raise click.BadParameter(f"No websocket url configured for {missing}")
+    else:
+        chains = [network for network in NetworkChain if websocket_url(network)]
+    asyncio.run(run(chains, list(consumers or CONSUMERS)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,17 @@
 from fastapi.exceptions import ValidationException
-from fastapi.responses import JSONResponse
+import time
+
+from fastapi.responses import JSONResponse, Response
 import uvicorn
 from fastapi import FastAPI, Request
 from api.api_v1.api import api_router
 from starlette.middleware.cors import CORSMiddleware
 
+from core import instrumentation
 from core.config import settings
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+instrumentation.install()
 
 app = FastAPI(
     title=settings.PROJECT_NAME, openapi_url=f"{settings.API_V1_STR}/openapi.json"
@@ -52,6 +58,31 @@ async def exception_handler(request: Request, exc: Exception):
     )
 
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    with instrumentation.span(f"HTTP {request.method}") as span:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            # Label with the route template, not the path with its ids
+            route = request.scope.get("route")
+            route = route.path if route else "unmatched"
+            instrumentation.HTTP_REQUEST_DURATION.labels(
+                method=request.method, route=route, status=status
+            ).observe(time.perf_counter() - start)
+            if span is not None:
+                span.set_attribute("http.route", route)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(generate_latest(), headers={"Content-Type": CONTENT_TYPE_LATEST})
+
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 
@@ -7,6 +7,7 @@ from .transaction import Transaction
 from .price_feed_oracle_history import PriceFeedOracleHistory
 from .user_points import UserPoints, UserPointAudit
 from .point_distribution_history import PointDistributionHistory
+from .point_distribution_history_daily import PointDistributionHistoryDaily
 from .referralcodes import ReferralCode
 from .referrals import Referral
 from .rewards import Reward
@@ -15,12 +16,14 @@ from .reward_sessions import RewardSessions
 from .points_multiplier_config import PointsMultiplierConfig
 from .reward_session_config import RewardSessionConfig
 from .user_points_history import UserPointsHistory
+from .user_points_history_daily import UserPointsHistoryDaily
 from .referral_points import ReferralPoints
 from .referral_points_history import ReferralPointsHistory
+from .referral_points_history_daily import ReferralPointsHistoryDaily
 from .campaigns import Campaign
 from .reward_thresholds import RewardThresholds
 from .onchain_transaction_history import OnchainTransactionHistory
-from .user_assets_history import UserHoldingAssetHistory
+from .user_assets_history import UserHoldingAssetHistory, UserHoldingAssetLatest
 from .user_last_30_days_tvl import UserLast30DaysTVL
 from .user_holding_job_state import UserHoldingJobState
 
@@ -37,3 +40,9 @@ from .whitelist_wallets import WhitelistWallet
 from .reward_distribution_config import RewardDistributionConfig
 from .app_config import AppConfig
 from .user_agreement import UserAgreement
+from .initiated_withdrawal_amount import InitiatedWithdrawalAmount
+from .transaction_ledger import LedgerAction, TransactionLedger
+from .job_run_history import JobRunHistory, JobRunStatus
+from .vault_state_snapshot import VaultStateSnapshot
+from .solv_nav_history import SolvNavHistory, SolvNavStatistics
+from .user_position_view import UserPositionView
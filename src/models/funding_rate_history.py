@@ -1,3 +1,4 @@
+from sqlalchemy import UniqueConstraint
 from sqlmodel import SQLModel, Field
 from uuid import UUID, uuid4
 from datetime import datetime as dt, timezone
@@ -7,7 +8,14 @@ import sqlmodel
 
 class FundingRateHistory(SQLModel, table=True):
     __tablename__ = "funding_rate_history"
-    __table_args__ = {"schema": "reports"}
+    __table_args__ = (
+        UniqueConstraint(
+            "partner_name",
+            "datetime",
+            name="uq_funding_rate_history_partner_name_datetime",
+        ),
+        {"schema": "reports"},
+    )
 
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     datetime: dt = sqlmodel.Field(default=dt.now(timezone.utc), index=True)
@@ -0,0 +1,20 @@
+import uuid
+from datetime import datetime, timezone
+
+from sqlmodel import Field, SQLModel
+
+
+class InitiatedWithdrawalAmount(SQLModel, table=True):
+    """Resolved amount of an initiated withdrawal transaction.
+
+    The amount only depends on the transaction input and the price per share at
+    its block, so it never changes once resolved.
+    """
+
+    __tablename__ = "initiated_withdrawal_amount"
+
+    tx_hash: str = Field(primary_key=True)
+    vault_id: uuid.UUID = Field(index=True)
+    block_number: int
+    amount: float
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
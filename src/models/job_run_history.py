@@ -0,0 +1,28 @@
+import uuid
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from sqlalchemy import Index
+from sqlmodel import Field, SQLModel
+
+
+class JobRunStatus(str, Enum):
+    SUCCESS = "success"
+    FAILED = "failed"
+    # Another process held the job lock
+    SKIPPED = "skipped"
+
+
+class JobRunHistory(SQLModel, table=True):
+    __tablename__ = "job_run_history"
+    __table_args__ = (
+        Index("ix_job_run_history_job_name_started_at", "job_name", "started_at"),
+    )
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    job_name: str
+    status: JobRunStatus
+    started_at: datetime
+    duration_seconds: float
+    error: Optional[str] = None
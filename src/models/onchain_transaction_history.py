@@ -1,9 +1,22 @@
 import uuid
+from sqlalchemy import Index, text
 from sqlmodel import Field, SQLModel
 
 
 class OnchainTransactionHistory(SQLModel, table=True):
     __tablename__ = "onchain_transaction_history"
+    __table_args__ = (
+        Index(
+            "ix_onchain_transaction_history_to_address_method_id_timestamp",
+            "to_address",
+            "method_id",
+            "timestamp",
+        ),
+        Index(
+            "ix_onchain_transaction_history_lower_from_address",
+            text("lower(from_address)"),
+        ),
+    )
 
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     tx_hash: str = Field(index=True, unique=True)
@@ -0,0 +1,16 @@
+from sqlmodel import SQLModel, Field
+from uuid import UUID
+from datetime import datetime
+
+
+# Daily rollup of compacted PointDistributionHistory rows. Distribution rows are
+# running totals, so the rollup keeps the last value of the day instead of a sum
+class PointDistributionHistoryDaily(SQLModel, table=True):
+    __tablename__ = "point_distribution_history_daily"
+
+    vault_id: UUID = Field(foreign_key="vaults.id", primary_key=True)
+    partner_name: str = Field(primary_key=True)
+    day: datetime = Field(primary_key=True)
+    point: float
+    entries: int
+    last_created_at: datetime
@@ -1,4 +1,5 @@
 from datetime import datetime as dt, timezone
+from sqlalchemy import Index, text
 from sqlmodel import SQLModel, Field
 import uuid
 
@@ -10,6 +11,9 @@ class PricePerShareHistoryBase(SQLModel):
 
 class PricePerShareHistory(PricePerShareHistoryBase, table=True):
     __tablename__ = "pps_history"
+    __table_args__ = (
+        Index("ix_pps_history_vault_id_datetime", "vault_id", text("datetime DESC")),
+    )
 
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     vault_id: uuid.UUID = Field(foreign_key="vaults.id")
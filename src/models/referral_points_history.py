@@ -1,4 +1,5 @@
 from typing import Optional
+from sqlalchemy import Index, text
 from sqlmodel import SQLModel, Field
 from uuid import UUID, uuid4
 from datetime import datetime, timezone
@@ -6,6 +7,9 @@ from datetime import datetime, timezone
 
 class ReferralPointsHistory(SQLModel, table=True):
     __tablename__ = "referral_points_history"
+    __table_args__ = (
+        Index("ix_referral_points_history_referral_points_id_created_at", "referral_points_id", text("created_at DESC")),
+    )
 
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     referral_points_id: UUID = Field(foreign_key="referral_points.id")
@@ -0,0 +1,16 @@
+from sqlmodel import SQLModel, Field
+from uuid import UUID
+from datetime import datetime
+
+
+# Daily rollup of compacted ReferralPointsHistory rows, points are summed
+class ReferralPointsHistoryDaily(SQLModel, table=True):
+    __tablename__ = "referral_points_history_daily"
+
+    referral_points_id: UUID = Field(
+        foreign_key="referral_points.id", primary_key=True
+    )
+    day: datetime = Field(primary_key=True)
+    point: float
+    entries: int
+    last_created_at: datetime
@@ -0,0 +1,39 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+
+class SolvNavHistory(SQLModel, table=True):
+    """NAV points of a Solv open fund, as published by the Solv API."""
+
+    __tablename__ = "solv_nav_history"
+
+    pool_slot_info_id: int = Field(primary_key=True)
+    nav_date: datetime = Field(primary_key=True)
+    nav: float
+    adjusted_nav: float
+
+
+class SolvNavStatistics(SQLModel, table=True):
+    """Running statistics of the NAV returns of a Solv open fund.
+
+    Updated with every point appended to `solv_nav_history`, so the
+    performance job never rescans the series. Returns are the changes of
+    `nav` between two consecutive points.
+    """
+
+    __tablename__ = "solv_nav_statistics"
+
+    pool_slot_info_id: int = Field(primary_key=True)
+    last_nav_date: Optional[datetime] = None
+    last_nav: Optional[float] = None
+    all_time_high: float = 0
+    return_count: int = 0
+    return_sum: float = 0
+    # Sum of the squares of the returns below zero, zero for the others
+    downside_square_sum: float = 0
+    negative_count: int = 0
+    negative_sum: float = 0
+    negative_square_sum: float = 0
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,52 @@
+import uuid
+from enum import Enum
+from typing import Optional
+
+from sqlalchemy import Index
+from sqlmodel import Field, SQLModel
+
+
+class LedgerAction(str, Enum):
+    DEPOSIT = "deposit"
+    INITIATE_WITHDRAWAL = "initiate_withdrawal"
+    COMPLETE_WITHDRAWAL = "complete_withdrawal"
+
+
+class TransactionLedger(SQLModel, table=True):
+    """Decoded vault transaction, written once when the raw transaction is indexed.
+
+    `amount` is in units of the deposited/withdrawn token and `usd_value` is its
+    value at the transaction time, so aggregations are plain SQL sums.
+    """
+
+    __tablename__ = "transaction_ledger"
+    __table_args__ = (
+        Index(
+            "ix_transaction_ledger_user_address_action_timestamp",
+            "user_address",
+            "action",
+            "timestamp",
+        ),
+        Index(
+            "ix_transaction_ledger_vault_id_action_timestamp",
+            "vault_id",
+            "action",
+            "timestamp",
+        ),
+    )
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    tx_hash: str = Field(unique=True)
+    vault_id: uuid.UUID = Field(foreign_key="vaults.id")
+    # Lower cased sender of the transaction
+    user_address: str
+    action: LedgerAction
+    method_id: str
+    token: Optional[str] = None
+    amount: float
+    shares: Optional[float] = None
+    pps_at_block: Optional[float] = None
+    usd_value: Optional[float] = None
+    block_number: int
+    timestamp: int
+    chain: str
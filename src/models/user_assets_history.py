@@ -1,3 +1,4 @@
+from sqlalchemy import Index, text
 from sqlmodel import SQLModel, Field
 from typing import Optional
 from uuid import UUID
@@ -6,6 +7,15 @@ from datetime import datetime
 
 class UserHoldingAssetHistory(SQLModel, table=True):
     __tablename__ = "user_holding_asset_history"
+    __table_args__ = (
+        Index(
+            "ix_user_holding_asset_history_chain_user_address_block_number",
+            "chain",
+            "user_address",
+            text("block_number DESC"),
+        ),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_address: str
     total_shares: float
@@ -18,3 +28,15 @@ class UserHoldingAssetHistory(SQLModel, table=True):
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     block_number: int
     chain: str = Field(default="arbitrum_one", index=True, nullable=True)
+
+
+# Latest UserHoldingAssetHistory row of every user, maintained by the KelpDAO
+# indexer so the partners endpoint does not scan the history
+class UserHoldingAssetLatest(SQLModel, table=True):
+    __tablename__ = "user_holding_asset_latest"
+
+    chain: str = Field(primary_key=True)
+    user_address: str = Field(primary_key=True)
+    asset_amount: float
+    block_number: int
+    timestamp: datetime
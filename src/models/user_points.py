@@ -1,4 +1,5 @@
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 from uuid import UUID, uuid4
 from datetime import datetime, timezone
@@ -6,6 +7,15 @@ from datetime import datetime, timezone
 
 class UserPoints(SQLModel, table=True):
     __tablename__ = "user_points"
+    __table_args__ = (
+        Index(
+            "ix_user_points_wallet_partner_vault_session",
+            "wallet_address",
+            "partner_name",
+            "vault_id",
+            "session_id",
+        ),
+    )
 
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     vault_id: UUID = Field(foreign_key="vaults.id")
@@ -15,6 +25,9 @@ class UserPoints(SQLModel, table=True):
     created_at: datetime = Field(default=datetime.now(timezone.utc), index=True)
     updated_at: datetime = Field(default=datetime.now(timezone.utc), index=True)
     session_id: Optional[UUID] = Field(foreign_key="reward_sessions.session_id")
+    # Latest UserPointsHistory entry, so readers never scan the history table
+    last_history_point: Optional[float] = Field(default=None, nullable=True)
+    last_history_at: Optional[datetime] = Field(default=None, nullable=True)
 
 class UserPointAudit(SQLModel, table=True):
     __tablename__ = "user_point_audit"
@@ -0,0 +1,14 @@
+from sqlmodel import SQLModel, Field
+from uuid import UUID
+from datetime import datetime
+
+
+# Daily rollup of compacted UserPointsHistory rows, points are summed
+class UserPointsHistoryDaily(SQLModel, table=True):
+    __tablename__ = "user_points_history_daily"
+
+    user_points_id: UUID = Field(foreign_key="user_points.id", primary_key=True)
+    day: datetime = Field(primary_key=True)
+    point: float
+    entries: int
+    last_created_at: datetime
@@ -1,4 +1,5 @@
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 from enum import Enum
 from uuid import UUID
@@ -12,6 +13,14 @@ class PositionStatus(str, Enum):
 
 class UserPortfolio(SQLModel, table=True):
     __tablename__ = "user_portfolio"
+    __table_args__ = (
+        Index(
+            "ix_user_portfolio_user_address_vault_id_status",
+            "user_address",
+            "vault_id",
+            "status",
+        ),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     vault_id: UUID
     user_address: str
@@ -0,0 +1,63 @@
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import Column, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Field, SQLModel
+
+from models.user_portfolio import PositionStatus
+
+
+class UserPositionView(SQLModel, table=True):
+    """Denormalized position of a wallet in a vault, read by the portfolio API.
+
+    One row per wallet and vault that has a position, points or rewards. The
+    position columns come from the active `user_portfolio` row, or the latest
+    closed one, and are empty when the wallet only has points or rewards.
+    `total_balance` and `pnl` are priced with the latest vault state snapshot;
+    the rows are written by `UserPositionViewService`.
+    """
+
+    __tablename__ = "user_position_view"
+    __table_args__ = (
+        Index("ix_user_position_view_wallet_address_status", "wallet_address", "status"),
+    )
+
+    # Lowercase, as in user_points and user_rewards
+    wallet_address: str = Field(primary_key=True)
+    vault_id: uuid.UUID = Field(primary_key=True, foreign_key="vaults.id")
+    position_id: Optional[int] = None
+    user_address: Optional[str] = None
+    status: Optional[PositionStatus] = None
+    shares: Optional[float] = None
+    price_per_share: Optional[float] = None
+    total_balance: Optional[float] = None
+    init_deposit: Optional[float] = None
+    entry_price: Optional[float] = None
+    pnl: Optional[float] = None
+    pending_deposit: Optional[float] = None
+    pending_withdrawal: Optional[float] = None
+    trade_start_date: Optional[datetime] = None
+    initiated_withdrawal_at: Optional[datetime] = None
+    # getUserWithdrawal of the vaults in WITHDRAWAL_BALANCE_SLUGS
+    withdrawal_amount: Optional[float] = None
+    withdrawal_performance_fee: Optional[float] = None
+    # Points per partner name
+    points: Dict[str, float] = Field(
+        default_factory=dict, sa_column=Column(JSONB, nullable=False)
+    )
+    reward_token: Optional[str] = None
+    unclaimed_rewards: float = 0
+    rewards_created_at: Optional[datetime] = None
+    vault_name: str
+    vault_address: Optional[str] = None
+    vault_currency: Optional[str] = None
+    vault_network: Optional[str] = None
+    vault_category: Optional[str] = None
+    slug: Optional[str] = None
+    current_round: Optional[int] = None
+    monthly_apy: Optional[float] = None
+    weekly_apy: Optional[float] = None
+    next_close_round_date: Optional[datetime] = None
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -2,6 +2,7 @@ from datetime import datetime
 import uuid
 
 import sqlmodel
+from sqlalchemy import Index, text
 from sqlalchemy.dialects.postgresql import JSON
 
 
@@ -36,6 +37,11 @@ class VaultPerformanceBase(sqlmodel.SQLModel):
 
 class VaultPerformance(VaultPerformanceBase, table=True):
     __tablename__ = "vault_performance"
+    __table_args__ = (
+        Index(
+            "ix_vault_performance_vault_id_datetime", "vault_id", text("datetime DESC")
+        ),
+    )
 
     id: uuid.UUID = sqlmodel.Field(default_factory=uuid.uuid4, primary_key=True)
     vault_id: uuid.UUID = sqlmodel.Field(foreign_key="vaults.id")
@@ -0,0 +1,34 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Index, UniqueConstraint, text
+from sqlmodel import Field, SQLModel
+
+
+class VaultStateSnapshot(SQLModel, table=True):
+    """On-chain state of a vault, read with every vault of its chain at one block.
+
+    Amounts are already divided by the vault decimals. `total_shares` and
+    `fee_pool_amount` are empty for the vaults that don't expose them.
+    """
+
+    __tablename__ = "vault_state_snapshot"
+    __table_args__ = (
+        UniqueConstraint("vault_id", "block_number"),
+        Index(
+            "ix_vault_state_snapshot_vault_id_datetime",
+            "vault_id",
+            text("datetime DESC"),
+        ),
+    )
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    vault_id: uuid.UUID = Field(foreign_key="vaults.id")
+    network_chain: str
+    block_number: int
+    datetime: datetime
+    price_per_share: float
+    tvl: float
+    total_shares: Optional[float] = None
+    fee_pool_amount: Optional[float] = None
@@ -2,6 +2,7 @@
 import asyncio
 import logging
 import traceback
+from typing import Optional
 
 import click
 from sqlmodel import select
@@ -11,7 +12,6 @@ from web3._utils.filters import AsyncFilter
 from websockets import ConnectionClosedError, ConnectionClosedOK
 
 from bg_tasks.fix_user_position_from_onchain import get_user_state
-from core import constants
 from core.abi_reader import read_abi
 from core.config import settings
 from core.db import engine
@@ -23,6 +23,7 @@ from models.user_portfolio import PositionStatus, UserPortfolio
 from models.vaults import NetworkChain
 from notifications import telegram_bot
 from notifications.message_builder import build_message
+from services.log_decoder import DecodedLog, log_decoder
 from services.socket_manager import WebSocketManager
 from services.vault_contract_service import VaultContractService
 from utils.calculate_price import calculate_avg_entry_price
@@ -39,145 +40,18 @@ chain_name = None
 session = Session(engine)
 
 
-def _extract_pendle_event(entry):
-    # Parse the account parameter from the topics field
-    from_address = None
-    if len(entry["topics"]) >= 2:
-        from_address = f'0x{entry["topics"][1].hex()[26:]}'  # For deposit event
-
-    # token_in = None
-    # if len(entry["topics"]) >= 3:
-    #     token_in = f'0x{entry["topics"][2].hex()[26:]}'
-
-    # Parse the amount and shares parameters from the data field
-    data = entry["data"].hex()
-    logger.info("Raw data: %s", data)
-
-    if entry["topics"][0].hex() == settings.PENDLE_COMPLETE_WITHDRAW_EVENT_TOPIC:
-        pt_amount = int(data[2:66], 16) / 1e18
-        sc_amount = int(data[66 : 66 + 64], 16) / 1e6
-        shares = int(data[66 + 64 : 66 + 2 * 64], 16) / 1e6
-        total_amount = int(data[66 + 2 * 64 : 66 + 3 * 64], 16) / 1e6
-        eth_amount = 0
-    else:
-        pt_amount = int(data[2:66], 16) / 1e18
-        eth_amount = int(data[66 : 66 + 64], 16) / 1e18
-        sc_amount = int(data[66 + 64 : 66 + 2 * 64], 16) / 1e6
-        total_amount = int(data[66 + 64 * 2 : 66 + 3 * 64], 16) / 1e6
-        shares = int(data[66 + 3 * 64 : 66 + 4 * 64], 16) / 1e6
-        logger.info(
-            f"pt_amount: {pt_amount}, eth_amount: {eth_amount}, sc_amount: {sc_amount}, total_amount: {total_amount}, shares: {shares}"
-        )
-
-    return pt_amount, eth_amount, sc_amount, total_amount, shares, from_address
-
-
-def _extract_stablecoin_event(entry):
-    # Decode the data field
-    data = entry["data"].hex()
-    value = int(data[2:66], 16) / 1e6
-    shares = int("0x" + data[66:], 16) / 1e6
-
-    from_address = None
-    if len(entry["topics"]) >= 2:
-        from_address = f'0x{entry["topics"][1].hex()[26:]}'  # For deposit event
-    return value, shares, from_address
-
-
-def _extract_solv_event(entry):
-    # Decode the data field
-    data = entry["data"].hex()
-    value = int(data[2:66], 16) / 1e8
-    shares = int("0x" + data[66:], 16) / 1e18
-
-    from_address = None
-    if len(entry["topics"]) >= 2:
-        from_address = f'0x{entry["topics"][1].hex()[26:]}'  # For deposit event
-    return value, shares, from_address
-
-
-def _extract_delta_neutral_event(entry):
-    # Parse the account parameter from the topics field
-    from_address = None
-    if len(entry["topics"]) >= 2:
-        from_address = f'0x{entry["topics"][1].hex()[26:]}'  # For deposit event
-
-    # token_in = None
-    # if len(entry["topics"]) >= 3:
-    #     token_in = f'0x{entry["topics"][2].hex()[26:]}'
-
-    # Parse the amount and shares parameters from the data field
-    data = entry["data"].hex()
-    amount = int(data[2:66], 16)
-
-    amount = amount / 1e18 if len(str(amount)) >= 18 else amount / 1e6
-
-    shares = int(data[66 : 66 + 64], 16) / 1e6
-    return amount, shares, from_address
-
-
-def _extract_rethink_event(entry):
-    """Extract data from Rethink vault events"""
-    # Get the from_address from indexed parameter
-    from_address = None
-    if len(entry["topics"]) >= 2:
-        from_address = f'0x{entry["topics"][1].hex()[26:]}'
-
-    # Decode the data field based on event type
-    data = entry["data"].hex()
-
-    if entry["topics"][0].hex() in [
-        settings.RETHINK_DELTA_NEUTRAL_DEPOSIT_EVENT_TOPIC,
-        settings.RETHINK_DELTA_NEUTRAL_DEPOSITED_TO_FUND_CONTRACT_EVENT_TOPIC,
-    ]:
-        # UserDeposited event: amount
-        amount = int(data[2:66], 16) / 1e18  # WETH has 18 decimals
-        return amount, 0, from_address
-
-    elif entry["topics"][0].hex() in [
-        settings.RETHINK_DELTA_NEUTRAL_REQUEST_FUND_EVENT_TOPIC,
-        settings.RETHINK_DELTA_NEUTRAL_COMPLETE_WITHDRAW_EVENT_TOPIC,
-    ]:
-        # InitiateWithdrawal and Withdrawn events: amount and shares
-        amount = int(data[2:66], 16) / 1e18
-        shares = int(data[66:130], 16) / 1e18
-        return amount, shares, from_address
-
-    elif (
-        entry["topics"][0].hex()
-        == settings.RETHINK_DELTA_NEUTRAL_DEPOSITED_TO_FUND_CONTRACT_EVENT_TOPIC
-    ):
-        # DepositedToFundContract event: amount only
-        amount = int(data[2:66], 16) / 1e18
-        return amount, 0, None
-
-
-async def handle_event(vault_address: str, entry, event_name):
-    # Get the vault with ROCKONYX_ADDRESS
-    vault = session.exec(
-        select(Vault).where(Vault.contract_address == vault_address)
-    ).first()
-
-    if vault is None:
-        raise ValueError("Vault not found")
+async def handle_event(
+    vault_address: str, entry, event_name, decoded: Optional[DecodedLog] = None
+):
+    if decoded is None:
+        decoded = log_decoder.decode(entry)
+    if decoded is None:
+        raise ValueError(f"No decoder for the event of vault {vault_address}")
+    vault = decoded.vault
 
     logger.info(f"Processing event {event_name} for vault {vault_address} {vault.name}")
 
-    # Extract the value, shares and from_address from the event
-    if vault.strategy_name == constants.OPTIONS_WHEEL_STRATEGY:
-        value, shares, from_address = _extract_stablecoin_event(entry)
-    elif vault.slug == constants.ETH_WITH_LENDING_BOOST_YIELD:
-        value, shares, from_address = _extract_rethink_event(entry)
-    elif vault.strategy_name == constants.DELTA_NEUTRAL_STRATEGY:
-        value, shares, from_address = _extract_delta_neutral_event(entry)
-    elif vault.slug == constants.SOLV_VAULT_SLUG:
-        value, shares, from_address = _extract_solv_event(entry)
-    elif vault.strategy_name == constants.PENDLE_HEDGING_STRATEGY:
-        _, eth_amount, sc_amount, value, shares, from_address = _extract_pendle_event(
-            entry
-        )
-    else:
-        raise ValueError("Invalid vault address")
+    value, shares, from_address = decoded.value, decoded.shares, decoded.from_address
 
     logger.info(f"Value: {value}, from_address: {from_address}")
 
@@ -20,6 +20,7 @@ from core import constants
 from models.onchain_transaction_history import OnchainTransactionHistory
 from models.vaults import Vault
 from services.vault_contract_service import VaultContractService
+from services.vault_registry import vault_registry
 from utils.extension_utils import (
     to_amount_pendle,
     to_tx_aumount,
@@ -37,20 +38,6 @@ logger = logging.getLogger(__name__)
 session = Session(engine)
 
 
-def get_vault_by_address(to_address: str):
-    """Retrieve the Vault instance based on the given address."""
-    vault_addresses = VaultContractService().get_vault_address_by_contract(
-        to_address.lower()
-    )
-    return session.exec(
-        select(Vault).where(
-            func.lower(Vault.contract_address).in_(
-                [addr.lower() for addr in vault_addresses]
-            )
-        )
-    ).first()
-
-
 def calculate_rethink_amount_value(deposit: OnchainTransactionHistory):
     """Calculate the amount value for rethink strategy."""
     converted_datetime = datetime.fromtimestamp(deposit.timestamp)
@@ -74,7 +61,7 @@ def calculate_total_deposit(deposits: list[OnchainTransactionHistory]):
     """Calculate the total deposit amount based on strategy and vault."""
     total_deposit = 0
     for deposit in deposits:
-        vault = get_vault_by_address(deposit.to_address)
+        vault = vault_registry.get_by_address(deposit.to_address)
         if not vault:
             continue
 
@@ -0,0 +1,249 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from core.bulk_writer import bulk_write
+from core.config import settings
+from models.funding_rate_history import FundingRateHistory
+from reports.ultils import PARTNER
+from schemas.funding_history_entry import FundingHistoryEntry
+from services import aevo_service, bsx_service, gold_link_service, hyperliquid_service
+from utils.vault_utils import convert_to_nanoseconds, datetime_to_unix_ms
+
+logger = logging.getLogger(__name__)
+
+# Launch date of the first delta neutral vault, used when a partner has no history yet
+DEFAULT_START_DATE = datetime(2024, 4, 5, 0, 0, 0, tzinfo=timezone.utc)
+MIN_WINDOW = timedelta(hours=1)
+
+
+@dataclass
+class FundingRateSource:
+    partner_name: str
+    fetch: Callable[..., List[FundingHistoryEntry]]
+    base_url: str
+    # Largest time range the API answers in one request, None when the API has no
+    # time filter and always returns its full (recent) history
+    max_window: Optional[timedelta] = None
+    # Page size requested from the API; a full page means the window was truncated
+    page_limit: int = 500
+    use_nanoseconds: bool = True
+    # Minimum delay between two requests to the same host
+    min_interval: float = 0.2
+    default_start_date: datetime = DEFAULT_START_DATE
+
+    @property
+    def host(self) -> str:
+        return urlparse(self.base_url or "").netloc or self.partner_name
+
+    def to_api_time(self, value: datetime) -> int:
+        if self.use_nanoseconds:
+            return convert_to_nanoseconds(value)
+        return datetime_to_unix_ms(value)
+
+
+class HostRateLimiter:
+    """Spaces out requests per host, shared by every source hitting the same API."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._host_locks: Dict[str, threading.Lock] = {}
+        self._last_call: Dict[str, float] = {}
+
+    def wait(self, host: str, min_interval: float):
+        with self._lock:
+            host_lock = self._host_locks.setdefault(host, threading.Lock())
+
+        with host_lock:
+            elapsed = time.monotonic() - self._last_call.get(host, 0.0)
+            if elapsed < min_interval:
+                time.sleep(min_interval - elapsed)
+            self._last_call[host] = time.monotonic()
+
+
+def get_default_sources() -> List[FundingRateSource]:
+    return [
+        FundingRateSource(
+            partner_name=PARTNER["BSX"],
+            fetch=bsx_service.get_funding_history,
+            base_url=settings.BSX_BASE_API_URL,
+            max_window=timedelta(days=20),
+            page_limit=500,
+        ),
+        FundingRateSource(
+            partner_name=PARTNER["AEVO"],
+            fetch=aevo_service.get_funding_history,
+            base_url=settings.AEVO_API_URL,
+            max_window=timedelta(days=2),
+            page_limit=50,
+        ),
+        FundingRateSource(
+            partner_name=PARTNER["HYPERLIQUID"],
+            fetch=hyperliquid_service.get_funding_history,
+            base_url=settings.HYPERLIQUID_URL,
+            max_window=timedelta(days=20),
+            page_limit=500,
+            use_nanoseconds=False,
+        ),
+        FundingRateSource(
+            partner_name=PARTNER["GOLDLINK"],
+            fetch=gold_link_service.get_funding_history,
+            base_url=settings.GOLD_LINK_API_URL,
+        ),
+    ]
+
+
+def get_hype_source() -> FundingRateSource:
+    return FundingRateSource(
+        partner_name=PARTNER["HYPERLIQUID_HYPE"],
+        fetch=hyperliquid_service.get_funding_history_hype,
+        base_url=settings.HYPERLIQUID_URL,
+        max_window=timedelta(days=20),
+        page_limit=500,
+        use_nanoseconds=False,
+        default_start_date=datetime.now(tz=timezone.utc) - timedelta(days=1),
+    )
+
+
+def get_latest_funding_rate_dates(session: Session) -> Dict[str, datetime]:
+    rows = session.exec(
+        select(
+            FundingRateHistory.partner_name, func.max(FundingRateHistory.datetime)
+        ).group_by(FundingRateHistory.partner_name)
+    ).all()
+    return {partner_name: latest for partner_name, latest in rows}
+
+
+def _normalize(entries: List[FundingHistoryEntry]) -> List[FundingHistoryEntry]:
+    for entry in entries:
+        if entry.datetime.tzinfo is None:
+            entry.datetime = entry.datetime.replace(tzinfo=timezone.utc)
+    return entries
+
+
+def fetch_source_history(
+    source: FundingRateSource,
+    start_date: datetime,
+    end_date: datetime,
+    rate_limiter: HostRateLimiter,
+) -> List[FundingHistoryEntry]:
+    """Fetch every entry strictly after `start_date` using the largest windows the
+    API allows. A full page shrinks the window until the API stops truncating.
+
+    Stops at the first window that fails or is still truncated at `MIN_WINDOW`
+    and returns the entries before it, so the next run resumes before the gap.
+    """
+    if source.max_window is None:
+        rate_limiter.wait(source.host, source.min_interval)
+        entries = _normalize(source.fetch())
+        return [e for e in entries if start_date < e.datetime <= end_date]
+
+    results: List[FundingHistoryEntry] = []
+    window = source.max_window
+    cursor = start_date
+    while cursor < end_date:
+        window_end = min(cursor + window, end_date)
+        rate_limiter.wait(source.host, source.min_interval)
+        try:
+            entries = _normalize(
+                source.fetch(
+                    start_time=source.to_api_time(cursor),
+                    end_time=source.to_api_time(window_end),
+                    limit=source.page_limit,
+                )
+            )
+        except Exception as e:
+            logger.error(
+                f"{source.partner_name}: fetching {cursor} to {window_end} failed, "
+                f"stopping at {cursor}: {e}"
+            )
+            break
+
+        if len(entries) >= source.page_limit:
+            if window <= MIN_WINDOW:
+                logger.error(
+                    f"{source.partner_name}: {cursor} to {window_end} is still "
+                    f"truncated at {source.page_limit} entries, stopping at {cursor}"
+                )
+                break
+            window = max(window / 2, MIN_WINDOW)
+            logger.info(
+                f"{source.partner_name}: page limit reached, shrinking window to {window}"
+            )
+            continue
+
+        results.extend(e for e in entries if cursor < e.datetime <= window_end)
+        cursor = window_end
+
+    return results
+
+
+def upsert_funding_rates(
+    session: Session, partner_name: str, entries: List[FundingHistoryEntry]
+) -> int:
+    rows = {
+        entry.datetime: {
+            "datetime": entry.datetime,
+            "funding_rate": entry.funding_rate,
+            "partner_name": partner_name,
+        }
+        for entry in entries
+    }
+    # COPY into a staging table, merged on (partner_name, datetime)
+    bulk_write(session, FundingRateHistory, rows.values())
+    session.commit()
+    return len(rows)
+
+
+def ingest_funding_rates(
+    session: Session,
+    sources: List[FundingRateSource],
+    max_workers: int = 4,
+) -> Dict[str, int]:
+    """Fetch funding rates of every source concurrently, resuming from the latest
+    stored datetime per partner, and upsert them on (partner_name, datetime)."""
+    latest_dates = get_latest_funding_rate_dates(session)
+    end_date = datetime.now(tz=timezone.utc)
+    rate_limiter = HostRateLimiter()
+
+    inserted: Dict[str, int] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for source in sources:
+            start_date = latest_dates.get(source.partner_name) or source.default_start_date
+            logger.info(
+                f"Fetching {source.partner_name} funding history from {start_date} to {end_date}..."
+            )
+            futures[
+                executor.submit(
+                    fetch_source_history, source, start_date, end_date, rate_limiter
+                )
+            ] = source
+
+        # Fetch concurrently, write from this thread since the session isn't thread safe
+        for future in as_completed(futures):
+            source = futures[future]
+            try:
+                entries = future.result()
+                inserted[source.partner_name] = upsert_funding_rates(
+                    session, source.partner_name, entries
+                )
+                logger.info(
+                    f"Upserted {inserted[source.partner_name]} {source.partner_name} funding rate records"
+                )
+            except Exception as e:
+                logger.error(
+                    f"Failed to process {source.partner_name} funding history: {str(e)}",
+                    exc_info=True,
+                )
+                session.rollback()
+
+    return inserted
@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from sqlmodel import Session, select
+
+from models.funding_rate_history import FundingRateHistory
+from models.goldlink_borrow_rate_history import GoldlinkBorrowRateHistory
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def _to_epoch(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def _start_of_day(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    value = value.astimezone(timezone.utc)
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class RateSeriesIndex:
+    """Sorted in-memory rate series answering window averages with prefix sums.
+
+    Every query is two binary searches over the timestamps, so averaging any
+    window costs O(log n) no matter how long the history is.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[datetime, float]]):
+        rows = sorted((_to_epoch(ts), float(rate)) for ts, rate in rows)
+        self.timestamps = np.fromiter((ts for ts, _ in rows), dtype=np.int64)
+        rates = np.fromiter((rate for _, rate in rows), dtype=np.float64)
+        self.prefix_sums = np.concatenate(([0.0], np.cumsum(rates)))
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def window_mean(self, start: datetime, end: datetime) -> Optional[float]:
+        """Average rate in [start, end), None when the window has no data."""
+        lo = np.searchsorted(self.timestamps, _to_epoch(start), side="left")
+        hi = np.searchsorted(self.timestamps, _to_epoch(end), side="left")
+        if hi <= lo:
+            return None
+        return float((self.prefix_sums[hi] - self.prefix_sums[lo]) / (hi - lo))
+
+    def day_mean(self, date: datetime, ffill: bool = False) -> float:
+        """Average rate over the UTC day of `date`.
+
+        With `ffill`, a day without data falls back to the last day that has data.
+        """
+        day_start = _start_of_day(date)
+        mean = self.window_mean(day_start, day_start + timedelta(days=1))
+        if mean is not None or not ffill:
+            return mean or 0.0
+
+        idx = np.searchsorted(self.timestamps, _to_epoch(day_start), side="left")
+        if idx == 0:
+            return 0.0
+        last_day = datetime.fromtimestamp(int(self.timestamps[idx - 1]), tz=timezone.utc)
+        return self.day_mean(last_day)
+
+    def trailing_mean(self, date: datetime, days: int) -> float:
+        """Average rate over the `days` full UTC days before the day of `date`."""
+        day_start = _start_of_day(date)
+        mean = self.window_mean(day_start - timedelta(days=days), day_start)
+        return mean or 0.0
+
+    def latest_day_mean(self) -> float:
+        """Average rate over the UTC day of the latest stored rate."""
+        if len(self) == 0:
+            return 0.0
+        latest = datetime.fromtimestamp(int(self.timestamps[-1]), tz=timezone.utc)
+        return self.day_mean(latest)
+
+
+class RateIndexStore:
+    """Loads each rate series once per process and shares it between jobs."""
+
+    def __init__(self, session: Session):
+        self.session = session
+        self._funding: Dict[str, RateSeriesIndex] = {}
+        self._interest: Optional[RateSeriesIndex] = None
+
+    def funding(self, partner_name: str) -> RateSeriesIndex:
+        if partner_name not in self._funding:
+            rows = self.session.exec(
+                select(FundingRateHistory.datetime, FundingRateHistory.funding_rate)
+                .where(FundingRateHistory.partner_name == partner_name)
+                .order_by(FundingRateHistory.datetime)
+            ).all()
+            self._funding[partner_name] = RateSeriesIndex(rows)
+        return self._funding[partner_name]
+
+    def interest(self) -> RateSeriesIndex:
+        if self._interest is None:
+            rows = self.session.exec(
+                select(
+                    GoldlinkBorrowRateHistory.datetime,
+                    GoldlinkBorrowRateHistory.apy_rate,
+                ).order_by(GoldlinkBorrowRateHistory.datetime)
+            ).all()
+            self._interest = RateSeriesIndex(rows)
+        return self._interest
+
+    def invalidate(self):
+        self._funding.clear()
+        self._interest = None
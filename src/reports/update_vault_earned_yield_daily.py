@@ -8,8 +8,6 @@ from core.db import engine
 from log import setup_logging_to_console, setup_logging_to_file
 from models import Vault
 from core import constants
-from models.funding_rate_history import FundingRateHistory
-from models.goldlink_borrow_rate_history import GoldlinkBorrowRateHistory
 from reports.ultils import (
     AE_USD,
     LEVERAGE,
@@ -18,6 +16,7 @@ from reports.ultils import (
     PARTNER,
     RENZO_AEVO_VALUE,
 )
+from reports.rate_index import RateIndexStore
 from schemas.funding_history_entry import FundingHistoryEntry
 from services import (
     aevo_service,
@@ -37,26 +36,11 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("calculate_apy_breakdown_daily")
 
 session = Session(engine)
+rate_store = RateIndexStore(session)
 
 
 def calculate_average_funding_rate(partner_name: str):
-    max_date_query = select(func.max(FundingRateHistory.datetime)).where(
-        FundingRateHistory.partner_name == partner_name
-    )
-    max_date = session.exec(max_date_query).first()
-
-    if max_date:
-        query = (
-            select(FundingRateHistory.funding_rate)
-            .where(FundingRateHistory.partner_name == partner_name)
-            .where(func.date(FundingRateHistory.datetime) == max_date.date())
-        )
-        data = session.exec(query).all()
-        if data:
-            return sum(data) / len(data)
-
-    else:
-        return 0
+    return rate_store.funding(partner_name).latest_day_mean()
 
 
 def get_prev_tvl(vault: Vault, service: VaultPerformanceHistoryService):
@@ -69,19 +53,7 @@ def get_prev_tvl(vault: Vault, service: VaultPerformanceHistoryService):
 
 
 def get_avg_interest_rate():
-    max_date_query = select(func.max(GoldlinkBorrowRateHistory.datetime))
-    max_date = session.exec(max_date_query).first()
-
-    if max_date:
-        query = select(GoldlinkBorrowRateHistory.apy_rate).where(
-            func.date(GoldlinkBorrowRateHistory.datetime) == max_date.date()
-        )
-        data = session.exec(query).all()
-        if data:
-            return sum(data) / len(data)
-
-    else:
-        return 0
+    return rate_store.interest().latest_day_mean()
 
 
 def fetch_vaults():
@@ -7,10 +7,9 @@ from core.db import engine
 from log import setup_logging_to_console, setup_logging_to_file
 from models import Vault
 from core import constants
-from models.goldlink_borrow_rate_history import GoldlinkBorrowRateHistory
-from models.funding_rate_history import FundingRateHistory
 from models.vault_performance import VaultPerformance
 from reports.fetch_funding_rate_history import PARTNER
+from reports.rate_index import RateIndexStore, RateSeriesIndex
 from services import lido_service, pendle_service, renzo_service
 from reports.ultils import (
     AE_USD,
@@ -26,84 +25,24 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("calculate_apy_breakdown_daily")
 
 session = Session(engine)
+rate_store = RateIndexStore(session)
 
 
-def get_interest_rate_df():
-    query = select(GoldlinkBorrowRateHistory)
-    data = session.exec(query).all()
+def get_interest_rate_index() -> RateSeriesIndex:
+    return rate_store.interest()
 
-    # Convert query results into a DataFrame
-    df = pd.DataFrame(
-        [{"datetime": item.datetime, "apy_rate": item.apy_rate} for item in data]
-    )
-
-    # Convert 'datetime' column to UTC and normalize to the start of the day
-    df["datetime"] = pd.to_datetime(df["datetime"], errors="coerce").dt.normalize()
-
-    # Resample to daily frequency, calculate mean funding rate, and forward-fill missing values
-    interest_rate_avg = (
-        df.set_index("datetime")
-        .resample("D")["apy_rate"]
-        .mean()
-        .ffill()  # Forward-fill missing data
-        .reset_index()
-    )
-
-    # Rename columns to make them more descriptive
-    interest_rate_avg.rename(
-        columns={"datetime": "date", "apy_rate": "average_rate"},
-        inplace=True,
-    )
-
-    return interest_rate_avg
-
-
-def get_avg_by_date(avg_df: pd.DataFrame, target_date: datetime) -> float:
-    avg_df["date_filter"] = avg_df["date"].dt.date
-
-    filtered_row = avg_df.loc[avg_df["date_filter"] == target_date.date()]
-
-    if not filtered_row.empty:
-        return filtered_row["average_rate"].mean()
-    return 0.0
 
+def get_avg_by_date(
+    rate_index: RateSeriesIndex, target_date: datetime, ffill: bool = False
+) -> float:
+    return rate_index.day_mean(target_date, ffill=ffill)
 
-def get_daily_funding_rate_df(partner_name: str):
-    # Query FundingHistory data for the given partner_name
-    query = select(FundingRateHistory).where(
-        FundingRateHistory.partner_name == partner_name
-    )
-    data = session.exec(query).all()
-
-    # Convert query results into a DataFrame
-    df = pd.DataFrame(
-        [
-            {"datetime": item.datetime, "funding_rate": item.funding_rate}
-            for item in data
-        ]
-    )
 
-    if df.empty:
+def get_funding_rate_index(partner_name: str) -> RateSeriesIndex:
+    rate_index = rate_store.funding(partner_name)
+    if len(rate_index) == 0:
         raise ValueError(f"No data found for partner: {partner_name}")
-
-    # Convert 'datetime' column to UTC and normalize to the start of the day
-    df["datetime"] = pd.to_datetime(df["datetime"], errors="coerce")
-
-    # Handle invalid or missing datetime values
-    if df["datetime"].isna().any():
-        raise ValueError("Invalid datetime format detected in the 'datetime' column")
-
-    # Resample to daily frequency and calculate mean funding rate
-    daily_avg = (
-        df.set_index("datetime").resample("D")["funding_rate"].mean().reset_index()
-    )
-
-    # Rename column to make it more descriptive
-    daily_avg.rename(
-        columns={"datetime": "date", "funding_rate": "average_rate"},
-        inplace=True,
-    )
-    return daily_avg
+    return rate_index
 
 
 def get_vault_performance(vault_id) -> List[VaultPerformance]:
@@ -180,8 +119,8 @@ def process_kelpdao_arbtrum_vault(
     vault: Vault, service: VaultPerformanceHistoryService
 ):
     logger.info("Start process_kelpdao_arbtrum_vault")
-    hyperliquid_funding_history_df = get_daily_funding_rate_df(PARTNER["HYPERLIQUID"])
-    aevo_funding_history_df = get_daily_funding_rate_df(PARTNER["AEVO"])
+    hyperliquid_funding_index = get_funding_rate_index(PARTNER["HYPERLIQUID"])
+    aevo_funding_index = get_funding_rate_index(PARTNER["AEVO"])
     daily_df = get_vault_dataframe(vault)
     for i, row in daily_df.iterrows():
         if i == 0:
@@ -192,9 +131,9 @@ def process_kelpdao_arbtrum_vault(
         # From date: November 11, 2024 switched to Hyperliquid
         date_move_vault = datetime(2024, 11, 11, tzinfo=timezone.utc)
         funding_avg_hourly = (
-            get_avg_by_date(hyperliquid_funding_history_df, date)
+            get_avg_by_date(hyperliquid_funding_index, date)
             if date >= date_move_vault
-            else get_avg_by_date(aevo_funding_history_df, date)
+            else get_avg_by_date(aevo_funding_index, date)
         )
 
         daily_funding_rate = funding_avg_hourly * 24
@@ -215,7 +154,7 @@ def process_kelpdao_arbtrum_vault(
 
 def process_kelpdao_vault(vault: Vault, service: VaultPerformanceHistoryService):
     logger.info("Start process_kelpdao_vault")
-    aevo_funding_history_df = get_daily_funding_rate_df(PARTNER["AEVO"])
+    aevo_funding_index = get_funding_rate_index(PARTNER["AEVO"])
     daily_df = get_vault_dataframe(vault)
 
     for i, row in daily_df.iterrows():
@@ -225,7 +164,7 @@ def process_kelpdao_vault(vault: Vault, service: VaultPerformanceHistoryService)
         date = row["datetime"]
         prev_tvl = get_tvl_from_prev_date(daily_df, i - 1)
 
-        funding_avg_hourly = get_avg_by_date(aevo_funding_history_df, date)
+        funding_avg_hourly = get_avg_by_date(aevo_funding_index, date)
         daily_funding_rate = funding_avg_hourly * 24
 
         funding_value = daily_funding_rate * ALLOCATION_RATIO * prev_tvl
@@ -241,7 +180,7 @@ def process_kelpdao_vault(vault: Vault, service: VaultPerformanceHistoryService)
 
 def process_bsx_vault(vault: Vault, service: VaultPerformanceHistoryService):
     logger.info("Start process_bsx_vault")
-    bsx_funding_historiy_df = get_daily_funding_rate_df(PARTNER["BSX"])
+    bsx_funding_index = get_funding_rate_index(PARTNER["BSX"])
 
     lido_apy = lido_service.get_apy()
     lido_daily_apy = lido_apy / 365
@@ -252,7 +191,7 @@ def process_bsx_vault(vault: Vault, service: VaultPerformanceHistoryService):
         date = row["datetime"]
         prev_tvl = get_tvl_from_prev_date(daily_df, i - 1)
 
-        funding_avg_hourly = get_avg_by_date(bsx_funding_historiy_df, date)
+        funding_avg_hourly = get_avg_by_date(bsx_funding_index, date)
         daily_funding_rate = funding_avg_hourly * 24
 
         funding_value = daily_funding_rate * ALLOCATION_RATIO * prev_tvl
@@ -273,7 +212,7 @@ def process_pendle_vault(vault: Vault, service: VaultPerformanceHistoryService):
     pendle_fixed_apy = pendle_data[0].implied_apy if pendle_data else 0
     pendle_daily_apy = pendle_fixed_apy / 365
 
-    hyperliquid_funding_history_df = get_daily_funding_rate_df(PARTNER["HYPERLIQUID"])
+    hyperliquid_funding_index = get_funding_rate_index(PARTNER["HYPERLIQUID"])
     daily_df = get_vault_dataframe(vault)
     for i, row in daily_df.iterrows():
         if i == 0:
@@ -281,7 +220,7 @@ def process_pendle_vault(vault: Vault, service: VaultPerformanceHistoryService):
         date = row["datetime"]
         prev_tvl = get_tvl_from_prev_date(daily_df, i - 1)
 
-        funding_avg_hourly = get_avg_by_date(hyperliquid_funding_history_df, date)
+        funding_avg_hourly = get_avg_by_date(hyperliquid_funding_index, date)
         daily_funding_rate = funding_avg_hourly * 24
 
         funding_value = daily_funding_rate * ALLOCATION_RATIO * prev_tvl
@@ -298,7 +237,7 @@ def process_pendle_vault(vault: Vault, service: VaultPerformanceHistoryService):
 def process_renzo_vault(vault: Vault, service: VaultPerformanceHistoryService):
     logger.info("Start process_renzo_vault")
 
-    aevo_funding_history_df = get_daily_funding_rate_df(PARTNER["AEVO"])
+    aevo_funding_index = get_funding_rate_index(PARTNER["AEVO"])
     renzo_apy = renzo_service.get_apy() / 100
     renzo_daily_apy = renzo_apy / 365
 
@@ -311,7 +250,7 @@ def process_renzo_vault(vault: Vault, service: VaultPerformanceHistoryService):
         date = row["datetime"]
         prev_tvl = get_tvl_from_prev_date(daily_df, i - 1)
 
-        funding_avg_hourly = get_avg_by_date(aevo_funding_history_df, date)
+        funding_avg_hourly = get_avg_by_date(aevo_funding_index, date)
         daily_funding_rate = funding_avg_hourly * 24
 
         funding_value = daily_funding_rate * ALLOCATION_RATIO * prev_tvl
@@ -327,8 +266,8 @@ def process_renzo_vault(vault: Vault, service: VaultPerformanceHistoryService):
 
 def process_goldlink_vault(vault: Vault, service: VaultPerformanceHistoryService):
     logger.info("Start process_goldlink_vault")
-    goldlink_funding_history_df = get_daily_funding_rate_df(PARTNER["GOLDLINK"])
-    interest_rate_avg_df = get_interest_rate_df()
+    goldlink_funding_index = get_funding_rate_index(PARTNER["GOLDLINK"])
+    interest_rate_index = get_interest_rate_index()
 
     daily_df = get_vault_dataframe(vault)
 
@@ -340,8 +279,8 @@ def process_goldlink_vault(vault: Vault, service: VaultPerformanceHistoryService
         prev_tvl = get_tvl_from_prev_date(daily_df, i - 1)
         prev_tvl = prev_tvl * LEVERAGE
 
-        funding_rate = get_avg_by_date(goldlink_funding_history_df, date)
-        interest_rate = get_avg_by_date(interest_rate_avg_df, date)
+        funding_rate = get_avg_by_date(goldlink_funding_index, date)
+        interest_rate = get_avg_by_date(interest_rate_index, date, ffill=True)
 
         # The funding rate of Goldlink is paid every 8 hours and is annualized
         funding_history_avg = float(funding_rate) / 365
@@ -21,7 +21,15 @@ from models import (
     Vault,
 )
 from models.vaults import NetworkChain, VaultCategory
+from services.log_decoder import (
+    RETHINK_EVENT_NAMES,
+    DecodedLog,
+    VaultEventFamily,
+    decode_event,
+    log_decoder,
+)
 from services.market_data import get_price
+from services.user_position_view_service import UserPositionViewService
 from utils.web3_utils import get_vault_contract, get_current_pps
 from web3_listener import (
     Web3Listener,
@@ -36,51 +44,14 @@ logger = logging.getLogger("rethink_web3_listener")
 session = Session(engine)
 
 RETHINK_EVENT_FILTERS = {
-    settings.RETHINK_DELTA_NEUTRAL_DEPOSIT_EVENT_TOPIC: {
-        "event": "Deposit",
-    },
-    settings.RETHINK_DELTA_NEUTRAL_DEPOSITED_TO_FUND_CONTRACT_EVENT_TOPIC: {
-        "event": "DepositedToFundContract",
-    },
-    settings.RETHINK_DELTA_NEUTRAL_REQUEST_FUND_EVENT_TOPIC: {
-        "event": "InitiateWithdraw",
-    },
-    settings.RETHINK_DELTA_NEUTRAL_COMPLETE_WITHDRAW_EVENT_TOPIC: {
-        "event": "Withdrawn",
-    },
+    topic: {"event": name} for topic, name in RETHINK_EVENT_NAMES.items()
 }
 
 
 def _extract_rethink_event(entry):
     """Extract data from Rethink vault events"""
-    # Get the from_address from indexed parameter
-    from_address = None
-    if len(entry["topics"]) >= 2:
-        from_address = f'0x{entry["topics"][1].hex()[26:]}'
-
-    # Decode the data field based on event type
-    data = entry["data"].hex()
-
-    if entry["topics"][0].hex() == settings.RETHINK_DELTA_NEUTRAL_DEPOSIT_EVENT_TOPIC:
-        # UserDeposited event: amount
-        amount = int(data[2:66], 16) / 1e18  # WETH has 18 decimals
-        return amount, 0, from_address
-
-    elif entry["topics"][0].hex() in [
-        settings.RETHINK_DELTA_NEUTRAL_REQUEST_FUND_EVENT_TOPIC,
-        settings.RETHINK_DELTA_NEUTRAL_COMPLETE_WITHDRAW_EVENT_TOPIC,
-    ]:
-        # InitiateWithdrawal and Withdrawn events: amount and shares
-        amount = int(data[2:66], 16) / 1e18
-        shares = int(data[66:130], 16) / 1e18
-        return amount, shares, from_address
-
-    elif (
-        entry["topics"][0].hex()
-        == settings.RETHINK_DELTA_NEUTRAL_DEPOSITED_TO_FUND_CONTRACT_EVENT_TOPIC
-    ):
-        # DepositedToFundContract event: amount only
-        return 0, 0, None
+    decoded = decode_event(VaultEventFamily.rethink, entry)
+    return decoded.value, decoded.shares, decoded.from_address
 
 
 def update_tvl(session: Session, vault: Vault, weth_amount: float):
@@ -172,6 +143,55 @@ def handle_deposited_to_fund_contract(
     )
 
 
+def handle_rethink_event(session: Session, event_name: str, decoded: DecodedLog):
+    """Apply a decoded Rethink vault event to the user portfolios"""
+    value, shares, from_address = decoded.value, decoded.shares, decoded.from_address
+
+    # Get vault contract for additional operations
+    vault = session.get(Vault, decoded.vault.id)
+    vault_contract, _ = get_vault_contract(vault, abi_name="rethink_yield_v2")
+
+    # Get user portfolio if applicable
+    user_portfolio = None
+    if from_address:
+        user_portfolio = session.exec(
+            select(UserPortfolio)
+            .where(UserPortfolio.user_address == from_address)
+            .where(UserPortfolio.vault_id == vault.id)
+            .where(UserPortfolio.status == PositionStatus.ACTIVE)
+        ).first()
+
+    # Handle event based on type
+    if event_name == "Deposit":
+        handle_deposit_event(
+            session,
+            user_portfolio,
+            value,
+            from_address,
+            vault,
+            shares,
+            vault_contract=vault_contract,
+        )
+    elif event_name == "DepositedToFundContract":
+        handle_deposited_to_fund_contract(session, vault, vault_contract, value)
+    elif event_name == "InitiateWithdraw":
+        handle_initiate_withdraw_event(
+            session,
+            user_portfolio,
+            value,
+            from_address,
+            shares,
+            get_current_pps(vault_contract),
+        )
+    elif event_name == "Withdrawn":
+        handle_withdrawn_event(session, user_portfolio, value, from_address, vault)
+
+    if event_name == "DepositedToFundContract":
+        UserPositionViewService(session).refresh(vault_ids=[vault.id])
+    elif from_address:
+        UserPositionViewService(session).refresh([from_address], [vault.id])
+
+
 def process_event(session: Session, msg: dict, event_filters: dict) -> None:
     """Process a single event message and handle it appropriately"""
     try:
@@ -182,55 +202,13 @@ def process_event(session: Session, msg: dict, event_filters: dict) -> None:
         # Get event type
         event_filter = event_filters[res["topics"][0].hex()]
 
-        # Get vault contract for additional operations
-        vault = session.exec(
-            select(Vault).where(Vault.contract_address == res["address"])
-        ).first()
-
-        if not vault:
+        # Extract event data
+        decoded = log_decoder.decode(res)
+        if decoded is None or decoded.family != VaultEventFamily.rethink:
             logger.warning(f"Vault not found for address {res['address']}")
             return
 
-        vault_contract, _ = get_vault_contract(vault, abi_name="rethink_yield_v2")
-
-        # Extract event data
-        value, shares, from_address = _extract_rethink_event(res)
-
-        # Get user portfolio if applicable
-        user_portfolio = None
-        if from_address:
-            user_portfolio = session.exec(
-                select(UserPortfolio)
-                .where(UserPortfolio.user_address == from_address)
-                .where(UserPortfolio.vault_id == vault.id)
-                .where(UserPortfolio.status == PositionStatus.ACTIVE)
-            ).first()
-
-        # Handle event based on type
-        if event_filter["event"] == "Deposit":
-            handle_deposit_event(
-                session,
-                user_portfolio,
-                value,
-                from_address,
-                vault,
-                shares,
-                vault_contract=vault_contract,
-            )
-        elif event_filter["event"] == "DepositedToFundContract":
-            handle_deposited_to_fund_contract(session, vault, vault_contract, value)
-        elif event_filter["event"] == "InitiateWithdraw":
-            handle_initiate_withdraw_event(
-                session,
-                user_portfolio,
-                value,
-                from_address,
-                shares,
-                get_current_pps(vault_contract),
-            )
-        elif event_filter["event"] == "Withdrawn":
-            handle_withdrawn_event(session, user_portfolio, value, from_address, vault)
-
+        handle_rethink_event(session, event_filter["event"], decoded)
     except Exception as e:
         logger.error(f"Error processing event: {e}")
         logger.error(traceback.format_exc())
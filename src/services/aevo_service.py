@@ -22,27 +22,20 @@ def get_funding_history(
     }
     headers = {"accept": "application/json"}
 
-    try:
-        response = requests.get(
-            f"{url}/funding-history", headers=headers, params=params
-        )
-        response.raise_for_status()  # Raise HTTPError for bad responses
-        data = response.json()
+    response = requests.get(f"{url}/funding-history", headers=headers, params=params)
+    response.raise_for_status()  # Raise HTTPError for bad responses
+    data = response.json()
 
-        funding_history = data.get("funding_history", [])
-        if funding_history:
-            # Map the raw funding history to FundingHistoryEntry instances
-            return [
-                FundingHistoryEntry(
-                    datetime=nanoseconds_to_datetime(int(entry[1])).astimezone(
-                        timezone.utc
-                    ),
-                    funding_rate=float(entry[2]),
-                )
-                for entry in funding_history
-            ]
-        return []  # Return an empty list if no data is found
-
-    except requests.RequestException as e:
-        print(f"Error fetching funding history: {e}")
-        return []
+    funding_history = data.get("funding_history", [])
+    if funding_history:
+        # Map the raw funding history to FundingHistoryEntry instances
+        return [
+            FundingHistoryEntry(
+                datetime=nanoseconds_to_datetime(int(entry[1])).astimezone(
+                    timezone.utc
+                ),
+                funding_rate=float(entry[2]),
+            )
+            for entry in funding_history
+        ]
+    return []  # Return an empty list if no data is found
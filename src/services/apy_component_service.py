@@ -1,12 +1,75 @@
 from abc import abstractmethod
+from dataclasses import dataclass, field
+from typing import Dict, List
 import uuid
 
-from sqlmodel import Session, select
+from sqlmodel import Session, col, select
 
 from models.apy_component import APYComponent
 from models.vault_apy_breakdown import VaultAPYBreakdown, VaultAPYComponent
 
 
+@dataclass
+class VaultAPYResult:
+    vault_id: uuid.UUID
+    total_apy: float
+    period: int
+    components: Dict[APYComponent, float] = field(default_factory=dict)
+
+
+def _component_key(component_name) -> str:
+    return component_name.value if isinstance(component_name, APYComponent) else component_name
+
+
+def bulk_upsert_vault_apy(session: Session, results: List[VaultAPYResult]):
+    """Upsert the breakdown and component rows of many vaults/periods in one commit."""
+    if not results:
+        return
+
+    vault_ids = {result.vault_id for result in results}
+    breakdowns = {
+        (breakdown.vault_id, breakdown.period): breakdown
+        for breakdown in session.exec(
+            select(VaultAPYBreakdown).where(col(VaultAPYBreakdown.vault_id).in_(vault_ids))
+        ).all()
+    }
+    components = {
+        (component.vault_apy_breakdown_id, component.component_name, component.period): component
+        for component in session.exec(
+            select(VaultAPYComponent).where(
+                col(VaultAPYComponent.vault_apy_breakdown_id).in_(
+                    [breakdown.id for breakdown in breakdowns.values()]
+                )
+            )
+        ).all()
+    }
+
+    for result in results:
+        breakdown = breakdowns.get((result.vault_id, result.period))
+        if not breakdown:
+            breakdown = VaultAPYBreakdown(vault_id=result.vault_id, period=result.period)
+            breakdowns[(result.vault_id, result.period)] = breakdown
+        breakdown.total_apy = result.total_apy
+        session.add(breakdown)
+
+        for component_name, component_apy in result.components.items():
+            key = (breakdown.id, _component_key(component_name), result.period)
+            component = components.get(key)
+            if component:
+                component.component_apy = component_apy
+            else:
+                component = VaultAPYComponent(
+                    vault_apy_breakdown_id=breakdown.id,
+                    component_name=_component_key(component_name),
+                    component_apy=component_apy,
+                    period=result.period,
+                )
+                components[key] = component
+            session.add(component)
+
+    session.commit()
+
+
 class APYComponentService:
     def __init__(
         self, vault_id: uuid.UUID, current_apy: float, period: int, session: Session
@@ -21,6 +84,14 @@ class APYComponentService:
         """Return the APY component values. Must be implemented by subclasses."""
         pass
 
+    def to_result(self) -> VaultAPYResult:
+        return VaultAPYResult(
+            vault_id=self.vault_id,
+            total_apy=self.current_apy,
+            period=self.period,
+            components=self.get_component_values(),
+        )
+
     def save(self):
         component_values = self.get_component_values()
         self.save_vault_apy_components(
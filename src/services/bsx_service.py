@@ -112,27 +112,22 @@ def get_funding_history(
     }
     headers = {"accept": "application/json"}
 
-    try:
-        api_url = f"{bsx_base_url}/products/{product_id}/funding-rate"
-        response = requests.get(f"{api_url}", headers=headers, params=params)
-        response.raise_for_status()  # Raise HTTPError for bad responses
-        data = response.json()
-
-        funding_history = data.get("items", [])
-        if funding_history:
-            # Map the raw funding history to FundingHistoryEntry instances
-            return [
-                FundingHistoryEntry(
-                    datetime=nanoseconds_to_datetime(int(entry["time"])).astimezone(
-                        timezone.utc
-                    ),
-                    funding_rate=float(entry["rate"]),
-                )
-                for entry in funding_history
-            ]
-
-        return []
-
-    except requests.RequestException as e:
-        print(f"Error BSX fetching funding history: {e}")
-        return []
+    api_url = f"{bsx_base_url}/products/{product_id}/funding-rate"
+    response = requests.get(f"{api_url}", headers=headers, params=params)
+    response.raise_for_status()  # Raise HTTPError for bad responses
+    data = response.json()
+
+    funding_history = data.get("items", [])
+    if funding_history:
+        # Map the raw funding history to FundingHistoryEntry instances
+        return [
+            FundingHistoryEntry(
+                datetime=nanoseconds_to_datetime(int(entry["time"])).astimezone(
+                    timezone.utc
+                ),
+                funding_rate=float(entry["rate"]),
+            )
+            for entry in funding_history
+        ]
+
+    return []
@@ -1,11 +1,12 @@
+from sqlalchemy import func
 from sqlmodel import select
 from typing import List
 from datetime import datetime
 
 from core import constants
 from models.onchain_transaction_history import OnchainTransactionHistory
+from models.transaction_ledger import LedgerAction, TransactionLedger
 from models.vaults import Vault
-from utils.extension_utils import to_tx_aumount
 
 
 class DepositService:
@@ -31,6 +32,11 @@ class DepositService:
         return deposits
 
     def get_total_deposits(self, vault: Vault, start_date: int, end_date: int) -> float:
-        deposits = self.get_deposits(vault.contract_address, start_date, end_date)
-        total_deposit = sum(to_tx_aumount(tx.input) for tx in deposits)
-        return total_deposit
+        total_deposit = self.session.exec(
+            select(func.coalesce(func.sum(TransactionLedger.amount), 0))
+            .where(TransactionLedger.vault_id == vault.id)
+            .where(TransactionLedger.action == LedgerAction.DEPOSIT)
+            .where(TransactionLedger.timestamp <= end_date)
+            .where(TransactionLedger.timestamp >= start_date)
+        ).one()
+        return float(total_deposit)
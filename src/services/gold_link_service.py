@@ -161,22 +161,18 @@ def get_funding_history(decimals=1e30) -> List[FundingHistoryEntry]:
     params = f'["{settings.GOLD_LINK_ETH_NETWORK_ID_MAINNET}",20]'
     api_url = f"{url}/?method=goldlink/getGmxHistoricFundingRate&params={params}"
 
-    try:
-        response = requests.get(api_url, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-
-        funding_history = data.get("result", [])
-        return [
-            FundingHistoryEntry(
-                datetime=entry["ts"],
-                funding_rate=float(entry["funding_rate"]) / decimals,
-            )
-            for entry in funding_history
-        ]
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching funding history: {e}")
-        return []
+    response = requests.get(api_url, headers=headers)
+    response.raise_for_status()
+    data = response.json()
+
+    funding_history = data.get("result", [])
+    return [
+        FundingHistoryEntry(
+            datetime=entry["ts"],
+            funding_rate=float(entry["funding_rate"]) / decimals,
+        )
+        for entry in funding_history
+    ]
 
 
 def get_apy_rate_history(
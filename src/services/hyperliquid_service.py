@@ -50,28 +50,23 @@ def get_funding_history(
     }
     headers = {"accept": "application/json"}
 
-    try:
-        response = requests.post(url, headers=headers, json=payload)
-        response.raise_for_status()
-        data = response.json()
-
-        time.sleep(0.6)
-        if isinstance(data, list):
-            return [
-                FundingHistoryEntry(
-                    datetime=unixtimestamp_to_datetime(int(entry["time"])).astimezone(
-                        timezone.utc
-                    ),
-                    funding_rate=float(entry["fundingRate"]),
-                )
-                for entry in data
-            ]
-
-        return []
+    response = requests.post(url, headers=headers, json=payload)
+    response.raise_for_status()
+    data = response.json()
 
-    except requests.RequestException as e:
-        print(f"Error Hyperliquid fetching funding history: {e}")
-        return []
+    time.sleep(0.6)
+    if isinstance(data, list):
+        return [
+            FundingHistoryEntry(
+                datetime=unixtimestamp_to_datetime(int(entry["time"])).astimezone(
+                    timezone.utc
+                ),
+                funding_rate=float(entry["fundingRate"]),
+            )
+            for entry in data
+        ]
+
+    return []
 
 
 def get_funding_history_hype(
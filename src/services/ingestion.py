@@ -0,0 +1,197 @@
+"""Ingestion of the vault logs of every chain in a single process.
+
+A `ChainSource` holds one websocket subscription to the logs of the active
+vaults of a chain and decodes every log once with the shared decoder
+registry. `FanOut` hands the decoded events to the consumers, each with its
+own bounded queue and worker task, so a slow consumer only delays itself.
+When a queue is full the source waits for it, unless the consumer drops its
+oldest event instead (`drop_when_full`).
+"""
+
+import asyncio
+import logging
+import time
+import traceback
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from websockets import ConnectionClosedError, ConnectionClosedOK
+
+from core import instrumentation
+from models.vaults import NetworkChain
+from services.log_decoder import DecodedLog, LogDecoderRegistry, log_decoder
+from services.socket_manager import WebSocketManager
+from services.vault_registry import VaultRegistry, vault_registry
+
+logger = logging.getLogger(__name__)
+
+HEAD_POLL_SECONDS = 15
+
+
+@dataclass
+class LogEvent:
+    chain: NetworkChain
+    log: dict
+    decoded: DecodedLog
+    received_at: float = field(default_factory=time.monotonic)
+
+
+class Consumer:
+    name: str = ""
+    max_queue_size: int = 1000
+    # Discard the oldest queued event instead of holding back the sources
+    drop_when_full: bool = False
+
+    def accepts(self, event: LogEvent) -> bool:
+        return True
+
+    async def handle(self, event: LogEvent):
+        raise NotImplementedError
+
+
+class FanOut:
+    def __init__(self, consumers: Sequence[Consumer]):
+        self.consumers = list(consumers)
+        self.queues: Dict[str, asyncio.Queue] = {
+            consumer.name: asyncio.Queue(consumer.max_queue_size)
+            for consumer in self.consumers
+        }
+        self._workers: List[asyncio.Task] = []
+
+    async def publish(self, event: LogEvent):
+        for consumer in self.consumers:
+            if not consumer.accepts(event):
+                continue
+            queue = self.queues[consumer.name]
+            if queue.full() and consumer.drop_when_full:
+                queue.get_nowait()
+                queue.task_done()
+                instrumentation.INGESTION_EVENTS.labels(
+                    consumer=consumer.name, status="dropped"
+                ).inc()
+                logger.warning(f"Queue of {consumer.name} is full, dropped an event")
+            await queue.put(event)
+            instrumentation.INGESTION_QUEUE_DEPTH.labels(consumer=consumer.name).set(
+                queue.qsize()
+            )
+
+    async def _work(self, consumer: Consumer, queue: asyncio.Queue):
+        while True:
+            event = await queue.get()
+            status = "handled"
+            try:
+                await consumer.handle(event)
+            except Exception as e:
+                status = "failed"
+                logger.error(f"Consumer {consumer.name} failed: {e}")
+                logger.error(traceback.format_exc())
+            finally:
+                queue.task_done()
+            instrumentation.INGESTION_EVENTS.labels(
+                consumer=consumer.name, status=status
+            ).inc()
+            instrumentation.INGESTION_CONSUMER_LAG.labels(consumer=consumer.name).set(
+                time.monotonic() - event.received_at
+            )
+            instrumentation.INGESTION_QUEUE_DEPTH.labels(consumer=consumer.name).set(
+                queue.qsize()
+            )
+
+    def start(self):
+        self._workers = [
+            asyncio.create_task(self._work(consumer, self.queues[consumer.name]))
+            for consumer in self.consumers
+        ]
+
+    async def join(self):
+        await asyncio.gather(*(queue.join() for queue in self.queues.values()))
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+
+class ChainSource(WebSocketManager):
+    def __init__(
+        self,
+        network: NetworkChain,
+        url: str,
+        fan_out: FanOut,
+        decoder: LogDecoderRegistry = log_decoder,
+        registry: VaultRegistry = vault_registry,
+    ):
+        super().__init__(url, logger=logger)
+        self.network = network
+        self.fan_out = fan_out
+        self.decoder = decoder
+        self.registry = registry
+        self.head: Optional[int] = None
+
+    def vault_addresses(self) -> List[str]:
+        return sorted(
+            {
+                vault.contract_address
+                for vault in self.registry.snapshot().by_id.values()
+                if vault.is_active
+                and vault.contract_address
+                and vault.network_chain == self.network
+            }
+        )
+
+    async def ingest(self, log):
+        decoded = self.decoder.decode(log)
+        if decoded is None:
+            return
+        instrumentation.LISTENER_EVENTS.labels(
+            chain=self.network.value, event=decoded.event_name
+        ).inc()
+        if self.head is not None:
+            instrumentation.LISTENER_EVENT_LAG.labels(chain=self.network.value).set(
+                self.head - log["blockNumber"]
+            )
+        await self.fan_out.publish(LogEvent(self.network, log, decoded))
+
+    async def _track_head(self):
+        # The persistent websocket only reads subscription messages, ask the
+        # head over the second connection
+        while True:
+            try:
+                self.head = await asyncio.to_thread(
+                    lambda: self.w3_socket.eth.block_number
+                )
+            except Exception as e:
+                logger.warning(f"Cannot read the {self.network.value} head: {e}")
+            await asyncio.sleep(HEAD_POLL_SECONDS)
+
+    async def _listen(self):
+        addresses = self.vault_addresses()
+        subscription_id = await self.w3.eth.subscribe("logs", {"address": addresses})
+        logger.info(
+            f"Subscribed to {len(addresses)} {self.network.value} vaults: {subscription_id}"
+        )
+        async for msg in self.read_messages():
+            try:
+                await self.ingest(msg["result"])
+            except Exception as e:
+                logger.error(f"Cannot ingest {self.network.value} log: {e}")
+                logger.error(traceback.format_exc())
+
+    async def run(self):
+        await self.connect()
+        head_tracker = asyncio.create_task(self._track_head())
+        try:
+            while True:
+                try:
+                    await self._listen()
+                except (ConnectionClosedError, ConnectionClosedOK):
+                    logger.error(
+                        f"{self.network.value} websocket connection closed",
+                        exc_info=True,
+                    )
+                    await asyncio.sleep(2)
+                    await self.reconnect()
+        finally:
+            head_tracker.cancel()
+            await self.disconnect()
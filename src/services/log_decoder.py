@@ -0,0 +1,314 @@
+"""Decoders for the vault event logs, shared by the listeners and jobs.
+
+Every listened event is a flat list of 32 byte words after the indexed sender,
+so each (strategy, event) pair is compiled once into a list of word slices
+with their decimals and decoded straight from the raw log bytes.
+`LogDecoderRegistry` maps (contract address, topic0) of every vault to its
+decoder, using the strategy metadata of the vault registry.
+"""
+
+import logging
+import threading
+from enum import Enum
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from core import constants
+from core.config import settings
+from models.vaults import Vault, VaultCategory
+from services.vault_registry import VaultRegistry, VaultSnapshot, vault_registry
+
+logger = logging.getLogger(__name__)
+
+WORD_SIZE = 32
+# Delta neutral vaults emit 18 decimals amounts for ETH and 6 for stablecoins
+AUTO_DECIMALS_THRESHOLD = 10**17
+
+# Amounts of a decoded log, in the DecodedLog order
+AMOUNT_FIELDS = ("value", "shares", "pt_amount", "eth_amount", "sc_amount")
+
+Layout = Callable[[bytes], List[float]]
+
+
+class VaultEventFamily(str, Enum):
+    stablecoin = "stablecoin"
+    delta_neutral = "delta_neutral"
+    solv = "solv"
+    pendle = "pendle"
+    rethink = "rethink"
+
+
+class Word(NamedTuple):
+    name: str
+    index: int
+    # None picks 18 or 6 decimals from the magnitude of the amount
+    scale: Optional[float]
+    # The word and all the data after it, read as a single integer
+    rest: bool = False
+    # Read as 0 when the log data is shorter
+    optional: bool = False
+
+
+class DecodedLog(NamedTuple):
+    vault: Vault
+    family: VaultEventFamily
+    event_name: str
+    from_address: Optional[str]
+    value: float = 0
+    shares: float = 0
+    pt_amount: float = 0
+    eth_amount: float = 0
+    sc_amount: float = 0
+
+
+class EventDecoder(NamedTuple):
+    event_name: str
+    layout: Layout
+    has_sender: bool = True
+
+
+def compile_layout(*words: Word) -> Layout:
+    slices = tuple(
+        (
+            AMOUNT_FIELDS.index(word.name),
+            word.index * WORD_SIZE,
+            None if word.rest else (word.index + 1) * WORD_SIZE,
+            word.scale,
+        )
+        for word in words
+    )
+    min_length = max(
+        ((word.index + 1) * WORD_SIZE for word in words if not word.optional),
+        default=0,
+    )
+    from_bytes = int.from_bytes
+
+    def decode(data: bytes) -> List[float]:
+        if len(data) < min_length:
+            raise ValueError(
+                f"Log data has {len(data)} bytes, expected at least {min_length}"
+            )
+        values = [0, 0, 0, 0, 0]
+        for position, start, end, scale in slices:
+            raw = from_bytes(data[start:end], "big")
+            if scale is None:
+                values[position] = (
+                    raw / 1e18 if raw >= AUTO_DECIMALS_THRESHOLD else raw / 1e6
+                )
+            else:
+                values[position] = raw / scale
+        return values
+
+    return decode
+
+
+# Event names of the topics listened by web3_listener and monitoring_listener
+EVENT_NAMES = {
+    settings.STABLECOIN_DEPOSIT_VAULT_FILTER_TOPICS: "Deposit",
+    settings.STABLECOIN_INITIATE_WITHDRAW_VAULT_FILTER_TOPICS: "InitiateWithdraw",
+    settings.STABLECOIN_COMPLETE_WITHDRAW_VAULT_FILTER_TOPICS: "Withdrawn",
+    settings.DELTA_NEUTRAL_DEPOSIT_EVENT_TOPIC: "Deposit",
+    settings.MULTIPLE_STABLECOINS_DEPOSIT_EVENT_TOPIC: "Deposit",
+    settings.DELTA_NEUTRAL_INITIATE_WITHDRAW_EVENT_TOPIC: "InitiateWithdraw",
+    settings.DELTA_NEUTRAL_COMPLETE_WITHDRAW_EVENT_TOPIC: "Withdrawn",
+    settings.SOLV_DEPOSIT_EVENT_TOPIC: "Deposit",
+    settings.SOLV_INITIATE_WITHDRAW_EVENT_TOPIC: "InitiateWithdraw",
+    settings.SOLV_COMPLETE_WITHDRAW_EVENT_TOPIC: "Withdrawn",
+    settings.PENDLE_DEPOSIT_EVENT_TOPIC: "Deposit",
+    settings.PENDLE_FORCE_REQUEST_FUND_EVENT_TOPIC: "InitiateWithdraw",
+    settings.PENDLE_REQUEST_FUND_EVENT_TOPIC: "InitiateWithdraw",
+    settings.PENDLE_COMPLETE_WITHDRAW_EVENT_TOPIC: "Withdrawn",
+}
+
+# Deposited / InitiateWithdrawal / Withdrawn(address indexed, uint256, uint256)
+STABLECOIN_LAYOUT = compile_layout(
+    Word("value", 0, 1e6), Word("shares", 1, 1e6, rest=True)
+)
+# Deposit / RequestFunds / Withdrawn(address indexed, address indexed, ...) in WBTC
+SOLV_LAYOUT = compile_layout(
+    Word("value", 0, 1e8), Word("shares", 1, 1e18, rest=True)
+)
+DELTA_NEUTRAL_LAYOUT = compile_layout(
+    Word("value", 0, None), Word("shares", 1, 1e6)
+)
+# Deposit / RequestFunds / ForceRequestFunds(address indexed, pt, eth, sc, total, shares)
+PENDLE_LAYOUT = compile_layout(
+    Word("pt_amount", 0, 1e18),
+    Word("eth_amount", 1, 1e18),
+    Word("sc_amount", 2, 1e6),
+    Word("value", 3, 1e6),
+    Word("shares", 4, 1e6),
+)
+# Withdrawn(address indexed, pt, sc, shares, total)
+PENDLE_WITHDRAWN_LAYOUT = compile_layout(
+    Word("pt_amount", 0, 1e18),
+    Word("sc_amount", 1, 1e6),
+    Word("shares", 2, 1e6),
+    Word("value", 3, 1e6),
+)
+# UserDeposited(address indexed, uint256), WETH amounts
+RETHINK_DEPOSIT_LAYOUT = compile_layout(Word("value", 0, 1e18))
+RETHINK_WITHDRAW_LAYOUT = compile_layout(
+    Word("value", 0, 1e18), Word("shares", 1, 1e18)
+)
+# DepositedToFundContract() carries no sender
+RETHINK_DEPOSITED_TO_FUND_LAYOUT = compile_layout(
+    Word("value", 0, 1e18, optional=True)
+)
+
+
+def _family_decoders(
+    layout: Layout, overrides: Optional[Dict[str, Layout]] = None
+) -> Dict[str, EventDecoder]:
+    overrides = overrides or {}
+    return {
+        topic: EventDecoder(name, overrides.get(topic, layout))
+        for topic, name in EVENT_NAMES.items()
+    }
+
+
+FAMILY_DECODERS: Dict[VaultEventFamily, Dict[str, EventDecoder]] = {
+    VaultEventFamily.stablecoin: _family_decoders(STABLECOIN_LAYOUT),
+    VaultEventFamily.delta_neutral: _family_decoders(DELTA_NEUTRAL_LAYOUT),
+    VaultEventFamily.solv: _family_decoders(SOLV_LAYOUT),
+    VaultEventFamily.pendle: _family_decoders(
+        PENDLE_LAYOUT,
+        {settings.PENDLE_COMPLETE_WITHDRAW_EVENT_TOPIC: PENDLE_WITHDRAWN_LAYOUT},
+    ),
+    VaultEventFamily.rethink: {
+        settings.RETHINK_DELTA_NEUTRAL_DEPOSIT_EVENT_TOPIC: EventDecoder(
+            "Deposit", RETHINK_DEPOSIT_LAYOUT
+        ),
+        settings.RETHINK_DELTA_NEUTRAL_DEPOSITED_TO_FUND_CONTRACT_EVENT_TOPIC: EventDecoder(
+            "DepositedToFundContract",
+            RETHINK_DEPOSITED_TO_FUND_LAYOUT,
+            has_sender=False,
+        ),
+        settings.RETHINK_DELTA_NEUTRAL_REQUEST_FUND_EVENT_TOPIC: EventDecoder(
+            "InitiateWithdraw", RETHINK_WITHDRAW_LAYOUT
+        ),
+        settings.RETHINK_DELTA_NEUTRAL_COMPLETE_WITHDRAW_EVENT_TOPIC: EventDecoder(
+            "Withdrawn", RETHINK_WITHDRAW_LAYOUT
+        ),
+    },
+}
+
+# Event names of the topics listened by rethink_web3_listener
+RETHINK_EVENT_NAMES = {
+    topic: decoder.event_name
+    for topic, decoder in FAMILY_DECODERS[VaultEventFamily.rethink].items()
+}
+
+
+def vault_event_family(vault: Vault) -> Optional[VaultEventFamily]:
+    if (
+        vault.category == VaultCategory.real_yield_v2
+        or vault.slug == constants.ETH_WITH_LENDING_BOOST_YIELD
+    ):
+        return VaultEventFamily.rethink
+    if vault.strategy_name == constants.OPTIONS_WHEEL_STRATEGY:
+        return VaultEventFamily.stablecoin
+    if vault.strategy_name == constants.DELTA_NEUTRAL_STRATEGY:
+        return VaultEventFamily.delta_neutral
+    if vault.slug == constants.SOLV_VAULT_SLUG:
+        return VaultEventFamily.solv
+    if vault.strategy_name == constants.PENDLE_HEDGING_STRATEGY:
+        return VaultEventFamily.pendle
+    return None
+
+
+def _to_bytes(value) -> bytes:
+    if type(value) is bytes:
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        # HexBytes slices are HexBytes, decode from plain bytes
+        return bytes(value)
+    return bytes.fromhex(value[2:] if value.startswith("0x") else value)
+
+
+def _topic_key(topic) -> bytes:
+    # HexBytes hash and compare like the plain bytes keys
+    return topic if isinstance(topic, bytes) else _to_bytes(topic)
+
+
+def _decode(
+    vault: Optional[Vault], family: VaultEventFamily, decoder: EventDecoder, log
+) -> DecodedLog:
+    topics = log["topics"]
+    from_address = None
+    if decoder.has_sender and len(topics) >= 2:
+        from_address = "0x" + _to_bytes(topics[1]).hex()[24:]
+    return DecodedLog(
+        vault,
+        family,
+        decoder.event_name,
+        from_address,
+        *decoder.layout(_to_bytes(log["data"])),
+    )
+
+
+def decode_event(family: VaultEventFamily, log) -> Optional[DecodedLog]:
+    """Decode a log of a known strategy without a vault lookup, None for an
+    event the strategy does not emit."""
+    decoder = FAMILY_DECODERS[family].get("0x" + _to_bytes(log["topics"][0]).hex())
+    if decoder is None:
+        return None
+    return _decode(None, family, decoder, log)
+
+
+class LogDecoderRegistry:
+    """Decoders of every vault keyed by (lower cased address, topic0 bytes).
+
+    The table is rebuilt whenever the vault registry loads a new snapshot, so
+    a vault added or re-deployed is picked up without restarting a listener.
+    """
+
+    def __init__(self, registry: VaultRegistry):
+        self.vault_registry = registry
+        self._lock = threading.Lock()
+        self._snapshot: Optional[VaultSnapshot] = None
+        self._decoders: Dict[
+            Tuple[str, bytes], Tuple[Vault, VaultEventFamily, EventDecoder]
+        ] = {}
+
+    @staticmethod
+    def _build(snapshot: VaultSnapshot):
+        decoders = {}
+        for address, vault in snapshot.by_address.items():
+            family = vault_event_family(vault)
+            if family is None:
+                continue
+            for topic, decoder in FAMILY_DECODERS[family].items():
+                decoders[(address, _topic_key(topic))] = (vault, family, decoder)
+        return decoders
+
+    def _table(self):
+        snapshot = self.vault_registry.snapshot()
+        if snapshot is not self._snapshot:
+            with self._lock:
+                if snapshot is not self._snapshot:
+                    self._decoders = self._build(snapshot)
+                    self._snapshot = snapshot
+                    logger.debug(f"Built {len(self._decoders)} log decoders")
+        return self._decoders
+
+    def decode(self, log) -> Optional[DecodedLog]:
+        """Decode a log of a vault, None when the address or event is not a
+        listened vault event."""
+        return self._decode_with(self._table(), log)
+
+    def decode_many(self, logs: Iterable) -> List[Optional[DecodedLog]]:
+        table = self._table()
+        return [self._decode_with(table, log) for log in logs]
+
+    @staticmethod
+    def _decode_with(table, log) -> Optional[DecodedLog]:
+        topics = log["topics"]
+        if not topics:
+            return None
+        entry = table.get((log["address"].lower(), _topic_key(topics[0])))
+        if entry is None:
+            return None
+        return _decode(*entry, log)
+
+
+log_decoder = LogDecoderRegistry(vault_registry)
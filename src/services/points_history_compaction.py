@@ -0,0 +1,132 @@
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HistoryRollup:
+    """How one append-only history table is rolled up into daily rows."""
+
+    table: str
+    daily_table: str
+    key_columns: List[str]
+    # Aggregate of the moved rows stored in the daily `point` column
+    point_aggregate: str
+    # Merge of an existing daily `point` (d.point) with a newly moved one
+    point_merge: str
+
+    @property
+    def keys(self) -> str:
+        return ", ".join(self.key_columns)
+
+    def build_compaction_sql(self) -> str:
+        same_key = " AND ".join(f"newer.{c} = h.{c}" for c in self.key_columns)
+        return f"""
+        WITH batch AS (
+            SELECT h.id
+            FROM {self.table} h
+            WHERE h.created_at < :cutoff
+              -- The latest row of every key stays raw for readers of the history
+              AND EXISTS (
+                  SELECT 1 FROM {self.table} newer
+                  WHERE {same_key} AND newer.created_at > h.created_at
+              )
+            LIMIT :batch_size
+            FOR UPDATE SKIP LOCKED
+        ),
+        moved AS (
+            DELETE FROM {self.table} h
+            USING batch
+            WHERE h.id = batch.id
+            RETURNING h.*
+        ),
+        rolled AS (
+            INSERT INTO {self.daily_table} AS d (
+                {self.keys}, day, point, entries, last_created_at
+            )
+            SELECT {self.keys}, date_trunc('day', created_at),
+                   {self.point_aggregate}, count(*), max(created_at)
+            FROM moved
+            GROUP BY {self.keys}, date_trunc('day', created_at)
+            ON CONFLICT ({self.keys}, day) DO UPDATE SET
+                point = {self.point_merge},
+                entries = d.entries + excluded.entries,
+                last_created_at = greatest(d.last_created_at, excluded.last_created_at)
+        )
+        SELECT count(*) FROM moved
+        """
+
+
+HISTORY_ROLLUPS = [
+    HistoryRollup(
+        table="user_points_history",
+        daily_table="user_points_history_daily",
+        key_columns=["user_points_id"],
+        point_aggregate="sum(point)",
+        point_merge="d.point + excluded.point",
+    ),
+    HistoryRollup(
+        table="referral_points_history",
+        daily_table="referral_points_history_daily",
+        key_columns=["referral_points_id"],
+        point_aggregate="sum(point)",
+        point_merge="d.point + excluded.point",
+    ),
+    HistoryRollup(
+        table="point_distribution_history",
+        daily_table="point_distribution_history_daily",
+        key_columns=["vault_id", "partner_name"],
+        # Running totals, the last value of the day wins
+        point_aggregate="(array_agg(point ORDER BY created_at DESC))[1]",
+        point_merge=(
+            "CASE WHEN excluded.last_created_at >= d.last_created_at "
+            "THEN excluded.point ELSE d.point END"
+        ),
+    ),
+]
+
+
+def compact_history(
+    session: Session,
+    rollup: HistoryRollup,
+    cutoff: datetime,
+    batch_size: int,
+    max_batches: int | None = None,
+) -> int:
+    """Move rows older than `cutoff` into daily rows, one short transaction per batch.
+
+    Each batch deletes and rolls up in a single statement, so the job can run
+    next to the hourly writers and be stopped at any time without losing points.
+    """
+    sql = text(rollup.build_compaction_sql())
+    # History timestamps are stored as naive UTC
+    if cutoff.tzinfo is not None:
+        cutoff = cutoff.astimezone(timezone.utc).replace(tzinfo=None)
+    compacted = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        moved = session.execute(
+            sql, {"cutoff": cutoff, "batch_size": batch_size}
+        ).scalar_one()
+        session.commit()
+        compacted += moved
+        batches += 1
+        if moved < batch_size:
+            break
+    logger.info(f"Compacted {compacted} {rollup.table} rows older than {cutoff}")
+    return compacted
+
+
+def compact_points_history(
+    session: Session, cutoff: datetime, batch_size: int
+) -> Dict[str, int]:
+    return {
+        rollup.table: compact_history(session, rollup, cutoff, batch_size)
+        for rollup in HISTORY_ROLLUPS
+    }
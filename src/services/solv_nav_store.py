@@ -0,0 +1,168 @@
+import logging
+import math
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+
+from bg_tasks.utils import calculate_roi
+from models.solv_nav_history import SolvNavHistory, SolvNavStatistics
+from services import solv_service
+
+logger = logging.getLogger(__name__)
+
+# empyrical's annualization factor of weekly returns
+WEEKLY_PERIODS = 52
+
+
+@dataclass
+class NavSeries:
+    """NAV points sorted by date, looked up by binary search."""
+
+    dates: List[datetime] = field(default_factory=list)
+    nav: List[float] = field(default_factory=list)
+    adjusted_nav: List[float] = field(default_factory=list)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def value_at(self, at: pd.Timestamp, column: str = "nav") -> float:
+        """Last value published on or before the day of `at`."""
+        cutoff = datetime(at.year, at.month, at.day)
+        index = bisect_right(self.dates, cutoff) - 1
+        if index < 0:
+            raise ValueError(f"No NAV on or before {cutoff:%Y-%m-%d}")
+        return getattr(self, column)[index]
+
+    def periodic_apy(
+        self,
+        offset: pd.DateOffset,
+        column: str = "nav",
+        now: Optional[pd.Timestamp] = None,
+    ) -> float:
+        now = now if now is not None else pd.Timestamp.now(tz="UTC")
+        start = now - offset
+        return calculate_roi(
+            self.value_at(now, column), self.value_at(start, column), (now - start).days
+        )
+
+
+def add_return(statistics: SolvNavStatistics, nav_return: float):
+    statistics.return_count += 1
+    statistics.return_sum += nav_return
+    if nav_return < 0:
+        statistics.downside_square_sum += nav_return**2
+        statistics.negative_count += 1
+        statistics.negative_sum += nav_return
+        statistics.negative_square_sum += nav_return**2
+
+
+def performance_statistics(
+    statistics: SolvNavStatistics,
+) -> Tuple[float, float, float, float]:
+    """All time high, sortino ratio, downside risk and risk factor.
+
+    Same values as empyrical's weekly sortino ratio and downside risk and as
+    `calculate_risk_factor` over the whole series, from the running sums.
+    """
+    sortino = downside = risk_factor = 0
+    if statistics.return_count:
+        downside = math.sqrt(
+            statistics.downside_square_sum / statistics.return_count * WEEKLY_PERIODS
+        )
+        if downside:
+            average_annual_return = (
+                statistics.return_sum / statistics.return_count * WEEKLY_PERIODS
+            )
+            sortino = average_annual_return / downside
+    if statistics.negative_count:
+        mean = statistics.negative_sum / statistics.negative_count
+        variance = statistics.negative_square_sum / statistics.negative_count - mean**2
+        risk_factor = math.sqrt(max(variance, 0))
+    return statistics.all_time_high, sortino, downside, risk_factor
+
+
+class SolvNavStore:
+    """Local copy of the NAV series of a Solv open fund.
+
+    `sync` appends the points published after the last stored one and folds
+    them into the running statistics, in the same transaction.
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        pool_slot_info_id: int = solv_service.NAV_POOL_SLOT_INFO_ID,
+        fetch_points: Callable[
+            [Optional[datetime], int], Optional[list]
+        ] = solv_service.fetch_nav_points_since,
+    ):
+        self.session = session
+        self.pool_slot_info_id = pool_slot_info_id
+        self.fetch_points = fetch_points
+
+    def statistics(self) -> SolvNavStatistics:
+        statistics = self.session.get(SolvNavStatistics, self.pool_slot_info_id)
+        if statistics is None:
+            statistics = SolvNavStatistics(pool_slot_info_id=self.pool_slot_info_id)
+        return statistics
+
+    def sync(self) -> int:
+        """Store the new NAV points, returns how many were added."""
+        statistics = self.statistics()
+        points = self.fetch_points(statistics.last_nav_date, self.pool_slot_info_id)
+        if points is None:
+            raise ValueError("Failed to fetch NAV data")
+
+        rows = []
+        for point in points:
+            nav_date = solv_service.parse_nav_date(point["navDate"])
+            last_nav_date = statistics.last_nav_date
+            if last_nav_date is not None and nav_date <= last_nav_date:
+                continue
+            # Same decimals as nav_data_to_dataframe
+            nav = float(point["nav"]) / 1e8
+            if statistics.last_nav is not None:
+                add_return(statistics, nav / statistics.last_nav - 1)
+            statistics.all_time_high = max(statistics.all_time_high, nav)
+            statistics.last_nav = nav
+            statistics.last_nav_date = nav_date
+            rows.append(
+                {
+                    "pool_slot_info_id": self.pool_slot_info_id,
+                    "nav_date": nav_date,
+                    "nav": nav,
+                    "adjusted_nav": float(point["adjustedNav"]) / 1e8,
+                }
+            )
+
+        if rows:
+            self.session.execute(
+                insert(SolvNavHistory).values(rows).on_conflict_do_nothing()
+            )
+            statistics.updated_at = datetime.now(timezone.utc)
+            self.session.add(statistics)
+            self.session.commit()
+        logger.info(
+            f"Stored {len(rows)} new NAV points of pool {self.pool_slot_info_id}"
+        )
+        return len(rows)
+
+    def series(self) -> NavSeries:
+        rows = self.session.exec(
+            select(
+                SolvNavHistory.nav_date, SolvNavHistory.nav, SolvNavHistory.adjusted_nav
+            )
+            .where(SolvNavHistory.pool_slot_info_id == self.pool_slot_info_id)
+            .order_by(SolvNavHistory.nav_date)
+        ).all()
+        series = NavSeries()
+        for nav_date, nav, adjusted_nav in rows:
+            series.dates.append(nav_date)
+            series.nav.append(nav)
+            series.adjusted_nav.append(adjusted_nav)
+        return series
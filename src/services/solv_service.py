@@ -1,6 +1,7 @@
 import requests
 import json
 from datetime import datetime, timezone
+from typing import Optional
 import pandas as pd
 from bg_tasks.utils import calculate_roi
 from core.config import settings
@@ -16,39 +17,105 @@ def nav_data_to_dataframe(nav_data):
     return df[["navDate", "nav", "adjustedNav"]]
 
 
-def fetch_nav_data():
-    url = "https://sft-api.com/graphql"
-    payload = '{"query":"query NavsOpenFund($filter: NavOpenFundFilter, $pagination: Pagination, $sort: Sort) {\\n  navsOpenFund(filter: $filter, pagination: $pagination, sort: $sort) {\\n    poolSlotInfoId\\n    symbol\\n    allTimeHigh\\n    currencyDecimals\\n    serialData {\\n      nav\\n      navDate\\n      adjustedNav\\n      __typename\\n    }\\n    __typename\\n  }\\n}","variables":{"filter":{"navType":"Investment","poolSlotInfoId":40},"pagination":{},"sort":{"field":"navDate","direction":"ASC"}}}'
-    headers = {
-        "authority": "sft-api.com",
-        "accept": "*/*",
-        "accept-language": "en-US,en;q=0.9,vi;q=0.8",
-        "authorization": settings.SOLV_API_KEY,
-        "cache-control": "no-cache",
-        "content-type": "application/json",
-        "origin": "https://app.solv.finance",
-        "pragma": "no-cache",
-        "referer": "https://app.solv.finance/",
-        "sec-ch-ua": '"Not_A Brand";v="99", "Google Chrome";v="109", "Chromium";v="109"',
-        "sec-ch-ua-mobile": "?0",
-        "sec-ch-ua-platform": '"Windows"',
-        "sec-fetch-dest": "empty",
-        "sec-fetch-mode": "cors",
-        "sec-fetch-site": "cross-site",
-        "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/109.0.0.0 Safari/537.36",
-        "x-amz-user-agent": "aws-amplify/3.0.7",
+NAV_URL = "https://sft-api.com/graphql"
+NAV_QUERY = "query NavsOpenFund($filter: NavOpenFundFilter, $pagination: Pagination, $sort: Sort) {\n  navsOpenFund(filter: $filter, pagination: $pagination, sort: $sort) {\n    poolSlotInfoId\n    symbol\n    allTimeHigh\n    currencyDecimals\n    serialData {\n      nav\n      navDate\n      adjustedNav\n      __typename\n    }\n    __typename\n  }\n}"
+NAV_POOL_SLOT_INFO_ID = 40
+NAV_HEADERS = {
+    "authority": "sft-api.com",
+    "accept": "*/*",
+    "accept-language": "en-US,en;q=0.9,vi;q=0.8",
+    "cache-control": "no-cache",
+    "content-type": "application/json",
+    "origin": "https://app.solv.finance",
+    "pragma": "no-cache",
+    "referer": "https://app.solv.finance/",
+    "sec-ch-ua": '"Not_A Brand";v="99", "Google Chrome";v="109", "Chromium";v="109"',
+    "sec-ch-ua-mobile": "?0",
+    "sec-ch-ua-platform": '"Windows"',
+    "sec-fetch-dest": "empty",
+    "sec-fetch-mode": "cors",
+    "sec-fetch-site": "cross-site",
+    "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/109.0.0.0 Safari/537.36",
+    "x-amz-user-agent": "aws-amplify/3.0.7",
+}
+
+
+def fetch_nav_points(
+    pool_slot_info_id: int = NAV_POOL_SLOT_INFO_ID,
+    direction: str = "ASC",
+    pagination: Optional[dict] = None,
+) -> Optional[list]:
+    """Raw NAV points of an open fund sorted by navDate, None on failure."""
+    payload = {
+        "query": NAV_QUERY,
+        "variables": {
+            "filter": {"navType": "Investment", "poolSlotInfoId": pool_slot_info_id},
+            "pagination": pagination or {},
+            "sort": {"field": "navDate", "direction": direction},
+        },
     }
+    headers = {**NAV_HEADERS, "authorization": settings.SOLV_API_KEY}
 
-    response = requests.post(url, headers=headers, data=payload)
+    response = requests.post(NAV_URL, headers=headers, data=json.dumps(payload))
     if response.status_code == 200:
         data = response.json()
         if "data" in data and "navsOpenFund" in data["data"]:
-            nav_data = data["data"]["navsOpenFund"]["serialData"]
-            df = nav_data_to_dataframe(nav_data)
-            return df
+            return data["data"]["navsOpenFund"]["serialData"]
     return None
 
 
+def fetch_nav_points_since(
+    since: Optional[datetime],
+    pool_slot_info_id: int = NAV_POOL_SLOT_INFO_ID,
+    page_size: int = 100,
+) -> Optional[list]:
+    """NAV points after `since` (every point when None), oldest first.
+
+    Pages are read newest first and the reading stops at the first page
+    reaching `since`, so a run only downloads the points it doesn't have.
+    """
+    points = {}
+    offset = 0
+    while True:
+        page = fetch_nav_points(
+            pool_slot_info_id,
+            direction="DESC",
+            pagination={"offset": offset, "limit": page_size},
+        )
+        if page is None:
+            return None
+        new_points = 0
+        reached_since = False
+        for point in page:
+            nav_date = parse_nav_date(point["navDate"])
+            if since is not None and nav_date <= since:
+                reached_since = True
+                continue
+            if nav_date not in points:
+                points[nav_date] = point
+                new_points += 1
+        # A short page is the last one, a page without new points means the
+        # API ignored the pagination and already returned everything
+        if reached_since or len(page) < page_size or new_points == 0:
+            break
+        offset += page_size
+    return [points[nav_date] for nav_date in sorted(points)]
+
+
+def parse_nav_date(value) -> datetime:
+    nav_date = pd.Timestamp(value)
+    if nav_date.tzinfo is not None:
+        nav_date = nav_date.tz_convert("UTC").tz_localize(None)
+    return nav_date.to_pydatetime()
+
+
+def fetch_nav_data():
+    nav_data = fetch_nav_points()
+    if nav_data is None:
+        return None
+    return nav_data_to_dataframe(nav_data)
+
+
 def get_monthly_apy(df, column="nav"):
     now = pd.Timestamp.now(tz="UTC")
     one_month_ago = now - pd.DateOffset(months=1)
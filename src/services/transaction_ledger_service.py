@@ -0,0 +1,207 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+from web3 import Web3
+from web3.contract import Contract
+
+from core import constants
+from models.onchain_transaction_history import OnchainTransactionHistory
+from models.transaction_ledger import LedgerAction, TransactionLedger
+from models.vaults import Vault
+from services.market_data import get_klines
+from services.vault_contract_service import VaultContractService
+from services.vault_registry import vault_registry
+from utils.extension_utils import (
+    to_amount_pendle,
+    to_tx_aumount,
+    to_tx_aumount_goldlink,
+    to_tx_aumount_rethink,
+)
+from utils.vault_utils import get_deposit_method_ids
+from utils.web3_utils import get_current_pps_by_block, parse_hex_to_int
+
+logger = logging.getLogger(__name__)
+
+LEDGER_ACTIONS = {
+    **{method_id: LedgerAction.DEPOSIT for method_id in get_deposit_method_ids()},
+    constants.MethodID.WITHDRAW.value: LedgerAction.INITIATE_WITHDRAWAL,
+    constants.MethodID.WITHDRAW_PENDLE1.value: LedgerAction.INITIATE_WITHDRAWAL,
+    constants.MethodID.WITHDRAW_PENDLE2.value: LedgerAction.INITIATE_WITHDRAWAL,
+    constants.MethodID.COMPPLETE_WITHDRAWAL.value: LedgerAction.COMPLETE_WITHDRAWAL,
+    constants.MethodID.COMPPLETE_WITHDRAWAL2.value: LedgerAction.COMPLETE_WITHDRAWAL,
+}
+
+# Binance symbols used to value non stablecoin vaults at the transaction time
+CURRENCY_PRICE_SYMBOLS = {
+    "WBTC": "BTCUSDT",
+    "BTC": "BTCUSDT",
+    "ETH": "ETHUSDT",
+    "WETH": "ETHUSDT",
+    "LINK": "LINKUSDT",
+}
+
+
+class TransactionLedgerService:
+    def __init__(self, session: Session):
+        self.session = session
+        self.vault_contract_service = VaultContractService()
+        self._contracts: Dict[str, Tuple[Contract, float]] = {}
+        self._prices: Dict[Tuple[str, int], float] = {}
+
+    def get_pps(self, vault: Vault, to_address: str, block_number: int) -> float:
+        key = to_address.lower()
+        if key not in self._contracts:
+            abi, decimals = self.vault_contract_service.get_vault_abi(vault=vault)
+            vault_contract, _ = self.vault_contract_service.get_vault_contract(
+                vault.network_chain, Web3.to_checksum_address(to_address), abi
+            )
+            self._contracts[key] = (vault_contract, decimals)
+        vault_contract, decimals = self._contracts[key]
+        return get_current_pps_by_block(vault_contract, block_number, decimals)
+
+    def get_usd_price(self, vault: Vault, timestamp: int) -> float:
+        symbol = CURRENCY_PRICE_SYMBOLS.get(vault.vault_currency)
+        if symbol is None:
+            return 1.0
+        # One klines request per symbol and 15 minutes candle
+        bucket = timestamp - timestamp % 900
+        if (symbol, bucket) not in self._prices:
+            start_time = datetime.fromtimestamp(bucket, tz=timezone.utc)
+            klines = get_klines(
+                symbol,
+                start_time=start_time,
+                end_time=start_time + timedelta(minutes=15),
+                interval="15m",
+                limit=1,
+            )
+            self._prices[(symbol, bucket)] = float(klines[0][4])
+        return self._prices[(symbol, bucket)]
+
+    def _share_decimals(self, vault: Vault) -> float:
+        _, decimals = self.vault_contract_service.get_vault_abi(vault=vault)
+        return decimals
+
+    def decode(
+        self, tx: OnchainTransactionHistory, vault: Vault, action: LedgerAction
+    ) -> TransactionLedger:
+        token = None
+        shares = None
+        pps = None
+        if vault.strategy_name == constants.PENDLE_HEDGING_STRATEGY:
+            # PT is valued with the oracle price, the amount is already in USDC
+            amount = to_amount_pendle(tx.input, tx.block_number, vault.network_chain)
+            usd_value = amount
+            if action != LedgerAction.DEPOSIT:
+                shares = amount
+        elif action == LedgerAction.DEPOSIT:
+            if vault.slug == constants.GOLD_LINK_SLUG:
+                amount = to_tx_aumount_goldlink(tx.input)
+                token = f"0x{tx.input[10:74][24:]}".lower()
+            elif vault.slug == constants.ETH_WITH_LENDING_BOOST_YIELD:
+                if tx.method_id == constants.MethodID.DEPOSIT_RETHINK1.value:
+                    amount = float(tx.value)
+                else:
+                    amount = to_tx_aumount_rethink(tx.input)
+            elif vault.slug == constants.SOLV_VAULT_SLUG:
+                amount = parse_hex_to_int(tx.input[10:74]) / 1e8
+            else:
+                amount = to_tx_aumount(tx.input)
+                token = f"0x{tx.input[74:138][24:]}".lower()
+            try:
+                pps = self.get_pps(vault, tx.to_address, tx.block_number)
+            except Exception as e:
+                logger.warning(f"Cannot read pps of {tx.to_address}: {e}")
+            if pps:
+                shares = amount / pps
+            usd_value = amount * self.get_usd_price(vault, tx.timestamp)
+        else:
+            shares = parse_hex_to_int(tx.input[10:74]) / self._share_decimals(vault)
+            pps = self.get_pps(vault, tx.to_address, tx.block_number)
+            amount = shares * pps
+            usd_value = amount * self.get_usd_price(vault, tx.timestamp)
+
+        return TransactionLedger(
+            tx_hash=tx.tx_hash,
+            vault_id=vault.id,
+            user_address=tx.from_address.lower(),
+            action=action,
+            method_id=tx.method_id,
+            token=token,
+            amount=amount,
+            shares=shares,
+            pps_at_block=pps,
+            usd_value=usd_value,
+            block_number=tx.block_number,
+            timestamp=tx.timestamp,
+            chain=tx.chain,
+        )
+
+    def enrich(self, transactions: Iterable[OnchainTransactionHistory]) -> int:
+        """Decode vault transactions into the ledger, skipping the ones already in it.
+
+        A transaction that cannot be decoded is logged and left out, the backfill
+        picks it up again on its next run.
+        """
+        rows = []
+        for tx in transactions:
+            action = LEDGER_ACTIONS.get(tx.method_id)
+            if action is None or tx.timestamp is None:
+                continue
+            vault = vault_registry.get_by_address(tx.to_address)
+            if vault is None:
+                continue
+            try:
+                rows.append(self.decode(tx, vault, action).model_dump())
+            except Exception as e:
+                logger.error(f"Cannot decode transaction {tx.tx_hash}: {e}")
+
+        if not rows:
+            return 0
+        self.session.execute(
+            insert(TransactionLedger)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["tx_hash"])
+        )
+        self.session.commit()
+        return len(rows)
+
+    def backfill(self, batch_size: int = 500) -> int:
+        """Enrich every indexed vault transaction missing from the ledger."""
+        enriched = 0
+        last_key = None
+        while True:
+            query = (
+                select(OnchainTransactionHistory)
+                .outerjoin(
+                    TransactionLedger,
+                    TransactionLedger.tx_hash == OnchainTransactionHistory.tx_hash,
+                )
+                .where(TransactionLedger.id.is_(None))
+                .where(OnchainTransactionHistory.method_id.in_(list(LEDGER_ACTIONS)))
+                .order_by(
+                    OnchainTransactionHistory.block_number, OnchainTransactionHistory.id
+                )
+                .limit(batch_size)
+            )
+            # Keyset pagination so transactions that cannot be decoded are not retried
+            if last_key is not None:
+                query = query.where(
+                    tuple_(
+                        OnchainTransactionHistory.block_number,
+                        OnchainTransactionHistory.id,
+                    )
+                    > tuple_(*last_key)
+                )
+            transactions: List[OnchainTransactionHistory] = self.session.exec(
+                query
+            ).all()
+            if not transactions:
+                break
+            last_key = (transactions[-1].block_number, transactions[-1].id)
+            enriched += self.enrich(transactions)
+            logger.info(f"Ledger backfill: {enriched} transactions enriched")
+        return enriched
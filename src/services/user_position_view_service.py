@@ -0,0 +1,420 @@
+import logging
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, col, select
+from web3 import Web3
+
+from core import constants
+from core.abi_reader import read_abi
+from models.pps_history import PricePerShareHistory
+from models.reward_distribution_config import RewardDistributionConfig
+from models.user_points import UserPoints
+from models.user_portfolio import PositionStatus, UserPortfolio
+from models.user_position_view import UserPositionView
+from models.user_rewards import UserRewards
+from models.vaults import Vault, VaultCategory
+from services.vault_registry import vault_registry
+from services.vault_state_snapshot_service import VaultStateSnapshotService
+from utils.web3_utils import multicall
+
+logger = logging.getLogger(__name__)
+
+# update_tvl_for_vaults snapshots every active vault each hour and refreshes
+# the view; older snapshots belong to vaults it doesn't read anymore
+SNAPSHOT_MAX_AGE = timedelta(days=7)
+# Rows per INSERT, under the bind parameter limit of Postgres
+UPSERT_BATCH_SIZE = 1000
+# Vaults priced with getUserWithdrawal by the portfolio API, and their ABI.
+# It returns (shares, pps, profit, performanceFee, withdrawAmount)
+WITHDRAWAL_BALANCE_ABIS = {
+    constants.KELPDAO_VAULT_ARBITRUM_SLUG: "kelpdao",
+    constants.HYPE_DELTA_NEUTRAL_SLUG: "hype",
+}
+WITHDRAWAL_DECIMALS = 1e6
+
+Key = Tuple[str, uuid.UUID]
+# Withdraw amount and performance fee of getUserWithdrawal
+Withdrawal = Tuple[float, float]
+
+
+def position_balance(
+    vault: Vault,
+    position: UserPortfolio,
+    price_per_share: float,
+    withdrawal: Optional[Withdrawal] = None,
+) -> Tuple[float, float, float]:
+    """Shares, balance and initial deposit of a position, as the portfolio API shows them.
+
+    `total_shares` excludes the shares of a pending withdrawal, like the
+    vault `balanceOf`, so these are priced separately. The vaults of
+    `WITHDRAWAL_BALANCE_ABIS` add the `withdrawal` amount net of its
+    performance fee instead.
+    """
+    pending_withdrawal = position.pending_withdrawal or 0
+    if position.total_shares is None:
+        # Positions opened before the listener tracked the shares
+        shares = None
+        total_balance = position.total_balance
+    elif withdrawal is not None:
+        shares = position.total_shares
+        withdraw_amount, performance_fee = withdrawal
+        total_balance = shares * price_per_share + withdraw_amount - performance_fee
+    else:
+        shares = position.total_shares
+        total_balance = (shares + pending_withdrawal) * price_per_share
+        if vault.category == VaultCategory.real_yield_v2:
+            total_balance += position.pending_deposit or 0
+
+    init_deposit = position.init_deposit
+    if pending_withdrawal:
+        init_deposit += pending_withdrawal * (position.entry_price or 0)
+    return shares, total_balance, init_deposit
+
+
+class UserPositionViewService:
+    """Keeps `user_position_view` up to date for a set of wallets and vaults.
+
+    `refresh` recomputes the rows from user_portfolio, user_points,
+    user_rewards and the latest vault snapshots in a handful of queries and
+    upserts them, so the listener and the jobs call it after they write.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def _scoped(self, statement, wallet_column, vault_column, wallets, vault_ids):
+        if wallets is not None:
+            statement = statement.where(col(wallet_column).in_(wallets))
+        if vault_ids is not None:
+            statement = statement.where(col(vault_column).in_(vault_ids))
+        return statement
+
+    def _positions(self, wallets, vault_ids) -> Dict[Key, UserPortfolio]:
+        positions = self.session.exec(
+            self._scoped(
+                select(UserPortfolio),
+                UserPortfolio.user_address,
+                UserPortfolio.vault_id,
+                wallets,
+                vault_ids,
+            ).order_by(UserPortfolio.id)
+        ).all()
+        # The active position of each vault, else the latest closed one
+        latest: Dict[Key, UserPortfolio] = {}
+        for position in positions:
+            key = (position.user_address.lower(), position.vault_id)
+            current = latest.get(key)
+            if current is None or current.status != PositionStatus.ACTIVE:
+                latest[key] = position
+        return latest
+
+    def _points(self, wallets, vault_ids) -> Dict[Key, Dict[str, float]]:
+        rows = self.session.execute(
+            self._scoped(
+                select(
+                    UserPoints.wallet_address,
+                    UserPoints.vault_id,
+                    UserPoints.partner_name,
+                    func.sum(UserPoints.points),
+                ),
+                UserPoints.wallet_address,
+                UserPoints.vault_id,
+                wallets,
+                vault_ids,
+            ).group_by(
+                UserPoints.wallet_address, UserPoints.vault_id, UserPoints.partner_name
+            )
+        ).all()
+        points: Dict[Key, Dict[str, float]] = {}
+        for wallet_address, vault_id, partner_name, total in rows:
+            partners = points.setdefault((wallet_address.lower(), vault_id), {})
+            partners[partner_name] = partners.get(partner_name, 0) + (total or 0)
+        return points
+
+    def _rewards(self, wallets, vault_ids) -> Dict[Key, Tuple[float, datetime]]:
+        rows = self.session.execute(
+            self._scoped(
+                select(
+                    UserRewards.wallet_address,
+                    UserRewards.vault_id,
+                    func.sum(UserRewards.total_reward),
+                    func.min(UserRewards.created_at),
+                ),
+                UserRewards.wallet_address,
+                UserRewards.vault_id,
+                wallets,
+                vault_ids,
+            ).group_by(UserRewards.wallet_address, UserRewards.vault_id)
+        ).all()
+        rewards: Dict[Key, Tuple[float, datetime]] = {}
+        for wallet_address, vault_id, total, created_at in rows:
+            key = (wallet_address.lower(), vault_id)
+            previous, first_at = rewards.get(key, (0, created_at))
+            rewards[key] = (previous + (total or 0), min(first_at, created_at))
+        return rewards
+
+    def _reward_tokens(self, vault_ids: Set[uuid.UUID]) -> Dict[uuid.UUID, str]:
+        rows = self.session.execute(
+            select(RewardDistributionConfig.vault_id, RewardDistributionConfig.reward_token)
+            .where(col(RewardDistributionConfig.vault_id).in_(vault_ids))
+            .where(RewardDistributionConfig.reward_token != None)
+            .distinct(RewardDistributionConfig.vault_id)
+            .order_by(RewardDistributionConfig.vault_id)
+        ).all()
+        return {vault_id: reward_token for vault_id, reward_token in rows}
+
+    def _prices_per_share(self, vault_ids: Set[uuid.UUID]) -> Dict[uuid.UUID, float]:
+        snapshots = VaultStateSnapshotService(self.session).latest(
+            vault_ids, max_age=SNAPSHOT_MAX_AGE
+        )
+        prices = {
+            vault_id: snapshot.price_per_share for vault_id, snapshot in snapshots.items()
+        }
+        missing = vault_ids - prices.keys()
+        if missing:
+            # Vaults the TVL job doesn't snapshot, priced as the listener does
+            rows = self.session.execute(
+                select(PricePerShareHistory.vault_id, PricePerShareHistory.price_per_share)
+                .where(col(PricePerShareHistory.vault_id).in_(missing))
+                .distinct(PricePerShareHistory.vault_id)
+                .order_by(
+                    PricePerShareHistory.vault_id, PricePerShareHistory.datetime.desc()
+                )
+            ).all()
+            prices.update({vault_id: pps for vault_id, pps in rows})
+        return prices
+
+    def _stored_withdrawals(self, keys: List[Key]) -> Dict[Key, Withdrawal]:
+        rows = self.session.execute(
+            select(
+                UserPositionView.wallet_address,
+                UserPositionView.vault_id,
+                UserPositionView.withdrawal_amount,
+                UserPositionView.withdrawal_performance_fee,
+            )
+            .where(
+                tuple_(UserPositionView.wallet_address, UserPositionView.vault_id).in_(
+                    keys
+                )
+            )
+            .where(UserPositionView.withdrawal_amount != None)
+        ).all()
+        return {
+            (wallet_address, vault_id): (amount, performance_fee or 0)
+            for wallet_address, vault_id, amount, performance_fee in rows
+        }
+
+    def _user_withdrawals(
+        self, positions: Dict[Key, UserPortfolio]
+    ) -> Dict[Key, Withdrawal]:
+        """Read getUserWithdrawal of the active positions in `WITHDRAWAL_BALANCE_ABIS`.
+
+        One multicall per vault; the positions that can't be read keep the
+        amounts stored by the previous refresh.
+        """
+        vaults: Dict[uuid.UUID, Vault] = {}
+        keys_by_vault: Dict[uuid.UUID, List[Key]] = defaultdict(list)
+        for key, position in positions.items():
+            vault = vault_registry.get_by_id(key[1])
+            if (
+                vault is not None
+                and vault.slug in WITHDRAWAL_BALANCE_ABIS
+                and position.status == PositionStatus.ACTIVE
+            ):
+                vaults[vault.id] = vault
+                keys_by_vault[vault.id].append(key)
+
+        withdrawals: Dict[Key, Withdrawal] = {}
+        for vault_id, keys in keys_by_vault.items():
+            vault = vaults[vault_id]
+            w3 = Web3(
+                Web3.HTTPProvider(constants.NETWORK_RPC_URLS[vault.network_chain])
+            )
+            contract = w3.eth.contract(
+                address=Web3.to_checksum_address(vault.contract_address),
+                abi=read_abi(WITHDRAWAL_BALANCE_ABIS[vault.slug]),
+            )
+            try:
+                results = multicall(
+                    w3,
+                    [
+                        contract.functions.getUserWithdrawal(
+                            Web3.to_checksum_address(wallet_address)
+                        )
+                        for wallet_address, _ in keys
+                    ],
+                )
+            except Exception as e:
+                logger.error(f"Cannot read the withdrawals of {vault.name}: {e}")
+                continue
+            for key, withdrawal in zip(keys, results):
+                if withdrawal is not None:
+                    withdrawals[key] = (
+                        withdrawal[4] / WITHDRAWAL_DECIMALS,
+                        withdrawal[3] / WITHDRAWAL_DECIMALS,
+                    )
+
+        missing = [
+            key
+            for keys in keys_by_vault.values()
+            for key in keys
+            if key not in withdrawals
+        ]
+        if missing:
+            withdrawals.update(self._stored_withdrawals(missing))
+        return withdrawals
+
+    def build_row(
+        self,
+        key: Key,
+        vault: Vault,
+        position: Optional[UserPortfolio],
+        price_per_share: Optional[float],
+        points: Dict[str, float],
+        rewards: Optional[Tuple[float, datetime]],
+        reward_token: Optional[str],
+        now: datetime,
+        withdrawal: Optional[Withdrawal] = None,
+    ) -> dict:
+        wallet_address, vault_id = key
+        row = {
+            "wallet_address": wallet_address,
+            "vault_id": vault_id,
+            "points": points,
+            "reward_token": reward_token,
+            "unclaimed_rewards": rewards[0] if rewards else 0,
+            "rewards_created_at": rewards[1] if rewards else None,
+            "vault_name": vault.name,
+            "vault_address": vault.contract_address,
+            "vault_currency": vault.vault_currency,
+            "vault_network": vault.network_chain,
+            "vault_category": vault.category,
+            "slug": vault.slug,
+            "current_round": vault.current_round,
+            "monthly_apy": vault.monthly_apy,
+            "weekly_apy": vault.weekly_apy,
+            "next_close_round_date": vault.next_close_round_date,
+            "updated_at": now,
+        }
+        if position is None:
+            row.update(
+                {
+                    "position_id": None,
+                    "user_address": None,
+                    "status": None,
+                    "shares": None,
+                    "price_per_share": None,
+                    "total_balance": None,
+                    "init_deposit": None,
+                    "entry_price": None,
+                    "pnl": None,
+                    "pending_deposit": None,
+                    "pending_withdrawal": None,
+                    "trade_start_date": None,
+                    "initiated_withdrawal_at": None,
+                    "withdrawal_amount": None,
+                    "withdrawal_performance_fee": None,
+                }
+            )
+            return row
+
+        if price_per_share is None:
+            price_per_share = position.entry_price or 1
+        shares, total_balance, init_deposit = position_balance(
+            vault, position, price_per_share, withdrawal
+        )
+        row.update(
+            {
+                "position_id": position.id,
+                "user_address": position.user_address,
+                "status": position.status,
+                "shares": shares,
+                "price_per_share": price_per_share,
+                "total_balance": total_balance,
+                "init_deposit": init_deposit,
+                "entry_price": position.entry_price,
+                "pnl": total_balance - init_deposit,
+                "pending_deposit": position.pending_deposit,
+                "pending_withdrawal": position.pending_withdrawal,
+                "trade_start_date": position.trade_start_date,
+                "initiated_withdrawal_at": position.initiated_withdrawal_at,
+                "withdrawal_amount": withdrawal[0] if withdrawal else None,
+                "withdrawal_performance_fee": withdrawal[1] if withdrawal else None,
+            }
+        )
+        return row
+
+    def _upsert(self, rows: List[dict]):
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            statement = insert(UserPositionView).values(
+                rows[start : start + UPSERT_BATCH_SIZE]
+            )
+            self.session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=["wallet_address", "vault_id"],
+                    set_={
+                        name: statement.excluded[name]
+                        for name in rows[0]
+                        if name not in ("wallet_address", "vault_id")
+                    },
+                )
+            )
+
+    def refresh(
+        self,
+        wallet_addresses: Optional[Iterable[str]] = None,
+        vault_ids: Optional[Iterable[uuid.UUID]] = None,
+    ) -> int:
+        """Recompute the rows of `wallet_addresses` in `vault_ids`, None meaning all.
+
+        Commits the session and returns the number of rows written.
+        """
+        wallets = None
+        if wallet_addresses is not None:
+            wallets = sorted({address.lower() for address in wallet_addresses})
+        if vault_ids is not None:
+            vault_ids = sorted(set(vault_ids))
+
+        positions = self._positions(wallets, vault_ids)
+        points = self._points(wallets, vault_ids)
+        rewards = self._rewards(wallets, vault_ids)
+        keys = positions.keys() | points.keys() | rewards.keys()
+        if not keys:
+            return 0
+
+        scoped_vault_ids = {vault_id for _, vault_id in keys}
+        reward_tokens = self._reward_tokens(scoped_vault_ids)
+        prices = self._prices_per_share(
+            {vault_id for _, vault_id in positions.keys()}
+        )
+        withdrawals = self._user_withdrawals(positions)
+
+        now = datetime.now(timezone.utc)
+        rows = []
+        for key in sorted(keys):
+            vault = vault_registry.get_by_id(key[1])
+            if vault is None:
+                logger.warning(f"Vault {key[1]} of wallet {key[0]} not found")
+                continue
+            rows.append(
+                self.build_row(
+                    key,
+                    vault,
+                    positions.get(key),
+                    prices.get(key[1]),
+                    points.get(key, {}),
+                    rewards.get(key),
+                    reward_tokens.get(key[1]),
+                    now,
+                    withdrawals.get(key),
+                )
+            )
+        if rows:
+            self._upsert(rows)
+        self.session.commit()
+        return len(rows)
@@ -20,6 +20,29 @@ from core.abi_reader import read_abi
 from hexbytes import HexBytes
 
 
+# Every deployment of a migrated vault, keyed by the current (lower cased) address
+VAULT_ADDRESS_ALIASES = {
+    "0x4a10c31b642866d3a3df2268cecd2c5b14600523": [
+        "0x4a10c31b642866d3a3df2268cecd2c5b14600523",
+        "0xF30353335003E71b42a89314AAaeC437E7Bc8F0B",
+        "0x2b7cdad36a86fd05ac1680cdc42a0ea16804d80c",
+    ],
+    "0xd531d9212cb1f9d27f9239345186a6e9712d8876": [
+        "0x50CDDCBa6289d3334f7D40cF5d312E544576F0f9",
+        "0x607b19a600F2928FB4049d2c593794fB70aaf9aa",
+        "0xC9A079d7d1CF510a6dBa8dA8494745beaE7736E2",
+        "0x389b5702FA8bF92759d676036d1a90516C1ce0C4",
+        "0xd531d9212cB1f9d27F9239345186A6e9712D8876",
+    ],
+    "0x316cdbbed9342a1109d967543f81fa6288ebc47d": [
+        "0x316CDbBEd9342A1109D967543F81FA6288eBC47D",
+        "0x0bD37D11e3A25B5BB0df366878b5D3f018c1B24c",
+        "0x18994527E6FfE7e91F1873eCA53e900CE0D0f276",
+        "0x55c4c840F9Ac2e62eFa3f12BaBa1B57A1208B6F5",
+    ],
+}
+
+
 class VaultContractService:
     def __init__(self):
         pass
@@ -88,65 +111,14 @@ class VaultContractService:
         return shares * pps
 
     def get_vault_address_historical(self, vault: Vault) -> List[str]:
-        if (
-            vault.contract_address.lower()
-            == "0x4a10c31b642866d3a3df2268cecd2c5b14600523".lower()
-        ):
-            return [
-                "0x4a10c31b642866d3a3df2268cecd2c5b14600523",
-                "0xF30353335003E71b42a89314AAaeC437E7Bc8F0B",
-                "0x2b7cdad36a86fd05ac1680cdc42a0ea16804d80c",
-            ]
-
-        if (
-            vault.contract_address.lower()
-            == "0xd531d9212cB1f9d27F9239345186A6e9712D8876".lower()
-        ):
-            return [
-                "0x50CDDCBa6289d3334f7D40cF5d312E544576F0f9",
-                "0x607b19a600F2928FB4049d2c593794fB70aaf9aa",
-                "0xC9A079d7d1CF510a6dBa8dA8494745beaE7736E2",
-                "0x389b5702FA8bF92759d676036d1a90516C1ce0C4",
-                "0xd531d9212cB1f9d27F9239345186A6e9712D8876",
-            ]
-        if (
-            vault.contract_address.lower()
-            == "0x316CDbBEd9342A1109D967543F81FA6288eBC47D".lower()
-        ):
-            return [
-                vault.contract_address,
-                "0x0bD37D11e3A25B5BB0df366878b5D3f018c1B24c",
-                "0x18994527E6FfE7e91F1873eCA53e900CE0D0f276",
-                "0x55c4c840F9Ac2e62eFa3f12BaBa1B57A1208B6F5",
-            ]
-
-        return [vault.contract_address.lower()]
+        return VAULT_ADDRESS_ALIASES.get(
+            vault.contract_address.lower(), [vault.contract_address.lower()]
+        )
 
     def get_vault_address_by_contract(self, contract_address: str) -> List[str]:
         contract_address = contract_address.lower()
-        vault_addresses = {
-            "0x4a10c31b642866d3a3df2268cecd2c5b14600523": [
-                "0x4a10c31b642866d3a3df2268cecd2c5b14600523",
-                "0xF30353335003E71b42a89314AAaeC437E7Bc8F0B",
-                "0x2b7cdad36a86fd05ac1680cdc42a0ea16804d80c",
-            ],
-            "0xd531d9212cb1f9d27f9239345186a6e9712d8876": [
-                "0x50CDDCBa6289d3334f7D40cF5d312E544576F0f9",
-                "0x607b19a600F2928FB4049d2c593794fB70aaf9aa",
-                "0xC9A079d7d1CF510a6dBa8dA8494745beaE7736E2",
-                "0x389b5702FA8bF92759d676036d1a90516C1ce0C4",
-                "0xd531d9212cb1f9d27f9239345186a6e9712d8876",
-            ],
-            "0x316cdbbed9342a1109d967543f81fa6288ebc47d": [
-                "0x316cdbbed9342a1109d967543f81fa6288ebc47d",
-                "0x0bD37D11e3A25B5BB0df366878b5D3f018c1B24c",
-                "0x18994527E6FfE7e91F1873eCA53e900CE0D0f276",
-                "0x55c4c840F9Ac2e62eFa3f12BaBa1B57A1208B6F5",
-            ],
-        }
-
-        for addresses in vault_addresses.values():
-            if contract_address in addresses:
+        for addresses in VAULT_ADDRESS_ALIASES.values():
+            if contract_address in [address.lower() for address in addresses]:
                 return addresses
 
         return [contract_address]
@@ -13,6 +13,7 @@ from models.vault_performance import VaultPerformance
 from models.vault_performance_history import VaultPerformanceHistory
 from models.vaults import Vault
 from services.vault_contract_service import VaultContractService
+from services.vault_registry import vault_registry
 from utils.extension_utils import (
     to_amount_pendle,
     to_tx_aumount,
@@ -102,10 +103,7 @@ class VaultPerformanceHistoryService:
         end_date = int(vault_performance_end_date.timestamp())
         start_date = int(vault_performance_start_date.timestamp())
 
-        service = VaultContractService()
-        contract_address = [
-            address.lower() for address in service.get_vault_address_historical(vault)
-        ]
+        contract_address = vault_registry.get_addresses(vault)
         deposits_query = (
             select(OnchainTransactionHistory)
             .where(
@@ -154,6 +152,7 @@ class VaultPerformanceHistoryService:
         else:
             total_deposit = sum(to_tx_aumount(tx.input) for tx in deposits)
 
+            service = VaultContractService()
             abi, _ = service.get_vault_abi(vault=vault)
 
             for tx in withdraw:
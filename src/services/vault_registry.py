@@ -0,0 +1,120 @@
+import logging
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from itertools import chain
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, select
+
+from core.config import settings
+from core.db import engine
+from models.vaults import Vault
+from services.vault_contract_service import VAULT_ADDRESS_ALIASES
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class VaultSnapshot:
+    by_address: Dict[str, Vault] = field(default_factory=dict)
+    by_slug: Dict[str, Vault] = field(default_factory=dict)
+    by_id: Dict[uuid.UUID, Vault] = field(default_factory=dict)
+    # Lower cased current and historical addresses of every vault
+    addresses: Dict[uuid.UUID, List[str]] = field(default_factory=dict)
+
+
+class VaultRegistry:
+    """Process wide read only index of the vaults table.
+
+    Vaults are loaded once into detached objects and looked up by any of their
+    (historical) contract addresses, slug or id. The index is rebuilt after a
+    commit that touched a vault in this process and, for changes made by other
+    processes, once it is older than `ttl_seconds`.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._snapshot: Optional[VaultSnapshot] = None
+        self._loaded_at = 0.0
+
+    def invalidate(self):
+        self._snapshot = None
+
+    def _load(self) -> VaultSnapshot:
+        snapshot = VaultSnapshot()
+        with Session(engine) as session:
+            vaults = session.exec(select(Vault)).all()
+
+        for vault in vaults:
+            snapshot.by_id[vault.id] = vault
+            if vault.slug:
+                snapshot.by_slug[vault.slug] = vault
+            if not vault.contract_address:
+                continue
+            current = vault.contract_address.lower()
+            addresses = [a.lower() for a in VAULT_ADDRESS_ALIASES.get(current, [])]
+            snapshot.addresses[vault.id] = [current] + [
+                a for a in addresses if a != current
+            ]
+            for address in addresses:
+                snapshot.by_address.setdefault(address, vault)
+        # A row of an older deployment still resolves to itself
+        for vault in vaults:
+            if vault.contract_address:
+                snapshot.by_address[vault.contract_address.lower()] = vault
+        return snapshot
+
+    def snapshot(self) -> VaultSnapshot:
+        snapshot = self._snapshot
+        age = time.monotonic() - self._loaded_at
+        if snapshot is not None and age < self.ttl_seconds:
+            return snapshot
+        with self._lock:
+            if self._snapshot is None or self._snapshot is snapshot:
+                self._snapshot = self._load()
+                self._loaded_at = time.monotonic()
+                logger.debug(f"Loaded {len(self._snapshot.by_id)} vaults")
+            return self._snapshot
+
+    def get_by_address(self, address: str) -> Optional[Vault]:
+        return self.snapshot().by_address.get(address.lower())
+
+    def get_by_slug(self, slug: str) -> Optional[Vault]:
+        return self.snapshot().by_slug.get(slug)
+
+    def get_by_id(self, vault_id: uuid.UUID) -> Optional[Vault]:
+        return self.snapshot().by_id.get(vault_id)
+
+    def get_addresses(self, vault: Vault) -> List[str]:
+        addresses = self.snapshot().addresses.get(vault.id)
+        if addresses is None:
+            return [vault.contract_address.lower()]
+        return addresses
+
+
+vault_registry = VaultRegistry(settings.VAULT_REGISTRY_TTL_SECONDS)
+
+
+@event.listens_for(OrmSession, "before_flush")
+def _track_vault_changes(session, flush_context, instances):
+    if any(
+        isinstance(obj, Vault)
+        for obj in chain(session.new, session.dirty, session.deleted)
+    ):
+        session.info["vaults_changed"] = True
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _invalidate_vault_registry(session):
+    if session.info.pop("vaults_changed", False):
+        vault_registry.invalidate()
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _discard_vault_changes(session):
+    session.info.pop("vaults_changed", None)
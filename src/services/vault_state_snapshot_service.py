@@ -0,0 +1,245 @@
+import logging
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, col, select
+from web3 import Web3
+from web3.contract import Contract
+
+from core import constants
+from core.abi_reader import read_abi
+from models.vault_state_snapshot import VaultStateSnapshot
+from models.vaults import NetworkChain, Vault, VaultCategory
+from utils.web3_utils import batch_eth_call, multicall
+
+logger = logging.getLogger(__name__)
+
+# The TVL job snapshots every chain each hour, the jobs running a few minutes
+# later read that snapshot instead of the chain
+DEFAULT_MAX_AGE = timedelta(minutes=30)
+
+
+@dataclass(frozen=True)
+class SnapshotLayout:
+    abi_name: str
+    decimals: float
+    # Words of getVaultState, which only answers to the vault owner
+    total_shares_index: Optional[int] = None
+    fee_pool_indexes: Tuple[int, ...] = ()
+    state_decimals: float = 1e6
+    # Vaults without getVaultState expose totalShares()
+    total_shares_decimals: Optional[float] = None
+
+    @property
+    def has_state(self) -> bool:
+        return self.total_shares_index is not None
+
+
+def snapshot_layout(vault: Vault) -> SnapshotLayout:
+    """Same ABIs, decimals and state words as the performance jobs."""
+    if vault.category == VaultCategory.real_yield_v2:
+        return SnapshotLayout("rethink_yield_v2", 1e18)
+    if vault.slug == constants.SOLV_VAULT_SLUG:
+        return SnapshotLayout("solv", 1e8, total_shares_decimals=1e18)
+    if vault.slug == constants.GOLD_LINK_SLUG:
+        return SnapshotLayout("goldlink", 1e6, 4, (5,))
+    if vault.strategy_name == constants.PENDLE_HEDGING_STRATEGY:
+        return SnapshotLayout("pendlehedging", 1e6, 5, (6,))
+    if vault.strategy_name == constants.OPTIONS_WHEEL_STRATEGY:
+        # Performance and management fees
+        return SnapshotLayout("rockonyxstablecoin", 1e6, 5, (0, 1))
+    return SnapshotLayout("RockOnyxDeltaNeutralVault", 1e6, 2, (3,))
+
+
+class VaultStateSnapshotService:
+    """Reads the PPS, TVL, total shares and fee pool of many vaults at once.
+
+    The vaults of a chain are read at a single block: the view calls in one
+    Multicall3 batch and getVaultState, which checks `msg.sender`, in one
+    JSON-RPC batch sent from each vault owner. Every read is persisted as a
+    `vault_state_snapshot` row so the jobs and the API share it.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+        self._web3: Dict[str, Web3] = {}
+
+    def get_web3(self, network_chain: str) -> Web3:
+        if network_chain not in self._web3:
+            self._web3[network_chain] = Web3(
+                Web3.HTTPProvider(constants.NETWORK_RPC_URLS[network_chain])
+            )
+        return self._web3[network_chain]
+
+    def _view_calls(self, contract: Contract, layout: SnapshotLayout) -> List:
+        calls = [
+            contract.functions.pricePerShare(),
+            contract.functions.totalValueLocked(),
+        ]
+        if layout.total_shares_decimals:
+            calls.append(contract.functions.totalShares())
+        return calls
+
+    def _read_views(self, w3: Web3, calls: List, block_number: int) -> List:
+        try:
+            return multicall(w3, calls, block_identifier=block_number)
+        except Exception as e:
+            logger.warning(
+                f"Multicall failed at block {block_number}, falling back to single calls: {e}"
+            )
+        results = []
+        for call in calls:
+            try:
+                results.append(call.call(block_identifier=block_number))
+            except Exception as inner_e:
+                logger.error(f"Error reading {call.fn_name} of {call.address}: {inner_e}")
+                results.append(None)
+        return results
+
+    def _read_states(
+        self, w3: Web3, calls: List[Tuple], block_number: int
+    ) -> List[Optional[tuple]]:
+        if not calls:
+            return []
+        try:
+            return batch_eth_call(w3, calls, block_identifier=block_number)
+        except Exception as e:
+            logger.error(f"Cannot read the vault states at block {block_number}: {e}")
+            return [None] * len(calls)
+
+    def read_chain(
+        self, network_chain: str, vaults: List[Vault]
+    ) -> List[VaultStateSnapshot]:
+        """Read the state of `vaults`, all on `network_chain`, at its head."""
+        w3 = self.get_web3(network_chain)
+        block_number = w3.eth.block_number
+        now = datetime.now(timezone.utc)
+
+        layouts = []
+        view_calls = []
+        view_offsets = []
+        state_calls = []
+        state_offsets = []
+        for vault in vaults:
+            layout = snapshot_layout(vault)
+            contract = w3.eth.contract(
+                address=Web3.to_checksum_address(vault.contract_address),
+                abi=read_abi(layout.abi_name),
+            )
+            layouts.append(layout)
+            view_offsets.append(len(view_calls))
+            view_calls.extend(self._view_calls(contract, layout))
+            if layout.has_state:
+                state_offsets.append(len(state_calls))
+                state_calls.append(
+                    (contract.functions.getVaultState(), vault.owner_wallet_address)
+                )
+            else:
+                state_offsets.append(None)
+
+        views = self._read_views(w3, view_calls, block_number)
+        states = self._read_states(w3, state_calls, block_number)
+
+        snapshots = []
+        for vault, layout, view_offset, state_offset in zip(
+            vaults, layouts, view_offsets, state_offsets
+        ):
+            pps, tvl = views[view_offset], views[view_offset + 1]
+            if pps is None or tvl is None:
+                logger.error(f"Cannot read the state of vault {vault.name}")
+                continue
+
+            total_shares = fee_pool_amount = None
+            if layout.total_shares_decimals:
+                shares = views[view_offset + 2]
+                if shares is not None:
+                    total_shares = shares / layout.total_shares_decimals
+            elif state_offset is not None and states[state_offset] is not None:
+                state = states[state_offset]
+                total_shares = state[layout.total_shares_index] / layout.state_decimals
+                fee_pool_amount = (
+                    sum(state[i] for i in layout.fee_pool_indexes) / layout.state_decimals
+                )
+
+            snapshots.append(
+                VaultStateSnapshot(
+                    vault_id=vault.id,
+                    network_chain=NetworkChain(vault.network_chain).value,
+                    block_number=block_number,
+                    datetime=now,
+                    price_per_share=pps / layout.decimals,
+                    tvl=tvl / layout.decimals,
+                    total_shares=total_shares,
+                    fee_pool_amount=fee_pool_amount,
+                )
+            )
+        return snapshots
+
+    def take(self, vaults: Iterable[Vault]) -> Dict[uuid.UUID, VaultStateSnapshot]:
+        """Snapshot `vaults`, one block per chain, and persist the rows."""
+        vaults_by_chain = defaultdict(list)
+        for vault in vaults:
+            if vault.contract_address:
+                vaults_by_chain[vault.network_chain].append(vault)
+
+        snapshots: Dict[uuid.UUID, VaultStateSnapshot] = {}
+        for network_chain, chain_vaults in vaults_by_chain.items():
+            try:
+                rows = self.read_chain(network_chain, chain_vaults)
+            except Exception as e:
+                logger.error(f"Cannot snapshot the {network_chain} vaults: {e}")
+                continue
+            if rows:
+                logger.info(
+                    f"Snapshot {len(rows)}/{len(chain_vaults)} {network_chain} vaults at block {rows[0].block_number}"
+                )
+            snapshots.update({row.vault_id: row for row in rows})
+
+        if snapshots:
+            # Another job may have read the same block already
+            self.session.execute(
+                insert(VaultStateSnapshot)
+                .values([row.model_dump() for row in snapshots.values()])
+                .on_conflict_do_nothing(index_elements=["vault_id", "block_number"])
+            )
+            self.session.commit()
+        return snapshots
+
+    def take_active(self) -> Dict[uuid.UUID, VaultStateSnapshot]:
+        vaults = self.session.exec(select(Vault).where(Vault.is_active == True)).all()
+        return self.take(vaults)
+
+    def latest(
+        self, vault_ids: Iterable[uuid.UUID], max_age: timedelta = DEFAULT_MAX_AGE
+    ) -> Dict[uuid.UUID, VaultStateSnapshot]:
+        """Latest snapshot of each vault, when younger than `max_age`."""
+        vault_ids = list(vault_ids)
+        if not vault_ids:
+            return {}
+        rows = self.session.exec(
+            select(VaultStateSnapshot)
+            .where(col(VaultStateSnapshot.vault_id).in_(vault_ids))
+            .where(VaultStateSnapshot.datetime >= datetime.now(timezone.utc) - max_age)
+            .distinct(VaultStateSnapshot.vault_id)
+            .order_by(
+                VaultStateSnapshot.vault_id,
+                VaultStateSnapshot.datetime.desc(),
+                VaultStateSnapshot.block_number.desc(),
+            )
+        ).all()
+        return {row.vault_id: row for row in rows}
+
+    def get_or_take(
+        self, vaults: Iterable[Vault], max_age: timedelta = DEFAULT_MAX_AGE
+    ) -> Dict[uuid.UUID, VaultStateSnapshot]:
+        """Latest fresh snapshot of each vault, reading the chain for the others."""
+        vaults = list(vaults)
+        snapshots = self.latest([vault.id for vault in vaults], max_age)
+        missing = [vault for vault in vaults if vault.id not in snapshots]
+        if missing:
+            snapshots.update(self.take(missing))
+        return snapshots
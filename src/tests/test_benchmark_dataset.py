@@ -0,0 +1,47 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from benchmarks import dataset
+from core.db import engine
+
+NOW = datetime(2024, 12, 1, 12, tzinfo=timezone.utc)
+SPEC = dataset.DatasetSpec(users=40, vaults=3, days=10, points_history_hours=2)
+
+
+def test_same_spec_builds_the_same_rows():
+    rows = dataset.build(SPEC, NOW)
+
+    assert rows == dataset.build(SPEC, NOW)
+    other_seed = dataset.DatasetSpec(**{**vars(SPEC), "seed": 1})
+    assert rows != dataset.build(other_seed, NOW)
+    assert len(rows[dataset.User]) == 40
+
+
+def test_reset_deletes_the_seeded_rows_and_the_job_rows():
+    session = Session(engine)
+    dataset.reset(session)
+    counts = dataset.generate(session, SPEC, NOW)
+    assert counts["users"] == 40
+    # Written by the points job for a seeded wallet
+    session.execute(
+        text(
+            "INSERT INTO point_distribution_history"
+            " (id, vault_id, partner_name, point, created_at)"
+            " SELECT gen_random_uuid(), id, 'Harmonix', 1, now()"
+            " FROM vaults WHERE name LIKE 'bench %'"
+        )
+    )
+    session.commit()
+
+    dataset.reset(session)
+    remaining = session.execute(
+        text(
+            "SELECT (SELECT count(*) FROM users WHERE wallet_address LIKE '0xbe4c%')"
+            " + (SELECT count(*) FROM vaults WHERE name LIKE 'bench %')"
+            " + (SELECT count(*) FROM user_points WHERE wallet_address LIKE '0xbe4c%')"
+        )
+    ).scalar()
+    session.close()
+    assert remaining == 0
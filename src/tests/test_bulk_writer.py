@@ -0,0 +1,181 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+from sqlmodel import Session, delete, select
+
+from bg_tasks.rewards_distribution_job_harmonix import (
+    HYPE_VAULT_ID,
+    insert_rewards_to_db,
+)
+from core.bulk_writer import UpsertSpec, bulk_write
+from core.db import engine
+from models.funding_rate_history import FundingRateHistory
+from models.onchain_transaction_history import OnchainTransactionHistory
+from models.user_assets_history import UserHoldingAssetLatest
+from models.user_position_view import UserPositionView
+from models.user_rewards import UserRewardAudit, UserRewards
+from models.vaults import Vault
+
+
+@pytest.fixture
+def session():
+    session = Session(engine)
+    yield session
+    session.close()
+
+
+def test_upsert_updates_the_conflicting_rows_once(session):
+    partner_name = f"bulk test {uuid.uuid4().hex[:8]}"
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    def row(hours, funding_rate):
+        return {
+            "datetime": start + timedelta(hours=hours),
+            "funding_rate": funding_rate,
+            "partner_name": partner_name,
+        }
+
+    rows = [row(hours, 0.1) for hours in range(3)]
+    assert bulk_write(session, FundingRateHistory, rows) == 3
+    session.commit()
+
+    # The same key twice in one write, the last row wins
+    updated = [row(0, 0.2), row(3, 0.3), row(3, 0.4)]
+    assert bulk_write(session, FundingRateHistory, updated) == 2
+    session.commit()
+
+    stored = session.exec(
+        select(FundingRateHistory)
+        .where(FundingRateHistory.partner_name == partner_name)
+        .order_by(FundingRateHistory.datetime)
+    ).all()
+    session.exec(
+        delete(FundingRateHistory).where(FundingRateHistory.partner_name == partner_name)
+    )
+    session.commit()
+    assert [row.funding_rate for row in stored] == [0.2, 0.1, 0.1, 0.4]
+    # The id comes from the model default_factory
+    assert all(isinstance(row.id, uuid.UUID) for row in stored)
+
+
+def test_insert_skips_the_existing_rows_and_returns_the_new_ones(session):
+    tx_hashes = [f"0xbulk{uuid.uuid4().hex}" for _ in range(3)]
+
+    def row(tx_hash):
+        return {
+            "tx_hash": tx_hash,
+            "block_number": 1,
+            "timestamp": 1,
+            "from_address": "0xfrom",
+            "to_address": "0xto",
+            "method_id": "0x",
+            "input": "0x",
+            "value": 0,
+            "chain": "arbitrum_one",
+        }
+
+    bulk_write(session, OnchainTransactionHistory, [row(tx_hashes[0])])
+    inserted = bulk_write(
+        session,
+        OnchainTransactionHistory,
+        [row(tx_hash) for tx_hash in tx_hashes],
+        returning=["tx_hash"],
+    )
+    session.rollback()
+    assert sorted(inserted) == sorted((tx_hash,) for tx_hash in tx_hashes[1:])
+
+
+def test_conditional_update_keeps_the_newer_rows(session):
+    user_address = f"0xbulk{uuid.uuid4().hex[:8]}"
+    now = datetime.now(timezone.utc)
+
+    def row(block_number, asset_amount):
+        return {
+            "chain": "arbitrum_one",
+            "user_address": user_address,
+            "asset_amount": asset_amount,
+            "block_number": block_number,
+            "timestamp": now,
+        }
+
+    bulk_write(session, UserHoldingAssetLatest, [row(20, 2.0)])
+    # An older block doesn't roll the snapshot back, a newer one moves it
+    assert bulk_write(session, UserHoldingAssetLatest, [row(10, 1.0)]) == 0
+    assert bulk_write(session, UserHoldingAssetLatest, [row(30, 3.0)]) == 1
+    latest = session.get(UserHoldingAssetLatest, ("arbitrum_one", user_address))
+    assert latest.asset_amount == 3.0
+    session.rollback()
+
+
+def test_increment_adds_to_the_stored_values(session):
+    partner_name = f"bulk test {uuid.uuid4().hex[:8]}"
+    at = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    spec = UpsertSpec(
+        ("partner_name", "datetime"), increment_columns=("funding_rate",)
+    )
+
+    def row(funding_rate):
+        return {
+            "datetime": at,
+            "funding_rate": funding_rate,
+            "partner_name": partner_name,
+        }
+
+    bulk_write(session, FundingRateHistory, [row(1.0)], spec)
+    # Rows of the same key are summed before they are added
+    written = bulk_write(
+        session,
+        FundingRateHistory,
+        [row(2.0), row(0.5)],
+        spec,
+        returning=["funding_rate"],
+    )
+    session.rollback()
+    assert written == [(3.5,)]
+
+
+def test_reward_distribution_adds_to_the_user_totals(session):
+    wallet_address = f"0xbulk{uuid.uuid4().hex[:8]}"
+    vault = session.get(Vault, HYPE_VAULT_ID)
+    created_vault = vault is None
+    if created_vault:
+        vault = Vault(
+            id=uuid.UUID(HYPE_VAULT_ID),
+            name="bulk writer test vault",
+            vault_currency="USDC",
+            network_chain="arbitrum_one",
+        )
+        session.add(vault)
+        session.commit()
+
+    # No reward config covers the date, the job produces an empty frame
+    assert insert_rewards_to_db(pd.DataFrame()) is None
+    rewards = pd.DataFrame(
+        {"user_address": [wallet_address] * 2, "reward": [1.0, 2.0]}
+    )
+    insert_rewards_to_db(rewards)
+    insert_rewards_to_db(rewards)
+
+    [user_reward] = session.exec(
+        select(UserRewards).where(UserRewards.wallet_address == wallet_address)
+    ).all()
+    audits = session.exec(
+        select(UserRewardAudit)
+        .where(UserRewardAudit.user_points_id == user_reward.id)
+        .order_by(UserRewardAudit.new_value)
+    ).all()
+    for row in audits:
+        session.delete(row)
+    session.delete(user_reward)
+    session.commit()
+    if created_vault:
+        session.exec(
+            delete(UserPositionView).where(UserPositionView.vault_id == vault.id)
+        )
+        session.delete(vault)
+        session.commit()
+
+    assert user_reward.total_reward == 6.0
+    assert [(a.old_value, a.new_value) for a in audits] == [(0, 3.0), (3.0, 6.0)]
@@ -0,0 +1,148 @@
+import uuid
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlmodel import Session, col, select
+
+from bg_tasks import calculate_apy_breakdown_daily as job
+from core import constants
+from core.db import engine
+from models.apy_component import APYComponent
+from models.vault_apy_breakdown import VaultAPYBreakdown, VaultAPYComponent
+from models.vaults import Vault
+
+KELPDAO_VAULT_ID = uuid.UUID("4b1c8a52-6d0c-4f39-9d3a-0f3a1e5a7c11")
+KELPDAO_ARB_VAULT_ID = uuid.UUID("4b1c8a52-6d0c-4f39-9d3a-0f3a1e5a7c12")
+SOLV_VAULT_ID = uuid.UUID("4b1c8a52-6d0c-4f39-9d3a-0f3a1e5a7c13")
+VAULT_IDS = [KELPDAO_VAULT_ID, KELPDAO_ARB_VAULT_ID, SOLV_VAULT_ID]
+
+
+@pytest.fixture
+def db_session():
+    session = Session(engine)
+    yield session
+    session.close()
+
+
+def clean_up(session: Session):
+    breakdown_ids = session.exec(
+        select(VaultAPYBreakdown.id).where(col(VaultAPYBreakdown.vault_id).in_(VAULT_IDS))
+    ).all()
+    session.query(VaultAPYComponent).where(
+        col(VaultAPYComponent.vault_apy_breakdown_id).in_(breakdown_ids)
+    ).delete()
+    session.query(VaultAPYBreakdown).where(
+        col(VaultAPYBreakdown.vault_id).in_(VAULT_IDS)
+    ).delete()
+    session.query(Vault).where(col(Vault.id).in_(VAULT_IDS)).delete()
+    session.commit()
+
+
+@pytest.fixture(autouse=True)
+def seed_vaults(db_session: Session):
+    clean_up(db_session)
+    db_session.add_all(
+        [
+            Vault(
+                id=KELPDAO_VAULT_ID,
+                name="KelpDAO",
+                slug=constants.KELPDAO_VAULT_SLUG,
+                category="real_yield",
+                network_chain="ethereum",
+                strategy_name=constants.DELTA_NEUTRAL_STRATEGY,
+                monthly_apy=20,
+                apy_15d=18,
+                apy_45d=16,
+                is_active=True,
+            ),
+            Vault(
+                id=KELPDAO_ARB_VAULT_ID,
+                name="KelpDAO Arbitrum",
+                slug=constants.KELPDAO_VAULT_ARBITRUM_SLUG,
+                category="real_yield",
+                network_chain="arbitrum_one",
+                strategy_name=constants.DELTA_NEUTRAL_STRATEGY,
+                monthly_apy=10,
+                apy_15d=None,
+                apy_45d=8,
+                is_active=True,
+            ),
+            Vault(
+                id=SOLV_VAULT_ID,
+                name="Solv",
+                slug=constants.SOLV_VAULT_SLUG,
+                category="real_yield",
+                network_chain="arbitrum_one",
+                strategy_name=constants.STAKING_STRATEGY,
+                monthly_apy=5,
+                apy_15d=4,
+                apy_45d=3,
+                is_active=True,
+            ),
+        ]
+    )
+    db_session.commit()
+    yield
+    clean_up(db_session)
+
+
+def run_job(kelpdao_apy: float):
+    kelpdao_get_apy = MagicMock(return_value=kelpdao_apy)
+    vaults = job.session.exec(select(Vault).where(col(Vault.id).in_(VAULT_IDS))).all()
+    with patch.dict(job.EXTERNAL_FETCHERS, {job.KELPDAO_APY: kelpdao_get_apy}):
+        snapshot = job.prefetch_inputs(vaults)
+        results = []
+        for vault in vaults:
+            results.extend(job.VaultAPYCalculator(vault, snapshot).calculate_apy_components())
+        job.bulk_upsert_vault_apy(job.session, results)
+    return kelpdao_get_apy
+
+
+def get_components(db_session: Session, vault_id: uuid.UUID, period: int):
+    breakdown = db_session.exec(
+        select(VaultAPYBreakdown)
+        .where(VaultAPYBreakdown.vault_id == vault_id)
+        .where(VaultAPYBreakdown.period == period)
+    ).one()
+    components = db_session.exec(
+        select(VaultAPYComponent).where(
+            VaultAPYComponent.vault_apy_breakdown_id == breakdown.id
+        )
+    ).all()
+    return breakdown, {c.component_name: c.component_apy for c in components}
+
+
+def test_prefetch_shares_inputs_between_sibling_vaults(db_session: Session):
+    kelpdao_get_apy = run_job(kelpdao_apy=4)
+
+    kelpdao_get_apy.assert_called_once()
+
+    breakdown, components = get_components(db_session, KELPDAO_VAULT_ID, 30)
+    assert breakdown.total_apy == 20
+    assert components == {
+        APYComponent.RS_ETH.value: 2,
+        APYComponent.AE_USD.value: 3.25,
+        APYComponent.FUNDING_FEES.value: 14.75,
+    }
+
+    breakdown, components = get_components(db_session, KELPDAO_ARB_VAULT_ID, 15)
+    assert breakdown.total_apy == 0
+    assert components[APYComponent.FUNDING_FEES.value] == -2
+
+    breakdown, components = get_components(db_session, SOLV_VAULT_ID, 45)
+    assert breakdown.total_apy == 3
+    assert components == {}
+
+
+def test_rerun_updates_rows_in_place(db_session: Session):
+    run_job(kelpdao_apy=4)
+    run_job(kelpdao_apy=6)
+
+    breakdowns = db_session.exec(
+        select(VaultAPYBreakdown).where(VaultAPYBreakdown.vault_id == KELPDAO_VAULT_ID)
+    ).all()
+    assert sorted(b.period for b in breakdowns) == [15, 30, 45]
+
+    _, components = get_components(db_session, KELPDAO_VAULT_ID, 30)
+    assert components[APYComponent.RS_ETH.value] == 3
+    assert len(components) == 3
@@ -0,0 +1,17 @@
+import inspect
+import re
+
+from web3 import Web3
+
+from core import config
+from core.config import settings
+
+# Topics are precomputed literals, each documented with the event signature
+TOPIC_PATTERN = re.compile(r'# keccak\("([^"]+)"\)\n\s+(\w+): str')
+
+
+def test_precomputed_event_topics_match_signatures():
+    topics = TOPIC_PATTERN.findall(inspect.getsource(config))
+    assert len(topics) == 18
+    for signature, name in topics:
+        assert getattr(settings, name) == Web3.keccak(text=signature).hex()
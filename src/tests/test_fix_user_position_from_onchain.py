@@ -0,0 +1,127 @@
+import json
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+from eth_abi import encode
+from sqlmodel import Session, select
+from web3 import Web3
+
+from bg_tasks.fix_user_position_from_onchain import (
+    OnchainUserState,
+    bulk_update_portfolios,
+    reconcile_vault_portfolios,
+)
+from core.abi_reader import read_abi
+from core.db import engine
+from models.user_portfolio import PositionStatus, UserPortfolio
+from utils.web3_utils import batch_eth_call
+
+VAULT_ADDRESS = "0x4a10C31b642866d3A3Df2268cEcD2c5B14600523"
+USERS = [
+    "0x1111111111111111111111111111111111111111",
+    "0x2222222222222222222222222222222222222222",
+    "0x3333333333333333333333333333333333333333",
+]
+
+
+@pytest.fixture
+def db_session():
+    session = Session(engine)
+    yield session
+    session.close()
+
+
+def test_batch_eth_call_keeps_sender_and_order():
+    w3 = Web3(Web3.HTTPProvider("http://localhost:8545"))
+    contract = w3.eth.contract(
+        address=VAULT_ADDRESS, abi=read_abi("RockOnyxDeltaNeutralVault")
+    )
+    requests = []
+
+    def fake_post(endpoint_uri, data, **kwargs):
+        payload = json.loads(data)
+        requests.append(payload)
+        responses = []
+        for call in reversed(payload):
+            sender = call["params"][0]["from"]
+            if sender == Web3.to_checksum_address(USERS[2]):
+                responses.append(
+                    {"jsonrpc": "2.0", "id": call["id"], "error": {"code": 3}}
+                )
+                continue
+            shares = int(sender, 16) % 1000
+            result = encode(["uint256"] * 4, [1, shares, 0, 0])
+            responses.append(
+                {"jsonrpc": "2.0", "id": call["id"], "result": "0x" + result.hex()}
+            )
+        return json.dumps(responses).encode()
+
+    with patch("utils.web3_utils.make_post_request", fake_post):
+        results = batch_eth_call(
+            w3,
+            [(contract.functions.getUserVaultState(), user) for user in USERS],
+            batch_size=2,
+        )
+
+    assert len(requests) == 2
+    assert results[0] == (1, int(USERS[0], 16) % 1000, 0, 0)
+    assert results[1] == (1, int(USERS[1], 16) % 1000, 0, 0)
+    assert results[2] is None
+
+
+def test_reconcile_updates_only_drifted_portfolios(db_session: Session):
+    vault_id = uuid4()
+    portfolios = [
+        UserPortfolio(
+            vault_id=vault_id,
+            user_address=user,
+            total_balance=100,
+            init_deposit=100,
+            total_shares=100,
+            pending_withdrawal=0,
+            status=PositionStatus.ACTIVE,
+            trade_start_date=datetime(2024, 1, 1),
+        )
+        for user in USERS
+    ]
+    db_session.add_all(portfolios)
+    db_session.commit()
+
+    states = {
+        USERS[0]: OnchainUserState(100, 100, 100, 0),
+        USERS[1]: OnchainUserState(100, 100, 112.5, 10),
+        USERS[2]: None,
+    }
+    vault = SimpleNamespace(name="test vault")
+    try:
+        updates, report = reconcile_vault_portfolios(vault, portfolios, states)
+        with patch("bg_tasks.fix_user_position_from_onchain.session", db_session):
+            bulk_update_portfolios(updates)
+
+        db_session.expire_all()
+        stored = {
+            p.user_address: p
+            for p in db_session.exec(
+                select(UserPortfolio).where(UserPortfolio.vault_id == vault_id)
+            ).all()
+        }
+        assert updates == [
+            {
+                "id": portfolios[1].id,
+                "total_balance": 112.5,
+                "pending_withdrawal": 10,
+            }
+        ]
+        assert stored[USERS[1]].total_balance == 112.5
+        assert stored[USERS[1]].pending_withdrawal == 10
+        assert stored[USERS[0]].total_balance == 100
+        assert (report.checked, report.changed, report.failed) == (3, 1, 1)
+        assert report.max_total_balance_drift == 12.5
+    finally:
+        db_session.query(UserPortfolio).where(
+            UserPortfolio.vault_id == vault_id
+        ).delete()
+        db_session.commit()
@@ -0,0 +1,157 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import requests
+from sqlmodel import Session, select
+
+from core.db import engine
+from models.funding_rate_history import FundingRateHistory
+from reports.funding_rate_ingestion import (
+    FundingRateSource,
+    HostRateLimiter,
+    fetch_source_history,
+    ingest_funding_rates,
+)
+from schemas.funding_history_entry import FundingHistoryEntry
+
+PARTNER_NAME = "TEST_PARTNER"
+START_DATE = datetime(2024, 4, 5, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db_session():
+    session = Session(engine)
+    yield session
+    session.close()
+
+
+@pytest.fixture(autouse=True)
+def clean_up(db_session: Session):
+    db_session.query(FundingRateHistory).where(
+        FundingRateHistory.partner_name == PARTNER_NAME
+    ).delete()
+    db_session.commit()
+
+
+def build_hourly_api(page_limit: int, calls: list):
+    def fetch(start_time: int, end_time: int, limit: int):
+        calls.append((start_time, end_time))
+        start = datetime.fromtimestamp(start_time / 1000, tz=timezone.utc)
+        end = datetime.fromtimestamp(end_time / 1000, tz=timezone.utc)
+        entries = []
+        current = start.replace(minute=0, second=0, microsecond=0)
+        while current <= end and len(entries) < min(limit, page_limit):
+            if current >= start:
+                entries.append(
+                    FundingHistoryEntry(datetime=current, funding_rate=0.0001)
+                )
+            current += timedelta(hours=1)
+        return entries
+
+    return fetch
+
+
+def build_source(fetch, max_window=timedelta(days=10), page_limit=48):
+    return FundingRateSource(
+        partner_name=PARTNER_NAME,
+        fetch=fetch,
+        base_url="https://api.test.xyz",
+        max_window=max_window,
+        page_limit=page_limit,
+        use_nanoseconds=False,
+        min_interval=0,
+        default_start_date=START_DATE,
+    )
+
+
+def test_fetch_source_history_shrinks_window_on_full_page():
+    calls = []
+    source = build_source(build_hourly_api(page_limit=48, calls=calls))
+
+    entries = fetch_source_history(
+        source, START_DATE, START_DATE + timedelta(days=3), HostRateLimiter()
+    )
+
+    datetimes = [e.datetime for e in entries]
+    assert len(datetimes) == len(set(datetimes)) == 72
+    assert min(datetimes) == START_DATE + timedelta(hours=1)
+    assert max(datetimes) == START_DATE + timedelta(days=3)
+
+
+def test_ingest_funding_rates_resumes_and_dedupes(db_session: Session):
+    calls = []
+    source = build_source(
+        build_hourly_api(page_limit=10_000, calls=calls), max_window=timedelta(days=30)
+    )
+    source.default_start_date = datetime.now(tz=timezone.utc) - timedelta(days=2)
+
+    ingest_funding_rates(db_session, [source])
+    first_rows = db_session.exec(
+        select(FundingRateHistory).where(FundingRateHistory.partner_name == PARTNER_NAME)
+    ).all()
+    latest = max(r.datetime for r in first_rows)
+    first_call_count = len(calls)
+
+    ingest_funding_rates(db_session, [source])
+    rows = db_session.exec(
+        select(FundingRateHistory).where(FundingRateHistory.partner_name == PARTNER_NAME)
+    ).all()
+
+    assert len(first_rows) >= 47
+    assert len(rows) == len({r.datetime for r in rows})
+    # The second run only covers the time since the latest stored rate
+    resumed_start, _ = calls[first_call_count]
+    assert resumed_start == int(latest.timestamp() * 1000)
+
+
+def test_failed_window_is_fetched_again_on_the_next_run(db_session: Session):
+    calls = []
+    api = build_hourly_api(page_limit=10_000, calls=calls)
+    failures = {2}
+
+    def fetch(start_time: int, end_time: int, limit: int):
+        entries = api(start_time, end_time, limit)
+        if len(calls) in failures:
+            raise requests.HTTPError("503 Service Unavailable")
+        return entries
+
+    source = build_source(fetch, max_window=timedelta(days=1))
+    start = datetime.now(tz=timezone.utc).replace(minute=0, second=0, microsecond=0)
+    source.default_start_date = start - timedelta(days=3)
+
+    def stored():
+        return sorted(
+            r.datetime
+            for r in db_session.exec(
+                select(FundingRateHistory).where(
+                    FundingRateHistory.partner_name == PARTNER_NAME
+                )
+            ).all()
+        )
+
+    ingest_funding_rates(db_session, [source])
+    # Only the window before the failure is stored, not the ones after it
+    assert stored()[-1] == start - timedelta(days=2)
+
+    failures.clear()
+    ingest_funding_rates(db_session, [source])
+    datetimes = stored()
+    assert datetimes[0] == start - timedelta(days=3) + timedelta(hours=1)
+    assert datetimes == [
+        datetimes[0] + timedelta(hours=hours) for hours in range(len(datetimes))
+    ]
+    assert len(datetimes) >= 72
+
+
+def test_truncated_minimum_window_stops_the_fetch():
+    calls = []
+    source = build_source(
+        build_hourly_api(page_limit=1, calls=calls), max_window=timedelta(hours=2)
+    )
+
+    entries = fetch_source_history(
+        source, START_DATE, START_DATE + timedelta(days=1), HostRateLimiter()
+    )
+
+    # A one hour window holds two entries, it can't be fetched without a gap
+    assert entries == []
@@ -0,0 +1,97 @@
+import asyncio
+
+from prometheus_client import REGISTRY
+
+from models.vaults import NetworkChain
+from services.ingestion import Consumer, FanOut, LogEvent
+from services.log_decoder import DecodedLog, VaultEventFamily
+
+
+def event(event_name: str, family=VaultEventFamily.stablecoin, block_number=1):
+    decoded = DecodedLog(None, family, event_name, "0xuser", value=1, shares=1)
+    return LogEvent(NetworkChain.arbitrum_one, {"blockNumber": block_number}, decoded)
+
+
+class RecordingConsumer(Consumer):
+    def __init__(self, name, max_queue_size=10, drop_when_full=False, family=None):
+        self.name = name
+        self.max_queue_size = max_queue_size
+        self.drop_when_full = drop_when_full
+        self.family = family
+        self.handled = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    def accepts(self, event: LogEvent) -> bool:
+        return self.family is None or event.decoded.family == self.family
+
+    async def handle(self, event: LogEvent):
+        await self.release.wait()
+        if event.decoded.event_name == "Fail":
+            raise ValueError("Cannot handle the event")
+        self.handled.append(event.log["blockNumber"])
+
+
+def test_events_are_routed_to_the_consumers_that_accept_them():
+    async def run():
+        everything = RecordingConsumer("test_all")
+        rethink = RecordingConsumer("test_rethink", family=VaultEventFamily.rethink)
+        fan_out = FanOut([everything, rethink])
+        fan_out.start()
+        await fan_out.publish(event("Deposit", block_number=1))
+        await fan_out.publish(event("Deposit", VaultEventFamily.rethink, 2))
+        await fan_out.publish(event("Fail", block_number=3))
+        await fan_out.publish(event("Withdrawn", block_number=4))
+        await fan_out.join()
+        await fan_out.stop()
+        return everything.handled, rethink.handled
+
+    assert asyncio.run(run()) == ([1, 2, 4], [2])
+    assert (
+        REGISTRY.get_sample_value(
+            "ingestion_events_total", {"consumer": "test_all", "status": "failed"}
+        )
+        == 1
+    )
+
+
+def test_full_queue_holds_back_the_source_or_drops_the_oldest_event():
+    async def run():
+        portfolio = RecordingConsumer("test_blocking", max_queue_size=2)
+        alerts = RecordingConsumer("test_dropping", max_queue_size=2, drop_when_full=True)
+        fan_out = FanOut([alerts])
+        fan_out.start()
+        alerts.release.clear()
+        for block_number in range(1, 6):
+            await fan_out.publish(event("Deposit", block_number=block_number))
+            # Let the worker run, like the source does between two messages
+            await asyncio.sleep(0)
+        alerts.release.set()
+        await fan_out.join()
+        await fan_out.stop()
+
+        blocking = FanOut([portfolio])
+        blocking.start()
+        portfolio.release.clear()
+        for block_number in range(1, 4):
+            await blocking.publish(event("Deposit", block_number=block_number))
+        # The worker holds one event and the queue two more
+        publish = asyncio.create_task(blocking.publish(event("Deposit", block_number=4)))
+        await asyncio.sleep(0.05)
+        assert not publish.done()
+        portfolio.release.set()
+        await publish
+        await blocking.join()
+        await blocking.stop()
+        return alerts.handled, portfolio.handled
+
+    dropped, handled = asyncio.run(run())
+    # The first event was taken by the worker before the queue filled up
+    assert dropped == [1, 4, 5]
+    assert handled == [1, 2, 3, 4]
+    assert (
+        REGISTRY.get_sample_value(
+            "ingestion_events_total", {"consumer": "test_dropping", "status": "dropped"}
+        )
+        == 2
+    )
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+from fastapi import Response
+from sqlmodel import Session, delete
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from api.api_v1.endpoints.partners import (
+    HoldingsFormat,
+    _holdings_query,
+    _stream_holdings,
+    get_user_asset_amounts,
+)
+from bg_tasks.indexing_user_holding_kelpdao import update_latest_holdings
+from core.db import async_engine, engine
+from models.user_assets_history import UserHoldingAssetHistory, UserHoldingAssetLatest
+from models.vaults import NetworkChain
+
+
+def history(user_address, block_number, asset_amount):
+    return UserHoldingAssetHistory(
+        user_address=user_address,
+        total_shares=1,
+        vault_total_shares=10,
+        asset_amount=asset_amount,
+        asset_address="0xrseth",
+        asset_symbol="rsETH",
+        asset_decimals=18,
+        holding_percentage=0.1,
+        block_number=block_number,
+        chain="arbitrum_one",
+    )
+
+
+@pytest.fixture
+def users():
+    # Sorts after every hex address, so the keyset pages only contain these users
+    prefix = f"0xtest{uuid.uuid4().hex[:8]}"
+    user_a, user_b = f"{prefix}a", f"{prefix}b"
+    session = Session(engine)
+    for rows in (
+        [history(user_a, 10, 1.0), history(user_b, 15, 5.0)],
+        [history(user_a, 20, 2.0)],
+        # Re-indexed older transaction
+        [history(user_b, 12, 4.0)],
+    ):
+        session.add_all(rows)
+        update_latest_holdings(session, rows)
+        session.commit()
+    yield prefix, user_a, user_b
+    for model in (UserHoldingAssetHistory, UserHoldingAssetLatest):
+        session.exec(delete(model).where(model.user_address.startswith(prefix)))
+    session.commit()
+    session.close()
+
+
+def get_holdings(**params):
+    async def run():
+        async with AsyncSession(async_engine) as session:
+            response = Response()
+            defaults = dict(
+                block_number=None,
+                user_address=None,
+                after=None,
+                limit=None,
+                format=HoldingsFormat.json,
+            )
+            data = await get_user_asset_amounts(
+                session, response, NetworkChain.arbitrum_one, **{**defaults, **params}
+            )
+            return {d.user_address: d.asset_amount for d in data}, response.headers
+
+    return asyncio.run(run())
+
+
+def test_latest_and_point_in_time_holdings(users):
+    _, user_a, user_b = users
+
+    assert get_holdings(user_address=user_a)[0] == {user_a: 2.0}
+    assert get_holdings(user_address=user_b)[0] == {user_b: 5.0}
+    assert get_holdings(user_address=user_a, block_number=15)[0] == {user_a: 1.0}
+    assert get_holdings(user_address=user_b, block_number=13)[0] == {user_b: 4.0}
+    # No holding yet at this block
+    assert get_holdings(user_address=user_b, block_number=11)[0] == {}
+
+
+def test_keyset_pages(users):
+    prefix, user_a, user_b = users
+
+    page, headers = get_holdings(after=prefix, limit=1)
+    assert page == {user_a: 2.0}
+    page, headers = get_holdings(after=headers["X-Next-Cursor"], limit=1)
+    assert page == {user_b: 5.0}
+
+
+def test_stream_ndjson_and_csv(users):
+    _, user_a, _ = users
+
+    async def collect(format):
+        query = _holdings_query(NetworkChain.arbitrum_one, 15, user_a, None, None)
+        return "".join([chunk async for chunk in _stream_holdings(query, format)])
+
+    [line] = asyncio.run(collect(HoldingsFormat.ndjson)).splitlines()
+    assert json.loads(line) == {
+        "user_address": user_a,
+        "asset_amount": 1.0,
+        "asset_amount_in_uint256": 10**18,
+    }
+    assert asyncio.run(collect(HoldingsFormat.csv)).splitlines() == [
+        "user_address,asset_amount,asset_amount_in_uint256",
+        f"{user_a},1.0,{10**18}",
+    ]
@@ -0,0 +1,194 @@
+import random
+import uuid
+
+import pytest
+from hexbytes import HexBytes
+
+from core import constants
+from core.config import settings
+from models.vaults import Vault
+from services.log_decoder import (
+    EVENT_NAMES,
+    RETHINK_EVENT_NAMES,
+    LogDecoderRegistry,
+    VaultEventFamily,
+    decode_event,
+)
+from services.vault_registry import VaultSnapshot
+
+SENDER_TOPIC = HexBytes("0x" + "0" * 24 + "20f89ba1b0fc1e83f9aef0a134095cd63f7e8cc7")
+
+
+# The hex string extractors the listeners used before the compiled decoders
+def legacy_stablecoin(entry):
+    data = entry["data"].hex()
+    value = int(data[2:66], 16) / 1e6
+    shares = int("0x" + data[66:], 16) / 1e6
+    from_address = None
+    if len(entry["topics"]) >= 2:
+        from_address = f'0x{entry["topics"][1].hex()[26:]}'
+    return value, shares, from_address
+
+
+def legacy_solv(entry):
+    data = entry["data"].hex()
+    value = int(data[2:66], 16) / 1e8
+    shares = int("0x" + data[66:], 16) / 1e18
+    from_address = None
+    if len(entry["topics"]) >= 2:
+        from_address = f'0x{entry["topics"][1].hex()[26:]}'
+    return value, shares, from_address
+
+
+def legacy_delta_neutral(entry):
+    from_address = None
+    if len(entry["topics"]) >= 2:
+        from_address = f'0x{entry["topics"][1].hex()[26:]}'
+    data = entry["data"].hex()
+    amount = int(data[2:66], 16)
+    amount = amount / 1e18 if len(str(amount)) >= 18 else amount / 1e6
+    shares = int(data[66 : 66 + 64], 16) / 1e6
+    return amount, shares, from_address
+
+
+def legacy_pendle(entry):
+    from_address = None
+    if len(entry["topics"]) >= 2:
+        from_address = f'0x{entry["topics"][1].hex()[26:]}'
+    data = entry["data"].hex()
+    if entry["topics"][0].hex() == settings.PENDLE_COMPLETE_WITHDRAW_EVENT_TOPIC:
+        pt_amount = int(data[2:66], 16) / 1e18
+        sc_amount = int(data[66 : 66 + 64], 16) / 1e6
+        shares = int(data[66 + 64 : 66 + 2 * 64], 16) / 1e6
+        total_amount = int(data[66 + 2 * 64 : 66 + 3 * 64], 16) / 1e6
+        eth_amount = 0
+    else:
+        pt_amount = int(data[2:66], 16) / 1e18
+        eth_amount = int(data[66 : 66 + 64], 16) / 1e18
+        sc_amount = int(data[66 + 64 : 66 + 2 * 64], 16) / 1e6
+        total_amount = int(data[66 + 64 * 2 : 66 + 3 * 64], 16) / 1e6
+        shares = int(data[66 + 3 * 64 : 66 + 4 * 64], 16) / 1e6
+    return pt_amount, eth_amount, sc_amount, total_amount, shares, from_address
+
+
+def legacy_rethink(entry):
+    from_address = None
+    if len(entry["topics"]) >= 2:
+        from_address = f'0x{entry["topics"][1].hex()[26:]}'
+    data = entry["data"].hex()
+    topic = entry["topics"][0].hex()
+    if topic == settings.RETHINK_DELTA_NEUTRAL_DEPOSIT_EVENT_TOPIC:
+        return int(data[2:66], 16) / 1e18, 0, from_address
+    if topic == settings.RETHINK_DELTA_NEUTRAL_DEPOSITED_TO_FUND_CONTRACT_EVENT_TOPIC:
+        return int(data[2:66], 16) / 1e18, 0, None
+    return int(data[2:66], 16) / 1e18, int(data[66:130], 16) / 1e18, from_address
+
+
+def random_log(rng: random.Random, topic: str, words: int, address: str = "0x0"):
+    data = b"".join(
+        rng.choice([rng.getrandbits(64), rng.getrandbits(100), 0]).to_bytes(32, "big")
+        for _ in range(words)
+    )
+    return {
+        "address": address,
+        "topics": [HexBytes(topic), SENDER_TOPIC],
+        "data": HexBytes(data),
+    }
+
+
+@pytest.mark.parametrize(
+    "family, legacy, words",
+    [
+        (VaultEventFamily.stablecoin, legacy_stablecoin, 2),
+        (VaultEventFamily.solv, legacy_solv, 2),
+        (VaultEventFamily.delta_neutral, legacy_delta_neutral, 3),
+    ],
+)
+def test_decoders_match_the_legacy_extractors(family, legacy, words):
+    rng = random.Random(family.value)
+    for topic in EVENT_NAMES:
+        for _ in range(50):
+            log = random_log(rng, topic, words)
+            decoded = decode_event(family, log)
+            assert (decoded.value, decoded.shares, decoded.from_address) == legacy(log)
+
+
+def test_pendle_decoder_matches_the_legacy_extractor():
+    rng = random.Random(1)
+    for topic in EVENT_NAMES:
+        for _ in range(50):
+            log = random_log(rng, topic, 5)
+            decoded = decode_event(VaultEventFamily.pendle, log)
+            assert (
+                decoded.pt_amount,
+                decoded.eth_amount,
+                decoded.sc_amount,
+                decoded.value,
+                decoded.shares,
+                decoded.from_address,
+            ) == legacy_pendle(log)
+
+
+def test_rethink_decoder_matches_the_legacy_extractor():
+    rng = random.Random(2)
+    for topic in RETHINK_EVENT_NAMES:
+        for _ in range(50):
+            log = random_log(rng, topic, 2)
+            decoded = decode_event(VaultEventFamily.rethink, log)
+            assert (decoded.value, decoded.shares, decoded.from_address) == (
+                legacy_rethink(log)
+            )
+
+
+def test_short_log_data_is_rejected():
+    log = random_log(random.Random(3), settings.PENDLE_DEPOSIT_EVENT_TOPIC, 4)
+    with pytest.raises(ValueError):
+        decode_event(VaultEventFamily.pendle, log)
+
+
+class StaticVaultRegistry:
+    def __init__(self, vaults):
+        self._snapshot = VaultSnapshot(
+            by_address={v.contract_address.lower(): v for v in vaults}
+        )
+
+    def snapshot(self):
+        return self._snapshot
+
+
+def test_registry_picks_the_decoder_of_the_vault():
+    options_wheel = Vault(
+        id=uuid.uuid4(),
+        name="Options wheel",
+        contract_address="0x55c4c840F9Ac2e62eFa3f12BaBa1B57A1208B6F5",
+        strategy_name=constants.OPTIONS_WHEEL_STRATEGY,
+        category="real_yield",
+    )
+    rethink = Vault(
+        id=uuid.uuid4(),
+        name="Rethink",
+        contract_address="0x1D47CA37872f4c19Cf6931f801E99A0d618E3688",
+        strategy_name=constants.DELTA_NEUTRAL_STRATEGY,
+        category="real_yield_v2",
+    )
+    registry = LogDecoderRegistry(StaticVaultRegistry([options_wheel, rethink]))
+    rng = random.Random(4)
+    # Both vaults emit Withdrawn(address,uint256,uint256) with different decimals
+    topic = settings.STABLECOIN_COMPLETE_WITHDRAW_VAULT_FILTER_TOPICS
+    logs = [
+        random_log(rng, topic, 2, options_wheel.contract_address),
+        random_log(rng, topic, 2, rethink.contract_address.lower()),
+        random_log(rng, settings.SOLV_DEPOSIT_EVENT_TOPIC, 2, rethink.contract_address),
+        random_log(rng, topic, 2, "0x000000000000000000000000000000000000dead"),
+    ]
+
+    first, second, unknown_event, unknown_vault = registry.decode_many(logs)
+
+    assert first.vault is options_wheel
+    assert (first.event_name, first.value) == ("Withdrawn", legacy_stablecoin(logs[0])[0])
+    assert second.vault is rethink
+    assert second.family == VaultEventFamily.rethink
+    assert (second.value, second.shares) == legacy_rethink(logs[1])[:2]
+    assert unknown_event is None
+    assert unknown_vault is None
+    assert registry.decode(logs[0]) == first
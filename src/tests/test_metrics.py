@@ -0,0 +1,63 @@
+import uuid
+from datetime import datetime, timezone
+
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+from sqlmodel import Session, delete
+
+from bg_tasks.scheduler import record_run
+from core import instrumentation
+from core.config import settings
+from core.db import engine
+from models.job_run_history import JobRunHistory, JobRunStatus
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_metrics_endpoint_serves_the_default_registry():
+    from main import metrics
+
+    instrumentation.HTTP_REQUEST_DURATION.labels(
+        method="GET", route="/vaults/{vault_slug}", status=200
+    ).observe(0.05)
+
+    response = metrics()
+    body = response.body.decode()
+    assert response.headers["Content-Type"].startswith("text/plain")
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert (
+        'http_request_duration_seconds_count{method="GET",'
+        'route="/vaults/{vault_slug}",status="200"}'
+    ) in body
+
+
+def test_scheduler_writes_the_job_metrics_to_the_textfile(tmp_path, monkeypatch):
+    job = f"test_job_{uuid.uuid4().hex[:8]}"
+    path = tmp_path / "scheduler.prom"
+    monkeypatch.setattr(settings, "METRICS_TEXTFILE_PATH", str(path))
+
+    record_run(job, JobRunStatus.SUCCESS, datetime.now(timezone.utc), 2.5)
+    with Session(engine) as session:
+        session.exec(delete(JobRunHistory).where(JobRunHistory.job_name == job))
+        session.commit()
+
+    text_format = path.read_text()
+    assert f'job_duration_seconds_count{{job="{job}",status="success"}} 1.0' in text_format
+    assert f'job_last_success_timestamp_seconds{{job="{job}"}}' in text_format
+    assert [p.name for p in tmp_path.iterdir()] == ["scheduler.prom"]
+
+
+def test_sql_hook_counts_rows_written_by_the_current_job():
+    instrumentation.install()
+    job = f"test_job_{uuid.uuid4().hex[:8]}"
+    selects = sample("db_query_duration_seconds_count", operation="SELECT")
+
+    with Session(engine) as session, instrumentation.job_run(job):
+        session.execute(text("CREATE TEMPORARY TABLE metrics_test (id int)"))
+        session.execute(text("INSERT INTO metrics_test SELECT generate_series(1, 5)"))
+        session.execute(text("SELECT count(*) FROM metrics_test"))
+
+    assert sample("db_rows_written_total", operation="INSERT", job=job) == 5
+    assert sample("db_query_duration_seconds_count", operation="SELECT") == selects + 1
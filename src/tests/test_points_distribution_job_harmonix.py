@@ -3,13 +3,23 @@ import pytest
 from unittest.mock import MagicMock, patch
 from datetime import datetime, timedelta, timezone
 
+from sqlmodel import Session, select
+
 from bg_tasks.points_distribution_job_harmonix import (
     harmonix_distribute_points,
     update_referral_points,
 )
+from core import constants
+from core.db import engine
 from models.referral_points import ReferralPoints
+from models.referral_points_history import ReferralPointsHistory
+from models.referralcodes import ReferralCode
 from models.referrals import Referral
+from models.reward_sessions import RewardSessions
+from models.user import User
+from models.user_points import UserPoints
 from models.user_points_history import UserPointsHistory
+from models.vaults import Vault
 
 
 @pytest.fixture
@@ -121,3 +131,118 @@ def test_maximum_points_distributed(logger_mock):
         logger_mock.info.assert_called_with(
             "Maximum points for Test Session have been distributed."
         )
+
+
+@pytest.fixture
+def referral_graph():
+    db_session = Session(engine)
+    now = datetime.now(tz=timezone.utc)
+    vault = Vault(id=uuid4(), name="referral test vault")
+    reward_session = RewardSessions(
+        session_name="referral test session",
+        start_date=now - timedelta(days=1),
+        partner_name=constants.HARMONIX,
+    )
+    referrer_1, referrer_2, referee_1, referee_2 = [
+        User(user_id=uuid4(), wallet_address=f"0xreferraltest{uuid4().hex}")
+        for _ in range(4)
+    ]
+    users = [referrer_1, referrer_2, referee_1, referee_2]
+    db_session.add_all([vault, reward_session, *users])
+    db_session.commit()
+
+    code = ReferralCode(user_id=referrer_1.user_id, code=f"test-{uuid4().hex}")
+    db_session.add(code)
+    db_session.commit()
+    referrals = [
+        Referral(
+            referrer_id=referrer.user_id,
+            referee_id=referee.user_id,
+            referral_code_id=code.referral_code_id,
+        )
+        for referrer, referee in [
+            (referrer_1, referee_1),
+            (referrer_1, referee_2),
+            (referrer_2, referee_2),
+        ]
+    ]
+    db_session.add_all(referrals)
+
+    user_points = []
+    history = []
+    for referee, points in [(referee_1, [10, 100]), (referee_2, [20, 200])]:
+        record = UserPoints(
+            vault_id=vault.id,
+            wallet_address=referee.wallet_address,
+            points=points[-1],
+            partner_name=constants.HARMONIX,
+            session_id=reward_session.session_id,
+            last_history_point=points[-1],
+            last_history_at=now - timedelta(hours=1),
+        )
+        user_points.append(record)
+        history.extend(
+            UserPointsHistory(
+                user_points_id=record.id,
+                point=point,
+                created_at=now - timedelta(hours=len(points) - i),
+            )
+            for i, point in enumerate(points)
+        )
+    db_session.add_all(user_points)
+    db_session.commit()
+    db_session.add_all(history)
+    db_session.commit()
+
+    yield db_session, reward_session, referrer_1, referrer_2
+
+    referral_points = db_session.exec(
+        select(ReferralPoints).where(
+            ReferralPoints.session_id == reward_session.session_id
+        )
+    ).all()
+    for model, rows in [
+        (
+            ReferralPointsHistory,
+            db_session.exec(
+                select(ReferralPointsHistory).where(
+                    ReferralPointsHistory.referral_points_id.in_(
+                        [r.id for r in referral_points]
+                    )
+                )
+            ).all(),
+        ),
+        (ReferralPoints, referral_points),
+        (UserPointsHistory, history),
+        (UserPoints, user_points),
+        (Referral, referrals),
+        (ReferralCode, [code]),
+        (User, users),
+        (RewardSessions, [reward_session]),
+        (Vault, [vault]),
+    ]:
+        for row in rows:
+            db_session.delete(row)
+        db_session.commit()
+    db_session.close()
+
+
+def test_update_referral_points_aggregates_latest_referee_points(referral_graph):
+    db_session, reward_session, referrer_1, referrer_2 = referral_graph
+    config = MagicMock(max_points=1_000_000)
+
+    with patch("bg_tasks.points_distribution_job_harmonix.session", db_session):
+        update_referral_points(datetime.now(tz=timezone.utc), reward_session, config, 0)
+        update_referral_points(datetime.now(tz=timezone.utc), reward_session, config, 0)
+
+    points = {
+        r.user_id: r.points
+        for r in db_session.exec(
+            select(ReferralPoints).where(
+                ReferralPoints.session_id == reward_session.session_id
+            )
+        ).all()
+    }
+    # Latest history of each referee, 10% per run, accumulated over two runs
+    assert points[referrer_1.user_id] == pytest.approx(2 * 0.1 * (100 + 200))
+    assert points[referrer_2.user_id] == pytest.approx(2 * 0.1 * 200)
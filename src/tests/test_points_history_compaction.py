@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from sqlmodel import Session, select
+
+from core import constants
+from core.db import engine
+from models.point_distribution_history import PointDistributionHistory
+from models.point_distribution_history_daily import PointDistributionHistoryDaily
+from models.user_points import UserPoints
+from models.user_points_history import UserPointsHistory
+from models.user_points_history_daily import UserPointsHistoryDaily
+from models.vaults import Vault
+from services.points_history_compaction import HISTORY_ROLLUPS, compact_history
+
+NOW = datetime(2024, 12, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def db_session():
+    session = Session(engine)
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def vault(db_session: Session):
+    vault = Vault(id=uuid4(), name="compaction test vault")
+    db_session.add(vault)
+    db_session.commit()
+    yield vault
+    for model, column in [
+        (PointDistributionHistoryDaily, PointDistributionHistoryDaily.vault_id),
+        (PointDistributionHistory, PointDistributionHistory.vault_id),
+    ]:
+        db_session.query(model).where(column == vault.id).delete()
+    user_points_ids = select(UserPoints.id).where(UserPoints.vault_id == vault.id)
+    db_session.query(UserPointsHistoryDaily).where(
+        UserPointsHistoryDaily.user_points_id.in_(user_points_ids)
+    ).delete()
+    db_session.query(UserPointsHistory).where(
+        UserPointsHistory.user_points_id.in_(user_points_ids)
+    ).delete()
+    db_session.query(UserPoints).where(UserPoints.vault_id == vault.id).delete()
+    db_session.query(Vault).where(Vault.id == vault.id).delete()
+    db_session.commit()
+
+
+def get_rollup(table: str):
+    return next(r for r in HISTORY_ROLLUPS if r.table == table)
+
+
+def test_compact_user_points_history_keeps_totals(db_session: Session, vault: Vault):
+    user_points = UserPoints(
+        vault_id=vault.id,
+        wallet_address=f"0xcompaction{uuid4().hex}",
+        points=0,
+        partner_name=constants.HARMONIX,
+    )
+    db_session.add(user_points)
+    db_session.commit()
+    # Hourly rows over 3 old days, the latest of them is older than the cutoff too
+    created = [NOW - timedelta(days=40, hours=i) for i in range(72)]
+    db_session.add_all(
+        UserPointsHistory(user_points_id=user_points.id, point=1.5, created_at=ts)
+        for ts in created
+    )
+    db_session.commit()
+
+    compacted = compact_history(
+        db_session,
+        get_rollup("user_points_history"),
+        cutoff=NOW - timedelta(days=30),
+        batch_size=10,
+    )
+
+    raw = db_session.exec(
+        select(UserPointsHistory).where(
+            UserPointsHistory.user_points_id == user_points.id
+        )
+    ).all()
+    daily = db_session.exec(
+        select(UserPointsHistoryDaily).where(
+            UserPointsHistoryDaily.user_points_id == user_points.id
+        )
+    ).all()
+
+    assert compacted == 71
+    # The latest row stays raw so readers of the history still find it
+    assert [r.created_at for r in raw] == [max(created)]
+    assert sum(d.entries for d in daily) == 71
+    assert sum(d.point for d in daily) + sum(r.point for r in raw) == 72 * 1.5
+    assert all(d.day.hour == 0 for d in daily)
+
+
+def test_compact_point_distribution_keeps_last_value_of_day(
+    db_session: Session, vault: Vault
+):
+    day = datetime(2024, 10, 1)
+    db_session.add_all(
+        PointDistributionHistory(
+            vault_id=vault.id,
+            partner_name=constants.HARMONIX,
+            point=float(hour),
+            created_at=day + timedelta(hours=hour),
+        )
+        for hour in range(24)
+    )
+    db_session.add(
+        PointDistributionHistory(
+            vault_id=vault.id,
+            partner_name=constants.HARMONIX,
+            point=100.0,
+            created_at=NOW,
+        )
+    )
+    db_session.commit()
+
+    rollup = get_rollup("point_distribution_history")
+    # Two runs with a small batch merge into the same daily row
+    compact_history(db_session, rollup, NOW - timedelta(days=30), 5, max_batches=2)
+    compact_history(db_session, rollup, NOW - timedelta(days=30), 5)
+
+    daily = db_session.exec(
+        select(PointDistributionHistoryDaily).where(
+            PointDistributionHistoryDaily.vault_id == vault.id
+        )
+    ).all()
+
+    assert len(daily) == 1
+    assert daily[0].day == day
+    assert daily[0].entries == 24
+    assert daily[0].point == 23.0
+    assert daily[0].last_created_at == day + timedelta(hours=23)
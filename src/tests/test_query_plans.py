@@ -0,0 +1,269 @@
+"""Query plan regression suite for the hot query shapes of the endpoints and bg_tasks.
+
+Seeds production-scale synthetic rows inside a transaction, refreshes the planner
+statistics and asserts with EXPLAIN that every hot query is answered by an index.
+The transaction is rolled back at the end so the test database is left untouched.
+"""
+
+import hashlib
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, text
+from sqlalchemy.dialects import postgresql
+from sqlmodel import select
+
+from core.db import engine
+from models.onchain_transaction_history import OnchainTransactionHistory
+from models.point_distribution_history import PointDistributionHistory
+from models.pps_history import PricePerShareHistory
+from models.user_points import UserPoints
+from models.user_portfolio import PositionStatus, UserPortfolio
+from models.vault_performance import VaultPerformance
+
+VAULT_COUNT = 20
+ROWS_PER_VAULT = 10_000
+USER_COUNT = 50_000
+TRANSACTION_COUNT = 300_000
+PARTNERS = ["harmonix", "hyperliquid", "bsx", "kelpdao", "renzo", "zircuit"]
+METHOD_IDS = ["0x2e2d2984", "0x12edde5e", "0x4cb5479f", "0x087fd4b0", "0xb6b55f25"]
+
+SEED_SQL = [
+    f"""
+    INSERT INTO vaults (id, name)
+    SELECT gen_random_uuid(), 'plan test vault ' || g
+    FROM generate_series(1, {VAULT_COUNT}) g
+    """,
+    f"""
+    INSERT INTO pps_history (id, vault_id, datetime, price_per_share)
+    SELECT gen_random_uuid(), v.id, now() - g * interval '1 hour', 1 + random()
+    FROM vaults v
+    CROSS JOIN generate_series(1, {ROWS_PER_VAULT}) g
+    WHERE v.name LIKE 'plan test vault %'
+    """,
+    f"""
+    INSERT INTO vault_performance (
+        id, vault_id, datetime, total_locked_value, apy_1m, apy_1w, benchmark, pct_benchmark
+    )
+    SELECT gen_random_uuid(), v.id, now() - g * interval '1 hour',
+           random() * 1e6, random(), random(), random(), random()
+    FROM vaults v
+    CROSS JOIN generate_series(1, {ROWS_PER_VAULT} / 2) g
+    WHERE v.name LIKE 'plan test vault %'
+    """,
+    f"""
+    INSERT INTO user_portfolio (
+        vault_id, user_address, total_balance, init_deposit, status, trade_start_date
+    )
+    SELECT v.ids[1 + (u + k) % {VAULT_COUNT}], '0x' || md5('user' || u),
+           random() * 1e4, random() * 1e4,
+           CASE WHEN u % 5 = 0 THEN 'CLOSED' ELSE 'ACTIVE' END::positionstatus, now()
+    FROM generate_series(1, {USER_COUNT}) u
+    CROSS JOIN generate_series(0, 1) k
+    CROSS JOIN (
+        SELECT array_agg(id ORDER BY name) AS ids
+        FROM vaults WHERE name LIKE 'plan test vault %'
+    ) v
+    """,
+    f"""
+    INSERT INTO user_points (
+        id, vault_id, wallet_address, points, partner_name, created_at, updated_at
+    )
+    SELECT gen_random_uuid(), p.vault_id, p.user_address, random() * 100,
+           (ARRAY{PARTNERS})[1 + (p.id % {len(PARTNERS)})], now(), now()
+    FROM user_portfolio p
+    JOIN vaults v ON v.id = p.vault_id AND v.name LIKE 'plan test vault %'
+    """,
+    f"""
+    INSERT INTO point_distribution_history (id, vault_id, partner_name, point, created_at)
+    SELECT gen_random_uuid(), v.id, partner, random() * 1e5, now() - g * interval '1 hour'
+    FROM vaults v
+    CROSS JOIN unnest(ARRAY{PARTNERS}) partner
+    CROSS JOIN generate_series(1, 1000) g
+    WHERE v.name LIKE 'plan test vault %'
+    """,
+    f"""
+    INSERT INTO onchain_transaction_history (
+        id, tx_hash, block_number, timestamp, from_address, to_address,
+        method_id, input, value, chain
+    )
+    SELECT gen_random_uuid(), '0xplan' || md5('tx' || g), 1000000 + g,
+           extract(epoch FROM now())::int - g * 30,
+           '0x' || upper(md5('user' || (g % {USER_COUNT}))),
+           '0x' || md5('vault' || (g % {VAULT_COUNT})),
+           (ARRAY{METHOD_IDS})[1 + (g % {len(METHOD_IDS)})],
+           '0x', 0, 'arbitrum_one'
+    FROM generate_series(1, {TRANSACTION_COUNT}) g
+    """,
+]
+
+SEEDED_TABLES = [
+    "vaults",
+    "pps_history",
+    "vault_performance",
+    "user_portfolio",
+    "user_points",
+    "point_distribution_history",
+    "onchain_transaction_history",
+]
+
+
+@pytest.fixture(scope="module")
+def seeded_connection():
+    connection = engine.connect()
+    transaction = connection.begin()
+    try:
+        for statement in SEED_SQL:
+            connection.execute(text(statement))
+        for table_name in SEEDED_TABLES:
+            connection.execute(text(f"ANALYZE {table_name}"))
+        yield connection
+    finally:
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture(scope="module")
+def sample(seeded_connection):
+    vault_id = seeded_connection.execute(
+        text("SELECT id FROM vaults WHERE name = 'plan test vault 1'")
+    ).scalar_one()
+    return {
+        "vault_id": vault_id,
+        "user_address": "0x" + _md5("user42"),
+        "vault_address": "0x" + _md5("vault7"),
+    }
+
+
+def _md5(value: str) -> str:
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+def _walk(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _walk(child)
+
+
+def explain(connection, statement) -> list:
+    sql = str(
+        statement.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    )
+    result = connection.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar_one()
+    if isinstance(result, str):
+        result = json.loads(result)
+    return list(_walk(result[0]["Plan"]))
+
+
+def assert_uses_index(connection, statement, index_name: str):
+    nodes = explain(connection, statement)
+    used = {node.get("Index Name") for node in nodes if node.get("Index Name")}
+    scans = {node["Node Type"] for node in nodes}
+    assert index_name in used, f"expected {index_name}, got {used or scans}"
+    assert "Seq Scan" not in scans
+
+
+def test_latest_pps_by_vault(seeded_connection, sample):
+    # api/api_v1/endpoints/vaults.py, statistics.py
+    statement = (
+        select(PricePerShareHistory)
+        .where(PricePerShareHistory.vault_id == sample["vault_id"])
+        .order_by(PricePerShareHistory.datetime.desc())
+        .limit(1)
+    )
+    assert_uses_index(
+        seeded_connection, statement, "ix_pps_history_vault_id_datetime"
+    )
+
+
+def test_latest_vault_performance_by_vault(seeded_connection, sample):
+    # services/vault_performance_history_service.py, statistics.py
+    statement = (
+        select(VaultPerformance)
+        .where(VaultPerformance.vault_id == sample["vault_id"])
+        .order_by(VaultPerformance.datetime.desc())
+        .limit(1)
+    )
+    assert_uses_index(
+        seeded_connection, statement, "ix_vault_performance_vault_id_datetime"
+    )
+
+
+def test_active_user_portfolio(seeded_connection, sample):
+    # api/api_v1/endpoints/portfolio.py, referral.py
+    statement = (
+        select(UserPortfolio)
+        .where(UserPortfolio.user_address == sample["user_address"])
+        .where(UserPortfolio.vault_id == sample["vault_id"])
+        .where(UserPortfolio.status == PositionStatus.ACTIVE)
+    )
+    assert_uses_index(
+        seeded_connection, statement, "ix_user_portfolio_user_address_vault_id_status"
+    )
+
+
+def test_user_points_by_wallet_partner_vault_session(seeded_connection, sample):
+    # bg_tasks/points_distribution_job_harmonix.py, referral.py
+    statement = (
+        select(UserPoints)
+        .where(UserPoints.wallet_address == sample["user_address"])
+        .where(UserPoints.partner_name == "harmonix")
+        .where(UserPoints.vault_id == sample["vault_id"])
+        .where(UserPoints.session_id == uuid.uuid4())
+    )
+    assert_uses_index(
+        seeded_connection, statement, "ix_user_points_wallet_partner_vault_session"
+    )
+
+
+def test_latest_point_distribution(seeded_connection, sample):
+    # api/api_v1/endpoints/vaults.py, bg_tasks/bsx_point_calculation.py
+    statement = (
+        select(PointDistributionHistory)
+        .where(PointDistributionHistory.vault_id == sample["vault_id"])
+        .where(PointDistributionHistory.partner_name == "bsx")
+        .order_by(PointDistributionHistory.created_at.desc())
+        .limit(1)
+    )
+    assert_uses_index(
+        seeded_connection,
+        statement,
+        "ix_point_distribution_history_vault_partner_created_at",
+    )
+
+
+def test_vault_transactions_by_method_and_time(seeded_connection, sample):
+    # bg_tasks/utils.py pending withdrawal queries, check_deposit_withdraw_balance.py
+    start = int((datetime.now(timezone.utc) - timedelta(days=1)).timestamp())
+    statement = (
+        select(OnchainTransactionHistory)
+        .where(OnchainTransactionHistory.to_address == sample["vault_address"])
+        .where(OnchainTransactionHistory.method_id == METHOD_IDS[0])
+        .where(OnchainTransactionHistory.timestamp >= start)
+    )
+    assert_uses_index(
+        seeded_connection,
+        statement,
+        "ix_onchain_transaction_history_to_address_method_id_timestamp",
+    )
+
+
+def test_transactions_by_lower_from_address(seeded_connection, sample):
+    # api/api_v1/endpoints/reports.py, bg_tasks/check_deposit_withdraw_balance.py
+    statement = (
+        select(OnchainTransactionHistory)
+        .where(OnchainTransactionHistory.method_id.in_(METHOD_IDS[:2]))
+        .where(
+            func.lower(OnchainTransactionHistory.from_address)
+            == sample["user_address"].lower()
+        )
+    )
+    assert_uses_index(
+        seeded_connection,
+        statement,
+        "ix_onchain_transaction_history_lower_from_address",
+    )
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta, timezone
+
+from reports.rate_index import RateSeriesIndex
+
+START = datetime(2024, 11, 1, tzinfo=timezone.utc)
+
+
+def build_index():
+    # Two readings per day for five days, day N has rates N and N + 1
+    rows = []
+    for day in range(5):
+        rows.append((START + timedelta(days=day, hours=1), float(day)))
+        rows.append((START + timedelta(days=day, hours=13), float(day + 1)))
+    return RateSeriesIndex(reversed(rows))
+
+
+def test_day_mean():
+    rate_index = build_index()
+
+    assert rate_index.day_mean(START + timedelta(days=2, hours=20)) == 2.5
+    assert rate_index.day_mean(START + timedelta(days=10)) == 0.0
+
+
+def test_day_mean_ffill_uses_last_day_with_data():
+    rate_index = build_index()
+
+    assert rate_index.day_mean(START + timedelta(days=10), ffill=True) == 4.5
+    assert rate_index.day_mean(START - timedelta(days=1), ffill=True) == 0.0
+
+
+def test_trailing_mean():
+    rate_index = build_index()
+
+    # Days 1 and 2 before day 3: (1 + 2 + 2 + 3) / 4
+    assert rate_index.trailing_mean(START + timedelta(days=3), 2) == 2.0
+    assert rate_index.trailing_mean(START, 7) == 0.0
+
+
+def test_latest_day_mean():
+    assert build_index().latest_day_mean() == 4.5
+    assert RateSeriesIndex([]).latest_day_mean() == 0.0
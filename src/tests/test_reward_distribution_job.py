@@ -0,0 +1,356 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+from sqlmodel import Session, col, delete, select
+
+from bg_tasks import reward_distribution_job
+from core import constants
+from core.db import engine
+from models.campaigns import Campaign
+from models.referralcodes import ReferralCode
+from models.referrals import Referral
+from models.reward_thresholds import RewardThresholds
+from models.rewards import Reward
+from models.user import User
+from models.user_last_30_days_tvl import UserLast30DaysTVL
+from models.user_portfolio import UserPortfolio
+
+NOW = datetime(2024, 12, 1, 12, 0, 0, tzinfo=timezone.utc)
+DAY = timedelta(days=1)
+
+
+def legacy_distribute_referral_101_rewards(session: Session, current_time):
+    campaign_101 = session.exec(
+        select(Campaign).where(Campaign.name == constants.Campaign.REFERRAL_101.value)
+    ).first()
+    unique_referrers = []
+    referrals = session.exec(select(Referral).order_by(Referral.created_at)).all()
+    for referral in referrals:
+        if len(unique_referrers) >= constants.REWARD_HIGH_LIMIT:
+            break
+        if referral.referrer_id in unique_referrers:
+            continue
+        rewards = session.exec(
+            select(Reward)
+            .where(Reward.user_id == referral.referrer_id)
+            .order_by(Reward.start_date)
+        ).all()
+        if rewards is None or len(rewards) == 0:
+            continue
+        is_already_in_101_campaign = False
+        for reward in rewards:
+            if reward.campaign_name == campaign_101.name:
+                unique_referrers.append(referral.referrer_id)
+                is_already_in_101_campaign = True
+                break
+        last_reward = rewards[-1]
+        if last_reward.campaign_name == campaign_101.name:
+            if (
+                last_reward.end_date is not None
+                and last_reward.end_date.replace(tzinfo=timezone.utc) < current_time
+            ):
+                last_reward.status = constants.Status.CLOSED
+                session.add(
+                    Reward(
+                        user_id=referral.referrer_id,
+                        reward_percentage=constants.REWARD_DEFAULT_PERCENTAGE,
+                        start_date=current_time,
+                        end_date=None,
+                        campaign_name=constants.Campaign.DEFAULT.value,
+                    )
+                )
+                session.commit()
+            continue
+        if is_already_in_101_campaign:
+            continue
+        user = session.exec(
+            select(User).where(User.user_id == referral.referee_id)
+        ).first()
+        if not user:
+            continue
+        user_portfolios = session.exec(
+            select(UserPortfolio).where(
+                UserPortfolio.user_address == user.wallet_address
+            )
+        ).all()
+        for user_portfolio in user_portfolios:
+            if user_portfolio.total_balance >= constants.MIN_FUNDS_FOR_HIGH_REWARD:
+                last_reward.status = constants.Status.CLOSED
+                last_reward.end_date = current_time
+                session.add(
+                    Reward(
+                        user_id=referral.referrer_id,
+                        reward_percentage=constants.REWARD_HIGH_PERCENTAGE,
+                        start_date=current_time,
+                        end_date=current_time
+                        + timedelta(constants.HIGH_REWARD_DURATION_DAYS),
+                        campaign_name=campaign_101.name,
+                    )
+                )
+                session.commit()
+                unique_referrers.append(referral.referrer_id)
+                break
+
+
+def legacy_distribute_kol_and_partner_rewards(session: Session, current_time):
+    rewards_thresholds = session.exec(
+        select(RewardThresholds).order_by(RewardThresholds.tier)
+    ).all()
+    users = session.exec(
+        select(User).where(
+            User.tier.in_(
+                [constants.UserTier.KOL.value, constants.UserTier.PARTNER.value]
+            )
+        )
+    ).all()
+    for user in users:
+        rewards = session.exec(
+            select(Reward)
+            .where(Reward.user_id == user.user_id)
+            .order_by(Reward.start_date)
+        ).all()
+        last_reward = rewards[-1]
+        if last_reward.campaign_name in (
+            constants.Campaign.KOL_AND_PARTNER.value,
+            constants.Campaign.DEFAULT.value,
+        ):
+            tvl = 0
+            user_tvl = session.exec(
+                select(UserLast30DaysTVL)
+                .where(UserLast30DaysTVL.user_id == user.user_id)
+                .order_by(UserLast30DaysTVL.created_at.desc())
+            ).first()
+            if user_tvl is not None:
+                tvl = user_tvl.total_value_locked
+            reward_percentage = 0
+            for rewards_threshold in rewards_thresholds:
+                if tvl >= rewards_threshold.threshold:
+                    reward_percentage = rewards_threshold.commission_rate
+            if reward_percentage != last_reward.reward_percentage:
+                last_reward.status = constants.Status.CLOSED
+                last_reward.end_date = current_time
+                session.add(
+                    Reward(
+                        user_id=user.user_id,
+                        reward_percentage=reward_percentage,
+                        start_date=current_time,
+                        end_date=None,
+                        campaign_name=constants.Campaign.KOL_AND_PARTNER.value,
+                    )
+                )
+        session.commit()
+
+
+def reward(user, campaign, percentage, start_days_ago, end_days_ago=None):
+    return Reward(
+        reward_id=uuid4(),
+        user_id=user.user_id,
+        reward_percentage=percentage,
+        start_date=NOW - start_days_ago * DAY,
+        end_date=NOW - end_days_ago * DAY if end_days_ago is not None else None,
+        campaign_name=campaign,
+    )
+
+
+@pytest.fixture
+def campaign_data():
+    session = Session(engine)
+    users = {
+        name: User(
+            user_id=uuid4(),
+            wallet_address=f"0x{uuid4().hex}",
+            tier=(
+                constants.UserTier.KOL.value
+                if name.startswith("kol")
+                else constants.UserTier.DEFAULT.value
+            ),
+        )
+        for name in [
+            "high",
+            "second_referee",
+            "expired",
+            "active_101",
+            "no_reward",
+            "no_position",
+            "left_101",
+            "over_limit",
+            "referee_1",
+            "referee_2",
+            "referee_3",
+            "referee_4",
+            "referee_5",
+            "kol_up",
+            "kol_same",
+            "kol_101",
+            "kol_no_tvl",
+        ]
+    }
+    session.add_all(users.values())
+    session.commit()
+    code = ReferralCode(user_id=users["high"].user_id, code=f"parity-{uuid4().hex}")
+    session.add(code)
+
+    def referral(referrer, referee, minutes):
+        return Referral(
+            referrer_id=users[referrer].user_id,
+            referee_id=users[referee].user_id,
+            referral_code_id=code.referral_code_id,
+            created_at=NOW - timedelta(days=30) + timedelta(minutes=minutes),
+        )
+
+    def position(referee, balance):
+        return UserPortfolio(
+            vault_id=uuid4(),
+            user_address=users[referee].wallet_address,
+            total_balance=balance,
+            init_deposit=balance,
+        )
+
+    session.add_all(
+        [
+            Campaign(name=constants.Campaign.REFERRAL_101.value, status="active"),
+            Campaign(name=constants.Campaign.KOL_AND_PARTNER.value, status="active"),
+            RewardThresholds(tier=1, threshold=0, commission_rate=0.05),
+            RewardThresholds(tier=2, threshold=1000, commission_rate=0.07),
+            RewardThresholds(tier=3, threshold=5000, commission_rate=0.1),
+            referral("high", "referee_1", 1),
+            referral("no_reward", "referee_2", 2),
+            referral("no_position", "referee_3", 3),
+            referral("left_101", "referee_2", 4),
+            referral("expired", "referee_2", 5),
+            referral("second_referee", "referee_2", 6),
+            referral("second_referee", "referee_4", 7),
+            referral("active_101", "referee_1", 8),
+            referral("over_limit", "referee_5", 9),
+            position("referee_1", 100),
+            position("referee_2", 10),
+            position("referee_2", 20),
+            position("referee_4", 10),
+            position("referee_4", 60),
+            position("referee_5", 500),
+            UserLast30DaysTVL(
+                user_id=users["kol_up"].user_id,
+                avg_entry_price=1,
+                shares_deposited=0,
+                shares_withdraw=0,
+                total_value_locked=10000,
+                created_at=NOW - 2 * DAY,
+            ),
+            UserLast30DaysTVL(
+                user_id=users["kol_up"].user_id,
+                avg_entry_price=1,
+                shares_deposited=0,
+                shares_withdraw=0,
+                total_value_locked=2000,
+                created_at=NOW - DAY,
+            ),
+            UserLast30DaysTVL(
+                user_id=users["kol_same"].user_id,
+                avg_entry_price=1,
+                shares_deposited=0,
+                shares_withdraw=0,
+                total_value_locked=6000,
+                created_at=NOW - DAY,
+            ),
+        ]
+    )
+    default = constants.Campaign.DEFAULT.value
+    referral_101 = constants.Campaign.REFERRAL_101.value
+    kol = constants.Campaign.KOL_AND_PARTNER.value
+    rewards = [
+        reward(users["high"], default, 0.05, 40),
+        reward(users["second_referee"], default, 0.05, 40),
+        reward(users["expired"], default, 0.05, 200),
+        reward(users["expired"], referral_101, 0.08, 100, 10),
+        reward(users["active_101"], referral_101, 0.08, 10, -80),
+        reward(users["no_position"], default, 0.05, 40),
+        reward(users["left_101"], referral_101, 0.08, 200, 110),
+        reward(users["left_101"], default, 0.05, 110),
+        reward(users["over_limit"], default, 0.05, 40),
+        reward(users["kol_up"], default, 0.05, 40),
+        reward(users["kol_same"], kol, 0.1, 40),
+        reward(users["kol_101"], referral_101, 0.08, 40, -50),
+        reward(users["kol_no_tvl"], kol, 0.06, 40),
+    ]
+    originals = [r.model_dump() for r in rewards]
+    session.add_all(rewards)
+    session.commit()
+    yield session, users, originals
+
+    user_ids = [user.user_id for user in users.values()]
+    session.exec(delete(Reward).where(col(Reward.user_id).in_(user_ids)))
+    session.exec(delete(Referral).where(col(Referral.referrer_id).in_(user_ids)))
+    session.exec(delete(ReferralCode).where(col(ReferralCode.user_id).in_(user_ids)))
+    wallets = [user.wallet_address for user in users.values()]
+    session.exec(
+        delete(UserPortfolio).where(col(UserPortfolio.user_address).in_(wallets))
+    )
+    session.exec(
+        delete(UserLast30DaysTVL).where(col(UserLast30DaysTVL.user_id).in_(user_ids))
+    )
+    session.exec(delete(Campaign))
+    session.exec(delete(RewardThresholds))
+    session.exec(delete(User).where(col(User.user_id).in_(user_ids)))
+    session.commit()
+    session.close()
+
+
+def reward_state(session: Session, users):
+    names = {user.user_id: name for name, user in users.items()}
+    rewards = session.exec(
+        select(Reward).where(col(Reward.user_id).in_(list(names)))
+    ).all()
+    return sorted(
+        (
+            names[r.user_id],
+            r.campaign_name,
+            r.reward_percentage,
+            r.status,
+            r.start_date,
+            r.end_date,
+        )
+        for r in rewards
+    )
+
+
+def reset_rewards(session: Session, users, originals):
+    user_ids = [user.user_id for user in users.values()]
+    session.exec(delete(Reward).where(col(Reward.user_id).in_(user_ids)))
+    session.add_all([Reward(**reward) for reward in originals])
+    session.commit()
+    session.expire_all()
+
+
+def test_set_based_campaigns_match_the_per_user_loops(campaign_data):
+    session, users, originals = campaign_data
+
+    with patch.object(constants, "REWARD_HIGH_LIMIT", 4):
+        legacy_distribute_referral_101_rewards(session, NOW)
+        legacy_distribute_kol_and_partner_rewards(session, NOW)
+        session.expire_all()
+        legacy = reward_state(session, users)
+
+        reset_rewards(session, users, originals)
+        reward_distribution_job.distribute_referral_101_rewards(NOW)
+        reward_distribution_job.distribute_kol_and_partner_rewards(NOW)
+        session.expire_all()
+        set_based = reward_state(session, users)
+
+    assert set_based == legacy
+    now = NOW.replace(tzinfo=None)
+    assert {(name, c, p) for name, c, p, _, start, _ in legacy if start == now} == {
+        ("high", constants.Campaign.REFERRAL_101.value, 0.08),
+        ("second_referee", constants.Campaign.REFERRAL_101.value, 0.08),
+        ("expired", constants.Campaign.DEFAULT.value, 0.05),
+        ("kol_up", constants.Campaign.KOL_AND_PARTNER.value, 0.07),
+        ("kol_no_tvl", constants.Campaign.KOL_AND_PARTNER.value, 0.05),
+    }
+    assert {name for name, _, _, status, *_ in legacy if status == "closed"} == {
+        "high",
+        "second_referee",
+        "expired",
+        "kol_up",
+        "kol_no_tvl",
+    }
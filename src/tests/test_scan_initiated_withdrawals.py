@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from bg_tasks.scan_initiated_withdrawals import WithdrawalAmountResolver
+from core import constants
+
+VAULT_ADDRESS_1 = "0x1111111111111111111111111111111111111111"
+VAULT_ADDRESS_2 = "0x2222222222222222222222222222222222222222"
+
+
+def build_input(shares: int) -> str:
+    return "0x12edde5e" + hex(shares)[2:].rjust(64, "0") + "0" * 64
+
+
+def build_row(tx_hash: str, to_address: str, block_number: int, shares: int):
+    return SimpleNamespace(
+        id=tx_hash,
+        tx_hash=tx_hash,
+        to_address=to_address,
+        block_number=block_number,
+        input=build_input(shares),
+    )
+
+
+def test_resolve_batches_pps_reads_per_block():
+    vault = SimpleNamespace(
+        name="test vault",
+        network_chain=constants.CHAIN_ARBITRUM,
+        strategy_name=constants.DELTA_NEUTRAL_STRATEGY,
+    )
+    resolver = WithdrawalAmountResolver(MagicMock())
+    resolver.get_contract = lambda vault, address: SimpleNamespace(
+        functions=SimpleNamespace(pricePerShare=lambda: address)
+    )
+    resolver.get_web3 = MagicMock()
+
+    pps = {VAULT_ADDRESS_1: 1_100_000, VAULT_ADDRESS_2: 2_000_000}
+    calls = []
+
+    def fake_multicall(w3, functions, block_identifier):
+        calls.append((block_identifier, sorted(functions)))
+        return [pps[address] for address in functions]
+
+    rows = [
+        build_row("0xa", VAULT_ADDRESS_1, 100, 10_000_000),
+        build_row("0xb", VAULT_ADDRESS_2, 100, 5_000_000),
+        build_row("0xc", VAULT_ADDRESS_1, 100, 1_000_000),
+        build_row("0xd", VAULT_ADDRESS_1, 200, 2_000_000),
+    ]
+    with patch("bg_tasks.scan_initiated_withdrawals.multicall", fake_multicall):
+        amounts = resolver.resolve(vault, rows)
+
+    assert len(calls) == 2
+    assert calls[0] == (100, sorted([VAULT_ADDRESS_1, VAULT_ADDRESS_2]))
+    assert calls[1] == (200, [VAULT_ADDRESS_1])
+    assert amounts["0xa"] == 10 * 1.1
+    assert amounts["0xb"] == 5 * 2.0
+    assert amounts["0xc"] == 1 * 1.1
+    assert amounts["0xd"] == 2 * 1.1
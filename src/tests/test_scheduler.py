@@ -0,0 +1,120 @@
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlmodel import Session, select
+
+from bg_tasks.scheduler import CronSchedule, ScheduledJob, Scheduler
+from core.db import engine, try_advisory_lock
+from models.job_run_history import JobRunHistory, JobRunStatus
+
+
+@pytest.fixture
+def job_name():
+    name = f"test_job_{uuid.uuid4().hex[:8]}"
+    yield name
+    with Session(engine) as session:
+        for run in session.exec(
+            select(JobRunHistory).where(JobRunHistory.job_name == name)
+        ).all():
+            session.delete(run)
+        session.commit()
+
+
+def get_runs(job_name):
+    with Session(engine) as session:
+        return session.exec(
+            select(JobRunHistory).where(JobRunHistory.job_name == job_name)
+        ).all()
+
+
+def test_cron_schedule_matches_crontab_fields():
+    hourly = CronSchedule("0 */12 * * *")
+    assert hourly.is_due(datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc))
+    assert not hourly.is_due(datetime(2025, 1, 1, 13, 0, tzinfo=timezone.utc))
+
+    # Fridays at 08:15
+    weekly = CronSchedule("15 8 * * 5")
+    assert weekly.is_due(datetime(2025, 1, 3, 8, 15, tzinfo=timezone.utc))
+    assert not weekly.is_due(datetime(2025, 1, 4, 8, 15, tzinfo=timezone.utc))
+
+    assert CronSchedule("1-3,30 * * * *").fields[0] == {1, 2, 3, 30}
+    with pytest.raises(ValueError):
+        CronSchedule("* * *")
+
+
+def test_run_job_records_duration_and_skips_when_locked(job_name):
+    calls = []
+    job = ScheduledJob(
+        job_name,
+        CronSchedule("* * * * *"),
+        "bg_tasks.compact_points_history",
+        calls.append,
+    )
+    scheduler = Scheduler([job], max_workers=1)
+    scheduler.load()
+
+    scheduler.run_job(job)
+    # Another process running the same job holds its lock
+    with try_advisory_lock(f"job:{job_name}") as acquired:
+        assert acquired
+        scheduler.run_job(job)
+
+    assert len(calls) == 1
+    runs = {run.status: run for run in get_runs(job_name)}
+    assert set(runs) == {JobRunStatus.SUCCESS, JobRunStatus.SKIPPED}
+    assert runs[JobRunStatus.SUCCESS].duration_seconds >= 0
+
+
+def test_failed_run_is_recorded(job_name):
+    def fail(module):
+        raise RuntimeError("rpc unavailable")
+
+    job = ScheduledJob(
+        job_name, CronSchedule("* * * * *"), "bg_tasks.compact_points_history", fail
+    )
+    scheduler = Scheduler([job], max_workers=1)
+    scheduler.load()
+    scheduler.run_job(job)
+
+    [run] = get_runs(job_name)
+    assert run.status == JobRunStatus.FAILED
+    assert run.error == "rpc unavailable"
+
+
+def test_jobs_of_the_same_module_do_not_overlap(job_name):
+    active, overlaps = [], []
+    guard = threading.Lock()
+
+    def run(module):
+        with guard:
+            active.append(module)
+            overlaps.append(len(active) > 1)
+        time.sleep(0.2)
+        with guard:
+            active.remove(module)
+
+    jobs = [
+        ScheduledJob(
+            f"{job_name}_{chain}",
+            CronSchedule("* * * * *"),
+            "bg_tasks.compact_points_history",
+            run,
+        )
+        for chain in ("arbitrum_one", "ethereum")
+    ]
+    scheduler = Scheduler(jobs, max_workers=2)
+    scheduler.load()
+    for job in jobs:
+        scheduler.submit(job)
+    scheduler.executor.shutdown(wait=True)
+
+    assert overlaps == [False, False]
+    for job in jobs:
+        assert [run.status for run in get_runs(job.name)] == [JobRunStatus.SUCCESS]
+        with Session(engine) as session:
+            for run in get_runs(job.name):
+                session.delete(run)
+            session.commit()
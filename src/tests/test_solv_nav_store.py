@@ -0,0 +1,117 @@
+import random
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+from sqlmodel import Session, delete
+
+from bg_tasks.utils import calculate_risk_factor
+from core.db import engine
+from models.solv_nav_history import SolvNavHistory, SolvNavStatistics
+from services import solv_service
+from services.solv_nav_store import SolvNavStore, performance_statistics
+
+# Not a real open fund, keeps the test rows apart from the job's
+POOL_SLOT_INFO_ID = -46
+
+
+def nav_points(count):
+    rng = random.Random(46)
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    nav = 1.0
+    points = []
+    for day in range(count, 0, -1):
+        nav *= 1 + rng.uniform(-0.004, 0.006)
+        points.append(
+            {
+                "navDate": f"{today - timedelta(days=day):%Y-%m-%d}",
+                "nav": str(round(nav * 1e8)),
+                "adjustedNav": str(round(nav * 1.01 * 1e8)),
+            }
+        )
+    return points
+
+
+def legacy_statistics(df: pd.DataFrame):
+    from empyrical import downside_risk, sortino_ratio
+
+    df = df.set_index("navDate").sort_index()
+    df["pct_change"] = df["nav"].pct_change()
+    sortino = float(sortino_ratio(df["pct_change"], period="weekly"))
+    downside = float(downside_risk(df["pct_change"], period="weekly"))
+    risk_factor = calculate_risk_factor(df["pct_change"].values.flatten())
+    return df["nav"].max(), sortino, downside, risk_factor
+
+
+@pytest.fixture
+def session():
+    session = Session(engine)
+    yield session
+    session.exec(
+        delete(SolvNavHistory).where(
+            SolvNavHistory.pool_slot_info_id == POOL_SLOT_INFO_ID
+        )
+    )
+    session.exec(
+        delete(SolvNavStatistics).where(
+            SolvNavStatistics.pool_slot_info_id == POOL_SLOT_INFO_ID
+        )
+    )
+    session.commit()
+    session.close()
+
+
+def test_sync_only_stores_the_new_points(session):
+    points = nav_points(120)
+    published = points[:100]
+    requests = []
+
+    def fetch_points(since, pool_slot_info_id):
+        requests.append(since)
+        # The API may send back the last known point again
+        return [
+            p
+            for p in published
+            if since is None or solv_service.parse_nav_date(p["navDate"]) >= since
+        ]
+
+    store = SolvNavStore(session, POOL_SLOT_INFO_ID, fetch_points)
+    assert store.sync() == 100
+    published = points
+    assert store.sync() == 20
+    assert store.sync() == 0
+
+    last_date = solv_service.parse_nav_date(points[-1]["navDate"])
+    assert requests == [
+        None,
+        solv_service.parse_nav_date(points[99]["navDate"]),
+        last_date,
+    ]
+    assert len(store.series()) == 120
+    assert store.statistics().last_nav_date == last_date
+
+
+def test_cached_series_matches_the_dataframe_computation(session):
+    points = nav_points(120)
+    store = SolvNavStore(
+        session, POOL_SLOT_INFO_ID, lambda since, pool_slot_info_id: points[:60]
+    )
+    store.sync()
+    store.fetch_points = lambda since, pool_slot_info_id: points[60:]
+    store.sync()
+    df = solv_service.nav_data_to_dataframe(points)
+
+    expected = legacy_statistics(df)
+    assert performance_statistics(store.statistics()) == pytest.approx(expected)
+
+    series = store.series()
+    assert series.periodic_apy(
+        pd.DateOffset(months=1), column="adjusted_nav"
+    ) == pytest.approx(solv_service.get_monthly_apy(df, column="adjustedNav"))
+    assert series.periodic_apy(pd.DateOffset(weeks=1)) == pytest.approx(
+        solv_service.get_weekly_apy(df)
+    )
+    for days in (15, 45):
+        assert series.periodic_apy(pd.DateOffset(days=days)) == pytest.approx(
+            solv_service.calculate_periodic_apy(df, days=days)
+        )
@@ -0,0 +1,133 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlmodel import Session, col, select
+
+from bg_tasks import sync_apy_vault_performance_history as job
+from core.db import engine
+from models.pps_history import PricePerShareHistory
+from models.vault_performance import VaultPerformance
+from models.vaults import Vault
+
+VAULT_ID = uuid.UUID("6d2e9b41-3c7a-4e58-8f1b-2a9c0d4e7f21")
+START = datetime(2025, 1, 1, 8, tzinfo=timezone.utc)
+
+
+def loop_rolling_apy(price_per_share: pd.Series, window_days: int) -> pd.Series:
+    # Per date computation the job used before
+    apys = pd.Series(index=price_per_share.index, dtype=float)
+    for current_date in price_per_share.index:
+        past_date = max(
+            price_per_share.index[0], current_date - pd.Timedelta(days=window_days)
+        )
+        days_diff = min(window_days, (current_date - price_per_share.index[0]).days)
+        if days_diff == 0:
+            apys[current_date] = 0
+        else:
+            apys[current_date] = (
+                job.calculate_roi(
+                    price_per_share[current_date],
+                    price_per_share[past_date],
+                    days=days_diff,
+                )
+                * 100
+            )
+    return apys
+
+
+@pytest.mark.parametrize("window_days", [7, 15, 30, 45])
+def test_rolling_apy_matches_the_per_date_computation(window_days):
+    rng = np.random.default_rng(window_days)
+    index = pd.date_range("2024-06-01", periods=200, freq="D")
+    price_per_share = pd.Series(
+        np.cumprod(1 + rng.normal(0.0005, 0.002, len(index))), index=index
+    )
+    price_per_share.iloc[3] = 0
+
+    np.testing.assert_allclose(
+        job.calculate_rolling_apy(price_per_share.to_numpy(), window_days),
+        loop_rolling_apy(price_per_share, window_days).to_numpy(),
+        rtol=1e-12,
+    )
+
+
+@pytest.fixture
+def vault():
+    session = Session(engine)
+    vault = Vault(
+        id=VAULT_ID,
+        name="APY history test vault",
+        slug=f"apy-history-test-{uuid.uuid4().hex[:8]}",
+        category="real_yield",
+        network_chain="arbitrum_one",
+        is_active=True,
+    )
+    session.add(vault)
+    session.commit()
+    for day in range(120):
+        # One price per share a day, the 10th day is missing
+        if day != 10:
+            session.add(
+                PricePerShareHistory(
+                    vault_id=VAULT_ID,
+                    datetime=START + timedelta(days=day),
+                    price_per_share=1 + 0.001 * day,
+                )
+            )
+        session.add(
+            VaultPerformance(
+                vault_id=VAULT_ID,
+                datetime=(START + timedelta(days=day, hours=2)).replace(tzinfo=None),
+                total_locked_value=1000,
+                apy_1m=0,
+                apy_1w=0,
+                benchmark=0,
+                pct_benchmark=0,
+            )
+        )
+    session.commit()
+    yield vault
+    for model in (VaultPerformance, PricePerShareHistory):
+        session.query(model).where(col(model.vault_id) == VAULT_ID).delete()
+    session.query(Vault).where(col(Vault.id) == VAULT_ID).delete()
+    session.commit()
+    session.close()
+
+
+def get_performances():
+    with Session(engine) as session:
+        return {
+            perf.datetime.date(): perf
+            for perf in session.exec(
+                select(VaultPerformance).where(VaultPerformance.vault_id == VAULT_ID)
+            ).all()
+        }
+
+
+def test_update_writes_changed_rows_only(vault):
+    df_daily = job.get_apy_history(vault)
+    assert job.update_apy_history(vault, df_daily) == 120
+    assert job.update_apy_history(vault, df_daily) == 0
+
+    performances = get_performances()
+    day_30 = performances[(START + timedelta(days=30)).date()]
+    assert day_30.apy_15d == pytest.approx(job.calculate_roi(1.030, 1.015, 15) * 100)
+    assert day_30.base_15d_apy == day_30.apy_15d
+    assert day_30.reward_15d_apy == 0
+    # Forward-filled from the previous day
+    day_10 = performances[(START + timedelta(days=10)).date()]
+    assert day_10.apy_45d == pytest.approx(job.calculate_roi(1.009, 1, 10) * 100)
+
+
+def test_tail_update_matches_the_full_rebuild(vault):
+    full = job.get_apy_history(vault)
+    since = (START + timedelta(days=110)).replace(hour=0, tzinfo=None)
+    # The lookback main uses for the tail
+    tail = job.get_apy_history(vault, since=since - timedelta(days=90))
+    assert tail.index[0] > full.index[0]
+
+    pd.testing.assert_frame_equal(full.loc[since:], tail.loc[since:])
+    assert job.update_apy_history(vault, tail, since=since) == 10
@@ -0,0 +1,127 @@
+import uuid
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+from sqlmodel import Session, select
+
+from api.api_v1.endpoints.reports import _process_deposit_with_addresses
+from core import constants
+from core.db import engine
+from models.onchain_transaction_history import OnchainTransactionHistory
+from models.transaction_ledger import LedgerAction, TransactionLedger
+from models.vaults import Vault
+from services.deposit_service import DepositService
+from services.transaction_ledger_service import TransactionLedgerService
+
+USDC = "af88d065e77c8cc2239327c5edb3a432268e5831"
+USER = "0xAbCdEf0000000000000000000000000000000001"
+
+
+def word(value) -> str:
+    if isinstance(value, int):
+        return f"{value:064x}"
+    return value.rjust(64, "0")
+
+
+@pytest.fixture
+def vault_transactions():
+    session = Session(engine)
+    vault = Vault(
+        id=uuid.uuid4(),
+        name="ledger test vault",
+        contract_address=f"0x{uuid.uuid4().hex}{uuid.uuid4().hex[:8]}",
+        category="real_yield",
+        strategy_name=constants.DELTA_NEUTRAL_STRATEGY,
+        network_chain="arbitrum_one",
+        vault_currency="USDC",
+    )
+    session.add(vault)
+    session.commit()
+
+    def transaction(method_id: str, data: str, block_number: int):
+        return OnchainTransactionHistory(
+            tx_hash=f"0x{uuid.uuid4().hex}",
+            block_number=block_number,
+            timestamp=1_700_000_000 + block_number,
+            from_address=USER,
+            to_address=vault.contract_address.lower(),
+            method_id=method_id,
+            input=method_id + data,
+            value=0,
+        )
+
+    transactions = [
+        transaction(
+            constants.MethodID.DEPOSIT.value, word(1_000 * 10**6) + word(USDC), 1
+        ),
+        transaction(constants.MethodID.WITHDRAW.value, word(400 * 10**6), 2),
+        transaction("0x095ea7b3", word(USDC) + word(1), 3),
+    ]
+    session.add_all(transactions)
+    session.commit()
+    yield session, vault, transactions
+
+    session.rollback()
+    for table in (TransactionLedger, OnchainTransactionHistory):
+        for row in session.exec(
+            select(table).where(table.tx_hash.in_([tx.tx_hash for tx in transactions]))
+        ).all():
+            session.delete(row)
+    session.commit()
+    session.delete(vault)
+    session.commit()
+    session.close()
+
+
+def test_backfill_decodes_vault_transactions_once(vault_transactions):
+    session, vault, transactions = vault_transactions
+    service = TransactionLedgerService(session)
+
+    with patch.object(service, "get_pps", return_value=1.25) as get_pps:
+        assert service.backfill(batch_size=1) >= 2
+        calls = get_pps.call_count
+        # Already enriched transactions are not decoded again
+        service.backfill(batch_size=1)
+        assert get_pps.call_count == calls
+
+    rows = {
+        row.action: row
+        for row in session.exec(
+            select(TransactionLedger).where(TransactionLedger.vault_id == vault.id)
+        ).all()
+    }
+    assert set(rows) == {LedgerAction.DEPOSIT, LedgerAction.INITIATE_WITHDRAWAL}
+
+    deposit = rows[LedgerAction.DEPOSIT]
+    assert deposit.user_address == USER.lower()
+    assert deposit.token == f"0x{USDC}"
+    assert deposit.amount == 1_000
+    assert deposit.shares == 800
+    assert deposit.usd_value == 1_000
+
+    withdrawal = rows[LedgerAction.INITIATE_WITHDRAWAL]
+    assert withdrawal.shares == 400
+    assert withdrawal.amount == 500
+    assert withdrawal.pps_at_block == 1.25
+
+    total = DepositService(session).get_total_deposits(vault, 0, 2_000_000_000)
+    assert total == 1_000
+
+
+def test_deposit_report_sums_the_token_amounts(vault_transactions):
+    session, vault, transactions = vault_transactions
+    service = TransactionLedgerService(session)
+
+    # A vault valued at 2 USD per token, the report stays in token units
+    with patch.object(service, "get_pps", return_value=1.0), patch.object(
+        service, "get_usd_price", return_value=2.0
+    ):
+        service.enrich(transactions)
+
+    [result] = _process_deposit_with_addresses(
+        session, [USER], datetime.fromtimestamp(0, tz=timezone.utc), None
+    )
+    assert result["deposited"] is True
+    assert result["total amount"] == 1_000
+    assert [entry["amount"] for entry in result["datetime"]] == [1_000]
@@ -0,0 +1,225 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlmodel import Session, delete
+from web3 import Web3
+
+from api.api_v1.endpoints.portfolio import (
+    get_portfolio_info,
+    get_total_points,
+    get_user_rewards,
+)
+from core import constants
+from core.db import engine
+from models.reward_distribution_config import RewardDistributionConfig
+from models.user_points import UserPoints
+from models.user_portfolio import PositionStatus, UserPortfolio
+from models.user_position_view import UserPositionView
+from models.user_rewards import UserRewards
+from models.vault_state_snapshot import VaultStateSnapshot
+from models.vaults import Vault
+from services.user_position_view_service import UserPositionViewService
+
+WALLET = "0x" + "ab" * 20
+OTHER_WALLET = "0x" + "cd" * 20
+
+
+@pytest.fixture
+def session():
+    session = Session(engine)
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def vault(session):
+    vault = Vault(
+        id=uuid.uuid4(),
+        name="position view test vault",
+        slug=f"position-view-{uuid.uuid4()}",
+        contract_address="0x" + uuid.uuid4().hex + "0" * 8,
+        vault_currency="USDC",
+        strategy_name=constants.DELTA_NEUTRAL_STRATEGY,
+        network_chain="arbitrum_one",
+        monthly_apy=12.5,
+        is_active=True,
+    )
+    session.add(vault)
+    session.commit()
+    yield vault
+    session.rollback()
+    for model in [
+        UserPositionView,
+        UserPortfolio,
+        UserPoints,
+        UserRewards,
+        VaultStateSnapshot,
+        RewardDistributionConfig,
+    ]:
+        session.exec(delete(model).where(model.vault_id == vault.id))
+    session.delete(vault)
+    session.commit()
+
+
+def seed(session, vault):
+    now = datetime.now(timezone.utc)
+    session.add_all(
+        [
+            UserPortfolio(
+                vault_id=vault.id,
+                user_address=WALLET,
+                total_balance=100,
+                init_deposit=100,
+                entry_price=1.0,
+                total_shares=80,
+                pending_withdrawal=20,
+                status=PositionStatus.ACTIVE,
+                trade_start_date=now - timedelta(days=30),
+            ),
+            UserPortfolio(
+                vault_id=vault.id,
+                user_address=OTHER_WALLET,
+                total_balance=0,
+                init_deposit=50,
+                entry_price=1.0,
+                total_shares=0,
+                status=PositionStatus.CLOSED,
+                trade_start_date=now - timedelta(days=60),
+            ),
+            UserPoints(
+                vault_id=vault.id,
+                wallet_address=WALLET,
+                points=10,
+                partner_name=constants.HARMONIX,
+            ),
+            UserPoints(
+                vault_id=vault.id,
+                wallet_address=WALLET,
+                points=5,
+                partner_name=constants.HARMONIX_MKT,
+            ),
+            UserRewards(
+                vault_id=vault.id,
+                wallet_address=WALLET,
+                total_reward=3,
+                partner_name=constants.HARMONIX,
+                created_at=now,
+            ),
+            RewardDistributionConfig(vault_id=vault.id, reward_token="$ARB"),
+            VaultStateSnapshot(
+                vault_id=vault.id,
+                network_chain="arbitrum_one",
+                block_number=1,
+                datetime=now,
+                price_per_share=1.5,
+                tvl=1000,
+            ),
+        ]
+    )
+    session.commit()
+
+
+def test_refresh_builds_the_rows_the_portfolio_endpoints_read(session, vault):
+    seed(session, vault)
+
+    assert UserPositionViewService(session).refresh(vault_ids=[vault.id]) == 2
+
+    portfolio = get_portfolio_info(session, WALLET.upper(), vault_id=None)
+    [position] = portfolio.positions
+    # (80 shares + 20 pending withdrawal) * 1.5, the pending withdrawal is
+    # added back to the deposit at the entry price
+    assert position.total_balance == pytest.approx(150)
+    assert position.init_deposit == pytest.approx(120)
+    assert position.pnl == pytest.approx(30)
+    assert position.monthly_apy == 12.5
+    assert {p.name: p.point for p in position.points} == {
+        constants.HARMONIX: 10,
+        constants.HARMONIX_MKT: 5,
+    }
+    assert [(r.name, r.unclaim) for r in position.rewards] == [("$ARB", 3)]
+    assert portfolio.total_balance == pytest.approx(150)
+
+    points = get_total_points(session, WALLET)
+    assert [(p.name, p.point) for p in points.points] == [(constants.HARMONIX, 15)]
+    [reward] = get_user_rewards(session, WALLET, str(vault.id))
+    assert (reward.name, reward.unclaim) == ("$ARB", 3)
+
+    # Closed positions stay in the view but are not in the portfolio
+    assert get_portfolio_info(session, OTHER_WALLET, vault_id=None).positions == []
+    assert get_user_rewards(session, OTHER_WALLET, str(vault.id))[0].unclaim == 0
+
+
+def test_refresh_of_a_wallet_only_rewrites_its_rows(session, vault):
+    seed(session, vault)
+    service = UserPositionViewService(session)
+    service.refresh(vault_ids=[vault.id])
+
+    session.add(
+        UserPoints(
+            vault_id=vault.id,
+            wallet_address=WALLET,
+            points=7,
+            partner_name="bsx",
+        )
+    )
+    session.add(
+        UserPoints(
+            vault_id=vault.id,
+            wallet_address=OTHER_WALLET,
+            points=7,
+            partner_name="bsx",
+        )
+    )
+    session.commit()
+
+    assert service.refresh([WALLET], [vault.id]) == 1
+    rows = {
+        row.wallet_address: row.points
+        for row in session.exec(
+            UserPositionView.__table__.select().where(
+                UserPositionView.vault_id == vault.id
+            )
+        )
+    }
+    assert rows[WALLET]["bsx"] == 7
+    assert "bsx" not in rows[OTHER_WALLET]
+
+
+def test_withdrawal_vaults_are_priced_with_get_user_withdrawal(
+    session, vault, monkeypatch
+):
+    vault.slug = constants.KELPDAO_VAULT_ARBITRUM_SLUG
+    session.add(vault)
+    session.commit()
+    seed(session, vault)
+
+    calls = []
+
+    def multicall(w3, functions):
+        calls.extend(functions)
+        # (shares, pps, profit, performanceFee, withdrawAmount)
+        return [(20_000_000, 1_400_000, 2_000_000, 200_000, 30_000_000)]
+
+    monkeypatch.setattr("services.user_position_view_service.multicall", multicall)
+    UserPositionViewService(session).refresh(vault_ids=[vault.id])
+
+    # Only the active position is read
+    assert [(call.fn_name, call.args) for call in calls] == [
+        ("getUserWithdrawal", (Web3.to_checksum_address(WALLET),))
+    ]
+    [position] = get_portfolio_info(session, WALLET, vault_id=None).positions
+    # 80 shares * 1.5 + 30 withdraw amount - 0.2 performance fee
+    assert position.total_balance == pytest.approx(149.8)
+    assert position.pnl == pytest.approx(29.8)
+
+    def failing_multicall(w3, functions):
+        raise ConnectionError("rpc unavailable")
+
+    # The amounts of the previous refresh are kept when the vault can't be read
+    monkeypatch.setattr(
+        "services.user_position_view_service.multicall", failing_multicall
+    )
+    UserPositionViewService(session).refresh(vault_ids=[vault.id])
+    [position] = get_portfolio_info(session, WALLET, vault_id=None).positions
+    assert position.total_balance == pytest.approx(149.8)
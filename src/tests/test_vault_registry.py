@@ -0,0 +1,74 @@
+import uuid
+from unittest.mock import patch
+
+import pytest
+from sqlmodel import Session
+
+from core.db import engine
+from models.vaults import Vault
+from services.vault_contract_service import VaultContractService
+from services.vault_registry import VaultRegistry, vault_registry
+
+
+def random_address() -> str:
+    return f"0x{uuid.uuid4().hex}{uuid.uuid4().hex[:8]}"
+
+
+@pytest.fixture
+def vault():
+    session = Session(engine)
+    vault = Vault(
+        id=uuid.uuid4(),
+        name="registry test vault",
+        slug=f"registry-test-{uuid.uuid4().hex[:8]}",
+        contract_address=random_address(),
+        category="real_yield",
+        network_chain="arbitrum_one",
+    )
+    session.add(vault)
+    session.commit()
+    session.refresh(vault)
+    yield session, vault
+    session.delete(vault)
+    session.commit()
+    session.close()
+
+
+def test_lookup_by_address_alias_slug_and_id(vault):
+    _, vault = vault
+    old_address = random_address()
+    registry = VaultRegistry(ttl_seconds=3600)
+
+    with patch.dict(
+        "services.vault_registry.VAULT_ADDRESS_ALIASES",
+        {vault.contract_address.lower(): [old_address, vault.contract_address]},
+    ):
+        checksum_like = "0x" + vault.contract_address[2:].upper()
+        assert registry.get_by_address(checksum_like).id == vault.id
+        assert registry.get_by_address(old_address).id == vault.id
+        assert registry.get_by_slug(vault.slug).id == vault.id
+        assert registry.get_by_id(vault.id).contract_address == vault.contract_address
+        assert registry.get_addresses(vault) == [
+            vault.contract_address.lower(),
+            old_address,
+        ]
+    assert registry.get_by_address(random_address()) is None
+
+
+def test_commit_touching_a_vault_invalidates_the_registry(vault):
+    session, vault = vault
+    assert vault_registry.get_by_id(vault.id).name == "registry test vault"
+
+    vault.name = "renamed registry test vault"
+    session.add(vault)
+    session.commit()
+
+    assert vault_registry.get_by_id(vault.id).name == "renamed registry test vault"
+
+
+def test_address_family_lookup_ignores_case():
+    service = VaultContractService()
+    family = service.get_vault_address_by_contract(
+        "0xF30353335003E71b42a89314AAaeC437E7Bc8F0B"
+    )
+    assert "0x4a10c31b642866d3a3df2268cecd2c5b14600523" in family
@@ -0,0 +1,165 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from sqlmodel import Session, delete
+from web3 import Web3
+
+from core import constants
+from core.db import engine
+from models.vault_state_snapshot import VaultStateSnapshot
+from models.vaults import Vault
+from services.vault_state_snapshot_service import VaultStateSnapshotService
+
+BLOCK_NUMBER = 1234
+OWNER = "0x75bE1a23160B1b930D4231257A83e1ac317153c8"
+
+
+def build_vault(slug, strategy, category="real_yield"):
+    return Vault(
+        id=uuid.uuid4(),
+        name=f"snapshot test {slug}",
+        slug=slug,
+        contract_address=Web3.to_checksum_address(
+            f"0x{uuid.uuid4().hex}{uuid.uuid4().hex[:8]}"
+        ),
+        category=category,
+        strategy_name=strategy,
+        network_chain="arbitrum_one",
+        owner_wallet_address=OWNER,
+        is_active=True,
+    )
+
+
+@pytest.fixture
+def vaults():
+    session = Session(engine)
+    vaults = {
+        "delta": build_vault(f"delta-{uuid.uuid4()}", constants.DELTA_NEUTRAL_STRATEGY),
+        "solv": build_vault(constants.SOLV_VAULT_SLUG, constants.STAKING_STRATEGY),
+        "rethink": build_vault(
+            f"rethink-{uuid.uuid4()}", constants.DELTA_NEUTRAL_STRATEGY, "real_yield_v2"
+        ),
+        "pendle": build_vault(f"pendle-{uuid.uuid4()}", constants.PENDLE_HEDGING_STRATEGY),
+    }
+    # The solv slug is unique, only the other vaults are stored
+    stored = [vaults["delta"], vaults["rethink"], vaults["pendle"]]
+    session.add_all(stored)
+    session.commit()
+    yield vaults
+    session.exec(
+        delete(VaultStateSnapshot).where(
+            VaultStateSnapshot.vault_id.in_([vault.id for vault in stored])
+        )
+    )
+    for vault in stored:
+        session.delete(vault)
+    session.commit()
+    session.close()
+
+
+def chain_reader(vaults, calls):
+    by_address = {vault.contract_address: name for name, vault in vaults.items()}
+    views = {
+        "delta": {"pricePerShare": 1_050_000, "totalValueLocked": 2_000_000_000},
+        "solv": {
+            "pricePerShare": 101_000_000,
+            "totalValueLocked": 350_000_000,
+            "totalShares": 3 * 10**18,
+        },
+        "rethink": {"pricePerShare": 11 * 10**17, "totalValueLocked": 5 * 10**18},
+        "pendle": {"pricePerShare": 990_000, "totalValueLocked": 700_000_000},
+    }
+    states = {
+        "delta": (10, 20, 1_900_000_000, 4_000_000, 0),
+        "pendle": (OWNER, 990_000, 0, 0, 0, 707_000_000, 1_500_000, 0),
+    }
+
+    def fake_multicall(w3, functions, block_identifier):
+        calls.append(("multicall", block_identifier, len(functions)))
+        return [views[by_address[f.address]][f.fn_name] for f in functions]
+
+    def fake_batch_eth_call(w3, functions, block_identifier):
+        calls.append(("batch_eth_call", block_identifier, len(functions)))
+        assert all(from_address == OWNER for _, from_address in functions)
+        return [states[by_address[f.address]] for f, _ in functions]
+
+    return fake_multicall, fake_batch_eth_call
+
+
+def test_vaults_of_a_chain_are_read_at_one_block_in_two_batches(vaults):
+    session = Session(engine)
+    service = VaultStateSnapshotService(session)
+    w3 = SimpleNamespace(
+        eth=SimpleNamespace(block_number=BLOCK_NUMBER, contract=Web3().eth.contract)
+    )
+    service.get_web3 = lambda network_chain: w3
+    calls = []
+    fake_multicall, fake_batch_eth_call = chain_reader(vaults, calls)
+
+    with patch(
+        "services.vault_state_snapshot_service.multicall", fake_multicall
+    ), patch(
+        "services.vault_state_snapshot_service.batch_eth_call", fake_batch_eth_call
+    ):
+        snapshots = service.read_chain("arbitrum_one", list(vaults.values()))
+
+    assert calls == [
+        ("multicall", BLOCK_NUMBER, 9),
+        ("batch_eth_call", BLOCK_NUMBER, 2),
+    ]
+    by_vault = {
+        name: (s.price_per_share, s.tvl, s.total_shares, s.fee_pool_amount)
+        for name, s in zip(vaults, snapshots)
+    }
+    assert by_vault == {
+        "delta": (1.05, 2000, 1900, 4),
+        "solv": (1.01, 3.5, 3, None),
+        "rethink": (1.1, 5, None, None),
+        "pendle": (0.99, 700, 707, 1.5),
+    }
+    assert {s.block_number for s in snapshots} == {BLOCK_NUMBER}
+
+
+def test_fresh_snapshots_are_reused(vaults):
+    session = Session(engine)
+    service = VaultStateSnapshotService(session)
+    w3 = SimpleNamespace(
+        eth=SimpleNamespace(block_number=BLOCK_NUMBER, contract=Web3().eth.contract)
+    )
+    service.get_web3 = lambda network_chain: w3
+    calls = []
+    fake_multicall, fake_batch_eth_call = chain_reader(vaults, calls)
+    delta, pendle = vaults["delta"], vaults["pendle"]
+    session.add(
+        VaultStateSnapshot(
+            vault_id=pendle.id,
+            network_chain="arbitrum_one",
+            block_number=BLOCK_NUMBER - 1000,
+            datetime=datetime.now(timezone.utc) - timedelta(hours=2),
+            price_per_share=1,
+            tvl=1,
+        )
+    )
+    session.commit()
+
+    with patch(
+        "services.vault_state_snapshot_service.multicall", fake_multicall
+    ), patch(
+        "services.vault_state_snapshot_service.batch_eth_call", fake_batch_eth_call
+    ):
+        service.take([delta])
+        calls.clear()
+        snapshots = service.get_or_take([delta, pendle])
+
+    # Only the vault with a late snapshot is read again
+    assert calls == [
+        ("multicall", BLOCK_NUMBER, 2),
+        ("batch_eth_call", BLOCK_NUMBER, 1),
+    ]
+    assert snapshots[delta.id].tvl == 2000
+    assert snapshots[pendle.id].tvl == 700
+    assert service.latest([pendle.id])[pendle.id].block_number == BLOCK_NUMBER
+    assert service.latest([pendle.id], timedelta(minutes=0)) == {}
@@ -1,4 +1,10 @@
+import json
+from typing import Any, List, Optional, Tuple
+
 from web3 import AsyncWeb3, Web3
+from web3._utils.abi import get_abi_output_types
+from web3._utils.request import make_post_request
+from web3.contract.contract import ContractFunction
 from web3.eth import Contract
 
 from core import constants
@@ -61,3 +67,89 @@ def get_current_tvl(vault_contract: Contract, decimals=1e6):
     tvl = vault_contract.functions.totalValueLocked().call()
 
     return tvl / decimals
+
+
+def multicall(
+    w3: Web3,
+    calls: List[ContractFunction],
+    block_identifier="latest",
+    batch_size: int = 200,
+) -> List[Optional[Any]]:
+    """Run many view calls through Multicall3 at the same block.
+
+    Results keep the order of `calls`; a reverted call returns None. Calls that
+    depend on `msg.sender` can't be batched this way, Multicall3 is the sender.
+    """
+    multicall_contract = w3.eth.contract(
+        address=constants.MULTICALL3_ADDRESS, abi=read_abi("multicall3")
+    )
+    results: List[Optional[Any]] = []
+    for i in range(0, len(calls), batch_size):
+        batch = calls[i : i + batch_size]
+        responses = multicall_contract.functions.aggregate3(
+            [(call.address, True, call._encode_transaction_data()) for call in batch]
+        ).call(block_identifier=block_identifier)
+
+        for call, (success, return_data) in zip(batch, responses):
+            if not success or not return_data:
+                results.append(None)
+                continue
+            decoded = w3.codec.decode(get_abi_output_types(call.abi), return_data)
+            results.append(decoded[0] if len(decoded) == 1 else decoded)
+    return results
+
+
+def batch_eth_call(
+    w3: Web3,
+    calls: List[Tuple[ContractFunction, Optional[str]]],
+    block_identifier="latest",
+    batch_size: int = 100,
+) -> List[Optional[Any]]:
+    """Send many `eth_call`s in JSON-RPC batches, each with its own `from`.
+
+    Use this instead of `multicall` for calls that depend on `msg.sender`.
+    Results keep the order of `calls`; a failed call returns None.
+    """
+    block = (
+        hex(block_identifier) if isinstance(block_identifier, int) else block_identifier
+    )
+    provider = w3.provider
+    results: List[Optional[Any]] = []
+    for i in range(0, len(calls), batch_size):
+        batch = calls[i : i + batch_size]
+        payload = []
+        for request_id, (call, from_address) in enumerate(batch):
+            tx = {"to": call.address, "data": call._encode_transaction_data()}
+            if from_address:
+                tx["from"] = Web3.to_checksum_address(from_address)
+            payload.append(
+                {
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "method": "eth_call",
+                    "params": [tx, block],
+                }
+            )
+
+        raw_response = make_post_request(
+            provider.endpoint_uri,
+            json.dumps(payload).encode(),
+            **provider.get_request_kwargs(),
+        )
+        responses = json.loads(raw_response)
+        if isinstance(responses, dict):
+            # The node rejected the whole batch
+            raise ValueError(responses.get("error", responses))
+        by_id = {response.get("id"): response for response in responses}
+
+        for request_id, (call, _) in enumerate(batch):
+            response = by_id.get(request_id, {})
+            return_data = response.get("result")
+            if "error" in response or not return_data or return_data == "0x":
+                results.append(None)
+                continue
+            decoded = w3.codec.decode(
+                get_abi_output_types(call.abi), bytes.fromhex(return_data[2:])
+            )
+            results.append(decoded[0] if len(decoded) == 1 else decoded)
+    return results
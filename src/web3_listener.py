@@ -9,6 +9,7 @@ import uuid
 
 import click
 from hexbytes import HexBytes
+from prometheus_client import start_http_server
 import seqlog
 from sqlmodel import select
 from sqlmodel import Session
@@ -16,7 +17,7 @@ from web3 import Web3
 from web3._utils.filters import AsyncFilter
 from websockets import ConnectionClosedError, ConnectionClosedOK
 
-from core import constants
+from core import constants, instrumentation
 from core.config import settings
 from core.db import engine
 from log import setup_logging_to_console, setup_logging_to_file
@@ -29,7 +30,15 @@ from models import (
 )
 from models.vaults import NetworkChain, VaultCategory
 from services.kyberswap import KyberSwapService
+from services.log_decoder import (
+    EVENT_NAMES,
+    DecodedLog,
+    VaultEventFamily,
+    decode_event,
+    log_decoder,
+)
 from services.socket_manager import WebSocketManager
+from services.user_position_view_service import UserPositionViewService
 from services.vault_contract_service import VaultContractService
 from utils.calculate_price import calculate_avg_entry_price
 
@@ -52,80 +61,30 @@ def update_tvl(session: Session, vault: Vault, deposit_amount: float):
 
 
 def _extract_stablecoin_event(entry):
-    # Decode the data field
-    data = entry["data"].hex()
-    value = int(data[2:66], 16) / 1e6
-    shares = int("0x" + data[66:], 16) / 1e6
-
-    from_address = None
-    if len(entry["topics"]) >= 2:
-        from_address = f'0x{entry["topics"][1].hex()[26:]}'  # For deposit event
-    return value, shares, from_address
+    decoded = decode_event(VaultEventFamily.stablecoin, entry)
+    return decoded.value, decoded.shares, decoded.from_address
 
 
 def _extract_solv_event(entry):
-    # Decode the data field
-    data = entry["data"].hex()
-    value = int(data[2:66], 16) / 1e8
-    shares = int("0x" + data[66:], 16) / 1e18
-
-    from_address = None
-    if len(entry["topics"]) >= 2:
-        from_address = f'0x{entry["topics"][1].hex()[26:]}'  # For deposit event
-    return value, shares, from_address
+    decoded = decode_event(VaultEventFamily.solv, entry)
+    return decoded.value, decoded.shares, decoded.from_address
 
 
 def _extract_delta_neutral_event(entry):
-    # Parse the account parameter from the topics field
-    from_address = None
-    if len(entry["topics"]) >= 2:
-        from_address = f'0x{entry["topics"][1].hex()[26:]}'  # For deposit event
-
-    # token_in = None
-    # if len(entry["topics"]) >= 3:
-    #     token_in = f'0x{entry["topics"][2].hex()[26:]}'
-
-    # Parse the amount and shares parameters from the data field
-    data = entry["data"].hex()
-    amount = int(data[2:66], 16)
-
-    amount = amount / 1e18 if len(str(amount)) >= 18 else amount / 1e6
-
-    shares = int(data[66 : 66 + 64], 16) / 1e6
-    return amount, shares, from_address
+    decoded = decode_event(VaultEventFamily.delta_neutral, entry)
+    return decoded.value, decoded.shares, decoded.from_address
 
 
 def _extract_pendle_event(entry):
-    # Parse the account parameter from the topics field
-    from_address = None
-    if len(entry["topics"]) >= 2:
-        from_address = f'0x{entry["topics"][1].hex()[26:]}'  # For deposit event
-
-    # token_in = None
-    # if len(entry["topics"]) >= 3:
-    #     token_in = f'0x{entry["topics"][2].hex()[26:]}'
-
-    # Parse the amount and shares parameters from the data field
-    data = entry["data"].hex()
-    logger.info("Raw data: %s", data)
-
-    if entry["topics"][0].hex() == settings.PENDLE_COMPLETE_WITHDRAW_EVENT_TOPIC:
-        pt_amount = int(data[2:66], 16) / 1e18
-        sc_amount = int(data[66 : 66 + 64], 16) / 1e6
-        shares = int(data[66 + 64 : 66 + 2 * 64], 16) / 1e6
-        total_amount = int(data[66 + 2 * 64 : 66 + 3 * 64], 16) / 1e6
-        eth_amount = 0
-    else:
-        pt_amount = int(data[2:66], 16) / 1e18
-        eth_amount = int(data[66 : 66 + 64], 16) / 1e18
-        sc_amount = int(data[66 + 64 : 66 + 2 * 64], 16) / 1e6
-        total_amount = int(data[66 + 64 * 2 : 66 + 3 * 64], 16) / 1e6
-        shares = int(data[66 + 3 * 64 : 66 + 4 * 64], 16) / 1e6
-        logger.info(
-            f"pt_amount: {pt_amount}, eth_amount: {eth_amount}, sc_amount: {sc_amount}, total_amount: {total_amount}, shares: {shares}"
-        )
-
-    return pt_amount, eth_amount, sc_amount, total_amount, shares, from_address
+    decoded = decode_event(VaultEventFamily.pendle, entry)
+    return (
+        decoded.pt_amount,
+        decoded.eth_amount,
+        decoded.sc_amount,
+        decoded.value,
+        decoded.shares,
+        decoded.from_address,
+    )
 
 
 def handle_deposit_event(
@@ -197,6 +156,10 @@ def handle_initiate_withdraw_event(
         else:
             user_portfolio.pending_withdrawal += shares
 
+        # The shares leave balanceOf until the withdrawal completes
+        if user_portfolio.total_shares is not None:
+            user_portfolio.total_shares = max(user_portfolio.total_shares - shares, 0)
+
         user_portfolio.init_deposit -= (
             value
             if user_portfolio.init_deposit >= value
@@ -244,6 +207,7 @@ def handle_withdrawn_event(
             shares = shares / decimals
         price_per_share = price_per_share / decimals
         user_portfolio.total_balance = price_per_share * shares
+        user_portfolio.total_shares = shares
 
         # Update the pending_withdrawal, we don't allow user to withdraw more or less than pending_withdrawal
         user_portfolio.pending_withdrawal = 0
@@ -273,14 +237,18 @@ event_handlers = {
 }
 
 
-def handle_event(session: Session, vault_address: str, entry, event_name):
-    # Get the vault with ROCKONYX_ADDRESS
-    vault = session.exec(
-        select(Vault).where(Vault.contract_address == vault_address)
-    ).first()
-
-    if vault is None:
-        raise ValueError("Vault not found")
+def handle_event(
+    session: Session,
+    vault_address: str,
+    entry,
+    event_name,
+    decoded: Optional[DecodedLog] = None,
+):
+    if decoded is None:
+        decoded = log_decoder.decode(entry)
+    if decoded is None:
+        raise ValueError(f"No decoder for the event of vault {vault_address}")
+    vault = session.get(Vault, decoded.vault.id)
 
     transaction = session.exec(
         select(Transaction).where(Transaction.txhash == entry["transactionHash"])
@@ -307,27 +275,17 @@ def handle_event(session: Session, vault_address: str, entry, event_name):
     else:
         latest_pps = 1
 
-    # Extract the value, shares and from_address from the event
-    if vault.strategy_name == constants.OPTIONS_WHEEL_STRATEGY:
-        value, shares, from_address = _extract_stablecoin_event(entry)
-    elif vault.strategy_name == constants.DELTA_NEUTRAL_STRATEGY:
-        value, shares, from_address = _extract_delta_neutral_event(entry)
-    elif vault.slug == constants.SOLV_VAULT_SLUG:
-        value, shares, from_address = _extract_solv_event(entry)
+    value, shares, from_address = decoded.value, decoded.shares, decoded.from_address
+    if decoded.family == VaultEventFamily.solv:
         latest_pps = round(value / shares, 4)
-    elif vault.strategy_name == constants.PENDLE_HEDGING_STRATEGY:
-        _, eth_amount, sc_amount, value, shares, from_address = _extract_pendle_event(
-            entry
-        )
+    elif decoded.family == VaultEventFamily.pendle:
         logger.info(
             "Recieving data from pendle vault: %s, %s, %s from %s",
-            eth_amount,
-            sc_amount,
+            decoded.eth_amount,
+            decoded.sc_amount,
             shares,
             from_address,
         )
-    else:
-        raise ValueError("Invalid vault address")
 
     logger.info(f"Value: {value}, from_address: {from_address}")
 
@@ -352,52 +310,10 @@ def handle_event(session: Session, vault_address: str, entry, event_name):
     )
 
     session.commit()
+    UserPositionViewService(session).refresh([from_address], [vault.id])
 
 
-EVENT_FILTERS = {
-    settings.STABLECOIN_DEPOSIT_VAULT_FILTER_TOPICS: {
-        "event": "Deposit",
-    },
-    settings.STABLECOIN_INITIATE_WITHDRAW_VAULT_FILTER_TOPICS: {
-        "event": "InitiateWithdraw",
-    },
-    settings.STABLECOIN_COMPLETE_WITHDRAW_VAULT_FILTER_TOPICS: {
-        "event": "Withdrawn",
-    },
-    settings.DELTA_NEUTRAL_DEPOSIT_EVENT_TOPIC: {
-        "event": "Deposit",
-    },
-    settings.MULTIPLE_STABLECOINS_DEPOSIT_EVENT_TOPIC: {
-        "event": "Deposit",
-    },
-    settings.DELTA_NEUTRAL_INITIATE_WITHDRAW_EVENT_TOPIC: {
-        "event": "InitiateWithdraw",
-    },
-    settings.DELTA_NEUTRAL_COMPLETE_WITHDRAW_EVENT_TOPIC: {
-        "event": "Withdrawn",
-    },
-    settings.SOLV_DEPOSIT_EVENT_TOPIC: {
-        "event": "Deposit",
-    },
-    settings.SOLV_INITIATE_WITHDRAW_EVENT_TOPIC: {
-        "event": "InitiateWithdraw",
-    },
-    settings.SOLV_COMPLETE_WITHDRAW_EVENT_TOPIC: {
-        "event": "Withdrawn",
-    },
-    settings.PENDLE_DEPOSIT_EVENT_TOPIC: {
-        "event": "Deposit",
-    },
-    settings.PENDLE_FORCE_REQUEST_FUND_EVENT_TOPIC: {
-        "event": "InitiateWithdraw",
-    },
-    settings.PENDLE_REQUEST_FUND_EVENT_TOPIC: {
-        "event": "InitiateWithdraw",
-    },
-    settings.PENDLE_COMPLETE_WITHDRAW_EVENT_TOPIC: {
-        "event": "Withdrawn",
-    },
-}
+EVENT_FILTERS = {topic: {"event": name} for topic, name in EVENT_NAMES.items()}
 
 
 class Web3Listener(WebSocketManager):
@@ -411,6 +327,17 @@ class Web3Listener(WebSocketManager):
         for event in events:
             handle_event(vault_address, event, event_name)
 
+    async def _record_event(self, network: str, event_name: str, block_number: int):
+        instrumentation.LISTENER_EVENTS.labels(chain=network, event=event_name).inc()
+        try:
+            head = await asyncio.to_thread(lambda: self.w3_socket.eth.block_number)
+        except Exception as e:
+            logger.warning(f"Cannot read the chain head: {e}")
+            return
+        instrumentation.LISTENER_EVENT_LAG.labels(chain=network).set(
+            head - block_number
+        )
+
     async def listen_for_events(self, network: NetworkChain):
         while True:
             try:
@@ -449,6 +376,9 @@ class Web3Listener(WebSocketManager):
                             handle_event(
                                 session, res["address"], res, event_filter["event"]
                             )
+                            await self._record_event(
+                                network, event_filter["event"], res["blockNumber"]
+                            )
             except (ConnectionClosedError, ConnectionClosedOK) as e:
                 self.logger.error("Websocket connection close", exc_info=True)
                 self.logger.error(traceback.format_exc())
@@ -539,6 +469,9 @@ def main(network: str):
     setup_logging_to_file(
         app=f"web3_listener_{network}", level=logging.INFO, logger=logger
     )
+    instrumentation.install()
+    if settings.LISTENER_METRICS_PORT:
+        start_http_server(settings.LISTENER_METRICS_PORT)
     asyncio.run(run(network))
     # test()
 